@@ -1,15 +1,32 @@
 import os
-import shutil
 import threading
-import time
-import datetime
-import queue
+import multiprocessing
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox, font
 from tkinter.scrolledtext import ScrolledText
-import PyPDF2
-import unicodedata
-import re
+import pdf_backends
+import pdf_engine
+import pdf_report
+import pdf_scanner
+from pdf_file_list import VirtualFileList
+
+# Intervalo entre actualizaciones del progreso en pantalla (10 cuadros por segundo)
+PROGRESS_FRAME_MS = 100
+
+# Límites de tiempo por archivo y sin avanzar de página: el proceso que los
+# supera se termina y se reemplaza, y el archivo se informa aparte
+FILE_TIMEOUT_SECONDS = 300
+PAGE_TIMEOUT_SECONDS = 60
+
+
+def format_duration(seconds):
+    """Formatea una duración en segundos como H:MM:SS o M:SS."""
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
 
 class AnalizadorPDFs:
     
@@ -34,6 +51,9 @@ class AnalizadorPDFs:
         
         # Variables
         self.pdf_files = []
+        # Carpeta que se recorre durante el análisis (alternativa a seleccionar archivos)
+        self.input_folder = None
+        self.scanning = False
         
         # Obtener ruta del escritorio
         self.escritorio = os.path.join(os.path.expanduser("~"), "Desktop")
@@ -41,6 +61,9 @@ class AnalizadorPDFs:
         # Carpeta de destino fija en el escritorio
         self.output_folder = os.path.join(self.escritorio, "PDFs Encontrados")
         
+        # Caché del texto extraído, para que volver a analizar la misma carpeta sea rápido
+        self.cache_folder = os.path.join(os.path.expanduser("~"), ".analizador_pdfs", "cache")
+        
         # Lista de criterios de búsqueda (cada elemento es una lista de palabras)
         # Ejemplo: [["factura", "pagada"], ["contrato", "firmado"], ["reporte"]]
         self.conditions = [
@@ -57,13 +80,16 @@ class AnalizadorPDFs:
             "errors": 0
         }
         
-        # Cola de procesamiento
-        self.process_queue = queue.Queue()
+        # Estado del procesamiento (el motor se detiene activando stop_event)
+        self.stop_event = threading.Event()
         self.is_processing = False
-        self.stats_lock = threading.Lock()
+        # Canal de progreso: el hilo de análisis suma contadores y la interfaz
+        # los lee cada PROGRESS_FRAME_MS, sin importar cuántos archivos terminen
+        self.progress_tracker = pdf_engine.ProgressTracker()
         
         # Para debugging
         self.debug_enabled = True
+        pdf_engine.debug_enabled = self.debug_enabled
         
         # Configurar estilos
         self.configure_styles()
@@ -76,16 +102,6 @@ class AnalizadorPDFs:
         if self.debug_enabled:
             print(f"[DEBUG] {message}")
     
-    def normalizar_texto(self, texto):
-        """Función para normalizar texto (eliminar acentos, espacios extras, etc.)"""
-        # Convertir a minúsculas
-        texto = texto.lower()
-        # Eliminar acentos
-        texto = ''.join(c for c in unicodedata.normalize('NFD', texto) if unicodedata.category(c) != 'Mn')
-        # Eliminar espacios extras
-        texto = re.sub(r'\s+', ' ', texto).strip()
-        return texto
-    
     def configure_styles(self):
         # Colores del tema
         self.color_primary = "#2c3e50"        # Azul oscuro principal
@@ -378,7 +394,7 @@ class AnalizadorPDFs:
                 return
             
             # Dividir por comas y limpiar espacios
-            words = [word.strip().lower() for word in text.split(',') if word.strip()]
+            words = pdf_engine.parse_criterion(text)
             
             if not words:
                 messagebox.showwarning("Advertencia", "Por favor ingrese palabras válidas.")
@@ -423,7 +439,7 @@ class AnalizadorPDFs:
         try:
             self.criteria_listbox.delete(0, tk.END)
             for i, criteria in enumerate(self.conditions):
-                display_text = f"{i+1}. {', '.join(criteria)}"
+                display_text = f"{i+1}. {pdf_engine.format_criterion(criteria)}"
                 self.criteria_listbox.insert(tk.END, display_text)
         except Exception as e:
             self.debug_print(f"Error al actualizar lista de criterios: {str(e)}")
@@ -474,7 +490,20 @@ class AnalizadorPDFs:
             padx=20,
             pady=8
         )
-        self.select_pdf_btn.pack(side=tk.LEFT, padx=(0, 15))
+        self.select_pdf_btn.pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.select_folder_btn = tk.Button(
+            select_frame, 
+            text="Seleccionar carpeta", 
+            command=self.select_pdf_folder,
+            bg=self.color_button,
+            fg=self.color_button_text,
+            font=self.button_font,
+            relief=tk.FLAT,
+            padx=20,
+            pady=8
+        )
+        self.select_folder_btn.pack(side=tk.LEFT, padx=(0, 15))
         
         self.file_count_label = tk.Label(
             select_frame,
@@ -498,15 +527,9 @@ class AnalizadorPDFs:
         )
         list_label.pack(anchor=tk.W, pady=(0, 5))
         
-        # Scrolled text (lista de archivos)
-        self.pdf_list = ScrolledText(
-            list_frame, 
-            height=5, 
-            width=70,
-            font=self.small_font,
-            wrap=tk.WORD
-        )
-        self.pdf_list.pack(fill=tk.BOTH, expand=True)
+        # Lista virtual de archivos con su estado (solo dibuja las filas visibles)
+        self.file_list = VirtualFileList(list_frame, rows=8, font=self.small_font)
+        self.file_list.pack(fill=tk.BOTH, expand=True)
 
     def create_progress_section(self, parent):
         # Frame para el botón de análisis
@@ -614,6 +637,15 @@ class AnalizadorPDFs:
             style="blue.Horizontal.TProgressbar"
         )
         self.progress.pack(fill=tk.X)
+        
+        self.rate_label = tk.Label(
+            inner_progress,
+            text="Velocidad: -",
+            font=self.small_font,
+            bg=self.color_bg,
+            fg=self.color_text
+        )
+        self.rate_label.pack(anchor=tk.W, pady=(5, 0))
 
     def create_buttons_section(self, parent):
         # Barra inferior con botones
@@ -722,6 +754,7 @@ class AnalizadorPDFs:
         )
         
         if files:
+            self.input_folder = None
             self.pdf_files = list(files)
             self.file_count_label.config(text=f"{len(self.pdf_files)} archivos seleccionados")
             
@@ -733,21 +766,51 @@ class AnalizadorPDFs:
             self.update_stats_display()
             
             # Mostrar lista de archivos
-            self.pdf_list.delete(1.0, tk.END)
-            for i, file in enumerate(self.pdf_files):
-                self.pdf_list.insert(tk.END, f"{i+1}. {os.path.basename(file)}\n")
+            self.file_list.set_paths(self.pdf_files)
             
             self.debug_print(f"Seleccionados {len(self.pdf_files)} archivos")
     
+    def select_pdf_folder(self):
+        """Selecciona una carpeta cuyos PDFs se buscan (recursivamente) durante el análisis."""
+        folder = filedialog.askdirectory(title="Seleccionar carpeta con PDFs")
+        
+        if folder:
+            self.input_folder = folder
+            self.pdf_files = []
+            self.file_count_label.config(text=f"Carpeta: {folder} (los PDFs se buscan al analizar)")
+            
+            # El total se conoce a medida que se recorre la carpeta
+            self.stats["total"] = 0
+            self.stats["processed"] = 0
+            self.stats["matches"] = 0
+            self.stats["errors"] = 0
+            self.update_stats_display()
+            
+            self.file_list.clear()
+            
+            self.debug_print(f"Carpeta seleccionada: {folder}")
+    
+    def iter_folder_files(self, folder):
+        """Recorre la carpeta de entrada y cuenta los PDFs a medida que aparecen.
+
+        La carpeta de salida (con su subcarpeta "Sin texto") no se recorre,
+        así los PDFs ya movidos no se vuelven a analizar.
+        """
+        self.scanning = True
+        try:
+            for path in pdf_scanner.scan_pdfs([folder], ignore=[self.output_folder]):
+                self.progress_tracker.add_total()
+                self.file_list.append(path)
+                yield path
+        finally:
+            self.scanning = False
+
     def update_stats_display(self):
         # Actualizar las etiquetas con los valores actuales
         self.total_label.config(text=f"Total PDFs: {self.stats['total']}")
         self.processed_label.config(text=f"Procesados: {self.stats['processed']}")
         self.matches_label.config(text=f"Encontrados: {self.stats['matches']}")
         self.errors_label.config(text=f"Errores: {self.stats['errors']}")
-        
-        # Forzar actualización de la interfaz
-        self.root.update_idletasks()
     
     def clear_all(self):
         """Limpia todos los datos y restablece la interfaz."""
@@ -766,8 +829,9 @@ class AnalizadorPDFs:
             
             # Limpiar listas y resultados
             self.pdf_files = []
+            self.input_folder = None
             self.file_count_label.config(text="0 archivos seleccionados")
-            self.pdf_list.delete(1.0, tk.END)
+            self.file_list.clear()
             
             # Restablecer estadísticas
             self.stats["total"] = 0
@@ -780,20 +844,13 @@ class AnalizadorPDFs:
             self.progress_var.set(0)
             self.progress_label.config(text="Progreso: 0%")
             
-            # Vaciar la cola de procesamiento
-            while not self.process_queue.empty():
-                try:
-                    self.process_queue.get_nowait()
-                    self.process_queue.task_done()
-                except queue.Empty:
-                    break
-            
-            # Reiniciar la queue
-            self.process_queue = queue.Queue()
+            # Detener el motor de análisis
+            self.stop_event.set()
             
             # Restablecer botones
             self.analyze_btn.config(state=tk.NORMAL)
             self.select_pdf_btn.config(state=tk.NORMAL)
+            self.select_folder_btn.config(state=tk.NORMAL)
             
             # Actualizar la interfaz
             self.root.update_idletasks()
@@ -803,48 +860,19 @@ class AnalizadorPDFs:
             self.debug_print(f"Error al limpiar: {str(e)}")
 
     def init_log_file(self):
-        """Inicializa el archivo de registro con encabezados."""
+        """Crea el archivo de registro; las coincidencias se escriben en lotes desde un hilo propio."""
         try:
-            # Asegurar que el directorio existe
-            os.makedirs(os.path.dirname(self.log_filename), exist_ok=True)
-            
-            with open(self.log_filename, 'w', encoding='utf-8') as f:
-                f.write("# INFORME DE ANÁLISIS DE PDFs\n")
-                f.write(f"# Fecha y hora: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"# Total de archivos analizados: {len(self.pdf_files)}\n")
-                f.write(f"# Criterios de búsqueda:\n")
-                for i, condition in enumerate(self.conditions):
-                    f.write(f"#   Criterio {i+1}: {', '.join(condition)}\n")
-                f.write("\n# RESULTADOS\n")
-                f.write("# --------------------------------------------------------------\n")
-                f.write("# ARCHIVO | CRITERIO ENCONTRADO | UBICACIÓN\n")
-                f.write("# --------------------------------------------------------------\n\n")
-            
+            total = None if self.input_folder else len(self.pdf_files)
+            self.report_writer = pdf_report.ReportWriter(self.log_filename, self.conditions, total)
             self.debug_print(f"Archivo de registro creado: {self.log_filename}")
         except Exception as e:
             self.debug_print(f"Error al crear archivo de registro: {str(e)}")
             raise
     
-    def log_match(self, filename, condition, dest_path):
-        """Registra una coincidencia en el archivo de registro."""
-        try:
-            with open(self.log_filename, 'a', encoding='utf-8') as f:
-                f.write(f"{filename} | {', '.join(condition)} | {dest_path}\n")
-        except Exception as e:
-            self.debug_print(f"Error al registrar coincidencia: {str(e)}")
-    
     def log_summary(self):
-        """Añade un resumen al final del archivo de registro."""
+        """Añade un resumen al final del archivo de registro y lo cierra."""
         try:
-            with open(self.log_filename, 'a', encoding='utf-8') as f:
-                f.write("\n# --------------------------------------------------------------\n")
-                f.write("# RESUMEN\n")
-                f.write("# --------------------------------------------------------------\n")
-                f.write(f"# Total de archivos procesados: {self.stats['processed']}\n")
-                f.write(f"# Total de archivos encontrados: {self.stats['matches']}\n")
-                f.write(f"# Total de errores: {self.stats['errors']}\n")
-                f.write(f"# Porcentaje de éxito: {(self.stats['matches'] / max(1, self.stats['total'])) * 100:.2f}%\n")
-                f.write(f"# Finalizado: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+            self.report_writer.close(self.stats, self.progress_tracker.timings)
         except Exception as e:
             self.debug_print(f"Error al crear resumen del log: {str(e)}")
 
@@ -859,7 +887,7 @@ class AnalizadorPDFs:
                 return
             
             # Verificar que hay PDFs seleccionados
-            if not self.pdf_files:
+            if not self.pdf_files and not self.input_folder:
                 messagebox.showwarning("Advertencia", "No hay archivos PDF seleccionados.")
                 return
             
@@ -881,93 +909,108 @@ class AnalizadorPDFs:
             # Reiniciar el sistema de procesamiento
             self.reset_processing_system()
             
-            # Restablecer estadísticas pero mantener el total
-            with self.stats_lock:
-                self.stats["processed"] = 0
-                self.stats["matches"] = 0
-                self.stats["errors"] = 0
+            # Restablecer estadísticas pero mantener el total (con una carpeta se cuenta al recorrerla)
+            total = 0 if self.input_folder else len(self.pdf_files)
+            self.progress_tracker = pdf_engine.ProgressTracker(total)
+            self.stats.update(self.progress_tracker.stats)
             self.update_stats_display()
             
             # Configurar la interfaz para el procesamiento
             self.analyze_btn.config(state=tk.DISABLED)
             self.select_pdf_btn.config(state=tk.DISABLED)
+            self.select_folder_btn.config(state=tk.DISABLED)
             self.clear_btn.config(state=tk.DISABLED)
             
-            # Añadir todos los archivos a la cola
-            for pdf_path in self.pdf_files:
-                self.process_queue.put(pdf_path)
-                self.debug_print(f"Añadido a la cola: {os.path.basename(pdf_path)}")
-            
             # Iniciar el procesamiento
+            self.stop_event = threading.Event()
             self.is_processing = True
             
             # Resetear la barra de progreso
             self.progress_var.set(0)
             self.progress_label.config(text="Progreso: 0%")
+            self.rate_label.config(text="Velocidad: -")
             
             # Crear archivo de registro
-            timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-            self.log_filename = os.path.join(
-                self.output_folder, 
-                f"reporte_analisis_{timestamp}.txt"
-            )
+            self.log_filename = pdf_report.new_log_filename(self.output_folder)
             self.debug_print(f"Nombre del archivo de registro: {self.log_filename}")
             
             # Inicializar archivo de registro
             self.init_log_file()
             
-            # Iniciar procesamiento en hilos
-            num_threads = min(4, len(self.pdf_files))  # Limitar a 4 hilos como máximo
-            self.processing_threads = []
-            
-            for i in range(num_threads):
-                thread = threading.Thread(target=self.process_pdfs_thread, args=(i,))
-                thread.daemon = True
-                self.processing_threads.append(thread)
-                thread.start()
-                self.debug_print(f"Hilo de procesamiento {i} iniciado")
-            
-            # Iniciar hilo de monitoreo
-            self.monitor_thread = threading.Thread(target=self.monitor_progress)
-            self.monitor_thread.daemon = True
-            self.monitor_thread.start()
-            self.debug_print("Hilo de monitoreo iniciado")
+            # Iniciar el motor de análisis en un hilo separado; con una carpeta,
+            # los PDFs se analizan a medida que el recorrido los encuentra
+            if self.input_folder:
+                self.scanning = True
+                self.file_list.clear()
+                pdf_files = self.iter_folder_files(self.input_folder)
+                workers = pdf_engine.default_workers()
+                max_workers = None
+            else:
+                self.file_list.reset_statuses()
+                pdf_files = list(self.pdf_files)
+                workers = min(pdf_engine.default_workers(), len(self.pdf_files))
+                max_workers = min(pdf_engine.default_max_workers(), len(self.pdf_files))
+            # La cantidad de workers se ajusta sola según el ritmo y la carga del
+            # equipo, y el extractor de texto se elige con los primeros archivos
+            options = pdf_engine.AnalysisOptions(
+                output_folder=self.output_folder,
+                workers=workers,
+                adaptive=True,
+                max_workers=max_workers,
+                backend=pdf_backends.AUTO_BACKEND,
+                cache_folder=self.cache_folder,
+                file_timeout=FILE_TIMEOUT_SECONDS,
+                page_timeout=PAGE_TIMEOUT_SECONDS
+            )
+            done_event = threading.Event()
+            self.analysis_thread = threading.Thread(
+                target=self.run_analysis,
+                args=(pdf_files, options, self.stop_event, done_event, self.report_writer)
+            )
+            self.analysis_thread.daemon = True
+            self.analysis_thread.start()
+            self.debug_print("Hilo de análisis iniciado")
             
-            # Actualizar la interfaz
-            self.root.update_idletasks()
+            # Mostrar el progreso a ritmo fijo
+            self.root.after(PROGRESS_FRAME_MS, self.drain_progress,
+                            self.progress_tracker, self.stop_event, done_event)
             
         except Exception as e:
             self.debug_print(f"Error al iniciar análisis: {str(e)}")
             messagebox.showerror("Error", f"Error al iniciar el análisis: {str(e)}")
             self.is_processing = False
 
-    def monitor_progress(self):
-        """Monitorea el progreso del procesamiento y actualiza la UI."""
+    def drain_progress(self, tracker, stop_event, done_event):
+        """Muestra el progreso acumulado desde el cuadro anterior (en el hilo principal)."""
         try:
-            self.debug_print("Monitor de progreso iniciado")
-            while self.is_processing:
-                try:
-                    # Verificar si todos los archivos han sido procesados
-                    if self.stats["processed"] >= self.stats["total"]:
-                        # Todos los archivos han sido procesados
-                        self.debug_print("Todos los archivos procesados, finalizando")
-                        self.root.after(0, self.finalize_processing)
-                        break
-                        
-                    # Calcular progreso
-                    progress = (self.stats["processed"] / max(1, self.stats["total"])) * 100
-                    
-                    # Actualizar UI (en el hilo principal)
-                    self.root.after(0, lambda p=progress: self.update_progress(p))
-                    
-                    # Esperar un poco antes de verificar de nuevo
-                    time.sleep(0.2)
-                except Exception as e:
-                    self.debug_print(f"Error en ciclo de monitoreo: {str(e)}")
+            # El análisis fue cancelado o reemplazado por otro
+            if stop_event.is_set() or not self.is_processing:
+                return
             
-            self.debug_print("Monitor de progreso finalizado")
+            # Leer antes de mirar done_event: así el último cuadro incluye todos los resultados
+            finished = done_event.is_set()
+            snapshot = tracker.snapshot()
+            self.stats.update(snapshot.stats)
+            self.update_stats_display()
+            self.update_progress(snapshot.percent)
+            self.rate_label.config(text=self.format_rate(snapshot))
+            # Los hilos de análisis solo marcan la lista; se dibuja acá
+            self.file_list.refresh()
+            
+            if finished:
+                self.finalize_processing()
+                return
         except Exception as e:
-            self.debug_print(f"Error fatal en hilo de monitoreo: {str(e)}")
+            self.debug_print(f"Error al mostrar el progreso: {str(e)}")
+        
+        self.root.after(PROGRESS_FRAME_MS, self.drain_progress, tracker, stop_event, done_event)
+
+    def format_rate(self, snapshot):
+        """Texto de velocidad y tiempo restante para la etiqueta de progreso."""
+        text = f"Velocidad: {snapshot.rate:.1f} PDFs/s  |  Transcurrido: {format_duration(snapshot.elapsed)}"
+        if snapshot.eta is not None and not self.scanning:
+            text += f"  |  Tiempo restante: {format_duration(snapshot.eta)}"
+        return text
 
     def reset_processing_system(self):
         """Reinicia el sistema de procesamiento para dejarlo listo para un nuevo análisis."""
@@ -975,16 +1018,8 @@ class AnalizadorPDFs:
             # Detener cualquier procesamiento en curso
             self.is_processing = False
             
-            # Vaciar la cola de procesamiento
-            while not self.process_queue.empty():
-                try:
-                    self.process_queue.get_nowait()
-                    self.process_queue.task_done()
-                except queue.Empty:
-                    break
-            
-            # Reiniciar la queue
-            self.process_queue = queue.Queue()
+            # Detener el motor de análisis de una ejecución anterior
+            self.stop_event.set()
             
             # Restablecer la barra de progreso
             self.progress_var.set(0)
@@ -997,144 +1032,47 @@ class AnalizadorPDFs:
         except Exception as e:
             self.debug_print(f"Error al reiniciar el sistema: {str(e)}")
         
-    def check_pdf_conditions(self, pdf_text):
-        """Verifica si un PDF cumple alguna de las condiciones."""
+    def run_analysis(self, pdf_files, options, stop_event, done_event, report_writer):
+        """Consume los resultados del motor de análisis en un hilo separado."""
         try:
-            # Si el texto está vacío, no cumple ninguna condición
-            if not pdf_text:
-                return False, None
-            
-            # Normalizar el texto para buscar coincidencias de manera más robusta
-            pdf_text_norm = self.normalizar_texto(pdf_text)
-            
-            # Verificar cada conjunto de condiciones
-            for condition in self.conditions:
-                # Verificar si todos los términos de esta condición están presentes
-                all_terms_found = True
-                for term in condition:
-                    term_norm = self.normalizar_texto(term)
-                    if term_norm not in pdf_text_norm:
-                        all_terms_found = False
-                        break
+            results = pdf_engine.analyze(pdf_files, self.conditions, options, stop_event=stop_event)
+            if results.calibration is not None:
+                report_writer.calibration = results.calibration.summary()
+                self.debug_print(f"Extractor de texto: {report_writer.calibration}")
+            for result in results:
+                # El análisis fue cancelado (por ejemplo, con "Limpiar Todo")
+                if stop_event.is_set():
+                    break
                 
-                if all_terms_found:
-                    return True, condition
-            
-            return False, None
+                # Registrar en log
+                report_writer.add(result)
+                
+                # La interfaz lee estos datos en el próximo cuadro de progreso
+                detail = result.error or (', '.join(result.condition) if result.matched else "")
+                self.file_list.set_status(result.path, result.status, detail)
+                self.progress_tracker.update(result)
+
+            self.debug_print("Hilo de análisis finalizado")
         except Exception as e:
-            self.debug_print(f"Error al verificar condiciones: {str(e)}")
-            # En caso de error, asumir que no cumple condiciones
-            return False, None
-        
-    def process_pdfs_thread(self, thread_id):
-        """Función para procesar PDFs en un hilo separado."""
-        try:
-            self.debug_print(f"Hilo {thread_id} iniciado")
-            while self.is_processing:
+            self.debug_print(f"Error fatal en hilo de análisis: {str(e)}")
+        finally:
+            # Un análisis cancelado no tiene resumen; uno completo lo cierra finalize_processing
+            if stop_event.is_set():
                 try:
-                    # Intentar obtener un archivo de la cola
-                    try:
-                        pdf_path = self.process_queue.get(block=False)
-                        self.debug_print(f"Hilo {thread_id} procesando: {os.path.basename(pdf_path)}")
-                    except queue.Empty:
-                        # No hay más archivos, terminar este hilo
-                        self.debug_print(f"Hilo {thread_id} sin más archivos para procesar")
-                        break
-                    
-                    # Procesar el archivo
-                    try:
-                        filename = os.path.basename(pdf_path)
-                        
-                        # Extraer el texto del PDF
-                        pdf_text = self.extract_pdf_text(pdf_path)
-                        
-                        # Verificar si el PDF cumple alguna de las condiciones
-                        match_found, condition_matched = self.check_pdf_conditions(pdf_text)
-                        
-                        if match_found:
-                            # El PDF cumple criterios, moverlo a la carpeta de destino
-                            self.debug_print(f"Archivo cumple criterios: {filename}")
-                            
-                            # Incrementar contador de coincidencias
-                            with self.stats_lock:
-                                self.stats["matches"] += 1
-                            
-                            dest_path = os.path.join(self.output_folder, filename)
-                            
-                            # Mover el archivo
-                            shutil.move(pdf_path, dest_path)
-                            self.debug_print(f"Archivo movido a: {dest_path}")
-                            
-                            # Registrar en log
-                            self.log_match(filename, condition_matched, dest_path)
-                            
-                            # Actualizar UI
-                            self.root.after(0, lambda f=filename, c=condition_matched: 
-                                        self.update_ui_match(f, c))
-                        
-                        else:
-                            # El PDF no cumple criterios, no se mueve
-                            self.debug_print(f"Archivo no cumple criterios: {filename}")
-                            self.root.after(0, lambda f=filename: self.update_ui_no_match(f))
-                    
-                    except Exception as e:
-                        # Incrementar contador de errores
-                        with self.stats_lock:
-                            self.stats["errors"] += 1
-                        
-                        self.debug_print(f"Error procesando {filename}: {str(e)}")
-                        
-                        # Actualizar UI (en el hilo principal)
-                        self.root.after(0, lambda f=filename, e=str(e): self.update_ui_error(f, e))
-                    
-                    finally:
-                        # Incrementar contador de procesados siempre, incluso si hay error
-                        with self.stats_lock:
-                            self.stats["processed"] += 1
-                        
-                        # Marcar como completado en la cola
-                        self.process_queue.task_done()
-                        
-                        # Forzar una actualización de la interfaz de usuario
-                        self.root.after(0, self.update_stats_display)
-                    
+                    report_writer.close()
                 except Exception as e:
-                    self.debug_print(f"Error en procesamiento del hilo {thread_id}: {str(e)}")
-            
-            self.debug_print(f"Hilo {thread_id} finalizado")
-        except Exception as e:
-            self.debug_print(f"Error fatal en hilo {thread_id}: {str(e)}")
+                    self.debug_print(f"Error al cerrar el archivo de registro: {str(e)}")
+            # drain_progress finaliza en el próximo cuadro
+            done_event.set()
 
-    def extract_pdf_text(self, pdf_path):
-        """Extrae todo el texto de un archivo PDF."""
-        try:
-            with open(pdf_path, 'rb') as file:
-                try:
-                    reader = PyPDF2.PdfReader(file)
-                    text = ""
-                    
-                    # Extraer texto de todas las páginas
-                    for page in reader.pages:
-                        try:
-                            page_text = page.extract_text()
-                            if page_text:  # Verificar que la extracción fue exitosa
-                                text += page_text
-                        except Exception as e:
-                            self.debug_print(f"Error al extraer texto de una página: {str(e)}")
-                    
-                    return text
-                except Exception as e:
-                    self.debug_print(f"Error al crear PdfReader: {str(e)}")
-                    return ""
-        except Exception as e:
-            self.debug_print(f"Error al abrir el archivo PDF {pdf_path}: {str(e)}")
-            raise
-        
     def update_progress(self, progress):
         """Actualiza la barra de progreso."""
         try:
             self.progress_var.set(progress)
-            self.progress_label.config(text=f"Progreso: {progress:.1f}%")
+            if self.scanning:
+                self.progress_label.config(text=f"Progreso: {progress:.1f}% (buscando más PDFs...)")
+            else:
+                self.progress_label.config(text=f"Progreso: {progress:.1f}%")
             
             # Cambiar el color de la barra según el progreso
             if progress < 30:
@@ -1143,36 +1081,9 @@ class AnalizadorPDFs:
                 self.style.configure("blue.Horizontal.TProgressbar", background='#2ecc71')
             else:
                 self.style.configure("blue.Horizontal.TProgressbar", background='#27ae60')
-            
-            # Forzar actualización
-            self.root.update_idletasks()
         except Exception as e:
             self.debug_print(f"Error al actualizar progreso: {str(e)}")
     
-    def update_ui_match(self, filename, condition):
-        """Actualiza la UI cuando se encuentra una coincidencia."""
-        try:
-            # Solo actualizar estadísticas
-            self.update_stats_display()
-        except Exception as e:
-            self.debug_print(f"Error en update_ui_match: {str(e)}")
-    
-    def update_ui_no_match(self, filename):
-        """Actualiza la UI cuando no se encuentra coincidencia."""
-        try:
-            # Solo actualizar estadísticas
-            self.update_stats_display()
-        except Exception as e:
-            self.debug_print(f"Error en update_ui_no_match: {str(e)}")
-    
-    def update_ui_error(self, filename, error_msg):
-        """Actualiza la UI cuando ocurre un error."""
-        try:
-            # Solo actualizar estadísticas
-            self.update_stats_display()
-        except Exception as e:
-            self.debug_print(f"Error en update_ui_error: {str(e)}")
-        
     def finalize_processing(self):
         """Finaliza el procesamiento y muestra resultados."""
         try:
@@ -1195,6 +1106,7 @@ class AnalizadorPDFs:
             # Habilitar botones nuevamente
             self.analyze_btn.config(state=tk.NORMAL)
             self.select_pdf_btn.config(state=tk.NORMAL)
+            self.select_folder_btn.config(state=tk.NORMAL)
             self.clear_btn.config(state=tk.NORMAL)
             
             # Mostrar mensaje con resultados
@@ -1203,7 +1115,9 @@ class AnalizadorPDFs:
                         f"📊 Resultados:\n" \
                         f"• Total de PDFs analizados: {self.stats['processed']}\n" \
                         f"• PDFs que cumplen criterios: {self.stats['matches']}\n" \
-                        f"• Errores encontrados: {self.stats['errors']}\n\n" \
+                        f"• Errores encontrados: {self.stats['errors']}\n" \
+                        f"• Sin texto extraíble (escaneos): {self.stats.get('textless', 0)}\n" \
+                        f"• Con tiempo agotado: {self.stats.get('timeouts', 0)}\n\n" \
                         f"📁 Los archivos encontrados se movieron a:\n" \
                         f"{self.output_folder}\n\n" \
                         f"📄 Se generó un informe detallado:\n" \
@@ -1215,7 +1129,9 @@ class AnalizadorPDFs:
                         f"📊 Resultados:\n" \
                         f"• Total de PDFs analizados: {self.stats['processed']}\n" \
                         f"• PDFs que cumplen criterios: {self.stats['matches']}\n" \
-                        f"• Errores encontrados: {self.stats['errors']}\n\n" \
+                        f"• Errores encontrados: {self.stats['errors']}\n" \
+                        f"• Sin texto extraíble (escaneos): {self.stats.get('textless', 0)}\n" \
+                        f"• Con tiempo agotado: {self.stats.get('timeouts', 0)}\n\n" \
                         f"ℹ️ No se encontraron PDFs que cumplieran con los criterios definidos.\n" \
                         f"Considere revisar o modificar los criterios de búsqueda."
                 
@@ -1241,6 +1157,11 @@ y moverlos automáticamente a una carpeta organizada.
    • En la sección "Criterios de Búsqueda", agrega conjuntos de palabras
    • Ejemplo: "factura, pagada" (el PDF debe tener AMBAS palabras)
    • Ejemplo: "contrato" (el PDF debe tener esta palabra)
+   • Ejemplo: "primeras 2: factura, pagada" (solo en las 2 primeras páginas;
+     también "últimas 1:" o "páginas 3-5:"). Se leen solo esas páginas
+   • Operadores: "pagada | cobrada" (alguna de las dos), "-borrador" (que NO
+     aparezca), comillas para palabras completas ("pago" no encuentra
+     "pagos") y "factura ~50 pagada" (a no más de 50 caracteres)
    • Puedes agregar múltiples criterios
    • Si un PDF cumple CON CUALQUIER criterio, será seleccionado
 
@@ -1248,6 +1169,8 @@ y moverlos automáticamente a una carpeta organizada.
    • Haz clic en "Seleccionar PDFs"
    • Elige uno o varios archivos PDF para analizar
    • Puedes seleccionar cientos de archivos a la vez
+   • O usa "Seleccionar carpeta" para analizar todos los PDFs de una
+     carpeta y sus subcarpetas (el análisis empieza mientras se recorre)
 
 3️⃣ ANALIZAR:
    • Haz clic en "🔍 ANALIZAR PDFs"
@@ -1259,6 +1182,10 @@ y moverlos automáticamente a una carpeta organizada.
    • Procesados: Archivos ya analizados
    • Encontrados: Archivos que cumplen criterios (movidos)
    • Errores: Archivos que no se pudieron procesar
+   • Sin texto: PDFs escaneados sin capa de texto; se detectan sin leer
+     sus páginas y requieren OCR para poder analizarlos
+   • Tiempo agotado: Archivos que tardaron más de 5 minutos (o 1 minuto
+     en una sola página); se interrumpen para no frenar el resto
 
 💡 CONSEJOS:
    • Las búsquedas ignoran acentos y mayúsculas
@@ -1351,4 +1278,6 @@ def main():
         messagebox.showerror("Error Fatal", f"Error al iniciar la aplicación: {str(e)}")
 
 if __name__ == "__main__":
+    # Necesario para los procesos de trabajo en el ejecutable de PyInstaller
+    multiprocessing.freeze_support()
     main()                        
\ No newline at end of file
@@ -0,0 +1,111 @@
+"""Modo distribuido en una sola máquina: pdf_cli vs. coordinador con varios workers locales.
+
+Genera un corpus sintético, lo analiza con pdf_cli.py y después con
+pdf_cluster.py (un coordinador y N workers, cada uno en su proceso) y
+compara el tiempo y la clasificación de cada archivo, que debe ser la misma.
+Con --matar, uno de los workers se termina con SIGKILL a mitad de camino:
+sus lotes vuelven a la cola cuando vence el plazo y el resultado tiene que
+seguir siendo el mismo.
+
+Uso:
+    python benchmarks/bench_cluster.py --files 300 --nodes 1 2 4 --matar
+"""
+import os
+import sys
+import json
+import glob
+import time
+import signal
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic_pdfs import generate_corpus
+
+TERMS = ("contrato", "firmado")
+
+
+def read_report(folder):
+    """Estado y criterio de cada archivo según el informe JSONL de la carpeta."""
+    path = sorted(glob.glob(os.path.join(folder, "*.jsonl")))[-1]
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    return {record["path"]: (record["status"], record["condition"]) for record in records if "path" in record}
+
+
+def common_args(corpus, criteria, output):
+    return [corpus, "-c", criteria, "-o", output, "--reubicar", "report", "--formato", "jsonl", "--sin-diario"]
+
+
+def run_cli(corpus, criteria, output, workers, mode):
+    started = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(ROOT, "pdf_cli.py"), *common_args(corpus, criteria, output),
+                    "-w", str(workers), "-m", mode], check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - started
+
+
+def run_cluster(corpus, criteria, output, nodes, mode, port, kill_after, lease):
+    url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    coordinator = subprocess.Popen([sys.executable, os.path.join(ROOT, "pdf_cluster.py"), "coordinar",
+                                    *common_args(corpus, criteria, output), "-w", "1", "-m", mode,
+                                    "--escuchar", f"127.0.0.1:{port}", "--lote", "20", "--plazo", str(lease)],
+                                   stdout=subprocess.PIPE, text=True)
+    workers = [subprocess.Popen([sys.executable, os.path.join(ROOT, "pdf_cluster.py"), "trabajar", url,
+                                 "--nombre", f"w{i + 1}"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+               for i in range(nodes)]
+    if kill_after is not None:
+        time.sleep(kill_after)
+        workers[-1].send_signal(signal.SIGKILL)
+    for worker in workers:
+        worker.wait()
+    output_text, _ = coordinator.communicate()
+    elapsed = time.perf_counter() - started
+    reassigned = [line for line in output_text.splitlines() if "devueltos a la cola" in line]
+    return elapsed, reassigned[0].split(":")[-1].strip() if reassigned else "0"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--pages", type=int, nargs=2, default=(5, 30))
+    parser.add_argument("--nodes", type=int, nargs="+", default=[1, 2, 4], help="Workers locales")
+    parser.add_argument("--mode", choices=("process", "thread"), default="process")
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--matar", action="store_true", help="Terminar un worker con SIGKILL a mitad de camino")
+    parser.add_argument("--plazo", type=float, default=3.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        corpus = os.path.join(folder, "corpus")
+        generate_corpus(corpus, files=args.files, pages=tuple(args.pages), match_ratio=0.4, terms=TERMS)
+        criteria = os.path.join(folder, "criterios.txt")
+        with open(criteria, "w", encoding="utf-8") as f:
+            f.write(", ".join(TERMS) + "\n")
+
+        reference_folder = os.path.join(folder, "cli")
+        cli_time = run_cli(corpus, criteria, reference_folder, 1, args.mode)
+        reference = read_report(reference_folder)
+        print(f"Corpus: {args.files} archivos, {sum(1 for status, _ in reference.values() if status == 'match')} "
+              f"con coincidencia")
+        print(f"pdf_cli, 1 worker: {cli_time:7.2f} s")
+        print(f"{'workers':>7} {'s':>7} {'reasignados':>12} {'distintos':>10}")
+
+        failures = 0
+        for nodes in args.nodes:
+            output = os.path.join(folder, f"cluster{nodes}")
+            kill_after = cli_time / nodes / 2 if args.matar and nodes > 1 else None
+            elapsed, reassigned = run_cluster(corpus, criteria, output, nodes, args.mode, args.port, kill_after,
+                                              args.plazo)
+            results = read_report(output)
+            mismatches = sum(1 for path, value in reference.items() if results.get(path) != value)
+            failures += mismatches
+            print(f"{nodes:>7} {elapsed:>7.2f} {reassigned:>12} {mismatches:>10}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
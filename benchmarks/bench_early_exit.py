@@ -0,0 +1,59 @@
+"""Mide cuántas páginas ahorra la extracción por páginas con salida anticipada.
+
+Compara la extracción completa (todas las páginas y luego verificar criterios)
+con process_pdf, que deja de leer en cuanto el resultado queda decidido, y
+comprueba que ambos clasifican igual cada archivo (con el mismo criterio).
+
+Uso:
+    python benchmarks/bench_early_exit.py --files 40 --pages 100
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdf_engine
+from synthetic_pdfs import generate_corpus
+
+CONDITIONS = [["contrato", "firmado"], ["factura", "pagada"]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--match-ratio", type=float, default=0.5)
+    args = parser.parse_args()
+
+    matcher = pdf_engine.ConditionMatcher(CONDITIONS)
+    options = pdf_engine.AnalysisOptions(output_folder=None, mode="thread", workers=1)
+
+    with tempfile.TemporaryDirectory() as folder:
+        paths = generate_corpus(folder, files=args.files, pages=args.pages, match_ratio=args.match_ratio)
+
+        start = time.perf_counter()
+        full = [pdf_engine.check_pdf_conditions(pdf_engine.extract_pdf_text(path), matcher) for path in paths]
+        full_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        streamed = [pdf_engine.process_pdf(path, matcher, options) for path in paths]
+        streamed_time = time.perf_counter() - start
+
+    mismatches = sum(1 for expected, result in zip(full, streamed) if expected != (result.matched, result.condition))
+    total_pages = args.files * args.pages
+    read_pages = sum(result.pages for result in streamed)
+    print(f"Corpus: {args.files} archivos x {args.pages} páginas, "
+          f"{sum(1 for matched, _ in full if matched)} con coincidencia")
+    print(f"Extracción completa: {total_pages:>7} páginas  {full_time:7.2f} s")
+    print(f"Salida anticipada:   {read_pages:>7} páginas  {streamed_time:7.2f} s  "
+          f"({100 * (1 - read_pages / total_pages):.1f}% de páginas ahorradas, "
+          f"{full_time / streamed_time:.2f}x)")
+    print(f"Clasificaciones distintas: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
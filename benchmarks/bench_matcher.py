@@ -0,0 +1,80 @@
+"""Verificación de criterios: bucle anidado original vs. máscaras de bits / autómata.
+
+Escala la cantidad de criterios (códigos de cliente de dos términos) sobre
+un texto fijo y compara, por documento:
+  - anidado:   el bucle original (normaliza cada término y busca con `in`)
+  - in+bits:   ConditionMatcher sin autómata (términos normalizados una vez)
+  - autómata:  ConditionMatcher con Aho–Corasick (una pasada por el texto)
+
+Uso:
+    python benchmarks/bench_matcher.py --criteria 10 100 500 1000 --pages 40
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdf_engine
+from synthetic_pdfs import random_page
+
+
+def nested_loop(pdf_text, conditions):
+    """Implementación original de check_pdf_conditions."""
+    if not pdf_text:
+        return False, None
+    pdf_text_norm = pdf_engine.normalizar_texto(pdf_text)
+    for condition in conditions:
+        all_terms_found = True
+        for term in condition:
+            term_norm = pdf_engine.normalizar_texto(term)
+            if term_norm not in pdf_text_norm:
+                all_terms_found = False
+                break
+        if all_terms_found:
+            return True, condition
+    return False, None
+
+
+def timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        value = function()
+    return (time.perf_counter() - start) / repeat, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--criteria", type=int, nargs="+", default=[2, 10, 50, 100, 200, 500, 1000])
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    # El último criterio es el único que se cumple: todos los anteriores se evalúan
+    pages = [random_page(rng, extra_terms=("expediente", "cli-004711") if i == args.pages - 1 else ())
+             for i in range(args.pages)]
+    text = "".join(pages)
+    print(f"Texto: {len(text)} caracteres en {args.pages} páginas")
+    print(f"{'criterios':>9} {'anidado ms':>11} {'in+bits ms':>11} {'autómata ms':>12} {'auto':>5}")
+
+    for count in args.criteria:
+        conditions = [["expediente", f"cli-{rng.randrange(10**6):06d}"] for _ in range(count - 1)]
+        conditions.append(["expediente", "cli-004711"])
+
+        def matcher_time(use_automaton):
+            matcher = pdf_engine.ConditionMatcher(conditions, use_automaton=use_automaton)
+            return timed(lambda: pdf_engine.check_pdf_conditions(text, matcher), args.repeat)
+
+        nested, expected = timed(lambda: nested_loop(text, conditions), args.repeat)
+        plain, plain_result = matcher_time(False)
+        automaton, automaton_result = matcher_time(True)
+        assert plain_result == expected and automaton_result == expected, "resultados distintos"
+        chosen = "sí" if len(set(t for c in conditions for t in c)) >= pdf_engine.AUTOMATON_MIN_TERMS else "no"
+        print(f"{count:>9} {nested * 1e3:>11.2f} {plain * 1e3:>11.2f} {automaton * 1e3:>12.2f} {chosen:>5}")
+
+
+if __name__ == "__main__":
+    main()
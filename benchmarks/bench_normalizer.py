@@ -0,0 +1,109 @@
+"""Equivalencia y velocidad de normalizar_texto frente a la versión original.
+
+Primero comprueba que la versión actual da exactamente el mismo resultado
+que la original (todos los caracteres Unicode de a uno, textos aleatorios y
+textos partidos en fragmentos con normalizar_fragmento); después mide ambas
+sobre texto en español.
+
+Uso:
+    python benchmarks/bench_normalizer.py --pages 50
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import unicodedata
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdf_engine
+from synthetic_pdfs import random_page
+
+
+def normalizar_texto_original(texto):
+    """Implementación original, basada en un generador carácter por carácter."""
+    texto = texto.lower()
+    texto = ''.join(c for c in unicodedata.normalize('NFD', texto) if unicodedata.category(c) != 'Mn')
+    texto = re.sub(r'\s+', ' ', texto).strip()
+    return texto
+
+
+def join_fragments(fragments):
+    """Une fragmentos normalizados como lo hace DocumentScan."""
+    text = ""
+    for fragment in fragments:
+        chunk = pdf_engine.normalizar_fragmento(fragment)
+        if chunk.startswith(' ') and (not text or text.endswith(' ')):
+            chunk = chunk[1:]
+        text += chunk
+    return text.rstrip(' ')
+
+
+def check_equivalence(samples, seed):
+    failures = 0
+    for code in range(sys.maxunicode + 1):
+        char = chr(code)
+        for text in (char, f"a{char}b", f" {char} "):
+            if pdf_engine.normalizar_texto(text) != normalizar_texto_original(text):
+                failures += 1
+                if failures <= 5:
+                    print(f"  distinto: U+{code:04X} en {text!r}")
+
+    rng = random.Random(seed)
+    alphabet = list("aeiouáéíóúüñÁÉÍÓÚÜÑ σςΑ\t\n\r\u00a0\u2003\u0301\u0303İßﬁ.-,") + ["  "]
+    for _ in range(samples):
+        text = ''.join(rng.choice(alphabet + ["Σ"]) for _ in range(rng.randint(0, 40)))
+        if pdf_engine.normalizar_texto(text) != normalizar_texto_original(text):
+            failures += 1
+            if failures <= 5:
+                print(f"  distinto: {text!r}")
+
+        # La sigma mayúscula se deja fuera de los fragmentos: su minúscula
+        # depende de la letra siguiente, que puede estar en la página siguiente
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        expected = normalizar_texto_original(text)
+        cuts = sorted(rng.randint(0, len(text)) for _ in range(rng.randint(0, 4)))
+        fragments = [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+        if join_fragments(fragments) != expected:
+            failures += 1
+            if failures <= 5:
+                print(f"  distinto: {text!r} en fragmentos {fragments!r}")
+    return failures
+
+
+def timed(function, text, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(text)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--samples", type=int, default=20000)
+    args = parser.parse_args()
+
+    failures = check_equivalence(args.samples, seed=7)
+    print(f"Equivalencia: {'OK' if not failures else f'{failures} diferencias'}")
+
+    rng = random.Random(3)
+    pages = [random_page(rng) for _ in range(args.pages)]
+    text = "\n".join(pages)
+    ascii_text = unicodedata.normalize('NFD', text).encode('ascii', 'ignore').decode()
+    print(f"Texto: {len(text)} caracteres en {args.pages} páginas")
+    for label, sample in (("español", text), ("ascii", ascii_text)):
+        original = timed(normalizar_texto_original, sample, args.repeat)
+        current = timed(pdf_engine.normalizar_texto, sample, args.repeat)
+        print(f"{label:<8} original {original * 1e3:8.2f} ms  actual {current * 1e3:7.2f} ms  "
+              f"({original / current:.1f}x)")
+    per_page = timed(lambda p: [pdf_engine.normalizar_fragmento(page) for page in p], pages, args.repeat)
+    print(f"por páginas (normalizar_fragmento): {per_page * 1e3:.2f} ms")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
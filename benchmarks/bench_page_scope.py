@@ -0,0 +1,61 @@
+"""Mide cuánto ahorra limitar los criterios a las primeras páginas.
+
+Compara un criterio que se busca en todo el documento con el mismo criterio
+limitado a las primeras páginas ("primeras 2: factura, pagada"). En el
+corpus sintético los términos aparecen en la primera página, así que ambos
+deben clasificar igual; los archivos sin coincidencia se leen enteros en el
+primer caso y solo en sus primeras páginas en el segundo.
+
+Uso:
+    python benchmarks/bench_page_scope.py --files 40 --pages 60
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdf_engine
+from synthetic_pdfs import generate_corpus
+
+TERMS = ("factura", "pagada")
+
+
+def run(paths, criterion, options):
+    matcher = pdf_engine.ConditionMatcher([pdf_engine.parse_criterion(criterion)])
+    start = time.perf_counter()
+    results = [pdf_engine.process_pdf(path, matcher, options) for path in paths]
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=60)
+    parser.add_argument("--scope", type=int, default=2, help="Páginas del criterio limitado")
+    parser.add_argument("--match-ratio", type=float, default=0.3)
+    args = parser.parse_args()
+
+    options = pdf_engine.AnalysisOptions(output_folder=None, mode="thread", workers=1)
+    with tempfile.TemporaryDirectory() as folder:
+        paths = generate_corpus(folder, files=args.files, pages=args.pages, match_ratio=args.match_ratio,
+                                terms=TERMS)
+        whole, whole_time = run(paths, ", ".join(TERMS), options)
+        scoped, scoped_time = run(paths, f"primeras {args.scope}: {', '.join(TERMS)}", options)
+
+    mismatches = sum(1 for a, b in zip(whole, scoped) if a.matched != b.matched)
+    whole_pages = sum(result.pages for result in whole)
+    scoped_pages = sum(result.pages for result in scoped)
+    print(f"Corpus: {args.files} archivos x {args.pages} páginas, "
+          f"{sum(1 for result in whole if result.matched)} con coincidencia")
+    print(f"Todo el documento:  {whole_pages:>7} páginas  {whole_time:7.2f} s")
+    print(f"Primeras {args.scope} páginas: {scoped_pages:>7} páginas  {scoped_time:7.2f} s  "
+          f"({whole_time / scoped_time:.1f}x)")
+    print(f"Clasificaciones distintas: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
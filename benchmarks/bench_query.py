@@ -0,0 +1,148 @@
+"""Lenguaje de consulta: evaluación anidada vs. plan compilado.
+
+Escala la cantidad de criterios con operadores (|, -, comillas, ~N) que
+comparten subexpresiones, sobre un texto fijo en el que solo se cumple el
+último criterio, y compara por documento:
+  - anidado:    recorre criterio por criterio y cláusula por cláusula,
+                normalizando y buscando cada término cada vez (la forma en
+                que se evaluaban los criterios, extendida a los operadores)
+  - plan:       ConditionMatcher compilado una vez, sobre el texto completo
+  - por página: el mismo plan con DocumentScan, página por página
+
+Después mide un documento con un término negado en la primera página: el
+plan decide que ningún criterio se puede cumplir y deja de leer páginas.
+
+Uso:
+    python benchmarks/bench_query.py --criteria 10 100 500 --pages 40
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdf_engine
+import pdf_query
+from synthetic_pdfs import random_page
+
+
+def occurrences(term, exact, text):
+    """Inicios de todas las apariciones de `term` en `text` (superpuestas)."""
+    pattern = re.escape(term)
+    if exact:
+        pattern = rf"(?<!\w){pattern}(?!\w)"
+    return [match.start() for match in re.finditer(f"(?={pattern})", text)]
+
+
+def evaluate(node, text):
+    """Evalúa el árbol de una cláusula sobre el texto normalizado completo."""
+    kind = node[0]
+    if kind == "term":
+        term = pdf_engine.normalizar_texto(node[1])
+        if node[2]:
+            return re.search(rf"(?<!\w){re.escape(term)}(?!\w)", text) is not None
+        return term in text
+    if kind == "near":
+        left, right, distance = node[1], node[2], node[3]
+        left_term = pdf_engine.normalizar_texto(left[1])
+        right_term = pdf_engine.normalizar_texto(right[1])
+        same = (left_term, left[2]) == (right_term, right[2])
+        right_positions = occurrences(right_term, right[2], text)
+        for a in occurrences(left_term, left[2], text):
+            for b in right_positions:
+                gap = max(b - a - len(left_term), a - b - len(right_term))
+                if gap <= distance and not (same and a == b):
+                    return True
+        return False
+    if kind == "not":
+        return not evaluate(node[1], text)
+    if kind == "and":
+        return all(evaluate(child, text) for child in node[1])
+    return any(evaluate(child, text) for child in node[1])
+
+
+def nested_loop(pdf_text, conditions):
+    """Criterio por criterio y cláusula por cláusula, sin compilar nada."""
+    pdf_text_norm = pdf_engine.normalizar_texto(pdf_text)
+    if not pdf_text_norm:
+        return False, None
+    for condition in conditions:
+        if all(evaluate(pdf_query.parse_clause(clause), pdf_text_norm) for clause in condition):
+            return True, condition
+    return False, None
+
+
+def make_conditions(count, rng, last_code):
+    templates = (
+        '"expediente", cli-{code} | "ref {code}", -anulado',
+        'cliente ~40 "cli-{code}", -(borrador | anulado)',
+        '(factura, "cli-{code}") | (recibo, "cli-{code}"), "pago" ~20 importe',
+    )
+    conditions = [pdf_engine.parse_criterion(templates[i % len(templates)].format(code=f"{rng.randrange(10**6):06d}"))
+                  for i in range(count - 1)]
+    conditions.append(pdf_engine.parse_criterion(templates[0].format(code=last_code)))
+    return conditions
+
+
+def timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        value = function()
+    return (time.perf_counter() - start) / repeat, value
+
+
+def scan_pages(matcher, pages):
+    scan = matcher.new_scan()
+    scan.plan(len(pages))
+    for index, page in enumerate(pages):
+        scan.feed(page, index)
+        if scan.decided:
+            break
+    return scan.result(), scan.pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--criteria", type=int, nargs="+", default=[10, 50, 100, 200, 500])
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    pages = [random_page(rng, extra_terms=("expediente", "cli-004711") if i == args.pages - 1 else ())
+             for i in range(args.pages)]
+    text = "\n".join(pages)
+    print(f"Texto: {len(text)} caracteres en {args.pages} páginas")
+    print(f"{'criterios':>9} {'nodos':>6} {'anidado ms':>11} {'plan ms':>8} {'por página ms':>14}")
+
+    for count in args.criteria:
+        conditions = make_conditions(count, rng, "004711")
+        matcher = pdf_engine.ConditionMatcher(conditions)
+        clauses = sum(len(condition) for condition in conditions)
+
+        nested, expected = timed(lambda: nested_loop(text, conditions), args.repeat)
+        compiled, compiled_result = timed(lambda: pdf_engine.check_pdf_conditions(text, matcher), args.repeat)
+        paged, (paged_result, _) = timed(lambda: scan_pages(matcher, pages), args.repeat)
+        assert compiled_result == expected and paged_result == expected, "resultados distintos"
+        print(f"{count:>9} {len(matcher.plan.nodes):>6} {nested * 1e3:>11.2f} {compiled * 1e3:>8.2f} "
+              f"{paged * 1e3:>14.2f}   ({clauses} cláusulas)")
+
+    # Un término negado en todos los criterios aparece en la primera página
+    pages[0] = random_page(rng, extra_terms=("anulado",))
+    text = "\n".join(pages)
+    conditions = [condition for condition in make_conditions(max(args.criteria), rng, "004711")
+                  if any("anulado" in clause for clause in condition)]
+    matcher = pdf_engine.ConditionMatcher(conditions)
+    nested, expected = timed(lambda: nested_loop(text, conditions), args.repeat)
+    paged, (paged_result, read) = timed(lambda: scan_pages(matcher, pages), args.repeat)
+    assert paged_result == expected, "resultados distintos"
+    print(f"\nCon \"anulado\" en la página 1 ({len(conditions)} criterios que lo niegan):")
+    print(f"  anidado:    {nested * 1e3:8.2f} ms sobre las {args.pages} páginas")
+    print(f"  por página: {paged * 1e3:8.2f} ms, decidido después de {read} página(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Prueba de carga del servicio de clasificación (pdf_service.py).
+
+Sin --url, genera un corpus sintético y arranca el servicio con --workers
+y --cola. Primero mide lo que cuesta clasificar un archivo lanzando
+pdf_cli.py desde cero (importar PyPDF2, compilar los criterios, arrancar el
+pool) y después envía --requests pedidos con cada nivel de concurrencia,
+por ruta o subiendo el PDF (--subir). Informa pedidos por segundo, los
+percentiles de latencia vistos por el cliente y los pedidos rechazados
+(503: la cola estaba llena), y al final el /estado del servicio.
+
+Uso:
+    python benchmarks/bench_service.py --requests 400 --concurrency 1 4 16 64 --workers 2 --cola 16
+    python benchmarks/bench_service.py --url http://127.0.0.1:8766 --conjunto facturas --archivos /datos/muestra
+"""
+import os
+import sys
+import glob
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import subprocess
+import urllib.request
+from concurrent import futures
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pdf_engine
+import pdf_service
+from synthetic_pdfs import generate_corpus
+
+TERMS = ("contrato", "firmado")
+
+
+def wait_ready(url, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError("El servicio terminó al arrancar")
+        try:
+            with urllib.request.urlopen(url + "/estado", timeout=1) as response:
+                return json.loads(response.read())
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("El servicio no respondió")
+
+
+def cold_start(paths, criteria, repeat=3):
+    """Segundos para clasificar un archivo lanzando pdf_cli.py desde cero (mediana)."""
+    times = []
+    with tempfile.TemporaryDirectory() as output:
+        for pdf_path in paths[:repeat]:
+            started = time.perf_counter()
+            subprocess.run([sys.executable, os.path.join(ROOT, "pdf_cli.py"), pdf_path, "-c", criteria,
+                            "-o", output, "--reubicar", "report", "--sin-diario", "-w", "1"],
+                           check=True, stdout=subprocess.DEVNULL)
+            times.append(time.perf_counter() - started)
+    return sorted(times)[len(times) // 2]
+
+
+def load(url, paths, criteria_set, requests, concurrency, upload, seed=1):
+    """Envía `requests` pedidos desde `concurrency` hilos; devuelve (histograma, rechazados, errores, segundos)."""
+    rng = random.Random(seed)
+    chosen = [rng.choice(paths) for _ in range(requests)]
+    contents = {}
+    if upload:
+        for pdf_path in set(chosen):
+            with open(pdf_path, "rb") as f:
+                contents[pdf_path] = f.read()
+    latency = pdf_engine.LatencyHistogram()
+    counts = {"rejected": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def send(pdf_path):
+        started = time.perf_counter()
+        try:
+            if upload:
+                code, _ = pdf_service.classify(url, data=contents[pdf_path], criteria_set=criteria_set,
+                                               name=os.path.basename(pdf_path))
+            else:
+                code, _ = pdf_service.classify(url, pdf_path=pdf_path, criteria_set=criteria_set)
+        except OSError:
+            code = None
+        elapsed = time.perf_counter() - started
+        with lock:
+            if code == 200:
+                latency.add(elapsed)
+            elif code == 503:
+                counts["rejected"] += 1
+            else:
+                counts["errors"] += 1
+
+    started = time.perf_counter()
+    with futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(send, chosen))
+    return latency, counts["rejected"], counts["errors"], time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=None, help="Servicio ya en marcha (si no, se arranca uno)")
+    parser.add_argument("--conjunto", default=None, help="Conjunto de criterios con --url")
+    parser.add_argument("--archivos", default=None, help="Carpeta de PDFs a enviar con --url")
+    parser.add_argument("--files", type=int, default=50)
+    parser.add_argument("--pages", type=int, nargs=2, default=(2, 20))
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--cola", type=int, default=16)
+    parser.add_argument("--mode", choices=("process", "thread"), default="process")
+    parser.add_argument("--port", type=int, default=8798)
+    parser.add_argument("--subir", action="store_true", help="Subir el PDF en lugar de enviar su ruta")
+    args = parser.parse_args()
+
+    process = None
+    with tempfile.TemporaryDirectory() as folder:
+        if args.url:
+            url = args.url.rstrip("/")
+            paths = sorted(glob.glob(os.path.join(args.archivos, "*.pdf")))
+            criteria_set = args.conjunto
+            cold = None
+        else:
+            paths = generate_corpus(os.path.join(folder, "corpus"), files=args.files, pages=tuple(args.pages),
+                                    match_ratio=0.4, terms=TERMS)
+            criteria = os.path.join(folder, "contratos.txt")
+            with open(criteria, "w", encoding="utf-8") as f:
+                f.write(", ".join(TERMS) + "\n")
+            cold = cold_start(paths, criteria)
+            url = f"http://127.0.0.1:{args.port}"
+            criteria_set = "contratos"
+            process = subprocess.Popen([sys.executable, os.path.join(ROOT, "pdf_service.py"), "-c", criteria,
+                                        "--escuchar", f"127.0.0.1:{args.port}", "-w", str(args.workers),
+                                        "-m", args.mode, "--cola", str(args.cola)],
+                                       stdout=subprocess.DEVNULL)
+        try:
+            started = time.perf_counter()
+            wait_ready(url, process)
+            print(f"Servicio listo en {time.perf_counter() - started:.2f} s ({len(paths)} archivos, "
+                  f"{'subiendo el PDF' if args.subir else 'por ruta'})")
+            if cold is not None:
+                print(f"Lanzando pdf_cli.py por archivo: {cold * 1e3:.0f} ms")
+            print(f"{'concurrencia':>12} {'pedidos/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+                  f"{'máx ms':>8} {'503':>5} {'errores':>8}")
+            for concurrency in args.concurrency:
+                latency, rejected, errors, elapsed = load(url, paths, criteria_set, args.requests, concurrency,
+                                                          args.subir)
+                summary = latency.summary()
+                print(f"{concurrency:>12} {latency.count / elapsed:>10.1f} {summary['p50'] * 1e3:>8.1f} "
+                      f"{summary['p95'] * 1e3:>8.1f} {summary['p99'] * 1e3:>8.1f} {summary['max'] * 1e3:>8.1f} "
+                      f"{rejected:>5} {errors:>8}")
+            with urllib.request.urlopen(url + "/estado", timeout=5) as response:
+                status = json.loads(response.read())
+            print(f"Servicio: {status['atendidos']} atendidos, {status['rechazados']} rechazados")
+            for name, summary in status["latencia_ms"].items():
+                print(f"  {name:<9} p50 {summary['p50']:8.1f} ms  p95 {summary['p95']:8.1f} ms  "
+                      f"p99 {summary['p99']:8.1f} ms")
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+
+if __name__ == "__main__":
+    main()
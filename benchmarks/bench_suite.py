@@ -0,0 +1,296 @@
+"""Suite de benchmarks reproducible: cada etapa por separado y el análisis completo.
+
+Genera un corpus sintético determinista (cantidad de páginas y densidad de
+texto variables, texto con o sin acentos, páginas que solo tienen una imagen
+y archivos corruptos) y mide:
+  - extracción:     iter_pdf_pages sobre todo el corpus (archivos/s, páginas/s)
+  - normalización:  normalizar_fragmento sobre el texto de cada página (MB/s)
+  - verificación:   los criterios sobre el texto normalizado, para cada cantidad de criterios
+  - completo:       analyze() para cada modo, cantidad de workers y de criterios
+                    (archivos/s, páginas/s, pico de memoria RSS); cada combinación
+                    corre en un proceso nuevo para que el pico de memoria sea el suyo
+
+Los resultados se guardan en JSON para compararlos entre commits:
+    python benchmarks/bench_suite.py --files 200 --workers 1 2 4 --criteria 2 100 1000 -o antes.json
+    python benchmarks/bench_suite.py --files 200 --workers 1 2 4 --criteria 2 100 1000 -o despues.json \\
+        --comparar antes.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import datetime
+import subprocess
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdf_engine
+from synthetic_pdfs import generate_corpus
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Criterios que el corpus contiene; el resto son códigos que no aparecen
+BASE_CONDITIONS = [["contrato", "firmado"], ["factura", "pagada"]]
+
+
+def make_conditions(count, seed=7):
+    """Devuelve `count` criterios deterministas: los de BASE_CONDITIONS y códigos de cliente."""
+    rng = random.Random(seed)
+    conditions = [list(condition) for condition in BASE_CONDITIONS[:count]]
+    while len(conditions) < count:
+        conditions.append(["expediente", f"cli-{rng.randrange(10**6):06d}"])
+    return conditions
+
+
+def peak_rss_mb(who):
+    """Pico de memoria residente del proceso (RUSAGE_SELF) o de sus hijos terminados (RUSAGE_CHILDREN)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux informa KB; macOS, bytes
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def best_of(repeat, function):
+    """Ejecuta `function` `repeat` veces y devuelve (mejor tiempo en segundos, último valor)."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, value
+
+
+def bench_stages(paths, criteria_sizes, repeat):
+    """Mide extracción, normalización y verificación por separado, en un solo hilo."""
+    def extract():
+        return [list(pdf_engine.iter_pdf_pages(path)) for path in paths]
+
+    extract_time, documents = best_of(repeat, extract)
+    page_count = sum(len(pages) for pages in documents)
+    char_count = sum(len(text) for pages in documents for text in pages)
+
+    def normalize():
+        return [[pdf_engine.normalizar_fragmento(text) for text in pages] for pages in documents]
+
+    normalize_time, normalized = best_of(repeat, normalize)
+
+    stages = {
+        "extract": {
+            "seconds": extract_time,
+            "files_per_s": len(paths) / extract_time,
+            "pages_per_s": page_count / extract_time,
+            "pages": page_count,
+        },
+        "normalize": {
+            "seconds": normalize_time,
+            "mb_per_s": char_count / 1e6 / max(normalize_time, 1e-9),
+            "chars": char_count,
+        },
+        "match": [],
+    }
+
+    for count in criteria_sizes:
+        matcher = pdf_engine.ConditionMatcher(make_conditions(count))
+
+        def match():
+            matches = 0
+            for chunks in normalized:
+                scan = matcher.new_scan()
+                for chunk in chunks:
+                    if scan.feed_normalized(chunk):
+                        break
+                matches += scan.result()[0]
+            return matches
+
+        match_time, matches = best_of(repeat, match)
+        stages["match"].append({
+            "criteria": count,
+            "automaton": matcher.automaton is not None,
+            "seconds": match_time,
+            "pages_per_s": page_count / max(match_time, 1e-9),
+            "matches": matches,
+        })
+    return stages
+
+
+def run_end_to_end(folder, mode, workers, criteria):
+    """Analiza el corpus una vez (en el proceso actual) y devuelve las métricas."""
+    paths = sorted(os.path.join(folder, name) for name in os.listdir(folder) if name.endswith(".pdf"))
+    options = pdf_engine.AnalysisOptions(output_folder=None, workers=workers, mode=mode)
+    counts = {"files": 0, "pages": 0, "matches": 0, "errors": 0}
+
+    start = time.perf_counter()
+    for result in pdf_engine.analyze(paths, make_conditions(criteria), options):
+        counts["files"] += 1
+        counts["pages"] += result.pages
+        counts["matches"] += result.matched
+        counts["errors"] += result.error is not None
+    elapsed = time.perf_counter() - start
+
+    # Esperar a que terminen los procesos del pool para que cuenten en RUSAGE_CHILDREN
+    deadline = time.monotonic() + 10
+    while multiprocessing.active_children() and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    return dict(
+        mode=mode,
+        workers=workers,
+        criteria=criteria,
+        seconds=elapsed,
+        files_per_s=counts["files"] / elapsed,
+        # Páginas leídas (la salida anticipada no lee el resto de un PDF que ya cumple)
+        pages_per_s=counts["pages"] / elapsed,
+        peak_rss_mb=peak_rss_mb(resource.RUSAGE_SELF) if resource else None,
+        peak_rss_children_mb=peak_rss_mb(resource.RUSAGE_CHILDREN) if resource else None,
+        **counts
+    )
+
+
+def bench_end_to_end(folder, modes, workers_list, criteria_sizes, repeat):
+    """Corre cada combinación en un proceso nuevo y se queda con la ejecución más rápida."""
+    runs = []
+    for mode in modes:
+        for workers in workers_list:
+            for criteria in criteria_sizes:
+                config = json.dumps({"folder": folder, "mode": mode, "workers": workers, "criteria": criteria})
+                best = None
+                for _ in range(repeat):
+                    output = subprocess.run(
+                        [sys.executable, os.path.abspath(__file__), "--ejecutar", config],
+                        check=True, capture_output=True, text=True
+                    ).stdout
+                    run = json.loads(output.strip().splitlines()[-1])
+                    if best is None or run["seconds"] < best["seconds"]:
+                        best = run
+                runs.append(best)
+                print(f"{mode:<8} {workers:>7} {criteria:>9} {best['files_per_s']:>10.1f} "
+                      f"{best['pages_per_s']:>9.1f} {best['peak_rss_mb'] or 0:>8.1f} "
+                      f"{best['peak_rss_children_mb'] or 0:>10.1f}")
+    return runs
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, previous_path):
+    """Muestra la variación de las métricas de velocidad respecto de otro archivo de resultados."""
+    with open(previous_path, encoding="utf-8") as f:
+        previous = json.load(f)
+    print(f"\nComparación con {previous_path} (commit {previous['meta'].get('commit')}):")
+
+    def line(label, new, old):
+        if old:
+            print(f"  {label:<40} {old:>10.1f} -> {new:>10.1f}  ({(new / old - 1) * 100:+.1f}%)")
+
+    for stage, metric in (("extract", "pages_per_s"), ("normalize", "mb_per_s")):
+        line(f"{stage} {metric}", current["stages"][stage][metric], previous["stages"][stage][metric])
+    old_match = {m["criteria"]: m for m in previous["stages"]["match"]}
+    for m in current["stages"]["match"]:
+        if m["criteria"] in old_match:
+            line(f"match {m['criteria']} criterios pages_per_s", m["pages_per_s"],
+                 old_match[m["criteria"]]["pages_per_s"])
+    old_runs = {(r["mode"], r["workers"], r["criteria"]): r for r in previous["end_to_end"]}
+    for r in current["end_to_end"]:
+        old = old_runs.get((r["mode"], r["workers"], r["criteria"]))
+        if old:
+            line(f"{r['mode']} w={r['workers']} c={r['criteria']} files_per_s", r["files_per_s"], old["files_per_s"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--pages", type=int, nargs=2, default=[1, 20], metavar=("MIN", "MAX"),
+                        help="Rango de páginas por archivo")
+    parser.add_argument("--words", type=int, nargs=2, default=[50, 600], metavar=("MIN", "MAX"),
+                        help="Rango de palabras por página (densidad de texto)")
+    parser.add_argument("--sin-acentos", action="store_true", help="Generar texto ASCII")
+    parser.add_argument("--image-ratio", type=float, default=0.1, help="Fracción de páginas solo imagen")
+    parser.add_argument("--corrupt-ratio", type=float, default=0.05, help="Fracción de archivos corruptos")
+    parser.add_argument("--match-ratio", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--modes", nargs="+", choices=pdf_engine.EXECUTION_MODES, default=list(pdf_engine.EXECUTION_MODES))
+    parser.add_argument("--criteria", type=int, nargs="+", default=[2, 100, 1000],
+                        help="Cantidades de criterios a medir")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones por medición (se toma la mejor)")
+    parser.add_argument("-o", "--output", default="bench_results.json")
+    parser.add_argument("--comparar", metavar="JSON", help="Resultados anteriores con los que comparar")
+    parser.add_argument("--ejecutar", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.ejecutar:
+        # Proceso hijo: una sola ejecución de analyze()
+        config = json.loads(args.ejecutar)
+        print(json.dumps(run_end_to_end(config["folder"], config["mode"], config["workers"], config["criteria"])))
+        return
+
+    corpus = {
+        "files": args.files,
+        "pages": args.pages,
+        "words_per_page": args.words,
+        "accents": not args.sin_acentos,
+        "image_page_ratio": args.image_ratio,
+        "corrupt_ratio": args.corrupt_ratio,
+        "match_ratio": args.match_ratio,
+        "seed": args.seed,
+    }
+    with tempfile.TemporaryDirectory() as folder:
+        paths = generate_corpus(
+            folder, files=args.files, pages=tuple(args.pages), words_per_page=tuple(args.words),
+            match_ratio=args.match_ratio, seed=args.seed, accents=not args.sin_acentos,
+            image_page_ratio=args.image_ratio, corrupt_ratio=args.corrupt_ratio
+        )
+        print(f"Corpus: {args.files} archivos, {args.pages[0]}-{args.pages[1]} páginas, "
+              f"{args.words[0]}-{args.words[1]} palabras por página, {os.cpu_count()} núcleos")
+
+        stages = bench_stages(paths, args.criteria, args.repeat)
+        print(f"Extracción:    {stages['extract']['pages_per_s']:.1f} páginas/s "
+              f"({stages['extract']['pages']} páginas)")
+        print(f"Normalización: {stages['normalize']['mb_per_s']:.1f} MB/s")
+        for m in stages["match"]:
+            print(f"Verificación:  {m['criteria']:>5} criterios  {m['pages_per_s']:.0f} páginas/s"
+                  f"{'  (autómata)' if m['automaton'] else ''}")
+
+        print(f"\n{'modo':<8} {'workers':>7} {'criterios':>9} {'archivos/s':>10} {'páginas/s':>9} "
+              f"{'RSS MB':>8} {'RSS hijos':>10}")
+        end_to_end = bench_end_to_end(folder, args.modes, sorted(set(args.workers)), args.criteria, args.repeat)
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "corpus": corpus,
+            "repeat": args.repeat,
+        },
+        "stages": stages,
+        "end_to_end": end_to_end,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados: {args.output}")
+
+    if args.comparar:
+        compare(results, args.comparar)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Compara el modo de hilos con el modo de procesos del motor de análisis.
+
+Uso:
+    python benchmarks/bench_workers.py --files 200 --pages 10 --workers 1 2 4 8
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdf_engine
+from synthetic_pdfs import generate_corpus
+
+CONDITIONS = [["contrato", "firmado"], ["factura", "pagada"]]
+
+
+def run(paths, mode, workers):
+    options = pdf_engine.AnalysisOptions(output_folder=None, workers=workers, mode=mode)
+    start = time.perf_counter()
+    matches = sum(1 for result in pdf_engine.analyze(paths, CONDITIONS, options) if result.matched)
+    return time.perf_counter() - start, matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        paths = generate_corpus(folder, files=args.files, pages=args.pages)
+        print(f"Corpus: {args.files} archivos x {args.pages} páginas, {os.cpu_count()} núcleos")
+        print(f"{'modo':<8} {'workers':>7} {'segundos':>9} {'archivos/s':>10} {'speedup':>8}")
+        baseline = None
+        for workers in sorted(set(args.workers)):
+            for mode in ("thread", "process"):
+                elapsed, matches = run(paths, mode, workers)
+                if baseline is None:
+                    baseline = elapsed
+                print(f"{mode:<8} {workers:>7} {elapsed:>9.2f} {args.files / elapsed:>10.1f} "
+                      f"{baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
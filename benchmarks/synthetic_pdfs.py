@@ -0,0 +1,137 @@
+"""Generador determinista de PDFs sintéticos para los benchmarks.
+
+No depende de librerías externas: escribe PDFs mínimos con fuente Helvetica
+(WinAnsiEncoding, para que los acentos del español se extraigan bien). Puede
+generar además páginas que solo tienen una imagen (sin texto extraíble) y
+archivos corruptos, para medir los casos que no son texto limpio.
+"""
+import os
+import random
+
+# Vocabulario de relleno con acentos y eñes
+VOCABULARIO = (
+    "el la los las de del en por para con sin sobre según durante mediante "
+    "documento información administración gestión expediente resolución "
+    "cliente proveedor número código página sección artículo cláusula "
+    "pago importe período año mes día además también según económico "
+    "acción revisión notificación dirección teléfono señor señora compañía"
+).split()
+
+# El mismo vocabulario sin acentos (texto ASCII)
+VOCABULARIO_ASCII = [
+    word.translate(str.maketrans("áéíóúñ", "aeioun")) for word in VOCABULARIO
+]
+
+# Imagen en línea de 2x2 píxeles en escala de grises, dibujada a 200x200 puntos
+_IMAGE_STREAM = b"q 200 0 0 200 100 400 cm BI /W 2 /H 2 /CS /G /BPC 8 ID \x00\xff\xff\x00 EI Q"
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def build_pdf(pages):
+    """Devuelve los bytes de un PDF con una página por cada texto de `pages` (líneas separadas por \\n).
+
+    Una página None solo contiene una imagen, sin texto.
+    """
+    objects = {}
+    kids = []
+    number = 4
+    for text in pages:
+        if text is None:
+            stream = _IMAGE_STREAM
+        else:
+            lines = " ".join(f"({_escape(line)}) '" for line in text.split('\n'))
+            stream = f"BT /F1 10 Tf 40 770 Td 12 TL {lines} ET".encode('cp1252', errors='replace')
+        objects[number] = (b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                           b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (number + 1))
+        objects[number + 1] = b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+        kids.append(number)
+        number += 2
+    objects[1] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[2] = (b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % k for k in kids) +
+                  b"] /Count %d >>" % len(kids))
+    objects[3] = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for i in sorted(objects):
+        offsets[i] = len(out)
+        out += b"%d 0 obj\n" % i + objects[i] + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % number
+    for i in range(1, number):
+        out += b"%010d 00000 n \n" % offsets[i]
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (number, xref)
+    return bytes(out)
+
+
+def write_pdf(path, pages):
+    """Escribe un PDF con una página por cada texto de `pages` (ver build_pdf)."""
+    with open(path, 'wb') as f:
+        f.write(build_pdf(pages))
+
+
+def write_corrupt_pdf(path, rng, pages):
+    """Escribe un PDF dañado: truncado a la mitad o con la tabla xref y el trailer reemplazados por basura."""
+    data = build_pdf(pages)
+    if rng.random() < 0.5:
+        data = data[:len(data) // 2]
+    else:
+        cut = data.rindex(b"xref")
+        data = data[:cut] + bytes(rng.randrange(256) for _ in range(len(data) - cut))
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def random_page(rng, words_per_page=300, words_per_line=12, extra_terms=(), vocabulary=VOCABULARIO):
+    """Genera el texto de una página, insertando `extra_terms` en posiciones aleatorias."""
+    words = [rng.choice(vocabulary) for _ in range(words_per_page)]
+    for term in extra_terms:
+        words.insert(rng.randrange(len(words) + 1), term)
+    lines = [" ".join(words[i:i + words_per_line]) for i in range(0, len(words), words_per_line)]
+    return "\n".join(lines)
+
+
+def _pick(rng, value):
+    """Un entero fijo, o uno al azar si `value` es un rango (mínimo, máximo)."""
+    if isinstance(value, int):
+        return value
+    return rng.randint(value[0], value[1])
+
+
+def generate_corpus(folder, files=20, pages=5, words_per_page=300, match_ratio=0.5,
+                    terms=("contrato", "firmado"), seed=1234, accents=True,
+                    image_page_ratio=0.0, corrupt_ratio=0.0):
+    """Genera `files` PDFs en `folder`; una fracción `match_ratio` contiene `terms` en la página 1.
+
+    - pages / words_per_page: un número fijo o un rango (mínimo, máximo) por archivo / página
+    - accents: texto en español con acentos, o el mismo vocabulario en ASCII
+    - image_page_ratio: fracción de páginas que solo tienen una imagen (nunca la página con `terms`)
+    - corrupt_ratio: fracción de archivos dañados, que no se pueden leer
+
+    Devuelve la lista de rutas generadas. Con la misma semilla el corpus es idéntico.
+    """
+    rng = random.Random(seed)
+    vocabulary = VOCABULARIO if accents else VOCABULARIO_ASCII
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for i in range(files):
+        matching = rng.random() < match_ratio
+        corrupt = corrupt_ratio and rng.random() < corrupt_ratio
+        page_texts = []
+        for page in range(_pick(rng, pages)):
+            extra = terms if (matching and page == 0) else ()
+            if image_page_ratio and not extra and rng.random() < image_page_ratio:
+                page_texts.append(None)
+                continue
+            page_texts.append(random_page(rng, _pick(rng, words_per_page), extra_terms=extra,
+                                          vocabulary=vocabulary))
+        path = os.path.join(folder, f"doc_{i:05d}.pdf")
+        if corrupt:
+            write_corrupt_pdf(path, rng, page_texts)
+        else:
+            write_pdf(path, page_texts)
+        paths.append(path)
+    return paths
@@ -0,0 +1,185 @@
+"""Extractores de texto de PDF intercambiables.
+
+PyPDF2 es el extractor de referencia y el único obligatorio. Si están
+instalados, también se pueden usar pypdfium2 (PDFium, en C++: mucho más
+rápido) y pdfminer.six (Python puro, con análisis de diseño). Distintos
+extractores pueden separar palabras o líneas de forma distinta, así que
+pdf_engine.calibrate_backends compara sus decisiones con las de PyPDF2 en
+una muestra del corpus antes de elegir uno.
+
+Cada extractor abre un archivo ya abierto en modo binario y devuelve un
+documento con:
+- page_count: cantidad de páginas
+- page_text(i): texto de la página i (puede lanzar excepciones)
+- has_text_layer(): False si ninguna página puede tener texto (puede lanzar
+  excepciones; los extractores sin un chequeo barato devuelven True)
+"""
+import io
+import re
+import PyPDF2
+
+try:
+    import pypdfium2
+except ImportError:
+    pypdfium2 = None
+
+try:
+    from pdfminer.pdfparser import PDFParser
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+except ImportError:
+    PDFParser = None
+
+# Extractores conocidos, en orden de preferencia ante un empate
+BACKENDS = ("pypdf2", "pypdfium2", "pdfminer")
+DEFAULT_BACKEND = "pypdf2"
+
+# Elegir el extractor calibrando con una muestra del corpus
+AUTO_BACKEND = "auto"
+
+
+# Operador que abre un bloque de texto en un flujo de contenido
+_TEXT_OPERATOR = re.compile(rb"(?<![A-Za-z0-9_])BT(?![A-Za-z0-9_])")
+
+
+def _has_text_forms(resources, depth=0):
+    """True si los recursos incluyen un XObject de formulario con fuentes (puede dibujar texto)."""
+    xobjects = resources.get("/XObject")
+    if not xobjects or depth > 3:
+        return False
+    for xobject in xobjects.get_object().values():
+        xobject = xobject.get_object()
+        if xobject.get("/Subtype") != "/Form":
+            continue
+        form_resources = xobject.get("/Resources")
+        if form_resources is None:
+            continue
+        form_resources = form_resources.get_object()
+        if form_resources.get("/Font") or _has_text_forms(form_resources, depth + 1):
+            return True
+    return False
+
+
+def _has_forms(resources):
+    """True si los recursos incluyen algún XObject de formulario."""
+    xobjects = resources.get("/XObject")
+    if not xobjects:
+        return False
+    return any(xobject.get_object().get("/Subtype") == "/Form" for xobject in xobjects.get_object().values())
+
+
+def _page_may_have_text(page):
+    """Chequeo barato de una página: fuentes en los recursos y operadores de texto en el contenido."""
+    resources = page.get("/Resources")
+    resources = resources.get_object() if resources is not None else {}
+    if _has_text_forms(resources):
+        return True
+    if not resources.get("/Font"):
+        return False
+    # Un formulario sin recursos propios puede escribir con las fuentes de la
+    # página (extract_text lo recorre): el contenido de la página solo tiene "Do"
+    if _has_forms(resources):
+        return True
+    contents = page.get_contents()
+    if contents is None:
+        return False
+    streams = contents if isinstance(contents, list) else [contents]
+    return any(_TEXT_OPERATOR.search(stream.get_object().get_data()) for stream in streams)
+
+
+class _PyPDF2Document:
+    def __init__(self, file):
+        self._pages = PyPDF2.PdfReader(file).pages
+        # len() recorre el árbol de páginas: es parte de preparar el lector
+        self.page_count = len(self._pages)
+
+    def page_text(self, index):
+        return self._pages[index].extract_text()
+
+    def has_text_layer(self):
+        # Revisa los recursos y flujos de contenido sin interpretarlos, y se
+        # detiene en la primera página con texto
+        return any(_page_may_have_text(page) for page in self._pages)
+
+    def close(self):
+        pass
+
+
+class _PdfiumDocument:
+    def __init__(self, file):
+        self._pdf = pypdfium2.PdfDocument(file)
+        self.page_count = len(self._pdf)
+
+    def page_text(self, index):
+        page = self._pdf[index]
+        try:
+            textpage = page.get_textpage()
+            try:
+                return textpage.get_text_range()
+            finally:
+                textpage.close()
+        finally:
+            page.close()
+
+    def has_text_layer(self):
+        return True
+
+    def close(self):
+        self._pdf.close()
+
+
+class _PdfminerDocument:
+    def __init__(self, file):
+        self._pages = list(PDFPage.create_pages(PDFDocument(PDFParser(file))))
+        self.page_count = len(self._pages)
+        resources = PDFResourceManager()
+        self._output = io.StringIO()
+        self._device = TextConverter(resources, self._output, laparams=LAParams())
+        self._interpreter = PDFPageInterpreter(resources, self._device)
+
+    def page_text(self, index):
+        self._output.seek(0)
+        self._output.truncate()
+        self._interpreter.process_page(self._pages[index])
+        return self._output.getvalue()
+
+    def has_text_layer(self):
+        return True
+
+    def close(self):
+        self._device.close()
+
+
+# Nombre -> clase del documento, o None si la biblioteca no está instalada
+_DOCUMENTS = {
+    "pypdf2": _PyPDF2Document,
+    "pypdfium2": _PdfiumDocument if pypdfium2 is not None else None,
+    "pdfminer": _PdfminerDocument if PDFParser is not None else None,
+}
+
+
+def available_backends():
+    """Nombres de los extractores instalados, en orden de preferencia."""
+    return [name for name in BACKENDS if _DOCUMENTS[name] is not None]
+
+
+def check_backend(name):
+    """Lanza ValueError si `name` no es un extractor conocido e instalado (o "auto")."""
+    if name == AUTO_BACKEND:
+        return
+    if name not in _DOCUMENTS:
+        raise ValueError(f"Extractor de texto desconocido: {name}")
+    if _DOCUMENTS[name] is None:
+        raise ValueError(f"El extractor {name} no está instalado")
+
+
+def open_document(name, file):
+    """Abre con el extractor `name` un PDF ya abierto en modo binario."""
+    document_class = _DOCUMENTS.get(name)
+    if document_class is None:
+        check_backend(name)
+        raise ValueError("El extractor \"auto\" se elige antes de abrir los archivos")
+    return document_class(file)
@@ -0,0 +1,151 @@
+"""Caché en disco del texto normalizado extraído de los PDFs.
+
+Cada entrada guarda el texto normalizado página por página, comprimido con
+zlib, en un archivo propio dentro de la carpeta de la caché. Las páginas que
+no se leyeron (por ejemplo, porque los criterios solo miraban las primeras)
+figuran como None. La clave es la
+ruta, el tamaño y la fecha de modificación del PDF ("stat"), o un hash de su
+contenido ("content"), que sigue siendo válido aunque el archivo se mueva.
+
+Las escrituras van a un archivo temporal que se renombra sobre el definitivo,
+así que varios procesos pueden escribir a la vez sin dejar entradas a medias.
+El tamaño total se limita eliminando las entradas usadas hace más tiempo
+(cada lectura actualiza la fecha de modificación de la entrada).
+"""
+import os
+import json
+import time
+import zlib
+import hashlib
+import tempfile
+
+CACHE_KEYS = ("stat", "content")
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+# Formato de las entradas; cambiarlo invalida las entradas anteriores
+# (2: las versiones anteriores guardaban como "" las páginas que el sondeo de
+# capa de texto no llegaba a extraer)
+_VERSION = 2
+_SUFFIX = ".json.z"
+
+
+class CacheEntry:
+    """Texto normalizado de un PDF: una cadena por página (None si la página no se leyó)."""
+
+    def __init__(self, pages, complete, page_count=None):
+        self.pages = pages
+        # False si falta alguna página
+        self.complete = complete
+        # Cantidad de páginas del PDF (None en entradas incompletas de versiones anteriores)
+        self.page_count = len(pages) if complete else page_count
+
+
+class TextCache:
+    """Caché de texto extraído con límite de tamaño y expulsión LRU."""
+
+    def __init__(self, folder, max_bytes=DEFAULT_MAX_BYTES, key="stat"):
+        if key not in CACHE_KEYS:
+            raise ValueError(f"Tipo de clave de caché desconocido: {key}")
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.key = key
+        # Bytes escritos desde la última revisión del tamaño total
+        self._written = 0
+        os.makedirs(folder, exist_ok=True)
+
+    def key_for(self, pdf_path, variant=None):
+        """Calcula la clave de caché de un PDF.
+
+        `variant` separa entradas del mismo PDF que no son intercambiables
+        (por ejemplo, el texto que dio otro extractor).
+        """
+        if self.key == "content":
+            digest = hashlib.sha256()
+            with open(pdf_path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(block)
+            if variant:
+                digest.update(b"\0" + variant.encode('utf-8'))
+            return digest.hexdigest()
+        stat = os.stat(pdf_path)
+        identity = f"{os.path.realpath(pdf_path)}\0{stat.st_size}\0{stat.st_mtime_ns}"
+        if variant:
+            identity += f"\0{variant}"
+        return hashlib.sha256(identity.encode('utf-8', 'surrogatepass')).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.folder, key[:2], key + _SUFFIX)
+
+    def get(self, key):
+        """Devuelve el CacheEntry de la clave, o None si no está en la caché."""
+        try:
+            entry_path = self._entry_path(key)
+            with open(entry_path, 'rb') as f:
+                data = json.loads(zlib.decompress(f.read()).decode('utf-8'))
+            if data.get("version") != _VERSION:
+                return None
+            # Marcar como usada recientemente
+            os.utime(entry_path)
+            return CacheEntry(data["pages"], data["complete"], data.get("page_count"))
+        except (OSError, ValueError, zlib.error, KeyError):
+            return None
+
+    def put(self, key, pages, complete, page_count=None):
+        """Guarda el texto normalizado de un PDF. Los errores de escritura se ignoran."""
+        try:
+            entry_path = self._entry_path(key)
+            payload = json.dumps({"version": _VERSION, "pages": pages, "complete": complete,
+                                  "page_count": page_count}, ensure_ascii=False)
+            blob = zlib.compress(payload.encode('utf-8', 'surrogatepass'))
+
+            os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(entry_path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(blob)
+                os.replace(temp_path, entry_path)
+            except OSError:
+                _remove(temp_path)
+                raise
+        except OSError:
+            return
+
+        self._written += len(blob)
+        if self._written >= self.max_bytes // 10:
+            self._written = 0
+            self.evict()
+
+    def evict(self):
+        """Elimina las entradas menos usadas hasta quedar por debajo del 90% del límite."""
+        entries = []
+        total = 0
+        for dirpath, _, filenames in os.walk(self.folder):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if name.endswith(".tmp"):
+                    # Temporales de escrituras interrumpidas hace más de un día
+                    if stat.st_mtime < time.time() - 86400:
+                        _remove(path)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * 9 // 10
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            _remove(path)
+            total -= size
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
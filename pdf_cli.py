@@ -0,0 +1,273 @@
+"""Línea de comandos del analizador de PDFs (sin interfaz gráfica).
+
+Ejemplo:
+    python pdf_cli.py /datos/entrada --criterios criterios.txt --salida "/datos/PDFs Encontrados" --workers 8
+"""
+import os
+import sys
+import argparse
+import multiprocessing
+import pdf_backends
+import pdf_cache
+import pdf_engine
+import pdf_journal
+import pdf_relocate
+import pdf_report
+import pdf_scanner
+
+
+def _count_discovered(paths, tracker):
+    """Cuenta los archivos a medida que el recorrido de carpetas los encuentra."""
+    for path in paths:
+        tracker.add_total()
+        yield path
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Analiza PDFs y mueve a la carpeta de salida los que cumplen algún criterio."
+    )
+    parser.add_argument("inputs", nargs="+", help="Carpetas o archivos PDF a analizar")
+    parser.add_argument("-c", "--criterios", required=True,
+                        help="Archivo de criterios: uno por línea, palabras separadas por comas")
+    parser.add_argument("-o", "--salida", required=True,
+                        help="Carpeta a la que se mueven los PDFs encontrados y donde se escribe el informe")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="Cantidad de workers (por defecto: un proceso por núcleo, o "
+                             f"{pdf_engine.DEFAULT_WORKERS} hilos con --modo thread)")
+    parser.add_argument("-m", "--modo", choices=pdf_engine.EXECUTION_MODES, default=pdf_engine.DEFAULT_MODE,
+                        help="Ejecutar el análisis en procesos (usa todos los núcleos) o en hilos")
+    parser.add_argument("--adaptativo", action="store_true",
+                        help="Ajustar la cantidad de workers durante la ejecución según el ritmo, la ocupación "
+                             "de la CPU y la espera de disco (--workers es el tamaño inicial)")
+    parser.add_argument("--workers-min", type=int, default=None, metavar="N",
+                        help="Mínimo de workers con --adaptativo (por defecto 1)")
+    parser.add_argument("--workers-max", type=int, default=None, metavar="N",
+                        help="Máximo de workers con --adaptativo (por defecto cuatro procesos por núcleo, o "
+                             f"{pdf_engine.DEFAULT_WORKERS * 8} hilos con --modo thread)")
+    parser.add_argument("--extractor", choices=(pdf_backends.AUTO_BACKEND,) + pdf_backends.BACKENDS,
+                        default=pdf_backends.AUTO_BACKEND,
+                        help="Biblioteca que extrae el texto: pypdf2, o pypdfium2 / pdfminer si están instalados. "
+                             "Con auto (por defecto) se prueban los instalados con los primeros archivos y se usa "
+                             "el más rápido que decide igual que pypdf2")
+    parser.add_argument("--muestra-calibracion", type=int, default=pdf_engine.DEFAULT_CALIBRATION_SAMPLE,
+                        metavar="N", help="Archivos con los que se elige el extractor con --extractor auto")
+    parser.add_argument("--cache", metavar="CARPETA",
+                        help="Carpeta de la caché de texto extraído (acelera las re-ejecuciones)")
+    parser.add_argument("--cache-max-mb", type=int, default=pdf_cache.DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="Tamaño máximo de la caché en MB")
+    parser.add_argument("--cache-clave", choices=pdf_cache.CACHE_KEYS, default="stat",
+                        help="Identificar los PDFs por ruta/tamaño/fecha (stat) o por su contenido (content)")
+    parser.add_argument("--incluir", action="append", metavar="PATRÓN",
+                        help="Patrón de nombres a analizar dentro de las carpetas (por defecto *.pdf); "
+                             "se puede repetir")
+    parser.add_argument("--excluir", action="append", default=[], metavar="PATRÓN",
+                        help="Patrón de archivos o carpetas a saltear (por ejemplo \"*/borradores\"); "
+                             "se puede repetir")
+    parser.add_argument("--min-kb", type=int, default=None, help="Saltear PDFs de menos de este tamaño en KB")
+    parser.add_argument("--max-mb", type=int, default=None, help="Saltear PDFs de más de este tamaño en MB")
+    parser.add_argument("--limite-paginas", type=int, default=None, metavar="N",
+                        help="Modo de memoria acotada: archivos de más de N páginas se tratan según --excedidos")
+    parser.add_argument("--limite-archivo-mb", type=int, default=None, metavar="MB",
+                        help="Modo de memoria acotada: archivos de más de MB megabytes se tratan según --excedidos")
+    parser.add_argument("--limite-memoria-mb", type=int, default=None, metavar="MB",
+                        help="Memoria residente máxima de cada proceso de trabajo; al superarla se deja "
+                             "de leer el archivo en curso")
+    parser.add_argument("--excedidos", choices=pdf_engine.OVERSIZE_MODES, default="lane",
+                        help="Archivos sobre los límites: analizarlos al final con pocos workers (lane), "
+                             "leer solo las primeras páginas (partial) o no analizarlos (skip)")
+    parser.add_argument("--workers-excedidos", type=int, default=1,
+                        help="Workers del carril de archivos excedidos")
+    parser.add_argument("--reubicar", choices=pdf_relocate.RELOCATE_MODES, default="move",
+                        help="Qué hacer con los PDFs encontrados: moverlos (por defecto), copiarlos, crear un "
+                             "enlace duro (hardlink) o una copia clonada (reflink), o solo informarlos (report)")
+    parser.add_argument("--colisiones", choices=pdf_relocate.COLLISION_MODES, default="suffix",
+                        help="Si el destino ya existe: agregar al nombre un sufijo derivado de la ruta de origen "
+                             "(suffix), dejar el archivo donde está (skip) o sobrescribir (overwrite)")
+    parser.add_argument("--workers-reubicacion", type=int, default=pdf_relocate.DEFAULT_RELOCATE_WORKERS,
+                        help="Hilos que mueven o copian los archivos, aparte de los workers de análisis")
+    parser.add_argument("--sin-texto", choices=pdf_engine.TEXTLESS_MODES, default="skip",
+                        help="PDFs sin capa de texto (escaneos): detectarlos sin extraer sus páginas (skip), "
+                             "además moverlos a --carpeta-sin-texto (move) o extraerlos igual (extract)")
+    parser.add_argument("--carpeta-sin-texto", metavar="CARPETA", default=None,
+                        help="Destino de los PDFs sin texto con --sin-texto move "
+                             "(por defecto, la subcarpeta \"Sin texto\" de la salida)")
+    parser.add_argument("--timeout-archivo", type=float, default=None, metavar="SEGUNDOS",
+                        help="Tiempo máximo por archivo; el proceso que lo supera se termina y se reemplaza "
+                             "(requiere --modo process)")
+    parser.add_argument("--timeout-pagina", type=float, default=None, metavar="SEGUNDOS",
+                        help="Tiempo máximo sin avanzar de página dentro de un archivo (requiere --modo process)")
+    parser.add_argument("--formato", action="append", choices=pdf_report.REPORT_FORMATS, metavar="FORMATO",
+                        help="Formato del informe: txt (por defecto), jsonl o csv; se puede repetir")
+    parser.add_argument("--intervalo-escritura", type=float, default=pdf_report.DEFAULT_FLUSH_INTERVAL,
+                        metavar="SEGUNDOS", help="Cada cuántos segundos se vuelcan los informes a disco")
+    parser.add_argument("--diario", metavar="ARCHIVO", default=None,
+                        help="Diario de la ejecución, para poder reanudarla (por defecto "
+                             f"{pdf_journal.JOURNAL_FILENAME} en la carpeta de salida)")
+    parser.add_argument("--reanudar", action="store_true",
+                        help="Continuar una ejecución interrumpida: saltea los archivos que figuran en el diario")
+    parser.add_argument("--sin-diario", action="store_true", help="No escribir el diario de la ejecución")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Muestra el resultado de cada archivo")
+    parser.add_argument("--debug", action="store_true", help="Muestra mensajes de depuración")
+    return parser
+
+
+def build_options(args):
+    """Opciones del motor a partir de los argumentos (lanza ValueError si no son válidas)."""
+    return pdf_engine.AnalysisOptions(
+        output_folder=args.salida,
+        workers=args.workers,
+        mode=args.modo,
+        adaptive=args.adaptativo,
+        min_workers=args.workers_min,
+        max_workers=args.workers_max,
+        cache_folder=args.cache,
+        cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+        cache_key=args.cache_clave,
+        max_pages=args.limite_paginas,
+        max_file_bytes=args.limite_archivo_mb * 1024 * 1024 if args.limite_archivo_mb else None,
+        rss_limit=args.limite_memoria_mb * 1024 * 1024 if args.limite_memoria_mb else None,
+        oversize=args.excedidos,
+        lane_workers=args.workers_excedidos,
+        file_timeout=args.timeout_archivo,
+        page_timeout=args.timeout_pagina,
+        textless=args.sin_texto,
+        textless_folder=args.carpeta_sin_texto,
+        relocate=args.reubicar,
+        collisions=args.colisiones,
+        relocate_workers=args.workers_reubicacion,
+        backend=args.extractor,
+        calibration_sample=args.muestra_calibracion
+    )
+
+
+def open_journal(args, conditions):
+    """Abre el diario de la ejecución según los argumentos, o devuelve None si está desactivado.
+
+    Lanza ValueError si el diario a reanudar no corresponde a estos criterios.
+    """
+    if args.sin_diario:
+        if args.reanudar:
+            raise ValueError("--reanudar necesita el diario de la ejecución")
+        return None
+    path = args.diario or os.path.join(args.salida, pdf_journal.JOURNAL_FILENAME)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    return pdf_journal.RunJournal(path, conditions, resume=args.reanudar)
+
+
+def _skip_done(paths, journal):
+    """Saltea los archivos que el diario ya tiene como terminados."""
+    for path in paths:
+        if not journal.is_done(path):
+            yield path
+
+
+def result_detail(result):
+    """Texto que acompaña al estado de un resultado en la salida detallada."""
+    detail = result.error or (', '.join(result.condition) if result.matched else "")
+    if result.limited:
+        state = ", parcial" if result.partial else ", sin analizar" if result.skipped else ""
+        detail = f"{detail} [límite: {result.limited}{state}]".lstrip()
+    return detail
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    pdf_engine.debug_enabled = args.debug
+
+    try:
+        conditions = pdf_engine.load_conditions(args.criterios)
+    except (OSError, ValueError) as e:
+        print(f"Error al leer los criterios: {str(e)}", file=sys.stderr)
+        return 2
+    if not conditions:
+        print("No hay criterios de búsqueda definidos.", file=sys.stderr)
+        return 2
+
+    def report_scan_error(path, error):
+        print(f"No se puede leer {path}: {error}", file=sys.stderr)
+
+    # Los archivos se analizan a medida que se encuentran; el total crece durante el recorrido
+    tracker = pdf_engine.ProgressTracker()
+    stats = tracker.stats
+    try:
+        options = build_options(args)
+        journal = open_journal(args, conditions)
+    except (ValueError, OSError) as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 2
+    # Los PDFs ya reubicados no se vuelven a encontrar si la salida está dentro de la entrada
+    pdf_files = pdf_scanner.scan_pdfs(
+        args.inputs,
+        include=args.incluir or pdf_scanner.DEFAULT_INCLUDE,
+        exclude=args.excluir,
+        min_size=args.min_kb * 1024 if args.min_kb is not None else None,
+        max_size=args.max_mb * 1024 * 1024 if args.max_mb is not None else None,
+        on_error=report_scan_error,
+        ignore=options.destination_folders
+    )
+    if journal is not None:
+        pdf_files = _skip_done(pdf_files, journal)
+    pdf_files = _count_discovered(pdf_files, tracker)
+
+    os.makedirs(args.salida, exist_ok=True)
+    report = pdf_report.ReportWriter(
+        pdf_report.new_log_filename(args.salida),
+        conditions,
+        formats=args.formato or ("txt",),
+        flush_interval=args.intervalo_escritura
+    )
+
+    # Al reanudar, las estadísticas y el informe incluyen lo que ya estaba hecho
+    resumed = 0
+    if journal is not None and journal.previous:
+        for result in journal.results():
+            tracker.add_total()
+            tracker.update(result)
+            report.add(result)
+        resumed = len(journal.previous)
+        print(f"Reanudando: {resumed} archivos ya terminados según {journal.path}")
+
+    try:
+        results = pdf_engine.analyze(pdf_files, conditions, options)
+        if results.calibration is not None:
+            report.calibration = results.calibration.summary()
+            print(f"Extractor de texto: {report.calibration}")
+        for result in results:
+            tracker.update(result)
+            report.add(result)
+            if journal is not None:
+                journal.record(result)
+            if args.verbose:
+                print(f"[{stats['processed']}/{stats['total']}] {result.status}: {result.path} "
+                      f"{result_detail(result)}".rstrip())
+    except KeyboardInterrupt:
+        print("Análisis interrumpido.", file=sys.stderr)
+    finally:
+        if journal is not None:
+            journal.close()
+        report.close(stats, tracker.timings)
+
+    snapshot = tracker.snapshot()
+    print(f"Procesados: {stats['processed']}  Encontrados: {stats['matches']}  Errores: {stats['errors']}")
+    print(f"Tiempo: {snapshot.elapsed:.1f} s "
+          f"({(stats['processed'] - resumed) / max(snapshot.elapsed, 1e-6):.1f} PDFs/s)")
+    if args.adaptativo and stats['workers']:
+        print(f"Workers: {stats['workers']} al final (entre {stats['workers_min']} y {stats['workers_max']})")
+    if args.cache:
+        print(f"Caché: {stats['cache_hits']} aciertos, {stats['cache_misses']} fallos")
+    if stats['textless']:
+        print(f"Sin texto extraíble: {stats['textless']}")
+    if stats['timeouts']:
+        print(f"Con tiempo agotado: {stats['timeouts']}")
+    if stats['limited']:
+        print(f"Sobre los límites de memoria: {stats['limited']}  Decididos parcialmente: {stats['partial']}  "
+              f"Sin analizar: {stats['skipped']}")
+    for report_path in report.paths.values():
+        print(f"Informe: {report_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
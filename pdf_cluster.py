@@ -0,0 +1,804 @@
+"""Modo distribuido: un coordinador reparte los PDFs entre workers de varias máquinas.
+
+Ejemplo, en la máquina que escribe el informe y mueve los encontrados:
+    python pdf_cluster.py coordinar /nas/entrada --criterios criterios.txt --salida "/nas/PDFs Encontrados" \\
+        --escuchar 0.0.0.0:8765 --clave secreto
+y en cada máquina de trabajo (también puede haber varios en la misma):
+    python pdf_cluster.py trabajar http://coordinador:8765 --clave secreto
+
+El coordinador recorre las carpetas y entrega las rutas en lotes por HTTP.
+Cada worker analiza sus lotes con el motor (pdf_engine.analyze, con el pool
+en marcha entre lote y lote) y devuelve los resultados a medida que
+terminan; los workers no mueven archivos. El coordinador reubica los
+encontrados, escribe un único informe y el diario, y suma las estadísticas
+de todos.
+
+Cada lote tiene un plazo (--plazo) que el worker renueva mientras trabaja.
+Si un worker deja de responder, los archivos de sus lotes que no tienen
+resultado vuelven a la cola para otro worker; un archivo que pierde a su
+worker --intentos veces queda como error. Si dos workers terminan el mismo
+archivo, vale el primer resultado.
+
+Protocolo (JSON sobre HTTP; con --clave, cada pedido lleva la cabecera X-Clave):
+    GET  /trabajo     -> {"criterios": [...], "opciones": {...}, "plazo": s}
+    POST /lote        {"worker"} -> {"lote": id, "rutas": [...]}; {"lote": null, "espera": s}
+                      si por ahora no hay rutas, o {"fin": true} si no queda trabajo
+    POST /resultados  {"worker", "lotes": [ids], "resultados": [...], "fin": bool} -> {"aceptados": n}
+                      también es el latido: renueva el plazo de los lotes; con "fin",
+                      lo que el worker no terminó vuelve a la cola en seguida
+
+Las rutas son las del coordinador. Si en un worker la carpeta compartida está
+montada en otro lugar, se traducen con --mapear (por ejemplo --mapear /nas=/mnt/nas).
+"""
+import os
+import sys
+import hmac
+import json
+import time
+import queue
+import signal
+import socket
+import argparse
+import threading
+import collections
+import http.server
+import urllib.error
+import urllib.request
+import multiprocessing
+import pdf_cache
+import pdf_cli
+import pdf_engine
+import pdf_journal
+import pdf_report
+import pdf_scanner
+
+# Dirección por defecto del coordinador (solo esta máquina; --escuchar 0.0.0.0:PUERTO para la red)
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+
+# Rutas por lote
+DEFAULT_BATCH_SIZE = 50
+
+# Segundos sin noticias de un worker antes de devolver sus lotes a la cola
+DEFAULT_LEASE = 60.0
+
+# Veces que un archivo puede perder a su worker antes de quedar como error
+DEFAULT_ATTEMPTS = 3
+
+# Espera que se le sugiere a un worker cuando no hay rutas para darle
+_IDLE_WAIT = 0.5
+
+# Cada cuánto el coordinador revisa los plazos vencidos
+_CHECK_INTERVAL = 1.0
+
+# Cada cuánto el worker envía los resultados terminados, y cuántos por pedido
+_SEND_INTERVAL = 0.5
+_SEND_BATCH = 200
+
+# Tamaño máximo del cuerpo de un pedido al coordinador (_SEND_BATCH resultados entran de sobra)
+_MAX_BODY = 16 * 1024 * 1024
+
+# Segundos que el worker reintenta mientras el coordinador no responde
+_RETRY_TIME = 30.0
+_REQUEST_TIMEOUT = 30.0
+
+# Al terminar, cuánto espera el coordinador a que todos los workers se enteren
+_FINISH_GRACE = 5.0
+
+# Cuánto espera la fuente de archivos del worker antes de devolverle el control al motor
+_WAIT_SLICE = 0.05
+
+# Versión del protocolo
+_VERSION = 1
+
+
+class CoordinatorError(OSError):
+    """El coordinador no responde o rechazó un pedido."""
+
+
+def parse_address(text):
+    """Separa "host:puerto" (lanza ValueError si no es válido)."""
+    host, _, port = text.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Dirección inválida (se espera HOST:PUERTO): {text}")
+    return host.strip("[]"), int(port)
+
+
+def parse_mapping(text):
+    """Separa "RUTA_DEL_COORDINADOR=RUTA_LOCAL" de --mapear."""
+    remote, sep, local = text.partition("=")
+    if not sep or not remote:
+        raise argparse.ArgumentTypeError(f"se espera RUTA_DEL_COORDINADOR=RUTA_LOCAL: {text}")
+    return remote, local
+
+
+class _Batch:
+    """Rutas entregadas a un worker que todavía no tienen resultado."""
+
+    __slots__ = ("id", "worker", "pending", "deadline")
+
+    def __init__(self, batch_id, worker, paths, deadline):
+        self.id = batch_id
+        self.worker = worker
+        self.pending = set(paths)
+        self.deadline = deadline
+
+
+class Coordinator:
+    """Cola de rutas del coordinador, con los lotes entregados y sus plazos.
+
+    take() y report() se llaman desde los hilos del servidor HTTP; los
+    resultados aceptados se consumen con results() desde un único hilo. El
+    recorrido de las carpetas (que puede tardar en discos lentos) se hace
+    fuera del lock principal, de a un hilo por vez, para no demorar los
+    latidos y los resultados de los demás workers.
+    """
+
+    def __init__(self, paths, job, batch_size=DEFAULT_BATCH_SIZE, lease=DEFAULT_LEASE, attempts=DEFAULT_ATTEMPTS):
+        # Lo que GET /trabajo entrega a los workers: criterios y opciones del análisis
+        self.job = job
+        self.batch_size = max(1, int(batch_size))
+        self.lease = lease
+        self.attempts = max(1, int(attempts))
+        self._paths = iter(paths)
+        self._exhausted = False
+        self._stopped = False
+        self._lock = threading.Lock()
+        # Solo un hilo avanza el recorrido a la vez; `_scanning` cuenta los
+        # pedidos con rutas recién recorridas que todavía no están en un lote
+        self._scan_lock = threading.Lock()
+        self._scanning = 0
+        self._batches = {}
+        self._next_id = 0
+        # Ruta pendiente -> lote que la tiene (None: está en la cola para reintentar)
+        self._owner = {}
+        self._requeued = collections.deque()
+        # Veces que cada ruta perdió a su worker
+        self._failures = collections.Counter()
+        self._results = queue.Queue()
+        # Archivos terminados por cada worker y archivos que volvieron a la cola
+        self.processed_by = collections.Counter()
+        self.reassigned = 0
+        # Último pedido de cada worker, y workers a los que ya se les dijo que no queda trabajo
+        self._seen = {}
+        self._dismissed = set()
+
+    @property
+    def finished(self):
+        return self._exhausted and not self._scanning and not self._requeued and not self._batches
+
+    def stop(self):
+        """No entregar más lotes (los resultados en camino se siguen aceptando)."""
+        with self._lock:
+            self._stopped = True
+
+    def take(self, worker):
+        """Próximo lote para `worker`: (id, rutas), (None, False) si hay que esperar o (None, True) si terminó."""
+        with self._lock:
+            self._seen[worker] = time.monotonic()
+            self._expire()
+            wanted = self.batch_size - len(self._requeued)
+            scan = not self._stopped and not self._exhausted and wanted > 0
+            if scan:
+                self._scanning += 1
+
+        fresh = []
+        if scan:
+            exhausted = False
+            with self._scan_lock:
+                if not self._exhausted:
+                    while len(fresh) < wanted:
+                        try:
+                            fresh.append(next(self._paths))
+                        except StopIteration:
+                            exhausted = True
+                            break
+
+        with self._lock:
+            if scan:
+                self._scanning -= 1
+                if exhausted:
+                    self._exhausted = True
+            paths = []
+            while not self._stopped and self._requeued and len(paths) < self.batch_size:
+                paths.append(self._requeued.popleft())
+            for pdf_path in fresh:
+                if pdf_path in self._owner:
+                    continue
+                if len(paths) < self.batch_size:
+                    paths.append(pdf_path)
+                else:
+                    # Mientras se recorría volvieron rutas a la cola: el resto espera al próximo lote
+                    self._owner[pdf_path] = None
+                    self._requeued.append(pdf_path)
+            if not paths:
+                if self._stopped or self.finished:
+                    self._dismissed.add(worker)
+                    return None, True
+                return None, False
+
+            self._next_id += 1
+            batch = _Batch(self._next_id, worker, paths, time.monotonic() + self.lease)
+            self._batches[batch.id] = batch
+            for pdf_path in paths:
+                self._owner[pdf_path] = batch.id
+            pdf_engine.debug_print(f"Lote {batch.id} para {worker}: {len(paths)} archivos")
+            return batch.id, paths
+
+    def report(self, worker, batch_ids, records, done=False):
+        """Acepta los resultados de `worker` y renueva el plazo de sus lotes. Devuelve cuántos aceptó.
+
+        Lanza ValueError si un registro no es válido (y entonces no acepta ninguno).
+        """
+        try:
+            results = [pdf_journal.result_from_record(record) for record in records]
+        except (KeyError, TypeError, AttributeError, ValueError) as e:
+            raise ValueError(f"Resultado inválido: {str(e)}")
+
+        accepted = 0
+        with self._lock:
+            self._seen[worker] = time.monotonic()
+            deadline = time.monotonic() + self.lease
+            for batch_id in batch_ids:
+                batch = self._batches.get(batch_id)
+                if batch is not None and batch.worker == worker:
+                    batch.deadline = deadline
+            for result in results:
+                if result.path not in self._owner:
+                    # Ya lo terminó otro worker, o no es un archivo de esta ejecución
+                    continue
+                batch_id = self._owner.pop(result.path)
+                if batch_id is None:
+                    self._requeued.remove(result.path)
+                else:
+                    batch = self._batches[batch_id]
+                    batch.pending.discard(result.path)
+                    if not batch.pending:
+                        del self._batches[batch_id]
+                self._failures.pop(result.path, None)
+                self.processed_by[worker] += 1
+                self._results.put(result)
+                accepted += 1
+            if done:
+                # El worker se va: lo que no terminó vuelve a la cola sin esperar el plazo
+                self._dismissed.add(worker)
+                for batch in [batch for batch in self._batches.values() if batch.worker == worker]:
+                    self._requeue(batch)
+        return accepted
+
+    def _expire(self):
+        now = time.monotonic()
+        for batch in [batch for batch in self._batches.values() if batch.deadline <= now]:
+            pdf_engine.debug_print(f"Venció el plazo del lote {batch.id} de {batch.worker}")
+            self._requeue(batch)
+
+    def _requeue(self, batch):
+        del self._batches[batch.id]
+        for pdf_path in sorted(batch.pending):
+            self._failures[pdf_path] += 1
+            if self._failures[pdf_path] >= self.attempts:
+                del self._owner[pdf_path]
+                del self._failures[pdf_path]
+                self._results.put(pdf_engine.AnalysisResult(
+                    pdf_path, error=f"Ningún worker terminó el archivo ({self.attempts} intentos)"))
+                continue
+            self._owner[pdf_path] = None
+            self._requeued.append(pdf_path)
+            self.reassigned += 1
+
+    def results(self):
+        """Entrega los resultados aceptados (None mientras no llega nada) hasta que no queda trabajo."""
+        next_check = 0.0
+        while True:
+            try:
+                result = self._results.get(timeout=_CHECK_INTERVAL / 4)
+            except queue.Empty:
+                result = None
+            yield result
+            now = time.monotonic()
+            if result is None or now >= next_check:
+                next_check = now + _CHECK_INTERVAL
+                with self._lock:
+                    self._expire()
+                    finished = self.finished
+                # Los resultados se encolan bajo el lock: si terminó, ya están todos en la cola
+                if finished and self._results.empty():
+                    return
+
+    def wait_dismissed(self, timeout):
+        """Espera hasta `timeout` segundos a que los workers activos sepan que no queda trabajo.
+
+        Los que no dieron noticias durante un plazo se consideran caídos y no se esperan.
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                active = {worker for worker, seen in self._seen.items() if seen > time.monotonic() - self.lease}
+                if active <= self._dismissed:
+                    return True
+            time.sleep(_WAIT_SLICE)
+        return False
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """Pedidos de los workers (ver el protocolo al comienzo del módulo)."""
+
+    server_version = "PdfAnalyzerCluster/1"
+
+    def log_message(self, format, *args):
+        pdf_engine.debug_print(f"{self.address_string()} {format % args}")
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError) as e:
+            # El worker se cayó durante el pedido; si era un lote, vuelve a la cola cuando vence el plazo
+            pdf_engine.debug_print(f"{self.address_string()} no recibió la respuesta: {str(e)}")
+
+    def _authorized(self):
+        key = self.server.key
+        if key is None:
+            return True
+        return hmac.compare_digest(self.headers.get("X-Clave", "").encode("utf-8"), key.encode("utf-8"))
+
+    def do_GET(self):
+        if not self._authorized():
+            return self._reply(403, {"error": "Clave incorrecta"})
+        if self.path != "/trabajo":
+            return self._reply(404, {"error": f"No existe {self.path}"})
+        self._reply(200, self.server.coordinator.job)
+
+    def do_POST(self):
+        if not self._authorized():
+            return self._reply(403, {"error": "Clave incorrecta"})
+        coordinator = self.server.coordinator
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if not 0 <= length <= _MAX_BODY:
+            return self._reply(400, {"error": "Content-Length inválido"})
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(body, dict):
+                raise ValueError("Se espera un objeto JSON")
+            worker = str(body.get("worker") or self.address_string())
+            if self.path == "/lote":
+                batch_id, paths = coordinator.take(worker)
+                if batch_id is not None:
+                    return self._reply(200, {"lote": batch_id, "rutas": paths})
+                if paths:
+                    return self._reply(200, {"fin": True})
+                return self._reply(200, {"lote": None, "espera": _IDLE_WAIT})
+            if self.path == "/resultados":
+                accepted = coordinator.report(worker, list(body.get("lotes") or ()),
+                                              list(body.get("resultados") or ()), bool(body.get("fin")))
+                return self._reply(200, {"aceptados": accepted})
+        except (ValueError, TypeError) as e:
+            return self._reply(400, {"error": str(e)})
+        self._reply(404, {"error": f"No existe {self.path}"})
+
+
+class _Server(http.server.ThreadingHTTPServer):
+    # Conexiones pendientes de aceptar (socketserver usa 5: con muchos workers a la vez se rechazarían)
+    request_queue_size = 128
+
+
+def start_server(coordinator, host, port, key=None):
+    """Atiende a los workers en un hilo aparte; devuelve el servidor (shutdown() para detenerlo)."""
+    server = _Server((host, port), _Handler)
+    server.coordinator = coordinator
+    server.key = key
+    threading.Thread(target=server.serve_forever, name="ClusterServer", daemon=True).start()
+    return server
+
+
+def job_description(conditions, options, args):
+    """Lo que el coordinador impone a todos los workers: los criterios y las opciones del análisis.
+
+    La caché y la reubicación quedan afuera (la caché es de cada máquina y
+    solo el coordinador mueve archivos). --workers y --modo valen para todos
+    los workers salvo que un worker indique los suyos; sin --workers, cada
+    uno usa los núcleos de su máquina.
+    """
+    return {
+        "version": _VERSION,
+        "criterios": [pdf_engine.format_criterion(condition) for condition in conditions],
+        "opciones": {
+            "workers": args.workers,
+            "mode": options.mode,
+            "adaptive": options.adaptive,
+            "min_workers": args.workers_min,
+            "max_workers": args.workers_max,
+            "max_pages": options.max_pages,
+            "max_file_bytes": options.max_file_bytes,
+            "rss_limit": options.rss_limit,
+            # Un worker no sabe cuándo termina la ejecución (su fuente es el coordinador):
+            # el carril de excedidos retendría esos archivos hasta el final
+            "oversize": "partial" if options.oversize == "lane" else options.oversize,
+            "lane_workers": options.lane_workers,
+            "file_timeout": options.file_timeout,
+            "page_timeout": options.page_timeout,
+            "textless": options.textless,
+            "backend": options.backend,
+            "calibration_sample": options.calibration_sample,
+        },
+        "plazo": args.plazo,
+    }
+
+
+class Worker:
+    """Cliente del coordinador: pide lotes, los analiza con el motor y devuelve los resultados.
+
+    paths() es la fuente de archivos para pdf_engine.analyze; add() recibe
+    cada resultado, y un hilo aparte los envía cada _SEND_INTERVAL segundos
+    (o un latido cada cuarto de plazo, para que los lotes no venzan
+    mientras se analizan archivos largos).
+    """
+
+    def __init__(self, url, name=None, key=None, mappings=()):
+        self.url = url.rstrip("/")
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.key = key
+        self.mappings = list(mappings)
+        self.stop_event = threading.Event()
+        # Error del hilo que envía los resultados
+        self.error = None
+        self.lease = DEFAULT_LEASE
+        self._lock = threading.Lock()
+        self._outgoing = []
+        # Lote -> rutas sin resultado, y ruta local -> (lote, ruta del coordinador)
+        self._open = {}
+        self._batch_of = {}
+        self._retry_at = 0.0
+        self._closing = threading.Event()
+        self._sender = None
+
+    def request(self, method, path, body=None):
+        """Pedido JSON al coordinador; mientras no responde se reintenta hasta _RETRY_TIME segundos."""
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"}
+        if self.key:
+            headers["X-Clave"] = self.key
+        deadline = time.monotonic() + _RETRY_TIME
+        while True:
+            request = urllib.request.Request(self.url + path, data=data, headers=headers, method=method)
+            try:
+                with urllib.request.urlopen(request, timeout=_REQUEST_TIMEOUT) as response:
+                    return json.loads(response.read().decode("utf-8"))
+            except urllib.error.HTTPError as e:
+                raise CoordinatorError(f"El coordinador rechazó {path}: {e.code} {e.reason}")
+            except (urllib.error.URLError, OSError, ValueError) as e:
+                if time.monotonic() >= deadline:
+                    raise CoordinatorError(f"No se puede contactar al coordinador en {self.url}: {str(e)}")
+                pdf_engine.debug_print(f"Reintentando {path}: {str(e)}")
+                time.sleep(1.0)
+
+    def job(self):
+        """Criterios y opciones del análisis (GET /trabajo)."""
+        job = self.request("GET", "/trabajo")
+        if job.get("version") != _VERSION:
+            raise CoordinatorError(f"Versión del protocolo distinta: {job.get('version')}")
+        self.lease = job.get("plazo") or DEFAULT_LEASE
+        return job
+
+    def to_local(self, pdf_path):
+        for remote, local in self.mappings:
+            if pdf_path.startswith(remote):
+                return local + pdf_path[len(remote):]
+        return pdf_path
+
+    def paths(self):
+        """Fuente de archivos para el motor: pide lotes hasta que el coordinador dice que terminó."""
+        while not self.stop_event.is_set():
+            wait = self._retry_at - time.monotonic()
+            if wait > 0:
+                time.sleep(min(wait, _WAIT_SLICE))
+                yield None
+                continue
+            reply = self.request("POST", "/lote", {"worker": self.name})
+            if reply.get("fin"):
+                return
+            batch_id = reply.get("lote")
+            if batch_id is None:
+                self._retry_at = time.monotonic() + (reply.get("espera") or _IDLE_WAIT)
+                yield None
+                continue
+            local_paths = []
+            with self._lock:
+                self._open[batch_id] = len(reply["rutas"])
+                for pdf_path in reply["rutas"]:
+                    local_path = self.to_local(pdf_path)
+                    self._batch_of[local_path] = (batch_id, pdf_path)
+                    local_paths.append(local_path)
+            yield from local_paths
+
+    def start(self):
+        self._sender = threading.Thread(target=self._send_loop, name="ClusterSender", daemon=True)
+        self._sender.start()
+
+    def add(self, result):
+        """Encola un resultado para el coordinador, con la ruta del coordinador y los tiempos por etapa."""
+        record = pdf_report.result_record(result)
+        record["timings"] = result.timings
+        with self._lock:
+            batch_id, record["path"] = self._batch_of.pop(result.path, (None, result.path))
+            if batch_id in self._open:
+                self._open[batch_id] -= 1
+                if not self._open[batch_id]:
+                    del self._open[batch_id]
+            self._outgoing.append(record)
+
+    def close(self):
+        """Envía lo que falta y avisa al coordinador que este worker se va."""
+        if self._sender is None:
+            return
+        self._closing.set()
+        self._sender.join()
+        self._sender = None
+
+    def _send(self, done=False):
+        while True:
+            with self._lock:
+                records = self._outgoing[:_SEND_BATCH]
+                del self._outgoing[:_SEND_BATCH]
+                batches = list(self._open)
+                last = not self._outgoing
+            self.request("POST", "/resultados", {"worker": self.name, "lotes": batches, "resultados": records,
+                                                 "fin": done and last})
+            if last:
+                return
+
+    def _send_loop(self):
+        heartbeat = max(_SEND_INTERVAL, self.lease / 4)
+        last_sent = time.monotonic()
+        try:
+            while not self._closing.wait(_SEND_INTERVAL):
+                with self._lock:
+                    waiting = bool(self._outgoing)
+                if waiting or time.monotonic() - last_sent >= heartbeat:
+                    self._send()
+                    last_sent = time.monotonic()
+            self._send(done=True)
+        except CoordinatorError as e:
+            # Sin coordinador no tiene sentido seguir: los lotes volverán a la cola cuando venzan
+            self.error = e
+            self.stop_event.set()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Reparte el análisis de PDFs entre varios workers (en esta u otras máquinas)."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    # El coordinador acepta las mismas opciones que pdf_cli
+    coordinate_cmd = commands.add_parser(
+        "coordinar", parents=[pdf_cli.build_parser()], add_help=False,
+        help="Recorre las carpetas, reparte los archivos y escribe el informe",
+        description="Recorre las carpetas y reparte los PDFs entre los workers; reubica los que cumplen "
+                    "algún criterio y escribe un único informe. --workers, --modo y los límites valen "
+                    "para todos los workers; la caché es de cada worker."
+    )
+    coordinate_cmd.add_argument("--escuchar", default=DEFAULT_ADDRESS, metavar="HOST:PUERTO",
+                                help=f"Dirección en la que se atiende a los workers (por defecto {DEFAULT_ADDRESS}, "
+                                     "solo esta máquina; 0.0.0.0:PUERTO para aceptar workers de la red)")
+    coordinate_cmd.add_argument("--clave", default=None,
+                                help="Clave que deben presentar los workers (recomendada fuera de esta máquina)")
+    coordinate_cmd.add_argument("--lote", type=int, default=DEFAULT_BATCH_SIZE, metavar="N",
+                                help="Archivos por lote")
+    coordinate_cmd.add_argument("--plazo", type=float, default=DEFAULT_LEASE, metavar="SEGUNDOS",
+                                help="Segundos sin noticias de un worker antes de dar sus lotes a otro")
+    coordinate_cmd.add_argument("--intentos", type=int, default=DEFAULT_ATTEMPTS, metavar="N",
+                                help="Veces que se entrega un archivo cuyo worker desaparece antes de "
+                                     "dejarlo como error")
+
+    work_cmd = commands.add_parser("trabajar", help="Analiza los lotes que entrega un coordinador")
+    work_cmd.add_argument("coordinador", help="URL del coordinador, por ejemplo http://servidor:8765")
+    work_cmd.add_argument("--clave", default=None, help="Clave del coordinador")
+    work_cmd.add_argument("--nombre", default=None,
+                          help="Nombre de este worker en el coordinador (por defecto máquina:pid)")
+    work_cmd.add_argument("-w", "--workers", type=int, default=None,
+                          help="Cantidad de workers de esta máquina (por defecto, la del coordinador o un "
+                               "proceso por núcleo)")
+    work_cmd.add_argument("-m", "--modo", choices=pdf_engine.EXECUTION_MODES, default=None,
+                          help="Procesos o hilos (por defecto, el del coordinador)")
+    work_cmd.add_argument("--cache", metavar="CARPETA",
+                          help="Carpeta de la caché de texto extraído de esta máquina")
+    work_cmd.add_argument("--cache-max-mb", type=int, default=pdf_cache.DEFAULT_MAX_BYTES // (1024 * 1024),
+                          help="Tamaño máximo de la caché en MB")
+    work_cmd.add_argument("--cache-clave", choices=pdf_cache.CACHE_KEYS, default="stat",
+                          help="Identificar los PDFs por ruta/tamaño/fecha (stat) o por su contenido (content)")
+    work_cmd.add_argument("--mapear", action="append", type=parse_mapping, default=[],
+                          metavar="RUTA_DEL_COORDINADOR=RUTA_LOCAL",
+                          help="Traduce las rutas que empiezan con RUTA_DEL_COORDINADOR (si la carpeta "
+                               "compartida está montada en otro lugar); se puede repetir")
+    work_cmd.add_argument("-v", "--verbose", action="store_true", help="Muestra el resultado de cada archivo")
+    work_cmd.add_argument("--debug", action="store_true", help="Muestra mensajes de depuración")
+    return parser
+
+
+def _discovered(paths, tracker, journal):
+    """Saltea lo que el diario tiene como terminado y cuenta los archivos a medida que aparecen.
+
+    El Coordinator consume este generador en los hilos del servidor HTTP (de
+    a uno por vez); add_total es seguro frente a los update del hilo principal.
+    """
+    for pdf_path in paths:
+        if journal is not None and journal.is_done(pdf_path):
+            continue
+        tracker.add_total()
+        yield pdf_path
+
+
+def coordinate(args):
+    try:
+        conditions = pdf_engine.load_conditions(args.criterios)
+    except (OSError, ValueError) as e:
+        print(f"Error al leer los criterios: {str(e)}", file=sys.stderr)
+        return 2
+    if not conditions:
+        print("No hay criterios de búsqueda definidos.", file=sys.stderr)
+        return 2
+
+    try:
+        options = pdf_cli.build_options(args)
+        host, port = parse_address(args.escuchar)
+        job = job_description(conditions, options, args)
+        journal = pdf_cli.open_journal(args, conditions)
+    except (ValueError, OSError) as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 2
+
+    def report_scan_error(path, error):
+        print(f"No se puede leer {path}: {error}", file=sys.stderr)
+
+    tracker = pdf_engine.ProgressTracker()
+    stats = tracker.stats
+    pdf_files = pdf_scanner.scan_pdfs(
+        args.inputs,
+        include=args.incluir or pdf_scanner.DEFAULT_INCLUDE,
+        exclude=args.excluir,
+        min_size=args.min_kb * 1024 if args.min_kb is not None else None,
+        max_size=args.max_mb * 1024 * 1024 if args.max_mb is not None else None,
+        on_error=report_scan_error,
+        ignore=options.destination_folders
+    )
+    coordinator = Coordinator(_discovered(pdf_files, tracker, journal), job, batch_size=args.lote,
+                              lease=args.plazo, attempts=args.intentos)
+    try:
+        server = start_server(coordinator, host, port, args.clave)
+    except OSError as e:
+        print(f"No se puede escuchar en {args.escuchar}: {str(e)}", file=sys.stderr)
+        if journal is not None:
+            journal.close()
+        return 2
+
+    os.makedirs(args.salida, exist_ok=True)
+    report = pdf_report.ReportWriter(
+        pdf_report.new_log_filename(args.salida),
+        conditions,
+        formats=args.formato or ("txt",),
+        flush_interval=args.intervalo_escritura
+    )
+
+    # Al reanudar, las estadísticas y el informe incluyen lo que ya estaba hecho
+    resumed = 0
+    if journal is not None and journal.previous:
+        for result in journal.results():
+            tracker.add_total()
+            tracker.update(result)
+            report.add(result)
+        resumed = len(journal.previous)
+        print(f"Reanudando: {resumed} archivos ya terminados según {journal.path}")
+
+    print(f"Coordinador en http://{host}:{port}, esperando workers. Ctrl+C para terminar.")
+    try:
+        for result in pdf_engine.relocate_results(coordinator.results(), options):
+            tracker.update(result)
+            report.add(result)
+            if journal is not None:
+                journal.record(result)
+            if args.verbose:
+                print(f"[{stats['processed']}/{stats['total']}] {result.status}: {result.path} "
+                      f"{pdf_cli.result_detail(result)}".rstrip())
+    except KeyboardInterrupt:
+        print("Análisis interrumpido.", file=sys.stderr)
+    finally:
+        coordinator.stop()
+        if journal is not None:
+            journal.close()
+        report.close(stats, tracker.timings)
+        coordinator.wait_dismissed(_FINISH_GRACE)
+        server.shutdown()
+        server.server_close()
+
+    snapshot = tracker.snapshot()
+    print(f"Procesados: {stats['processed']}  Encontrados: {stats['matches']}  Errores: {stats['errors']}")
+    print(f"Tiempo: {snapshot.elapsed:.1f} s "
+          f"({(stats['processed'] - resumed) / max(snapshot.elapsed, 1e-6):.1f} PDFs/s)")
+    for name, count in sorted(coordinator.processed_by.items()):
+        print(f"Worker {name}: {count} archivos")
+    if coordinator.reassigned:
+        print(f"Archivos devueltos a la cola (workers caídos o detenidos): {coordinator.reassigned}")
+    if stats['textless']:
+        print(f"Sin texto extraíble: {stats['textless']}")
+    if stats['timeouts']:
+        print(f"Con tiempo agotado: {stats['timeouts']}")
+    if stats['limited']:
+        print(f"Sobre los límites de memoria: {stats['limited']}  Decididos parcialmente: {stats['partial']}  "
+              f"Sin analizar: {stats['skipped']}")
+    for report_path in report.paths.values():
+        print(f"Informe: {report_path}")
+    return 0
+
+
+def work(args):
+    worker = Worker(args.coordinador, name=args.nombre, key=args.clave, mappings=args.mapear)
+    try:
+        job = worker.job()
+        conditions = [pdf_engine.parse_criterion(line) for line in job["criterios"]]
+        settings = dict(job["opciones"])
+        if args.workers is not None:
+            settings["workers"] = args.workers
+        if args.modo is not None:
+            settings["mode"] = args.modo
+        # Los workers solo informan: la reubicación es del coordinador
+        options = pdf_engine.AnalysisOptions(
+            output_folder=None,
+            relocate="report",
+            cache_folder=args.cache,
+            cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+            cache_key=args.cache_clave,
+            **settings
+        )
+    except (CoordinatorError, ValueError, KeyError, TypeError) as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 2
+
+    # SIGTERM, como Ctrl+C: dejar de pedir lotes, enviar lo terminado y devolver el resto
+    signal.signal(signal.SIGTERM, lambda signum, frame: worker.stop_event.set())
+    print(f"Worker {worker.name}: {options.pool_size} {'procesos' if options.mode == 'process' else 'hilos'}, "
+          f"coordinador {worker.url}")
+    worker.start()
+    processed = 0
+    started = time.monotonic()
+    try:
+        results = pdf_engine.analyze(worker.paths(), conditions, options, stop_event=worker.stop_event)
+        for result in results:
+            worker.add(result)
+            processed += 1
+            if args.verbose:
+                print(f"{result.status}: {result.path} {pdf_cli.result_detail(result)}".rstrip())
+        if results.calibration is not None:
+            print(f"Extractor de texto: {results.calibration.summary()}")
+    except CoordinatorError as e:
+        worker.error = e
+    except KeyboardInterrupt:
+        print("Worker interrumpido.", file=sys.stderr)
+    finally:
+        worker.close()
+
+    elapsed = time.monotonic() - started
+    print(f"Procesados: {processed} en {elapsed:.1f} s ({processed / max(elapsed, 1e-6):.1f} PDFs/s)")
+    if worker.error is not None:
+        print(f"Error: {str(worker.error)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    pdf_engine.debug_enabled = args.debug
+    if args.command == "coordinar":
+        return coordinate(args)
+    return work(args)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
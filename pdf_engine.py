@@ -0,0 +1,2109 @@
+"""Motor de análisis de PDFs independiente de la interfaz gráfica.
+
+Contiene la extracción de texto, la normalización y la verificación de
+criterios, y una función `analyze` que procesa una colección de archivos y
+va entregando un resultado por archivo a medida que terminan. La interfaz
+tkinter y la línea de comandos (pdf_cli.py) son consumidores de este módulo.
+"""
+import gc
+import os
+import re
+import sys
+import copy
+import math
+import time
+import signal
+import heapq
+import itertools
+import threading
+import collections
+import multiprocessing
+from concurrent import futures
+import unicodedata
+import pdf_backends
+import pdf_cache
+import pdf_query
+import pdf_relocate
+import pdf_watchdog
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Modos de ejecución: "process" reparte los archivos entre procesos (usa todos
+# los núcleos); "thread" usa hilos dentro del mismo proceso, limitados por el GIL.
+EXECUTION_MODES = ("process", "thread")
+DEFAULT_MODE = "process"
+
+# Cantidad de hilos de trabajo por defecto en modo "thread"
+DEFAULT_WORKERS = 4
+
+# Qué hacer con los archivos que superan los límites del modo de memoria acotada:
+# "lane" los analiza al final en un carril con pocos workers y sin límites de
+# tamaño, "partial" lee solo las primeras páginas y "skip" no los analiza.
+OVERSIZE_MODES = ("lane", "partial", "skip")
+
+# Páginas que se leen en modo "partial" de un archivo que supera el límite de bytes
+DEFAULT_PARTIAL_PAGES = 20
+
+# Qué hacer con los PDFs sin capa de texto (escaneos): "skip" no extrae sus
+# páginas, "move" además los mueve a una carpeta aparte y "extract" los
+# procesa como cualquier otro (sin el chequeo previo)
+TEXTLESS_MODES = ("skip", "move", "extract")
+
+# Con una fuente de archivos que puede quedar en espera (modo vigilancia), cada
+# cuántos segundos se vuelve a consultar mientras hay archivos en proceso
+IDLE_POLL_INTERVAL = 0.1
+
+# Archivos con los que se calibra el extractor con backend="auto", y cuánto
+# más rápido tiene que ser otro extractor para preferirlo a PyPDF2
+DEFAULT_CALIBRATION_SAMPLE = 20
+CALIBRATION_MIN_GAIN = 0.1
+
+# Pool adaptativo: cada cuántos segundos se revisa el tamaño, qué mejora del
+# ritmo justifica un worker más, y cuántos períodos se espera tras deshacer
+# un cambio que no sirvió (la espera se duplica con cada intento fallido)
+ADAPT_INTERVAL = 2.0
+ADAPT_MIN_GAIN = 0.05
+ADAPT_HOLD_PERIODS = 3
+ADAPT_MAX_HOLD_PERIODS = 48
+
+# Con límite de memoria, cada proceso de trabajo se reemplaza tras esta cantidad
+# de archivos, para devolver al sistema la memoria que el intérprete retiene
+WORKER_RECYCLE_TASKS = 100
+
+# Para debugging
+debug_enabled = False
+
+
+def debug_print(message):
+    """Imprime mensajes de depuración."""
+    if debug_enabled:
+        print(f"[DEBUG] {message}")
+
+
+class _FoldTable(dict):
+    """Tabla para str.translate: minúsculas + NFD sin marcas diacríticas, carácter por carácter.
+
+    Se completa a medida que aparecen caracteres nuevos, así que un texto en
+    español cuesta una búsqueda en C por carácter en lugar de varias llamadas
+    a Python.
+    """
+
+    def __missing__(self, code):
+        char = chr(code)
+        folded = ''.join(c for c in unicodedata.normalize('NFD', char.lower()) if unicodedata.category(c) != 'Mn')
+        self[code] = folded
+        return folded
+
+
+_fold_table = _FoldTable()
+# Precargar Latin-1 y Latin Extended-A (el caso habitual)
+for _code in range(0x250):
+    _fold_table[_code]
+
+# La sigma mayúscula es el único carácter cuya minúscula depende del contexto
+# (σ o ς al final de palabra); los textos que la contienen usan lower() completo.
+_SIGMA = '\u03a3'
+
+
+def _fold(texto):
+    """Minúsculas y eliminación de acentos, igual que la versión basada en NFD."""
+    if texto.isascii():
+        return texto.lower()
+    if _SIGMA in texto:
+        texto = texto.lower()
+    return texto.translate(_fold_table)
+
+
+def normalizar_texto(texto):
+    """Función para normalizar texto (eliminar acentos, espacios extras, etc.)"""
+    # Minúsculas y sin acentos; split() sin argumentos colapsa los mismos espacios que \s+
+    return ' '.join(_fold(texto).split())
+
+
+class PageScope:
+    """Páginas en las que se busca un criterio.
+
+    - "first": las primeras `first` páginas
+    - "last": las últimas `first` páginas
+    - "range": de la página `first` a la `last` (contando desde 1; last=None
+      llega hasta el final)
+    """
+
+    def __init__(self, kind, first, last=None):
+        if kind not in ("first", "last", "range"):
+            raise ValueError(f"Alcance de páginas desconocido: {kind}")
+        if first < 1 or (last is not None and (kind != "range" or last < first)):
+            raise ValueError("Rango de páginas inválido")
+        self.kind = kind
+        self.first = first
+        self.last = last
+
+    def pages(self, page_count):
+        """Índices (desde 0) de las páginas del alcance en un documento de `page_count` páginas."""
+        if self.kind == "first":
+            return range(min(self.first, page_count))
+        if self.kind == "last":
+            return range(max(0, page_count - self.first), page_count)
+        last = page_count if self.last is None else min(self.last, page_count)
+        return range(self.first - 1, last)
+
+    def _key(self):
+        return (self.kind, self.first, self.last)
+
+    def __eq__(self, other):
+        return isinstance(other, PageScope) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __str__(self):
+        if self.kind == "first":
+            return f"primeras {self.first}"
+        if self.kind == "last":
+            return f"últimas {self.first}"
+        if self.last == self.first:
+            return f"página {self.first}"
+        return f"páginas {self.first}-{'' if self.last is None else self.last}"
+
+    def __repr__(self):
+        return f"PageScope({self.kind!r}, {self.first!r}, {self.last!r})"
+
+
+class Criterion(list):
+    """Cláusulas de un criterio (ver pdf_query), con las páginas en las que se buscan (scope=None: todas)."""
+
+    def __init__(self, terms=(), scope=None):
+        super().__init__(terms)
+        self.scope = scope
+
+    def __eq__(self, other):
+        if not isinstance(other, list):
+            return NotImplemented
+        return list.__eq__(self, other) and self.scope == getattr(other, "scope", None)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+
+# Alcance al comienzo de un criterio: "primeras 2:", "últimas 1:", "páginas 3-5:", "página 4:", "páginas 3-:"
+_SCOPE_PREFIX = re.compile(
+    r"^\s*(?:(primeras?|[uú]ltimas?)\s+(\d+)|p[aá]ginas?\s+(\d+)(?:\s*(-)\s*(\d*))?)\s*:",
+    re.IGNORECASE
+)
+
+
+def parse_criterion(text):
+    """Convierte un texto "palabra1, palabra2" en un Criterion.
+
+    Cada cláusula separada por comas puede usar el lenguaje de consulta de
+    pdf_query ("pagada | cobrada", "-borrador", "factura ~50 pagada"). Un
+    texto que no es una consulta válida se lee como antes de que existieran
+    los operadores: términos separados por comas, buscados tal cual. Un
+    prefijo "primeras N:", "últimas N:" o "páginas A-B:" limita el criterio
+    a esas páginas ("factura, pagada" en "primeras 2: factura, pagada").
+    Lanza ValueError si el rango no es válido.
+    """
+    scope = None
+    match = _SCOPE_PREFIX.match(text)
+    if match:
+        scope = _scope_from_match(match)
+        text = text[match.end():]
+    text = text.lower()
+    try:
+        clauses = pdf_query.split_clauses(text)
+    except ValueError:
+        clauses = pdf_query.split_literal(text)
+    return Criterion(clauses, scope)
+
+
+def parse_scope(text):
+    """Convierte el texto de un alcance (str(PageScope): "primeras 2", "páginas 3-5") en un PageScope.
+
+    Lanza ValueError si no es un alcance válido.
+    """
+    match = _SCOPE_PREFIX.match(f"{text}:")
+    if not match or match.end() != len(text) + 1:
+        raise ValueError(f"Alcance de páginas inválido: {text}")
+    return _scope_from_match(match)
+
+
+def _scope_from_match(match):
+    kind, count, first, dash, last = match.groups()
+    if kind is not None:
+        return PageScope("first" if kind.lower().startswith("p") else "last", int(count))
+    first = int(first)
+    return PageScope("range", first, (int(last) if last else None) if dash else first)
+
+
+def format_criterion(condition):
+    """Texto de un criterio tal como se escribe en un archivo de criterios."""
+    scope = getattr(condition, "scope", None)
+    terms = ', '.join(condition)
+    return f"{scope}: {terms}" if scope is not None else terms
+
+
+def load_conditions(path):
+    """Lee un archivo de criterios: uno por línea, cláusulas separadas por comas.
+
+    Las líneas vacías y las que empiezan con '#' se ignoran. Lanza ValueError
+    si una línea tiene un rango de páginas inválido.
+    """
+    conditions = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                words = parse_criterion(line)
+            except ValueError as e:
+                raise ValueError(f"{path}, línea {number}: {str(e)}")
+            if words and words not in conditions:
+                conditions.append(words)
+    return conditions
+
+
+def normalizar_fragmento(texto):
+    """Normaliza un fragmento de texto igual que normalizar_texto, pero sin recortar los extremos.
+
+    Conserva un espacio al principio o al final si el fragmento empieza o
+    termina con espacios, para poder unir fragmentos consecutivos (por ejemplo,
+    páginas) y obtener el mismo resultado que normalizando el texto completo.
+    """
+    texto = _fold(texto)
+    words = texto.split()
+    if not words:
+        return ' ' if texto else ''
+    normalized = ' '.join(words)
+    if texto[0].isspace():
+        normalized = ' ' + normalized
+    if texto[-1].isspace():
+        normalized += ' '
+    return normalized
+
+
+# Etapas cuyo tiempo se mide en cada archivo (AnalysisResult.timings)
+STAGES = ("open", "reader", "probe", "extract", "normalize", "match", "cache", "move")
+
+
+def _add_time(timings, stage, start):
+    """Suma a timings[stage] el tiempo transcurrido desde `start` (time.perf_counter)."""
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + (time.perf_counter() - start)
+
+
+def current_rss():
+    """Memoria residente actual del proceso en bytes, o None si no se puede medir."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    return None
+
+
+class PageBudget:
+    """Límites de lectura de un archivo en el modo de memoria acotada.
+
+    iter_pdf_pages deja de leer cuando el PDF tiene más de `max_pages` páginas
+    (o, con `truncate`, lee solo las primeras `max_pages`) o cuando la memoria
+    residente del proceso supera `rss_limit` bytes, y anota el motivo
+    ("pages" o "memory") en `exceeded`.
+    """
+
+    def __init__(self, max_pages=None, rss_limit=None, truncate=False):
+        self.max_pages = max_pages
+        self.rss_limit = rss_limit
+        self.truncate = truncate
+        self.exceeded = None
+
+    def over_memory(self):
+        if not self.rss_limit:
+            return False
+        rss = current_rss()
+        if rss is None or rss <= self.rss_limit:
+            return False
+        # Antes de rendirse, liberar lo que haya quedado de archivos anteriores
+        gc.collect()
+        rss = current_rss()
+        return rss is not None and rss > self.rss_limit
+
+
+def has_text_layer(document):
+    """False si ninguna página del PDF puede mostrar texto (por ejemplo, un escaneo sin OCR).
+
+    `document` es un documento abierto con pdf_backends.open_document. Ante
+    cualquier duda devuelve True, para que el archivo se extraiga normalmente.
+    """
+    try:
+        return document.has_text_layer()
+    except Exception as e:
+        debug_print(f"No se pudo revisar la capa de texto: {str(e)}")
+        return True
+
+
+def iter_pdf_pages(pdf_path, start=0, timings=None, budget=None, probe_text=False,
+                   backend=pdf_backends.DEFAULT_BACKEND):
+    """Extrae el texto de un archivo PDF página por página, desde la página `start`.
+
+    Ver iter_pdf_page_items.
+    """
+    select = lambda page_count: range(start, page_count)
+    for _, page_text in iter_pdf_page_items(pdf_path, select, timings, budget, probe_text, backend):
+        yield page_text
+
+
+def iter_pdf_page_items(pdf_path, select=None, timings=None, budget=None, probe_text=False,
+                        backend=pdf_backends.DEFAULT_BACKEND, on_textless=None):
+    """Extrae el texto de las páginas elegidas de un PDF y entrega (índice, texto) por página.
+
+    `select(cantidad_de_páginas)` devuelve los índices (desde 0, en orden) de
+    las páginas a extraer; por defecto, todas.
+
+    Las páginas que no se pueden extraer se entregan como "". Si el consumidor
+    deja de iterar, el archivo se cierra sin leer el resto de las páginas.
+    Si se pasa un diccionario `timings`, se le suman los tiempos de las etapas
+    "open", "reader", "probe" y "extract". Con un PageBudget, la lectura se
+    corta al superar sus límites. Con `probe_text`, si el PDF no tiene capa de
+    texto (has_text_layer) se entrega "" por cada página sin extraerlas, y
+    antes se llama a `on_textless()` si se pasó.
+    `backend` es el extractor de pdf_backends que lee el archivo.
+    """
+    started = time.perf_counter()
+    try:
+        file = open(pdf_path, 'rb')
+    except Exception as e:
+        debug_print(f"Error al abrir el archivo PDF {pdf_path}: {str(e)}")
+        raise
+    finally:
+        _add_time(timings, "open", started)
+
+    with file:
+        started = time.perf_counter()
+        try:
+            document = pdf_backends.open_document(backend, file)
+        except Exception as e:
+            _add_time(timings, "reader", started)
+            debug_print(f"Error al abrir el PDF con {backend}: {str(e)}")
+            return
+        _add_time(timings, "reader", started)
+        try:
+            yield from _iter_document_pages(pdf_path, document, select, timings, budget, probe_text, on_textless)
+        finally:
+            document.close()
+
+
+def _iter_document_pages(pdf_path, document, select, timings, budget, probe_text, on_textless=None):
+    page_count = document.page_count
+    indices = select(page_count) if select is not None else range(page_count)
+    if budget is not None and budget.max_pages is not None and page_count > budget.max_pages:
+        budget.exceeded = "pages"
+        if not budget.truncate:
+            return
+        indices = [i for i in indices if i < budget.max_pages]
+
+    if probe_text:
+        started = time.perf_counter()
+        textless = not has_text_layer(document)
+        _add_time(timings, "probe", started)
+        if textless:
+            debug_print(f"Sin capa de texto: {os.path.basename(pdf_path)}")
+            if on_textless is not None:
+                on_textless()
+            for i in indices:
+                yield i, ""
+            return
+
+    for i in indices:
+        if budget is not None and budget.over_memory():
+            budget.exceeded = "memory"
+            debug_print(f"Límite de memoria superado leyendo {pdf_path}")
+            return
+        pdf_watchdog.beat()
+        started = time.perf_counter()
+        try:
+            page_text = document.page_text(i)
+        except Exception as e:
+            debug_print(f"Error al extraer texto de una página: {str(e)}")
+            page_text = ""
+        _add_time(timings, "extract", started)
+        yield i, page_text or ""
+
+
+def extract_pdf_text(pdf_path):
+    """Extrae todo el texto de un archivo PDF."""
+    return "".join(iter_pdf_pages(pdf_path))
+
+
+# A partir de esta cantidad de términos distintos conviene recorrer el texto una
+# sola vez con el autómata en lugar de buscar cada término con `in` (medido con
+# benchmarks/bench_matcher.py: el autómata cuesta lo mismo con 10 o 2000
+# términos, las búsquedas con `in` crecen linealmente).
+AUTOMATON_MIN_TERMS = 128
+
+
+class TermAutomaton:
+    """Autómata de Aho–Corasick sobre un conjunto de términos.
+
+    Una sola pasada por el texto devuelve la máscara de bits de los términos
+    presentes (bit i = términos[i]). El estado se puede conservar entre
+    llamadas para continuar la búsqueda en el fragmento siguiente.
+    """
+
+    def __init__(self, terms):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [0]
+        for index, term in enumerate(terms):
+            state = 0
+            for char in term:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(0)
+                    self.goto[state][char] = next_state
+                state = next_state
+            self.output[state] |= 1 << index
+
+        # Enlaces de fallo en orden de anchura
+        pending = collections.deque(self.goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for char, next_state in self.goto[state].items():
+                pending.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                self.output[next_state] |= self.output[self.fail[next_state]]
+
+    def scan(self, text, state=0):
+        """Recorre `text` desde `state`. Devuelve (máscara de términos encontrados, estado final)."""
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        found = 0
+        for char in text:
+            while True:
+                next_state = goto[state].get(char)
+                if next_state is not None:
+                    state = next_state
+                    break
+                if not state:
+                    break
+                state = fail[state]
+            if output[state]:
+                found |= output[state]
+        return found, state
+
+
+class ConditionMatcher:
+    """Criterios de búsqueda preparados una vez por ejecución.
+
+    Normaliza los términos de todos los criterios por adelantado, asigna un
+    bit a cada término distinto y representa cada criterio como la máscara de
+    sus términos. Las cláusulas con operadores (ver pdf_query) se compilan a
+    un único QueryPlan compartido por todos los criterios; su máscara incluye
+    además los términos que esas cláusulas necesitan sí o sí. Los criterios
+    se agrupan por alcance (Criterion.scope): los términos de cada grupo se
+    acumulan solo con las páginas de su alcance.
+    Cada documento se verifica con un DocumentScan obtenido con new_scan().
+    `use_automaton` fuerza (True) o evita (False) el autómata; por defecto se
+    usa con AUTOMATON_MIN_TERMS términos o más.
+    """
+
+    def __init__(self, conditions, use_automaton=None):
+        self.conditions = [Criterion(condition, getattr(condition, "scope", None)) for condition in conditions]
+
+        # Términos distintos, cada uno con su bit
+        self.terms = []
+        self._term_index = {}
+        self.masks = []
+        clauses = []
+        for condition in self.conditions:
+            mask = 0
+            extended = []
+            for text in condition:
+                node = pdf_query.parse_clause(text) if text.strip() else ("term", "", False)
+                if pdf_query.is_plain(node):
+                    mask |= self._term_bit(normalizar_texto(node[1]))
+                else:
+                    extended.append(node)
+            self.masks.append(mask)
+            clauses.append(extended)
+
+        # Cláusulas con operadores: None si todos los criterios son listas de términos
+        self.plan = None
+        self.roots = [None] * len(self.conditions)
+        if any(clauses):
+            self.plan = pdf_query.QueryPlan(clauses, normalizar_texto, self._term_bit)
+            self.roots = self.plan.roots
+            self.masks = [mask | required for mask, required in zip(self.masks, self.plan.required)]
+        # Un término vacío está en cualquier texto no vacío
+        self.empty_mask = self._term_bit("") if "" in self._term_index else 0
+
+        # Alcances distintos (None = todas las páginas), el grupo de cada
+        # criterio y su posición en él, y las máscaras y nodos de cada grupo
+        self.scopes = []
+        self.groups = []
+        self.positions = []
+        self.group_masks = []
+        self.group_roots = []
+        for condition, mask, root in zip(self.conditions, self.masks, self.roots):
+            if condition.scope not in self.scopes:
+                self.scopes.append(condition.scope)
+                self.group_masks.append([])
+                self.group_roots.append([])
+            group = self.scopes.index(condition.scope)
+            self.groups.append(group)
+            self.positions.append(len(self.group_masks[group]))
+            self.group_masks[group].append(mask)
+            self.group_roots[group].append(root)
+        # Con algún criterio sin alcance se leen todas las páginas
+        self.all_pages = None in self.scopes
+
+        if use_automaton is None:
+            use_automaton = len(self.terms) >= AUTOMATON_MIN_TERMS
+        self.automaton = TermAutomaton(self.terms) if use_automaton else None
+        self.term_bits = [(term, 1 << i) for i, term in enumerate(self.terms) if term]
+        # Caracteres a conservar entre páginas para encontrar términos partidos por el salto de página
+        longest = max((len(term) for term in self.terms), default=0)
+        self.overlap = max(0, longest - 1)
+
+    def _term_bit(self, term):
+        index = self._term_index.get(term)
+        if index is None:
+            index = self._term_index[term] = len(self.terms)
+            self.terms.append(term)
+        return 1 << index
+
+    def required_terms(self, index):
+        """Términos normalizados que tienen que aparecer en un documento para que cumpla el criterio `index`."""
+        mask = self.masks[index]
+        return [term for i, term in enumerate(self.terms) if mask >> i & 1]
+
+    def is_plain(self, index):
+        """True si el criterio `index` es solo una lista de términos (sin operadores)."""
+        return self.roots[index] is None
+
+    def new_scan(self):
+        return DocumentScan(self)
+
+
+class _GroupScan:
+    """Estado de la verificación de un grupo de criterios con el mismo alcance."""
+
+    __slots__ = ("masks", "roots", "pages", "remaining", "found", "has_text", "state", "tail", "ends_with_space",
+                 "query", "decided", "first", "finished", "window", "window_start", "evaluated")
+
+    def __init__(self, masks, roots, plan):
+        self.masks = masks
+        # Índices de las páginas del alcance (None = todas) y cuántas faltan recibir (None = no se sabe)
+        self.pages = None
+        self.remaining = None
+        self.found = 0
+        self.has_text = False
+        # Estado del autómata, o final del texto normalizado ya visto
+        self.state = 0
+        self.tail = ""
+        self.ends_with_space = False
+
+        # Evaluación de las cláusulas con operadores (solo si el matcher tiene un plan)
+        self.roots = roots if plan is not None else None
+        self.query = plan.new_state() if plan is not None else None
+        # Valor de cada criterio del grupo (None: todavía no se sabe) y el
+        # primero que se cumple
+        self.decided = [None] * len(masks)
+        self.first = None
+        # No llegan más páginas del alcance
+        self.finished = False
+        # Final del texto en el que se buscan las condiciones de posición, y
+        # desde dónde buscar en él (1 si se recortó: el carácter anterior
+        # sirve para saber si una palabra empieza ahí)
+        self.window = ""
+        self.window_start = 0
+        self.evaluated = -1
+
+    def feed(self, chunk, matcher):
+        if not self.has_text:
+            self.has_text = True
+            self.found |= matcher.empty_mask
+
+        if chunk.startswith(' ') and (self.ends_with_space or not self.tail):
+            chunk = chunk[1:]
+        if not chunk:
+            return
+        self.ends_with_space = chunk.endswith(' ')
+
+        if matcher.automaton is not None:
+            found, self.state = matcher.automaton.scan(chunk, self.state)
+            self.found |= found
+            self.tail = chunk[-1:]
+        else:
+            window = self.tail + chunk
+            found = self.found
+            for term, bit in matcher.term_bits:
+                if not found & bit and term in window:
+                    found |= bit
+            self.found = found
+            overlap = matcher.overlap
+            self.tail = window[-overlap:] if overlap else window[-1:]
+
+        if self.roots is not None:
+            self._advance(chunk, matcher.plan)
+
+    def _advance(self, chunk, plan):
+        window = self.window + chunk if plan.overlap else None
+        # Sin términos nuevos ni búsquedas de posición pendientes, la pasada daría lo mismo
+        if self.found != self.evaluated or self.query.checked:
+            self._evaluate(plan, window, False)
+        if window is not None:
+            if len(window) > plan.overlap:
+                self.window = window[-plan.overlap:]
+                self.window_start = 1
+            else:
+                self.window = window
+
+    def _evaluate(self, plan, window, final):
+        """Una pasada del plan sobre los criterios del grupo que todavía pueden cambiar el resultado."""
+        query = self.query
+        query.begin(self.found, window, self.window_start, final)
+        self.evaluated = self.found
+        found = self.found
+        for position, root in enumerate(self.roots):
+            # Los criterios posteriores al primero que se cumple no cambian el resultado
+            if self.first is not None and position >= self.first:
+                break
+            if self.decided[position] is not None:
+                continue
+            mask = self.masks[position]
+            value = True if found & mask == mask else (False if final else None)
+            if value is not False and root is not None:
+                root_value = plan.evaluate(root, query)
+                if root_value is not True:
+                    value = root_value
+            if value is None:
+                continue
+            self.decided[position] = value
+            if value:
+                self.first = position
+                break
+        query.window = None
+
+    def finish(self, plan):
+        """Indica que no llegan más páginas del alcance: lo que no apareció ya no aparece."""
+        if self.finished:
+            return
+        self.finished = True
+        if self.roots is not None:
+            self._evaluate(plan, self.window if plan.overlap else None, True)
+
+    @property
+    def complete(self):
+        if self.roots is not None:
+            return self.first is not None and self.has_text
+        found = self.found
+        return any(found & mask == mask for mask in self.masks)
+
+    def outcome(self, position):
+        """True si el criterio `position` se cumple, False si ya no puede cumplirse y None si todavía no se sabe."""
+        if self.matched(position):
+            return True
+        if self.finished or (self.roots is not None and self.decided[position] is False):
+            return False
+        return None
+
+    def matched(self, position):
+        if not self.has_text:
+            return False
+        if self.roots is not None:
+            return self.decided[position] is True
+        mask = self.masks[position]
+        return self.found & mask == mask
+
+
+class DocumentScan:
+    """Verificación incremental de los criterios sobre un documento.
+
+    Recibe el texto página por página con feed(). Los términos encontrados se
+    acumulan en una máscara de bits, así que un criterio puede completarse con
+    términos de páginas distintas o con un término partido entre dos páginas.
+    Las cláusulas con operadores se evalúan con el plan del matcher después de
+    cada página; `decided` indica cuándo el resultado ya no puede cambiar:
+    se cumple un criterio y todos los anteriores ya no pueden cumplirse (así
+    el criterio informado es el mismo que daría leer todo el documento), o
+    no se puede cumplir ninguno (por ejemplo, porque apareció un término
+    negado en todos).
+
+    Con criterios de alcance limitado, plan(cantidad_de_páginas) indica qué
+    páginas hace falta leer; cada página se entrega con su índice y solo
+    cuenta para los criterios cuyo alcance la incluye. Sin plan() los
+    alcances no se aplican.
+    """
+
+    def __init__(self, matcher):
+        self.matcher = matcher
+        self.groups = [_GroupScan(masks, roots, matcher.plan)
+                       for masks, roots in zip(matcher.group_masks, matcher.group_roots)]
+        # Páginas recibidas
+        self.pages = 0
+        # Cantidad de páginas del documento e índices a leer, una vez llamado plan()
+        self.page_count = None
+        self.indices = None
+        # Los criterios anteriores a este ya no pueden cumplirse
+        self._frontier = 0
+
+    @property
+    def has_text(self):
+        return any(group.has_text for group in self.groups)
+
+    def plan(self, page_count):
+        """Fija la cantidad de páginas y devuelve los índices de las que algún criterio necesita, en orden."""
+        self.page_count = page_count
+        needed = set()
+        for group, scope in zip(self.groups, self.matcher.scopes):
+            if scope is not None:
+                group.pages = scope.pages(page_count)
+                needed.update(group.pages)
+            group.remaining = len(group.pages) if group.pages is not None else page_count
+            if not group.remaining:
+                # Ninguna página del documento está en el alcance
+                group.finish(self.matcher.plan)
+        self.indices = range(page_count) if self.matcher.all_pages else sorted(needed)
+        return self.indices
+
+    def feed(self, page_text, index=None):
+        """Agrega el texto de una página. Devuelve True si el resultado ya quedó decidido."""
+        return self.feed_normalized(normalizar_fragmento(page_text), index)
+
+    def feed_normalized(self, chunk, index=None):
+        """Como feed(), pero con el texto de la página ya pasado por normalizar_fragmento.
+
+        `index` es el índice de la página en el documento (por defecto, la
+        siguiente a la última recibida).
+        """
+        if index is None:
+            index = self.pages
+        self.pages += 1
+        matcher = self.matcher
+        for group in self.groups:
+            if group.pages is None or index in group.pages:
+                if chunk:
+                    group.feed(chunk, matcher)
+                if group.remaining is not None:
+                    group.remaining -= 1
+                    if not group.remaining:
+                        group.finish(matcher.plan)
+        return self.decided
+
+    @property
+    def complete(self):
+        return any(group.complete for group in self.groups)
+
+    @property
+    def decided(self):
+        """True si el resultado ya no puede cambiar (ver la descripción de la clase)."""
+        matcher = self.matcher
+        groups = self.groups
+        while self._frontier < len(matcher.conditions):
+            outcome = groups[matcher.groups[self._frontier]].outcome(matcher.positions[self._frontier])
+            if outcome is None:
+                return False
+            if outcome:
+                return True
+            self._frontier += 1
+        return True
+
+    def result(self):
+        """Devuelve (True, criterio) con el primer criterio cumplido, o (False, None)."""
+        groups = self.groups
+        for group in groups:
+            group.finish(self.matcher.plan)
+        for condition, group, position in zip(self.matcher.conditions, self.matcher.groups, self.matcher.positions):
+            if groups[group].matched(position):
+                return True, condition
+        return False, None
+
+
+def check_pdf_conditions(pdf_text, conditions):
+    """Verifica si un PDF cumple alguna de las condiciones.
+
+    `conditions` puede ser la lista de criterios o un ConditionMatcher ya preparado.
+    `pdf_text` es el texto de todo el documento, así que los alcances de
+    página de los criterios no se aplican.
+    """
+    try:
+        matcher = conditions if isinstance(conditions, ConditionMatcher) else ConditionMatcher(conditions)
+        scan = matcher.new_scan()
+        scan.feed(pdf_text)
+        return scan.result()
+    except Exception as e:
+        debug_print(f"Error al verificar condiciones: {str(e)}")
+        # En caso de error, asumir que no cumple condiciones
+        return False, None
+
+
+def default_workers(mode=DEFAULT_MODE):
+    """Cantidad de workers por defecto: un proceso por núcleo, o 4 hilos."""
+    if mode == "process":
+        return os.cpu_count() or 1
+    return DEFAULT_WORKERS
+
+
+def default_max_workers(mode=DEFAULT_MODE):
+    """Tope del pool adaptativo: con almacenamiento lento conviene más lecturas en paralelo que núcleos."""
+    if mode == "process":
+        return (os.cpu_count() or 1) * 4
+    return DEFAULT_WORKERS * 8
+
+
+class AnalysisOptions:
+    """Parámetros de una ejecución del motor."""
+
+    def __init__(self, output_folder=None, workers=None, mode=DEFAULT_MODE,
+                 cache_folder=None, cache_max_bytes=pdf_cache.DEFAULT_MAX_BYTES, cache_key="stat",
+                 max_pages=None, max_file_bytes=None, rss_limit=None, oversize="lane", lane_workers=1,
+                 file_timeout=None, page_timeout=None, textless="skip", textless_folder=None,
+                 relocate="move", collisions="suffix", relocate_workers=pdf_relocate.DEFAULT_RELOCATE_WORKERS,
+                 adaptive=False, min_workers=None, max_workers=None,
+                 backend=pdf_backends.DEFAULT_BACKEND, calibration_sample=DEFAULT_CALIBRATION_SAMPLE):
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Modo de ejecución desconocido: {mode}")
+        if cache_key not in pdf_cache.CACHE_KEYS:
+            raise ValueError(f"Tipo de clave de caché desconocido: {cache_key}")
+        if oversize not in OVERSIZE_MODES:
+            raise ValueError(f"Tratamiento de archivos excedidos desconocido: {oversize}")
+        if relocate not in pdf_relocate.RELOCATE_MODES:
+            raise ValueError(f"Modo de reubicación desconocido: {relocate}")
+        if collisions not in pdf_relocate.COLLISION_MODES:
+            raise ValueError(f"Tratamiento de colisiones desconocido: {collisions}")
+        if textless not in TEXTLESS_MODES:
+            raise ValueError(f"Tratamiento de PDFs sin texto desconocido: {textless}")
+        pdf_backends.check_backend(backend)
+        if (file_timeout or page_timeout) and mode != "process":
+            raise ValueError("Los límites de tiempo requieren el modo process (un hilo no se puede interrumpir)")
+        # Carpeta a la que se mueven los PDFs que cumplen criterios (None = no mover)
+        self.output_folder = output_folder
+        self.mode = mode
+        self.workers = max(1, int(workers or default_workers(mode)))
+        # Pool adaptativo (ver PoolSizer): `workers` es el tamaño inicial y se
+        # ajusta durante la ejecución entre min_workers y max_workers
+        self.adaptive = adaptive
+        self.min_workers = max(1, int(min_workers or 1))
+        self.max_workers = max(self.min_workers, int(max_workers or default_max_workers(mode)))
+        if adaptive:
+            self.workers = min(max(self.workers, self.min_workers), self.max_workers)
+        # Caché de texto extraído (None = sin caché); ver pdf_cache.py
+        self.cache_folder = cache_folder
+        self.cache_max_bytes = cache_max_bytes
+        self.cache_key = cache_key
+        # Modo de memoria acotada (None = sin límite): páginas y bytes por archivo,
+        # memoria residente por proceso de trabajo (o del proceso, con hilos)
+        self.max_pages = max_pages
+        self.max_file_bytes = max_file_bytes
+        self.rss_limit = rss_limit
+        self.oversize = oversize
+        self.lane_workers = max(1, int(lane_workers))
+        # Límites de tiempo en segundos (None = sin límite): por archivo y sin
+        # avanzar de página. El proceso que los supera se mata y se reemplaza.
+        self.file_timeout = file_timeout
+        self.page_timeout = page_timeout
+        # PDFs sin texto extraíble (ver TEXTLESS_MODES); con "move" van a
+        # textless_folder, o a la subcarpeta "Sin texto" de output_folder
+        self.textless = textless
+        if textless_folder is None and output_folder:
+            textless_folder = os.path.join(output_folder, "Sin texto")
+        self.textless_folder = textless_folder
+        # Etapa de reubicación de los archivos clasificados (ver pdf_relocate)
+        self.relocate = relocate
+        self.collisions = collisions
+        self.relocate_workers = max(1, int(relocate_workers))
+        # Extractor de texto (ver pdf_backends). Con "auto", cada llamada a
+        # analyze lo elige con calibrate_backends sobre los primeros
+        # `calibration_sample` archivos (ver AnalysisRun.calibration)
+        self.backend = backend
+        self.calibration_sample = calibration_sample
+
+    @property
+    def cache_variant(self):
+        """El texto de cada extractor se guarda aparte en la caché (PyPDF2 usa las claves de siempre)."""
+        return None if self.backend == pdf_backends.DEFAULT_BACKEND else self.backend
+
+    @property
+    def pool_size(self):
+        """Procesos o hilos que puede llegar a tener el pool."""
+        return self.max_workers if self.adaptive else self.workers
+
+    @property
+    def timeouts(self):
+        return bool(self.file_timeout or self.page_timeout)
+
+    @property
+    def memory_bounded(self):
+        return bool(self.max_pages or self.max_file_bytes or self.rss_limit)
+
+    @property
+    def destination_folders(self):
+        """Carpetas a las que se reubican archivos: no hay que volver a buscar PDFs en ellas."""
+        return [folder for folder in (self.output_folder, self.textless_folder) if folder]
+
+    def for_lane(self):
+        """Opciones del carril de archivos excedidos: pocos workers, sin límites de tamaño."""
+        lane = copy.copy(self)
+        lane.workers = self.lane_workers
+        lane.adaptive = False
+        lane.max_pages = None
+        lane.max_file_bytes = None
+        # Si tampoco alcanza la memoria, se decide con las páginas leídas
+        lane.oversize = "partial"
+        return lane
+
+
+class AnalysisResult:
+    """Resultado del análisis de un archivo."""
+
+    def __init__(self, path, matched=False, condition=None, dest_path=None, error=None, pages=0, cache=None):
+        self.path = path
+        self.matched = matched
+        self.condition = condition
+        self.dest_path = dest_path
+        self.error = error
+        # Páginas leídas antes de decidir (menos que el total si hubo salida anticipada)
+        self.pages = pages
+        # "hit" si el texto salió de la caché sin abrir el PDF, "miss" si hubo que extraerlo
+        self.cache = cache
+        # Segundos por etapa (claves de STAGES) y total del archivo
+        self.timings = {}
+        self.elapsed = 0.0
+        # Modo de memoria acotada: límite superado ("pages", "bytes" o "memory"),
+        # si la decisión se tomó sin leer todas las páginas, si el archivo no se
+        # analizó (--excedidos skip) y si queda para el carril de excedidos
+        self.limited = None
+        self.partial = False
+        self.skipped = False
+        self.deferred = False
+        # Límite de tiempo superado ("file" o "page"); el archivo no se terminó de analizar
+        self.timed_out = None
+        # Ninguna página tiene texto extraíble (escaneo sin OCR, solo imágenes)
+        self.textless = False
+        # Tamaño del pool cuando terminó el archivo
+        self.workers = None
+        # Extractor de texto con el que se analizó
+        self.backend = None
+
+    @property
+    def filename(self):
+        return os.path.basename(self.path)
+
+    @property
+    def status(self):
+        if self.timed_out:
+            return "timeout"
+        if self.error is not None:
+            return "error"
+        if self.matched:
+            return "match"
+        return "no_text" if self.textless else "no_match"
+
+    def __repr__(self):
+        return f"AnalysisResult({self.filename!r}, status={self.status!r}, condition={self.condition!r})"
+
+
+def new_stats(total=0):
+    """Crea el diccionario de estadísticas de una ejecución."""
+    return {
+        "total": total,
+        "processed": 0,
+        "matches": 0,
+        "errors": 0,
+        "timeouts": 0,
+        "textless": 0,
+        "cache_hits": 0,
+        "cache_misses": 0,
+        "limited": 0,
+        "partial": 0,
+        "skipped": 0,
+        # Tamaño del pool: el último informado y el rango recorrido
+        "workers": 0,
+        "workers_min": 0,
+        "workers_max": 0
+    }
+
+
+def update_stats(stats, result):
+    """Acumula un AnalysisResult en el diccionario de estadísticas."""
+    stats["processed"] += 1
+    if result.timed_out:
+        stats["timeouts"] += 1
+    elif result.error is not None:
+        stats["errors"] += 1
+    elif result.matched:
+        stats["matches"] += 1
+    elif result.textless:
+        stats["textless"] += 1
+    if result.cache == "hit":
+        stats["cache_hits"] += 1
+    elif result.cache == "miss":
+        stats["cache_misses"] += 1
+    if result.limited:
+        stats["limited"] += 1
+    if result.partial:
+        stats["partial"] += 1
+    if result.skipped:
+        stats["skipped"] += 1
+    if result.workers:
+        stats["workers"] = result.workers
+        stats["workers_min"] = min(stats["workers_min"] or result.workers, result.workers)
+        stats["workers_max"] = max(stats["workers_max"], result.workers)
+
+
+class LatencyHistogram:
+    """Histograma de duraciones en cubetas logarítmicas de memoria constante.
+
+    Los percentiles se informan con el límite superior de su cubeta (error
+    relativo de hasta un 5%); el máximo es exacto.
+    """
+
+    _BASE = 1e-6
+    _GROWTH = 1.05
+
+    def __init__(self):
+        self.buckets = collections.Counter()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        if seconds > self._BASE:
+            bucket = int(math.log(seconds / self._BASE, self._GROWTH)) + 1
+        else:
+            bucket = 0
+        self.buckets[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, fraction):
+        """Duración por debajo de la cual queda la fracción `fraction` de las muestras."""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= target:
+                return min(self._BASE * self._GROWTH ** bucket, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total": self.total,
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+        }
+
+
+class TimingStats:
+    """Tiempos por etapa de una ejecución: un histograma por etapa y los archivos más lentos."""
+
+    def __init__(self, slowest=10):
+        self.stages = {}
+        self.total = LatencyHistogram()
+        # Desde que el archivo apareció hasta su resultado (solo en modo vigilancia)
+        self.latency = LatencyHistogram()
+        self.slowest_count = slowest
+        # Montículo de (segundos, orden, ruta, tiempos por etapa) con los más lentos
+        self._slowest = []
+        self._added = 0
+
+    def add(self, result, latency=None):
+        if latency is not None:
+            self.latency.add(latency)
+        for stage, seconds in result.timings.items():
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = LatencyHistogram()
+            histogram.add(seconds)
+        self.total.add(result.elapsed)
+
+        self._added += 1
+        entry = (result.elapsed, self._added, result.path, dict(result.timings))
+        if len(self._slowest) < self.slowest_count:
+            heapq.heappush(self._slowest, entry)
+        elif self.slowest_count and entry > self._slowest[0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def summary(self):
+        """Resumen por etapa (en el orden de STAGES) más el total por archivo."""
+        ordered = sorted(self.stages, key=lambda stage: STAGES.index(stage) if stage in STAGES else len(STAGES))
+        summary = {stage: self.stages[stage].summary() for stage in ordered}
+        summary["total"] = self.total.summary()
+        if self.latency.count:
+            summary["latency"] = self.latency.summary()
+        return summary
+
+    def slowest(self):
+        """Lista de (ruta, segundos, tiempos por etapa) de los archivos más lentos, del más lento al menos."""
+        return [(path, seconds, timings) for seconds, _, path, timings in sorted(self._slowest, reverse=True)]
+
+
+class ProgressSnapshot:
+    """Estado del progreso en un instante: estadísticas, velocidad y tiempo restante."""
+
+    def __init__(self, stats, elapsed, rate, eta):
+        self.stats = stats
+        self.elapsed = elapsed
+        # Archivos por segundo en la ventana reciente (0 si todavía no hay datos)
+        self.rate = rate
+        # Segundos estimados hasta procesar el total conocido, o None
+        self.eta = eta
+
+    @property
+    def percent(self):
+        return self.stats["processed"] / max(1, self.stats["total"]) * 100
+
+
+class ProgressTracker:
+    """Canal de progreso entre los hilos que procesan y quien muestra el avance.
+
+    Los productores solo suman contadores bajo un lock (update, add_total);
+    el consumidor llama a snapshot() a su propio ritmo, así que el costo de
+    mostrar el progreso no depende de cuántos archivos terminan por segundo.
+    Los tiempos por etapa se acumulan en `timings` (TimingStats).
+
+    update y add_total se pueden llamar desde cualquier hilo a la vez (en
+    pdf_cluster, add_total corre en los hilos del servidor HTTP mientras el
+    principal llama a update). snapshot() es de un único consumidor: la
+    ventana de velocidad no se protege. Leer `stats` o `timings` sin el lock
+    solo es exacto cuando los productores ya terminaron (para los informes
+    finales). `clock` da los segundos (time.monotonic; las pruebas pasan un
+    reloj propio).
+    """
+
+    def __init__(self, total=0, window=5.0, clock=time.monotonic):
+        self.stats = new_stats(total)
+        self.timings = TimingStats()
+        self.window = window
+        self._clock = clock
+        self.started = clock()
+        self._lock = threading.Lock()
+        # Muestras (instante, procesados) de la ventana reciente, para la velocidad
+        self._samples = collections.deque()
+
+    def add_total(self, count=1):
+        with self._lock:
+            self.stats["total"] += count
+
+    def update(self, result, latency=None):
+        with self._lock:
+            update_stats(self.stats, result)
+            self.timings.add(result, latency)
+
+    def snapshot(self):
+        """Copia de las estadísticas con la velocidad reciente y el tiempo restante estimado."""
+        with self._lock:
+            stats = dict(self.stats)
+        now = self._clock()
+        self._samples.append((now, stats["processed"]))
+        while len(self._samples) > 2 and self._samples[1][0] <= now - self.window:
+            self._samples.popleft()
+
+        since, processed_since = self._samples[0]
+        if now - since >= 1.0:
+            rate = (stats["processed"] - processed_since) / (now - since)
+        else:
+            # Al principio no hay ventana: usar el promedio desde el inicio
+            rate = stats["processed"] / max(now - self.started, 1e-6)
+        remaining = stats["total"] - stats["processed"]
+        eta = remaining / rate if rate > 0 else None
+        return ProgressSnapshot(stats, now - self.started, rate, eta)
+
+
+def _cpu_times():
+    """(ocupado, espera de E/S, total) acumulados de la CPU del sistema, o None si no se pueden medir."""
+    try:
+        with open('/proc/stat') as f:
+            values = [int(value) for value in f.readline().split()[1:9]]
+        idle, iowait = values[3], values[4]
+        total = sum(values)
+        return (total - idle - iowait, iowait, total)
+    except (OSError, ValueError, IndexError):
+        pass
+    if psutil is not None:
+        times = psutil.cpu_times()
+        iowait = getattr(times, "iowait", 0.0)
+        total = sum(times)
+        return (total - times.idle - iowait, iowait, total)
+    return None
+
+
+class PoolSizer:
+    """Tamaño adaptativo del pool: cuántos archivos se procesan a la vez.
+
+    Cada `interval` segundos compara el ritmo (archivos por segundo) con el
+    del período anterior y mira la ocupación de la CPU y la espera de E/S:
+    - si el último cambio no mejoró el ritmo, lo deshace y deja pasar
+      ADAPT_HOLD_PERIODS períodos antes de volver a probar;
+    - si hay CPU libre o mucha espera de E/S (almacenamiento lento), agrega
+      un worker;
+    - si la CPU está saturada sin espera de E/S, quita uno.
+    Sin medición de CPU se decide solo por el ritmo. `clock` da los
+    segundos (time.monotonic; las pruebas pasan un reloj propio).
+    """
+
+    def __init__(self, initial, minimum, maximum, interval=ADAPT_INTERVAL, clock=time.monotonic):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.size = min(max(initial, minimum), maximum)
+        self.interval = interval
+        self._clock = clock
+        # (segundos desde el inicio, tamaño, archivos/s, CPU ocupada, espera de E/S) de cada cambio
+        self.history = []
+        self._started = self._since = clock()
+        self._completed = 0
+        self._cpu = _cpu_times()
+        self._rate = None
+        # +1 o -1 si el último cambio fue una prueba que todavía hay que evaluar
+        self._trial = 0
+        self._hold = 0
+        self._backoff = ADAPT_HOLD_PERIODS
+
+    def completed(self):
+        """Registra un archivo terminado y, si pasó un período, revisa el tamaño."""
+        self._completed += 1
+        now = self._clock()
+        if now - self._since >= self.interval:
+            self._adjust(now)
+
+    def _adjust(self, now):
+        rate = self._completed / (now - self._since)
+        cpu = _cpu_times()
+        busy = iowait = None
+        if cpu is not None and self._cpu is not None and cpu[2] > self._cpu[2]:
+            total = cpu[2] - self._cpu[2]
+            busy = (cpu[0] - self._cpu[0]) / total
+            iowait = (cpu[1] - self._cpu[1]) / total
+        self._cpu = cpu
+        self._completed = 0
+        self._since = now
+        previous, self._rate = self._rate, rate
+
+        # La prueba del período anterior se evalúa ahora; si no se confirma se
+        # deshace, y ese retroceso no se vuelve a evaluar
+        trial, self._trial = self._trial, 0
+        change = 0
+        if (trial > 0 and rate < previous * (1 + ADAPT_MIN_GAIN)) or \
+                (trial < 0 and rate < previous * (1 - ADAPT_MIN_GAIN)):
+            # Un worker más no sirvió, o uno menos empeoró el ritmo: volver atrás
+            change = -trial
+            self._hold = self._backoff
+            self._backoff = min(self._backoff * 2, ADAPT_MAX_HOLD_PERIODS)
+        elif trial:
+            self._backoff = ADAPT_HOLD_PERIODS
+        elif self._hold:
+            self._hold -= 1
+        elif busy is None or busy < 0.85 or iowait > 0.2:
+            change = self._trial = 1
+        elif busy > 0.97 and iowait < 0.05:
+            change = self._trial = -1
+
+        size = min(max(self.size + change, self.minimum), self.maximum)
+        if size == self.size:
+            self._trial = 0
+            return
+        self.size = size
+        self.history.append((now - self._started, size, rate, busy, iowait))
+        load = f", CPU {busy:.0%}, E/S {iowait:.0%}" if busy is not None else ""
+        debug_print(f"Pool adaptativo: {size} workers ({rate:.1f} archivos/s{load})")
+
+
+# Caché de texto de cada proceso, creada al primer uso
+_caches = {}
+
+
+def _get_cache(options):
+    if not options.cache_folder:
+        return None
+    # Opciones con la misma carpeta pueden identificar los PDFs de distinta forma (pdf_service)
+    cache_id = (options.cache_folder, options.cache_key)
+    cache = _caches.get(cache_id)
+    if cache is None:
+        cache = pdf_cache.TextCache(options.cache_folder, options.cache_max_bytes, options.cache_key)
+        _caches[cache_id] = cache
+    return cache
+
+
+class _PageSource:
+    """Texto normalizado de las páginas que pide un DocumentScan, de la caché o del PDF.
+
+    Entrega (índice, texto normalizado) en el orden de scan.plan. Las páginas
+    que están en `pages` (índice -> texto, None si falta) salen de ahí; el PDF
+    se abre recién cuando hace falta la primera que no está, y lo que se
+    extrae se agrega a `pages`. `opened` indica si hubo que abrir el PDF.
+
+    Si el sondeo de capa de texto saltea la extracción (`probed_textless`),
+    las páginas se entregan como "" pero no se agregan a `pages`: ese texto
+    vacío depende de la política --sin-texto y no debe quedar en la caché
+    como si se hubiera extraído.
+    """
+
+    def __init__(self, pdf_path, scan, pages, options, timings, budget):
+        self.pdf_path = pdf_path
+        self.scan = scan
+        self.pages = pages
+        self.options = options
+        self.timings = timings
+        self.budget = budget
+        self.opened = False
+        self.probed_textless = False
+
+    def _cached(self, index):
+        return index < len(self.pages) and self.pages[index] is not None
+
+    def __iter__(self):
+        scan = self.scan
+        pages = self.pages
+        # Páginas del plan ya entregadas desde la caché
+        done = 0
+        if scan.page_count is None and scan.matcher.all_pages:
+            # Se leen todas las páginas: el comienzo guardado sirve sin saber cuántas son
+            while self._cached(done):
+                yield done, pages[done]
+                done += 1
+        elif scan.page_count is not None:
+            for index in scan.indices:
+                if not self._cached(index):
+                    break
+                yield index, pages[index]
+                done += 1
+            else:
+                return
+
+        def select(page_count):
+            if scan.page_count is None:
+                scan.plan(page_count)
+            return [index for index in scan.indices[done:] if not self._cached(index)]
+
+        self.opened = True
+        fresh = iter_pdf_page_items(self.pdf_path, select, self.timings, self.budget,
+                                    self.options.textless != "extract", self.options.backend,
+                                    self._on_textless)
+        try:
+            # La primera página a extraer también resuelve el plan si faltaba la cantidad de páginas
+            pending = next(fresh, None)
+            if scan.indices is None:
+                return
+            for index in scan.indices[done:]:
+                if self._cached(index):
+                    yield index, pages[index]
+                    continue
+                item = pending if pending is not None else next(fresh, None)
+                pending = None
+                if item is None:
+                    # No se pudieron leer más páginas (límites de memoria)
+                    return
+                page_text = item[1]
+                if self.probed_textless:
+                    yield index, ""
+                    continue
+                started = time.perf_counter()
+                chunk = normalizar_fragmento(page_text)
+                _add_time(self.timings, "normalize", started)
+                if index >= len(pages):
+                    pages.extend([None] * (index + 1 - len(pages)))
+                pages[index] = chunk
+                yield index, chunk
+        finally:
+            fresh.close()
+
+    def _on_textless(self):
+        self.probed_textless = True
+
+
+def _scan_pdf(pdf_path, matcher, options, result, budget=None):
+    """Recorre las páginas del PDF hasta que el resultado queda decidido o no quedan páginas por leer.
+
+    Solo se leen las páginas que necesita algún criterio (ver PageScope). Con
+    caché, primero se usan las páginas ya guardadas y solo se abre el PDF si
+    hacen falta páginas que todavía no se extrajeron; lo nuevo se agrega a la
+    entrada de la caché.
+
+    Si se leyeron todas las páginas y ninguna tiene texto, marca result.textless.
+    """
+    scan = matcher.new_scan()
+    timings = result.timings
+    cache = _get_cache(options)
+    entry = None
+    if cache is not None:
+        started = time.perf_counter()
+        key = cache.key_for(pdf_path, options.cache_variant)
+        entry = cache.get(key)
+        _add_time(timings, "cache", started)
+    pages = entry.pages if entry else []
+    if entry is not None and entry.page_count is not None:
+        scan.plan(entry.page_count)
+
+    source = _PageSource(pdf_path, scan, pages, options, timings, budget)
+    has_text = False
+    read_all = True
+    for index, chunk in source:
+        has_text = has_text or (chunk != "" and not chunk.isspace())
+        started = time.perf_counter()
+        scan.feed_normalized(chunk, index)
+        _add_time(timings, "match", started)
+        if scan.decided:
+            # Sin coincidencias, el resultado suele quedar decidido recién con la última página
+            read_all = scan.indices is not None and index == scan.indices[-1]
+            break
+    if read_all:
+        _mark_textless(result, scan, has_text, budget)
+
+    if cache is not None:
+        result.cache = "miss" if source.opened else "hit"
+        if source.opened and not source.probed_textless and scan.page_count is not None:
+            complete = len(pages) >= scan.page_count and None not in pages
+            started = time.perf_counter()
+            cache.put(key, pages, complete, scan.page_count)
+            _add_time(timings, "cache", started)
+    return scan
+
+
+def _pages_have_text(pages):
+    return any(chunk and not chunk.isspace() for chunk in pages)
+
+
+def _mark_textless(result, scan, has_text, budget):
+    """Marca el resultado como sin texto si se leyeron todas sus páginas (al menos una) y ninguna tenía texto."""
+    if has_text or scan.pages == 0:
+        return
+    if budget is not None and budget.exceeded:
+        return
+    if scan.page_count is not None and scan.pages < scan.page_count:
+        # Los criterios solo miraban algunas páginas
+        return
+    result.textless = True
+
+
+def extract_normalized_pages(pdf_path, options=None):
+    """Devuelve el texto normalizado (normalizar_fragmento) de todas las páginas del PDF.
+
+    Usa la caché de `options` si está configurada, completando las entradas parciales.
+    """
+    backend = options.backend if options is not None else pdf_backends.DEFAULT_BACKEND
+    cache = _get_cache(options) if options is not None else None
+    if cache is None:
+        return [normalizar_fragmento(page_text) for page_text in iter_pdf_pages(pdf_path, backend=backend)]
+
+    key = cache.key_for(pdf_path, options.cache_variant)
+    entry = cache.get(key)
+    if entry and entry.complete:
+        return entry.pages
+    pages = entry.pages if entry else []
+    page_count = None
+
+    def missing(count):
+        nonlocal page_count
+        page_count = count
+        return [index for index in range(count) if index >= len(pages) or pages[index] is None]
+
+    for index, page_text in iter_pdf_page_items(pdf_path, missing, backend=backend):
+        if index >= len(pages):
+            pages.extend([None] * (index + 1 - len(pages)))
+        pages[index] = normalizar_fragmento(page_text)
+    if page_count is not None and None not in pages:
+        cache.put(key, pages, True, page_count)
+    return [chunk or "" for chunk in pages]
+
+
+def join_normalized(pages):
+    """Une páginas normalizadas en el mismo texto que normalizar_texto daría sobre el documento completo."""
+    text = ""
+    for chunk in pages:
+        if chunk.startswith(' ') and (not text or text.endswith(' ')):
+            chunk = chunk[1:]
+        text += chunk
+    return text.rstrip(' ')
+
+
+def _relocation_folder(result, options):
+    """Carpeta a la que va el archivo de `result`, o None si se queda donde está."""
+    if result.error is not None:
+        return None
+    if result.matched:
+        return options.output_folder
+    if result.textless and options.textless == "move":
+        return options.textless_folder
+    return None
+
+
+def _relocate_result(relocator, result, folder):
+    """Etapa de reubicación (en los hilos de analyze): mueve, copia o enlaza el archivo de `result`."""
+    started = time.perf_counter()
+    try:
+        result.dest_path = relocator.relocate(result.path, folder)
+        debug_print(f"Archivo reubicado en: {result.dest_path}")
+    except pdf_relocate.DestinationExists as e:
+        # Sigue siendo una coincidencia, pero el archivo se queda donde está
+        result.dest_path = None
+        debug_print(f"No se reubica {result.filename}: {str(e)}")
+    except Exception as e:
+        debug_print(f"Error reubicando {result.filename}: {str(e)}")
+        result.error = f"No se pudo reubicar: {str(e)}"
+    moved = time.perf_counter() - started
+    result.timings["move"] = result.timings.get("move", 0.0) + moved
+    result.elapsed += moved
+    return result
+
+
+def process_pdf(pdf_path, matcher, options):
+    """Analiza un único PDF y decide si cumple criterios.
+
+    Las páginas se extraen de a una y la extracción se detiene en cuanto el
+    resultado queda decidido (ver DocumentScan.decided). El archivo no se mueve: de eso se encarga la
+    etapa de reubicación de analyze.
+    """
+    result = AnalysisResult(pdf_path)
+    started = time.perf_counter()
+    try:
+        _process_pdf(pdf_path, matcher, options, result)
+    except Exception as e:
+        debug_print(f"Error procesando {result.filename}: {str(e)}")
+        result.error = str(e)
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def _process_pdf(pdf_path, matcher, options, result):
+    budget = None
+    if options.memory_bounded:
+        budget = PageBudget(options.max_pages, options.rss_limit, truncate=options.oversize == "partial")
+        if options.max_file_bytes and os.path.getsize(pdf_path) > options.max_file_bytes:
+            result.limited = "bytes"
+            if options.oversize == "lane":
+                result.deferred = True
+                return
+            if options.oversize == "skip":
+                result.skipped = True
+                return
+            budget.max_pages = options.max_pages or DEFAULT_PARTIAL_PAGES
+            budget.truncate = True
+
+    scan = _scan_pdf(pdf_path, matcher, options, result, budget)
+    result.pages = scan.pages
+    result.backend = options.backend
+
+    # Un resultado ya decidido es definitivo aunque queden páginas sin leer
+    if budget is not None and budget.exceeded and not scan.decided:
+        result.limited = result.limited or budget.exceeded
+        debug_print(f"Archivo sobre el límite ({result.limited}): {result.filename}")
+        if options.oversize == "lane":
+            result.deferred = True
+            return
+        if options.oversize == "skip" and scan.pages == 0:
+            # Sobre el límite de páginas: no se llegó a leer ninguna
+            result.skipped = True
+        else:
+            result.partial = True
+
+    # Verificar si el PDF cumple alguna de las condiciones
+    match_found, condition_matched = scan.result()
+
+    if match_found:
+        debug_print(f"Archivo cumple criterios: {result.filename}")
+        result.matched = True
+        result.condition = condition_matched
+    elif result.textless:
+        debug_print(f"Archivo sin texto extraíble: {result.filename}")
+    else:
+        debug_print(f"Archivo no cumple criterios: {result.filename}")
+
+
+# Estado de cada proceso de trabajo (se inicializa una vez por proceso)
+_worker_matcher = None
+_worker_options = None
+
+
+def _init_worker(matcher, options, debug):
+    global _worker_matcher, _worker_options, debug_enabled
+    # Ctrl+C lo maneja el proceso principal, que decide qué hacer con lo pendiente
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_matcher = matcher
+    _worker_options = options
+    debug_enabled = debug
+
+
+def _call_in_worker(function, pdf_path):
+    """Punto de entrada en los procesos: solo viaja de vuelta el resultado de `function`."""
+    return function(pdf_path, _worker_matcher, _worker_options)
+
+
+def _run_pool(paths, function, matcher, options, stop_event, on_failure, relocator=None):
+    """Aplica function(pdf_path, matcher, options) a cada ruta en los workers.
+
+    Entrega los resultados en orden de finalización. Si un worker termina de
+    forma inesperada o se lo mata por superar un límite de tiempo, entrega
+    on_failure(pdf_path, excepción) para ese archivo. Con un `relocator`, los
+    archivos a reubicar pasan antes por options.relocate_workers hilos del
+    proceso principal, y su resultado se entrega cuando terminan.
+
+    Si un worker muere de golpe en modo "process" (un fallo nativo del
+    extractor, el sistema lo mata por memoria), ProcessPoolExecutor queda
+    inutilizable: se crea un pool nuevo y los archivos que estaban en curso
+    se vuelven a analizar de a uno, así el que lo tira abajo queda solo y es
+    el único que se entrega con on_failure.
+
+    Si `paths` entrega None, la fuente no tiene archivos por ahora: se siguen
+    entregando los resultados y se la vuelve a consultar en seguida.
+    """
+    if options.timeouts:
+        def new_executor():
+            return pdf_watchdog.WatchdogExecutor(
+                max_workers=options.pool_size,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(matcher, options, debug_enabled),
+                file_timeout=options.file_timeout,
+                page_timeout=options.page_timeout,
+                max_tasks_per_child=WORKER_RECYCLE_TASKS if options.rss_limit else None
+            )
+
+        def submit(pdf_path):
+            return executor.submit(_call_in_worker, function, pdf_path)
+    elif options.mode == "process":
+        pool_kwargs = {}
+        if options.rss_limit and sys.version_info >= (3, 11):
+            pool_kwargs["max_tasks_per_child"] = WORKER_RECYCLE_TASKS
+
+        def new_executor():
+            return futures.ProcessPoolExecutor(
+                max_workers=options.pool_size,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(matcher, options, debug_enabled),
+                **pool_kwargs
+            )
+
+        def submit(pdf_path):
+            return executor.submit(_call_in_worker, function, pdf_path)
+    else:
+        def new_executor():
+            return futures.ThreadPoolExecutor(max_workers=options.pool_size)
+
+        def submit(pdf_path):
+            return executor.submit(function, pdf_path, matcher, options)
+    executor = new_executor()
+
+    relocation_pool = None
+    if relocator is not None and relocator.mode != "report":
+        relocation_pool = futures.ThreadPoolExecutor(max_workers=options.relocate_workers,
+                                                     thread_name_prefix="Relocator")
+
+    # Límite de archivos en vuelo (analizándose o reubicándose): la enumeración
+    # no se adelanta al procesamiento. Con el pool adaptativo, la cantidad de
+    # archivos que se analizan a la vez es el tamaño elegido por PoolSizer.
+    max_pending = options.workers * 4
+    sizer = None
+    if options.adaptive:
+        sizer = PoolSizer(options.workers, options.min_workers, options.max_workers)
+        max_pending = options.max_workers * 4
+    pending = {}
+    relocating = set()
+    # Después de una caída del pool: archivos que estaban en curso (se
+    # reintentan de a uno), el que se está reintentando y los ya tomados de
+    # `paths` que no se llegaron a enviar
+    suspects = collections.deque()
+    alone = None
+    unsent = collections.deque()
+    paths = iter(paths)
+    exhausted = False
+    try:
+        while True:
+            idle = False
+            broken = False
+            if suspects:
+                if not pending and not stop_event.is_set():
+                    pdf_path = suspects.popleft()
+                    try:
+                        alone = submit(pdf_path)
+                        pending[alone] = pdf_path
+                    except futures.BrokenExecutor:
+                        suspects.appendleft(pdf_path)
+                        broken = True
+            else:
+                while (unsent or not exhausted) and not stop_event.is_set() \
+                        and len(pending) + len(relocating) < max_pending \
+                        and (sizer is None or len(pending) < sizer.size):
+                    if unsent:
+                        pdf_path = unsent.popleft()
+                    else:
+                        try:
+                            pdf_path = next(paths)
+                        except StopIteration:
+                            exhausted = True
+                            break
+                        if pdf_path is None:
+                            idle = True
+                            break
+                        debug_print(f"Añadido a la cola: {os.path.basename(pdf_path)}")
+                    try:
+                        pending[submit(pdf_path)] = pdf_path
+                    except futures.BrokenExecutor:
+                        unsent.appendleft(pdf_path)
+                        broken = True
+                        break
+
+            if not broken:
+                # Al cancelar no se esperan más análisis, pero sí las reubicaciones ya empezadas
+                waiting = relocating if stop_event.is_set() else relocating.union(pending)
+                if not waiting:
+                    if idle and not stop_event.is_set():
+                        continue
+                    break
+
+                done, _ = futures.wait(waiting, timeout=IDLE_POLL_INTERVAL if idle else None,
+                                       return_when=futures.FIRST_COMPLETED)
+                for future in done:
+                    if future in relocating:
+                        relocating.discard(future)
+                        yield future.result()
+                        continue
+                    pdf_path = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except futures.BrokenExecutor as e:
+                        broken = True
+                        if future is not alone:
+                            # Puede haber sido otro de los archivos en curso
+                            suspects.append(pdf_path)
+                            continue
+                        debug_print(f"El worker murió procesando {pdf_path}: {str(e)}")
+                        result = on_failure(pdf_path, e)
+                    except Exception as e:
+                        # Un proceso de trabajo terminó de forma inesperada o se lo mató
+                        debug_print(f"Error en worker procesando {pdf_path}: {str(e)}")
+                        result = on_failure(pdf_path, e)
+                    if sizer is not None:
+                        sizer.completed()
+                    if isinstance(result, AnalysisResult):
+                        result.workers = sizer.size if sizer is not None else options.workers
+                    folder = _relocation_folder(result, options) if relocation_pool is not None else None
+                    if folder:
+                        relocating.add(relocation_pool.submit(_relocate_result, relocator, result, folder))
+                        continue
+                    yield result
+
+            if broken:
+                # Los análisis que seguían en el pool caído no van a terminar
+                suspects.extend(pending.values())
+                pending.clear()
+                alone = None
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = new_executor()
+    finally:
+        # Terminó, se canceló o el consumidor dejó de iterar: no empezar nada más.
+        # stop_event es del llamador y no se toca (solo lo activa quien cancela).
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+        if relocation_pool is not None:
+            # No dejar copias a medias
+            relocation_pool.shutdown(wait=True)
+
+
+class AnalysisRun:
+    """Lo que devuelve analyze: se itera para obtener los AnalysisResult.
+
+    `backend` es el extractor con el que se analiza y `calibration` el
+    resultado de calibrate_backends si se eligió con "auto" (None si no).
+    """
+
+    def __init__(self, results, backend, calibration=None):
+        self._results = results
+        self.backend = backend
+        self.calibration = calibration
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._results)
+
+    def close(self):
+        """Deja de entregar resultados (como cerrar el generador)."""
+        self._results.close()
+
+
+def analyze(paths, conditions, options=None, stop_event=None, **kwargs):
+    """Analiza los PDFs de `paths` y entrega un AnalysisResult por archivo (ver AnalysisRun).
+
+    `paths` puede ser cualquier iterable (también un generador); se consume a
+    medida que los workers quedan libres. Los resultados se entregan en orden
+    de finalización, no en el orden de entrada. En modo "process" la
+    extracción, la normalización y la verificación de criterios ocurren en
+    los procesos de trabajo. Si se activa `stop_event` (o el consumidor deja
+    de iterar), no se inician archivos nuevos.
+
+    En el modo de memoria acotada (options.max_pages, max_file_bytes o
+    rss_limit), los archivos que superan un límite se tratan según
+    options.oversize; con "lane" se analizan al final, con
+    options.lane_workers workers, y su resultado indica el límite superado.
+
+    Los archivos que cumplen criterios (y los sin texto, con textless="move")
+    se reubican en una etapa aparte, con options.relocate_workers hilos del
+    proceso principal; su resultado se entrega cuando la reubicación terminó.
+
+    Con options.backend "auto", antes de empezar se elige el extractor con
+    calibrate_backends sobre los primeros options.calibration_sample archivos.
+    `options` no se modifica: la ejecución usa una copia con el elegido.
+    """
+    if options is None:
+        options = AnalysisOptions(**kwargs)
+    if stop_event is None:
+        stop_event = threading.Event()
+    # Los criterios se preparan una sola vez para toda la ejecución
+    matcher = ConditionMatcher(conditions)
+
+    calibration = None
+    if options.backend == pdf_backends.AUTO_BACKEND:
+        options = copy.copy(options)
+        if len(pdf_backends.available_backends()) > 1:
+            sample, paths = _calibration_sample(paths, options.calibration_sample)
+            calibration = calibrate_backends(sample, matcher, max_pages=options.max_pages)
+            options.backend = calibration.chosen
+        else:
+            options.backend = pdf_backends.DEFAULT_BACKEND
+
+    if options.output_folder:
+        os.makedirs(options.output_folder, exist_ok=True)
+    relocator = pdf_relocate.Relocator(options.relocate, options.collisions)
+
+    results = _run_pool(paths, process_pdf, matcher, options, stop_event, _failed_result, relocator)
+    if options.memory_bounded and options.oversize == "lane":
+        results = _with_lane(results, matcher, options, stop_event, relocator)
+    return AnalysisRun(results, options.backend, calibration)
+
+
+def relocate_results(results, options):
+    """Etapa de reubicación de analyze para resultados analizados en otro lado (ver pdf_cluster).
+
+    `results` entrega AnalysisResult, o None mientras no hay nada nuevo (como
+    las fuentes de analyze). Los archivos a reubicar pasan por
+    options.relocate_workers hilos y su resultado se entrega cuando terminan;
+    el resto se entrega en seguida.
+    """
+    if options.output_folder:
+        os.makedirs(options.output_folder, exist_ok=True)
+    relocator = pdf_relocate.Relocator(options.relocate, options.collisions)
+    if relocator.mode == "report":
+        for result in results:
+            if result is not None:
+                yield result
+        return
+
+    relocation_pool = futures.ThreadPoolExecutor(max_workers=options.relocate_workers,
+                                                 thread_name_prefix="Relocator")
+    max_pending = options.relocate_workers * 4
+    relocating = set()
+    try:
+        for result in results:
+            if len(relocating) >= max_pending:
+                done, relocating = futures.wait(relocating, return_when=futures.FIRST_COMPLETED)
+            else:
+                done = {future for future in relocating if future.done()}
+                relocating -= done
+            for future in done:
+                yield future.result()
+            if result is None:
+                continue
+            folder = _relocation_folder(result, options)
+            if folder:
+                relocating.add(relocation_pool.submit(_relocate_result, relocator, result, folder))
+            else:
+                yield result
+        for future in futures.as_completed(relocating):
+            yield future.result()
+    finally:
+        # No dejar copias a medias
+        relocation_pool.shutdown(wait=True)
+
+
+class Calibration:
+    """Resultado de calibrate_backends: tiempo y diferencias de cada extractor en la muestra."""
+
+    def __init__(self, sample, reference=pdf_backends.DEFAULT_BACKEND):
+        # Archivos de la muestra
+        self.sample = sample
+        self.reference = reference
+        # Extractor -> segundos que tardó en decidir toda la muestra
+        self.seconds = {}
+        # Extractor -> archivos en los que su decisión difiere de la de la referencia
+        self.disagreements = {}
+        self.chosen = reference
+
+    def summary(self):
+        """Texto de una línea con el elegido y lo medido, para la consola y el informe."""
+        details = []
+        for name, seconds in self.seconds.items():
+            detail = f"{name} {seconds:.2f} s"
+            if self.disagreements.get(name):
+                detail += f" ({len(self.disagreements[name])} diferencias)"
+            details.append(detail)
+        return f"{self.chosen} (muestra de {self.sample} archivos: {', '.join(details)})"
+
+
+def _sample_decision(pdf_path, matcher, backend, budget):
+    """Decide un archivo de la muestra como lo haría process_pdf, sin caché. Devuelve (decisión, segundos)."""
+    started = time.perf_counter()
+    scan = matcher.new_scan()
+    for index, page_text in iter_pdf_page_items(pdf_path, scan.plan, budget=budget, backend=backend):
+        scan.feed(page_text, index)
+        if scan.decided:
+            break
+    return scan.result(), time.perf_counter() - started
+
+
+def calibrate_backends(paths, matcher, backends=None, max_pages=None):
+    """Elige el extractor más rápido que decide igual que PyPDF2 en los archivos de `paths`.
+
+    Cada extractor instalado (o los de `backends`) decide cada archivo de la
+    muestra, deteniéndose como siempre en cuanto el resultado queda decidido. Se
+    descarta un extractor si alguna decisión (cumple o no, y qué criterio)
+    difiere de la de PyPDF2; entre los demás se elige el más rápido, si le
+    saca a PyPDF2 al menos CALIBRATION_MIN_GAIN. Con `max_pages` se leen a lo
+    sumo esas páginas de cada archivo.
+    """
+    reference = pdf_backends.DEFAULT_BACKEND
+    backends = [name for name in backends or pdf_backends.available_backends() if name != reference]
+    calibration = Calibration(len(paths), reference)
+    if not backends or not paths:
+        return calibration
+
+    # Una lectura previa, para que la caché del sistema no favorezca al primer extractor
+    for pdf_path in paths:
+        try:
+            with open(pdf_path, 'rb') as f:
+                while f.read(1024 * 1024):
+                    pass
+        except OSError:
+            pass
+
+    decisions = {}
+    for name in [reference] + backends:
+        calibration.seconds[name] = 0.0
+        calibration.disagreements[name] = []
+        for pdf_path in paths:
+            budget = PageBudget(max_pages, truncate=True) if max_pages else None
+            try:
+                decision, seconds = _sample_decision(pdf_path, matcher, name, budget)
+            except Exception as e:
+                decision, seconds = ("error", str(e)), 0.0
+            calibration.seconds[name] += seconds
+            if name == reference:
+                decisions[pdf_path] = decision
+            elif decision != decisions[pdf_path]:
+                calibration.disagreements[name].append(pdf_path)
+
+    best = calibration.seconds[reference] * (1 - CALIBRATION_MIN_GAIN)
+    for name in backends:
+        if not calibration.disagreements[name] and calibration.seconds[name] < best:
+            calibration.chosen, best = name, calibration.seconds[name]
+    debug_print(f"Extractor elegido: {calibration.summary()}")
+    return calibration
+
+
+def _calibration_sample(paths, size):
+    """Toma hasta `size` rutas del comienzo de `paths` (sin esperar si la fuente entrega None).
+
+    Devuelve (muestra, iterable con todas las rutas, incluida la muestra).
+    """
+    if size <= 0:
+        return [], paths
+    paths = iter(paths)
+    sample = []
+    idle = []
+    for pdf_path in paths:
+        if pdf_path is None:
+            idle.append(None)
+            break
+        sample.append(pdf_path)
+        if len(sample) >= size:
+            break
+    return sample, itertools.chain(sample, idle, paths)
+
+
+def _failed_result(pdf_path, error):
+    """Resultado de un archivo cuyo worker terminó de forma inesperada o superó un límite de tiempo."""
+    result = AnalysisResult(pdf_path, error=str(error))
+    if isinstance(error, pdf_watchdog.WorkerTimeout):
+        result.timed_out = error.limit
+    return result
+
+
+def _with_lane(results, matcher, options, stop_event, relocator):
+    """Entrega los resultados y, al final, analiza en el carril de excedidos los archivos diferidos."""
+    deferred = {}
+    for result in results:
+        if result.deferred:
+            deferred[result.path] = result.limited
+            continue
+        yield result
+
+    if not deferred or stop_event.is_set():
+        return
+    debug_print(f"Carril de excedidos: {len(deferred)} archivos")
+    for result in _run_pool(deferred, process_pdf, matcher, options.for_lane(), stop_event, _failed_result,
+                            relocator):
+        result.limited = result.limited or deferred[result.path]
+        yield result
+
+
+class ExtractedDocument:
+    """Texto normalizado de todas las páginas de un PDF, para indexarlo."""
+
+    def __init__(self, path, pages=None, size=None, mtime_ns=None, error=None):
+        self.path = path
+        self.pages = pages or []
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.error = error
+
+
+def _extract_document(pdf_path, matcher, options):
+    try:
+        stat = os.stat(pdf_path)
+        pages = extract_normalized_pages(pdf_path, options)
+        return ExtractedDocument(pdf_path, pages, stat.st_size, stat.st_mtime_ns)
+    except Exception as e:
+        debug_print(f"Error extrayendo {pdf_path}: {str(e)}")
+        return ExtractedDocument(pdf_path, error=str(e))
+
+
+def extract_documents(paths, options=None, stop_event=None, **kwargs):
+    """Extrae el texto normalizado completo de cada PDF en los workers (ver analyze).
+
+    Entrega un ExtractedDocument por archivo, en orden de finalización.
+    """
+    if options is None:
+        options = AnalysisOptions(**kwargs)
+    if stop_event is None:
+        stop_event = threading.Event()
+    if options.backend == pdf_backends.AUTO_BACKEND:
+        # Sin criterios no hay decisiones que comparar: el índice usa el extractor de referencia
+        options = copy.copy(options)
+        options.backend = pdf_backends.DEFAULT_BACKEND
+    on_failure = lambda pdf_path, error: ExtractedDocument(pdf_path, error=str(error))
+    return _run_pool(paths, _extract_document, None, options, stop_event, on_failure)
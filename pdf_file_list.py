@@ -0,0 +1,187 @@
+"""Lista virtual de archivos para la interfaz gráfica.
+
+Un Treeview con una cantidad fija de filas que muestra una ventana sobre los
+datos (rutas y estado de cada archivo). Al desplazarse solo se reescriben las
+filas visibles, así que agregar o actualizar decenas de miles de archivos no
+bloquea la interfaz ni crea un elemento de Tk por archivo.
+"""
+import os
+import threading
+import tkinter as tk
+from tkinter import ttk
+
+PENDING = "pending"
+
+# Texto y color de cada estado (los de pdf_engine.AnalysisResult.status)
+STATUS_LABELS = {
+    PENDING: "Pendiente",
+    "match": "Encontrado",
+    "no_match": "Sin coincidencia",
+    "no_text": "Sin texto",
+    "error": "Error",
+    "timeout": "Tiempo agotado",
+}
+STATUS_COLORS = {
+    PENDING: "#7f8c8d",
+    "match": "#27ae60",
+    "no_match": "#2c3e50",
+    "no_text": "#8e44ad",
+    "error": "#e74c3c",
+    "timeout": "#e67e22",
+}
+
+
+class VirtualFileList(ttk.Frame):
+    """Lista de archivos con columnas de estado que solo dibuja las filas visibles.
+
+    Los métodos que modifican los datos (set_paths, append, set_status, clear)
+    pueden llamarse desde cualquier hilo: actualizan los datos bajo un lock y
+    marcan la ventana visible para redibujar. Tk solo se toca desde el hilo
+    principal: ahí el redibujado es inmediato, y los cambios que llegan desde
+    otros hilos se dibujan cuando el hilo principal llama a refresh() (la
+    interfaz lo hace en cada cuadro de progreso).
+    """
+
+    def __init__(self, parent, rows=8, font=None):
+        super().__init__(parent)
+        self.rows = rows
+        self.first = 0
+        self.paths = []
+        self.statuses = []
+        self.details = {}
+        self.index_of = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        self.tree = ttk.Treeview(
+            self,
+            columns=("num", "name", "status", "detail"),
+            show="headings",
+            height=rows,
+            selectmode="none"
+        )
+        self.tree.heading("num", text="#")
+        self.tree.heading("name", text="Archivo")
+        self.tree.heading("status", text="Estado")
+        self.tree.heading("detail", text="Detalle")
+        self.tree.column("num", width=60, anchor=tk.E, stretch=False)
+        self.tree.column("name", width=320)
+        self.tree.column("status", width=120, stretch=False)
+        self.tree.column("detail", width=200)
+        for status, color in STATUS_COLORS.items():
+            self.tree.tag_configure(status, foreground=color)
+        if font is not None:
+            ttk.Style().configure("Treeview", font=font)
+
+        # Filas fijas que se reutilizan al desplazarse
+        self.row_ids = [self.tree.insert("", tk.END, values=("", "", "", "")) for _ in range(rows)]
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # La rueda del mouse desplaza la lista y no la ventana principal
+        self.tree.bind("<MouseWheel>", lambda e: self._scroll_rows(int(-1 * (e.delta / 120)) * 3))
+        self.tree.bind("<Button-4>", lambda e: self._scroll_rows(-3))
+        self.tree.bind("<Button-5>", lambda e: self._scroll_rows(3))
+
+        self._refresh()
+
+    def __len__(self):
+        return len(self.paths)
+
+    def set_paths(self, paths):
+        """Reemplaza el contenido de la lista; todos los archivos quedan pendientes."""
+        with self._lock:
+            self.paths = list(paths)
+            self.statuses = [PENDING] * len(self.paths)
+            self.details = {}
+            self.index_of = {path: i for i, path in enumerate(self.paths)}
+            self.first = 0
+        self._schedule_refresh()
+
+    def append(self, path):
+        """Agrega un archivo pendiente al final de la lista."""
+        with self._lock:
+            self.index_of[path] = len(self.paths)
+            self.paths.append(path)
+            self.statuses.append(PENDING)
+        self._schedule_refresh()
+
+    def clear(self):
+        self.set_paths([])
+
+    def reset_statuses(self):
+        """Vuelve a marcar todos los archivos como pendientes."""
+        with self._lock:
+            self.statuses = [PENDING] * len(self.paths)
+            self.details = {}
+        self._schedule_refresh()
+
+    def set_status(self, path, status, detail=""):
+        """Actualiza el estado de un archivo (ignora rutas que no están en la lista)."""
+        with self._lock:
+            index = self.index_of.get(path)
+            if index is None:
+                return
+            self.statuses[index] = status
+            if detail:
+                self.details[index] = detail
+            else:
+                self.details.pop(index, None)
+            visible = self.first <= index < self.first + self.rows
+        if visible:
+            self._schedule_refresh()
+
+    def _schedule_refresh(self):
+        with self._lock:
+            self._dirty = True
+        if threading.current_thread() is threading.main_thread():
+            self._refresh()
+
+    def refresh(self):
+        """Redibuja si hubo cambios desde el último redibujado (solo desde el hilo principal)."""
+        with self._lock:
+            dirty = self._dirty
+        if dirty:
+            self._refresh()
+
+    def _scroll_rows(self, delta):
+        self._scroll_to(self.first + delta)
+        return "break"
+
+    def _scroll_to(self, first):
+        with self._lock:
+            self.first = max(0, min(first, len(self.paths) - self.rows))
+        self._refresh()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self._scroll_to(int(float(value) * len(self.paths)))
+        elif action == "scroll":
+            step = self.rows if unit == "pages" else 1
+            self._scroll_rows(int(value) * step)
+
+    def _refresh(self):
+        """Redibuja las filas visibles a partir de los datos."""
+        with self._lock:
+            self._dirty = False
+            total = len(self.paths)
+            first = self.first = max(0, min(self.first, total - self.rows))
+            rows = []
+            for offset in range(self.rows):
+                index = first + offset
+                if index < total:
+                    status = self.statuses[index]
+                    rows.append(((index + 1, os.path.basename(self.paths[index]),
+                                  STATUS_LABELS.get(status, status), self.details.get(index, "")),
+                                 (status,)))
+                else:
+                    rows.append((("", "", "", ""), ()))
+
+        for row_id, (values, tags) in zip(self.row_ids, rows):
+            self.tree.item(row_id, values=values, tags=tags)
+        if total > self.rows:
+            self.scrollbar.set(first / total, (first + self.rows) / total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
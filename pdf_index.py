@@ -0,0 +1,367 @@
+"""Índice de texto completo de un corpus de PDFs (SQLite FTS5).
+
+Guarda el texto normalizado de cada PDF (un documento por archivo y,
+opcionalmente, una fila por página) para que evaluar un conjunto de criterios
+sea una consulta al índice en lugar de volver a leer todos los archivos.
+Usa el tokenizador trigram de FTS5, que busca subcadenas: un término se
+encuentra en las mismas condiciones que en check_pdf_conditions.
+
+Ejemplos:
+    python pdf_index.py indexar indice.db /datos/entrada --workers 8
+    python pdf_index.py consultar indice.db -c criterios.txt -o "/datos/PDFs Encontrados"
+    python pdf_index.py quitar indice.db /datos/entrada/viejo.pdf
+"""
+import os
+import sys
+import sqlite3
+import argparse
+import multiprocessing
+import pdf_engine
+import pdf_relocate
+import pdf_report
+import pdf_scanner
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER,
+    mtime_ns INTEGER,
+    pages INTEGER
+);
+CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(text, tokenize='trigram');
+CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+    text, document_id UNINDEXED, page UNINDEXED, tokenize='trigram'
+);
+"""
+
+# Los términos más cortos no se pueden buscar con trigramas y se resuelven con LIKE
+_MIN_TRIGRAM_TERM = 3
+
+
+class PdfIndex:
+    """Índice persistente del texto normalizado de un conjunto de PDFs.
+
+    Las rutas se guardan y se buscan absolutas: "./a.pdf" y "/datos/a.pdf"
+    son el mismo documento.
+    """
+
+    def __init__(self, db_path, per_page=False):
+        """Abre (o crea) el índice. `per_page` queda guardado en el índice una vez activado."""
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        try:
+            self.conn.executescript(_SCHEMA)
+        except sqlite3.OperationalError as e:
+            raise RuntimeError(f"SQLite {sqlite3.sqlite_version} no soporta FTS5 con trigramas "
+                               f"(hace falta 3.34 o superior): {str(e)}")
+        with self.conn:
+            if per_page:
+                self.conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('per_page', '1')")
+            row = self.conn.execute("SELECT value FROM settings WHERE key = 'per_page'").fetchone()
+        self.per_page = row is not None and row[0] == '1'
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def paths(self):
+        return [row[0] for row in self.conn.execute("SELECT path FROM documents ORDER BY path")]
+
+    def is_current(self, pdf_path):
+        """True si el PDF está indexado y no cambió desde entonces."""
+        pdf_path = os.path.abspath(pdf_path)
+        row = self.conn.execute("SELECT size, mtime_ns FROM documents WHERE path = ?", (pdf_path,)).fetchone()
+        if row is None:
+            return False
+        try:
+            stat = os.stat(pdf_path)
+        except OSError:
+            return False
+        return (stat.st_size, stat.st_mtime_ns) == tuple(row)
+
+    def add(self, document):
+        """Agrega o reemplaza un pdf_engine.ExtractedDocument."""
+        pdf_path = os.path.abspath(document.path)
+        with self.conn:
+            self._delete(pdf_path)
+            cursor = self.conn.execute(
+                "INSERT INTO documents (path, size, mtime_ns, pages) VALUES (?, ?, ?, ?)",
+                (pdf_path, document.size, document.mtime_ns, len(document.pages))
+            )
+            document_id = cursor.lastrowid
+            self.conn.execute("INSERT INTO documents_fts (rowid, text) VALUES (?, ?)",
+                              (document_id, pdf_engine.join_normalized(document.pages)))
+            if self.per_page:
+                self.conn.executemany(
+                    "INSERT INTO pages_fts (text, document_id, page) VALUES (?, ?, ?)",
+                    [(chunk, document_id, number)
+                     for number, chunk in enumerate(document.pages, start=1) if chunk]
+                )
+
+    def remove(self, pdf_path):
+        """Quita un PDF del índice. Devuelve True si estaba indexado."""
+        with self.conn:
+            return self._delete(os.path.abspath(pdf_path))
+
+    def _delete(self, pdf_path):
+        row = self.conn.execute("SELECT id FROM documents WHERE path = ?", (pdf_path,)).fetchone()
+        if row is None:
+            return False
+        self.conn.execute("DELETE FROM documents_fts WHERE rowid = ?", row)
+        self.conn.execute("DELETE FROM pages_fts WHERE document_id = ?", row)
+        self.conn.execute("DELETE FROM documents WHERE id = ?", row)
+        return True
+
+    def rename(self, old_path, new_path):
+        """Actualiza la ruta de un PDF indexado que se movió sin cambiar su contenido."""
+        old_path, new_path = os.path.abspath(old_path), os.path.abspath(new_path)
+        with self.conn:
+            self._delete(new_path)
+            self.conn.execute("UPDATE documents SET path = ? WHERE path = ?", (new_path, old_path))
+
+    def update(self, paths, options=None, stop_event=None):
+        """Indexa los PDFs nuevos o modificados de `paths` (los demás no se vuelven a leer).
+
+        Devuelve (agregados, sin cambios, errores).
+        """
+        unchanged = 0
+
+        def stale_paths():
+            nonlocal unchanged
+            for pdf_path in paths:
+                if self.is_current(pdf_path):
+                    unchanged += 1
+                else:
+                    yield pdf_path
+
+        added = errors = 0
+        for document in pdf_engine.extract_documents(stale_paths(), options, stop_event):
+            if document.error is not None:
+                errors += 1
+                continue
+            self.add(document)
+            added += 1
+        return added, unchanged, errors
+
+    def prune(self, roots):
+        """Quita los PDFs indexados bajo `roots` que ya no existen. Devuelve cuántos se quitaron."""
+        roots = [os.path.join(os.path.abspath(root), '') for root in roots]
+        removed = 0
+        for pdf_path in self.paths():
+            under_root = any(os.path.abspath(pdf_path).startswith(root) for root in roots)
+            if under_root and not os.path.exists(pdf_path):
+                # Tal como está guardada (en índices anteriores puede ser relativa)
+                with self.conn:
+                    removed += self._delete(pdf_path)
+        return removed
+
+    def _matching_ids(self, terms):
+        """Ids de los documentos que contienen todos los términos normalizados."""
+        long_terms = [term for term in terms if len(term) >= _MIN_TRIGRAM_TERM]
+        short_terms = [term for term in terms if len(term) < _MIN_TRIGRAM_TERM]
+
+        clauses = []
+        params = []
+        if long_terms:
+            clauses.append("documents_fts MATCH ?")
+            params.append(" AND ".join('"' + term.replace('"', '""') + '"' for term in long_terms))
+        for term in short_terms:
+            if term:
+                clauses.append("text LIKE ? ESCAPE '\\'")
+                escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+                params.append(f"%{escaped}%")
+            else:
+                clauses.append("text != ''")
+        if not clauses:
+            # Sin términos imprescindibles (por ejemplo, "-borrador"): todos son candidatos
+            return {row[0] for row in self.conn.execute("SELECT rowid FROM documents_fts")}
+        sql = "SELECT rowid FROM documents_fts WHERE " + " AND ".join(clauses)
+        return {row[0] for row in self.conn.execute(sql, params)}
+
+    def query(self, conditions):
+        """Evalúa los criterios sobre el índice.
+
+        Devuelve una lista de (ruta, criterio) con el primer criterio que cumple
+        cada documento, como check_pdf_conditions sobre el texto completo. Las
+        búsquedas de texto completo eligen los documentos que tienen los
+        términos imprescindibles de cada criterio; los criterios con operadores
+        o con alcance de páginas se terminan de verificar sobre el texto
+        guardado. Los criterios con alcance de páginas necesitan un índice por
+        página (lanza ValueError si no lo es).
+        """
+        matched = {}
+        for condition in conditions:
+            matcher = pdf_engine.ConditionMatcher([condition])
+            document_ids = self._matching_ids(matcher.required_terms(0))
+            if getattr(condition, "scope", None) is not None:
+                document_ids = self._matching_in_scope(document_ids, matcher)
+            elif not matcher.is_plain(0):
+                document_ids = self._matching_text(document_ids, matcher)
+            for document_id in document_ids:
+                matched.setdefault(document_id, condition)
+        if not matched:
+            return []
+        rows = self.conn.execute(
+            f"SELECT id, path FROM documents WHERE id IN ({','.join('?' * len(matched))})",
+            list(matched)
+        )
+        return sorted((path, matched[document_id]) for document_id, path in rows)
+
+    def _matching_text(self, document_ids, matcher):
+        """De los documentos candidatos, los que cumplen el criterio de `matcher` sobre su texto completo."""
+        matching = set()
+        for document_id in document_ids:
+            row = self.conn.execute("SELECT text FROM documents_fts WHERE rowid = ?", (document_id,)).fetchone()
+            scan = matcher.new_scan()
+            scan.feed_normalized(row[0])
+            if scan.result()[0]:
+                matching.add(document_id)
+        return matching
+
+    def _matching_in_scope(self, document_ids, matcher):
+        """De los documentos candidatos, los que cumplen el criterio de `matcher` dentro de su alcance."""
+        if not self.per_page:
+            raise ValueError("Los criterios con alcance de páginas necesitan un índice creado con --por-pagina")
+        matching = set()
+        for document_id in document_ids:
+            row = self.conn.execute("SELECT pages FROM documents WHERE id = ?", (document_id,)).fetchone()
+            texts = dict(self.conn.execute("SELECT page, text FROM pages_fts WHERE document_id = ?",
+                                           (document_id,)))
+            scan = matcher.new_scan()
+            for index in scan.plan(row[0]):
+                # Las páginas se guardan tal como salen de normalizar_fragmento,
+                # así que se unen igual que en el análisis de los PDFs
+                scan.feed_normalized(texts.get(index + 1, ""), index)
+                if scan.decided:
+                    break
+            if scan.result()[0]:
+                matching.add(document_id)
+        return matching
+
+    def pages_with_terms(self, pdf_path, terms):
+        """Números de página que contienen alguno de los términos (solo con per_page)."""
+        pdf_path = os.path.abspath(pdf_path)
+        pages = set()
+        for term in terms:
+            term = pdf_engine.normalizar_texto(term)
+            escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            rows = self.conn.execute(
+                "SELECT p.page FROM pages_fts p JOIN documents d ON d.id = p.document_id "
+                "WHERE d.path = ? AND p.text LIKE ? ESCAPE '\\'",
+                (pdf_path, f"%{escaped}%")
+            )
+            pages.update(row[0] for row in rows)
+        return sorted(pages)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Índice de texto completo de PDFs para consultas rápidas.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    index_cmd = commands.add_parser("indexar", help="Agrega al índice los PDFs nuevos o modificados")
+    index_cmd.add_argument("indice", help="Archivo SQLite del índice")
+    index_cmd.add_argument("inputs", nargs="+", help="Carpetas o archivos PDF")
+    index_cmd.add_argument("--por-pagina", action="store_true", help="Guardar también una fila por página")
+    index_cmd.add_argument("-w", "--workers", type=int, default=None)
+    index_cmd.add_argument("-m", "--modo", choices=pdf_engine.EXECUTION_MODES, default=pdf_engine.DEFAULT_MODE)
+    index_cmd.add_argument("--cache", metavar="CARPETA", help="Carpeta de la caché de texto extraído")
+
+    remove_cmd = commands.add_parser("quitar", help="Quita PDFs del índice")
+    remove_cmd.add_argument("indice")
+    remove_cmd.add_argument("paths", nargs="+")
+
+    query_cmd = commands.add_parser("consultar", help="Evalúa criterios sobre el índice")
+    query_cmd.add_argument("indice")
+    query_cmd.add_argument("-c", "--criterios", required=True,
+                           help="Archivo de criterios: uno por línea, palabras separadas por comas")
+    query_cmd.add_argument("-o", "--salida",
+                           help="Mover los PDFs encontrados a esta carpeta y escribir ahí el informe")
+    query_cmd.add_argument("-v", "--verbose", action="store_true")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.command == "indexar":
+        options = pdf_engine.AnalysisOptions(workers=args.workers, mode=args.modo, cache_folder=args.cache)
+        with PdfIndex(args.indice, per_page=args.por_pagina) as index:
+            added, unchanged, errors = index.update(pdf_scanner.scan_pdfs(args.inputs), options)
+            removed = index.prune([entry for entry in args.inputs if os.path.isdir(entry)])
+            print(f"Indexados: {added}  Sin cambios: {unchanged}  Quitados: {removed}  Errores: {errors}")
+            print(f"Documentos en el índice: {index.count()}")
+        return 0
+
+    if args.command == "quitar":
+        with PdfIndex(args.indice) as index:
+            removed = sum(index.remove(pdf_path) for pdf_path in args.paths)
+        print(f"Quitados: {removed}")
+        return 0
+
+    try:
+        conditions = pdf_engine.load_conditions(args.criterios)
+    except (OSError, ValueError) as e:
+        print(f"Error al leer los criterios: {str(e)}", file=sys.stderr)
+        return 2
+    if not conditions:
+        print("No hay criterios de búsqueda definidos.", file=sys.stderr)
+        return 2
+
+    with PdfIndex(args.indice) as index:
+        try:
+            hits = index.query(conditions)
+        except ValueError as e:
+            print(f"Error: {str(e)}", file=sys.stderr)
+            return 2
+        stats = pdf_engine.new_stats(index.count())
+        stats["processed"] = stats["total"]
+        report = None
+        relocator = pdf_relocate.Relocator()
+        if args.salida:
+            os.makedirs(args.salida, exist_ok=True)
+            report = pdf_report.ReportWriter(pdf_report.new_log_filename(args.salida), conditions, stats["total"])
+
+        stale = 0
+        for pdf_path, condition in hits:
+            if not index.is_current(pdf_path):
+                # El archivo cambió o desapareció: hay que volver a indexarlo
+                stale += 1
+                print(f"Desactualizado en el índice: {pdf_path}", file=sys.stderr)
+                continue
+            dest_path = pdf_path
+            if args.salida:
+                try:
+                    dest_path = relocator.relocate(pdf_path, args.salida)
+                    index.rename(pdf_path, dest_path)
+                except OSError as e:
+                    stats["errors"] += 1
+                    print(f"Error al mover {pdf_path}: {str(e)}", file=sys.stderr)
+                    continue
+                report.add(pdf_engine.AnalysisResult(pdf_path, True, condition, dest_path))
+            # Una coincidencia que no se pudo mover cuenta solo como error
+            stats["matches"] += 1
+            if args.verbose or not args.salida:
+                print(f"{pdf_path} | {', '.join(condition)}")
+
+        if report:
+            report.close(stats)
+            print(f"Informe: {report.paths['txt']}")
+    print(f"Documentos: {stats['total']}  Encontrados: {stats['matches']}  "
+          f"Desactualizados: {stale}  Errores: {stats['errors']}")
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""Diario de una ejecución, para poder reanudarla si se interrumpe.
+
+Cada archivo terminado se agrega al diario como una línea JSON, escrita con
+una única llamada a os.write sobre un archivo abierto en modo O_APPEND: si
+el proceso muere, lo escrito ya está en el sistema operativo, y a lo sumo
+queda incompleta la última línea (que se descarta al reanudar). Además se
+sincroniza con el disco cada `sync_interval` segundos, por si se corta la
+luz.
+
+Al reanudar se leen las líneas del diario y se saltean los archivos ya
+terminados: el costo de volver a empezar depende de lo que falta, no de lo
+que ya se hizo.
+"""
+import os
+import json
+import time
+import datetime
+import pdf_engine
+import pdf_report
+
+# Nombre del diario dentro de la carpeta de salida
+JOURNAL_FILENAME = "diario_analisis.jsonl"
+
+# Versión del formato del diario
+_VERSION = 1
+
+# Segundos máximos entre sincronizaciones con el disco
+DEFAULT_SYNC_INTERVAL = 1.0
+
+
+def result_from_record(record):
+    """Reconstruye un AnalysisResult a partir de una línea del diario."""
+    condition = record.get("condition")
+    if condition is not None:
+        scope = record.get("scope")
+        condition = pdf_engine.Criterion(condition, pdf_engine.parse_scope(scope) if scope else None)
+    result = pdf_engine.AnalysisResult(
+        record["path"],
+        matched=record.get("status") == "match",
+        condition=condition,
+        dest_path=record.get("dest_path"),
+        error=record.get("error"),
+        pages=record.get("pages") or 0,
+        cache=record.get("cache")
+    )
+    result.elapsed = record.get("elapsed") or 0.0
+    # Los resultados que llegan de pdf_cluster traen también los tiempos por etapa
+    result.timings = dict(record.get("timings") or {})
+    result.limited = record.get("limited")
+    result.partial = bool(record.get("partial"))
+    result.skipped = bool(record.get("skipped"))
+    result.timed_out = record.get("timed_out")
+    result.textless = bool(record.get("textless"))
+    result.workers = record.get("workers")
+    result.backend = record.get("backend")
+    return result
+
+
+class RunJournal:
+    """Diario de los archivos terminados en una ejecución.
+
+    Con resume=True se cargan las entradas de un diario existente (que debe
+    ser de los mismos criterios) y se siguen agregando al final; si no, se
+    empieza un diario nuevo.
+    """
+
+    def __init__(self, path, conditions, resume=False, sync_interval=DEFAULT_SYNC_INTERVAL):
+        self.path = path
+        self.sync_interval = sync_interval
+        # Ruta absoluta -> (tamaño, fecha) del archivo terminado, o None si ya no estaba en su lugar
+        self.completed = {}
+        # Ruta absoluta -> entrada de los archivos terminados en ejecuciones anteriores
+        self.previous = {}
+        # Los alcances de página (pdf_engine.PageScope) se guardan aparte, así
+        # los diarios sin alcances siguen teniendo el formato de siempre
+        scopes = [getattr(condition, "scope", None) for condition in conditions]
+        scopes = [str(scope) if scope is not None else None for scope in scopes] if any(scopes) else None
+        conditions = [list(condition) for condition in conditions]
+
+        valid_size = 0
+        if resume and os.path.exists(path):
+            valid_size = self._load(conditions, scopes)
+        flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, "O_BINARY", 0)
+        if not valid_size:
+            flags |= os.O_TRUNC
+        self._fd = os.open(path, flags, 0o644)
+        if valid_size:
+            # Descartar una última línea incompleta antes de seguir agregando
+            os.ftruncate(self._fd, valid_size)
+        else:
+            header = {
+                "journal": _VERSION,
+                "conditions": conditions,
+                "started": datetime.datetime.now().isoformat(timespec="seconds"),
+            }
+            if scopes is not None:
+                header["scopes"] = scopes
+            self._append(header)
+        self._synced = time.monotonic()
+
+    def _load(self, conditions, scopes):
+        """Lee el diario existente y devuelve el tamaño de su parte válida."""
+        valid_size = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Línea incompleta: el proceso murió mientras la escribía
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                if valid_size == 0:
+                    if entry.get("journal") != _VERSION:
+                        raise ValueError(f"{self.path} no es un diario de análisis")
+                    if entry.get("conditions") != conditions or entry.get("scopes") != scopes:
+                        raise ValueError("El diario corresponde a otros criterios de búsqueda")
+                else:
+                    key = os.path.abspath(entry["path"])
+                    self.previous[key] = entry
+                    self.completed[key] = (entry["size"], entry["mtime_ns"]) if "size" in entry else None
+                valid_size += len(line)
+        return valid_size
+
+    def __len__(self):
+        return len(self.completed)
+
+    def is_done(self, pdf_path):
+        """True si el archivo ya se terminó y, si sigue en su lugar, no cambió desde entonces.
+
+        Si el terminado ya no estaba en su lugar (se movió a la salida), un
+        archivo que aparece después con la misma ruta es otro y no cuenta.
+        """
+        key = os.path.abspath(pdf_path)
+        if key not in self.completed:
+            return False
+        try:
+            stat = os.stat(pdf_path)
+        except OSError:
+            return True
+        return (stat.st_size, stat.st_mtime_ns) == self.completed[key]
+
+    def results(self):
+        """AnalysisResult de los archivos terminados en ejecuciones anteriores (para estadísticas e informes)."""
+        return [result_from_record(entry) for entry in self.previous.values()]
+
+    def record(self, result):
+        """Agrega al diario el resultado de un archivo terminado."""
+        entry = pdf_report.result_record(result)
+        stat_key = None
+        try:
+            # Si el archivo sigue en su lugar, se lo vuelve a analizar al reanudar solo si cambió
+            stat = os.stat(result.path)
+            entry["size"], entry["mtime_ns"] = stat_key = (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            pass
+        self.completed[os.path.abspath(result.path)] = stat_key
+        self._append(entry)
+        if time.monotonic() - self._synced >= self.sync_interval:
+            os.fsync(self._fd)
+            self._synced = time.monotonic()
+
+    def _append(self, entry):
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode('utf-8')
+        os.write(self._fd, line)
+
+    def close(self):
+        if self._fd is None:
+            return
+        try:
+            os.fsync(self._fd)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,518 @@
+"""Lenguaje de consulta de los criterios y su compilación a un plan de evaluación.
+
+Un criterio es una lista de cláusulas separadas por comas que se tienen que
+cumplir todas. Cada cláusula puede ser:
+
+- factura, nota de credito: el texto aparece (también dentro de otra palabra)
+- "pago", "nota de credito": aparece como palabras completas
+- pagada | cobrada: aparece alguna de las alternativas
+- -borrador: no aparece
+- factura ~50 pagada: los dos términos aparecen a no más de 50 caracteres
+  uno del otro (contando sobre el texto normalizado)
+- (a, b) | c: los paréntesis agrupan; dentro de ellos la coma también es "y"
+
+De mayor a menor precedencia: ~N, -, |, coma. Los términos se comparan
+normalizados (minúsculas, sin acentos, espacios simples), igual que siempre.
+Un "\\" delante de ( ) , | ~ " \\ o de un "-" inicial lo convierte en texto
+("\\-5%", "a\\|b"). Los criterios escritos antes de que existieran los
+operadores que no son una consulta válida ("(nota", "5 ~ 10") se leen como
+antes, como términos separados por comas (ver split_literal).
+
+QueryPlan compila una vez por ejecución las cláusulas de todos los criterios:
+las subexpresiones repetidas se evalúan una sola vez, los operandos de cada
+"y" / "o" se ordenan por costo y probabilidad estimados, y la evaluación
+sobre el texto, página por página, usa lógica de tres valores (se cumple, no
+se cumple, todavía no se sabe): una subexpresión decidida no se vuelve a
+evaluar y las búsquedas que solo le servían a ella dejan de hacerse.
+"""
+import re
+import bisect
+
+# Árbol de una cláusula (parse_clause):
+#   ("term", texto, exacta)  texto a buscar; exacta=True: como palabras completas
+#   ("near", a, b, n)        términos a y b a no más de n caracteres
+#   ("and", [hijos]) / ("or", [hijos]) / ("not", hijo)
+
+_TOKEN = re.compile(r'\s*(?:(?P<punct>[(),|])|~\s*(?P<distance>\d+)|(?P<tilde>~)'
+                    r'|"(?P<quoted>[^"]*)(?P<closed>"?)'
+                    r'|(?P<word>(?:\\.?|[^(),|~"\s\\])(?:\\.?|[^(),|~"\\])*))', re.DOTALL)
+
+# Caracteres que se escapan con "\" para buscarlos como texto
+_SPECIAL = re.compile(r'([(),|~"\\])')
+_ESCAPED = re.compile(r'\\(.?)', re.DOTALL)
+
+
+def escape(term):
+    """Texto de una cláusula que busca `term` tal cual, sin interpretar operadores."""
+    escaped = _SPECIAL.sub(r'\\\1', term)
+    return "\\" + escaped if escaped.startswith("-") else escaped
+
+
+def _unescape(word):
+    # Una "\" suelta al final queda como texto
+    return _ESCAPED.sub(lambda match: match.group(1) or "\\", word)
+
+
+def _tokenize(text):
+    """Divide `text` en (tipo, valor, inicio, fin). Tipos: ( ) , | ~ quoted word end."""
+    tokens = []
+    position = 0
+    while True:
+        match = _TOKEN.match(text, position)
+        if match is None:
+            tokens.append(("end", None, len(text), len(text)))
+            return tokens
+        position = match.end()
+        start = position - len(match.group().lstrip())
+        if match.group("punct"):
+            tokens.append((match.group("punct"), None, start, position))
+        elif match.group("distance") is not None:
+            tokens.append(("~", int(match.group("distance")), start, position))
+        elif match.group("tilde"):
+            raise ValueError("Falta la distancia después de ~ (por ejemplo, factura ~50 pagada)")
+        elif match.group("quoted") is not None:
+            if not match.group("closed"):
+                raise ValueError("Faltan las comillas de cierre")
+            tokens.append(("quoted", match.group("quoted"), start, position))
+        else:
+            word = match.group("word").rstrip()
+            tokens.append(("word", word, start, start + len(word)))
+
+
+class _Parser:
+    def __init__(self, text):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position]
+
+    def take(self):
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def clauses(self, nested=False):
+        """Operandos separados por comas hasta ")" o el final. Devuelve [(árbol, inicio, fin)]."""
+        items = []
+        while True:
+            kind, _, start, _ = self.peek()
+            if kind in (",", ")", "end"):
+                if nested:
+                    raise ValueError("Falta un término entre comas o paréntesis")
+            else:
+                node = self.alternatives()
+                items.append((node, start, self.tokens[self.position - 1][3]))
+            kind = self.peek()[0]
+            if kind == ",":
+                self.take()
+                continue
+            if kind == ")" and not nested:
+                raise ValueError("Paréntesis de cierre sin abrir")
+            if kind not in (")", "end"):
+                raise ValueError(f"Falta una coma o un operador antes de «{self.text[self.peek()[2]:].strip()}»")
+            return items
+
+    def alternatives(self):
+        items = [self.negation()]
+        while self.peek()[0] == "|":
+            self.take()
+            items.append(self.negation())
+        return items[0] if len(items) == 1 else ("or", items)
+
+    def negation(self):
+        kind, value, start, end = self.peek()
+        if kind == "word" and value.startswith("-"):
+            rest = value[1:].lstrip()
+            if rest:
+                # "-borrador": el resto de la palabra es el operando
+                self.tokens[self.position] = ("word", rest, end - len(rest), end)
+            else:
+                self.take()
+            return ("not", self.negation())
+        return self.proximity()
+
+    def proximity(self):
+        node = self.operand()
+        while self.peek()[0] == "~":
+            distance = self.take()[1]
+            right = self.operand()
+            if node[0] != "term" or right[0] != "term":
+                raise ValueError("~N solo puede unir dos términos (por ejemplo, factura ~50 pagada)")
+            node = ("near", node, right, distance)
+        return node
+
+    def operand(self):
+        kind, value, _, _ = self.take()
+        if kind == "(":
+            items = self.clauses(nested=True)
+            if self.take()[0] != ")":
+                raise ValueError("Falta cerrar un paréntesis")
+            nodes = [item[0] for item in items]
+            return nodes[0] if len(nodes) == 1 else ("and", nodes)
+        if kind == "quoted":
+            if not value.strip():
+                raise ValueError("Comillas sin texto")
+            return ("term", value, True)
+        if kind == "word":
+            return ("term", _unescape(value), False)
+        raise ValueError("Falta un término")
+
+
+def split_clauses(text):
+    """Divide un criterio en sus cláusulas (separadas por comas fuera de paréntesis).
+
+    Devuelve el texto de cada cláusula, sin espacios en los extremos; las
+    cláusulas vacías se ignoran. Lanza ValueError si la sintaxis no es válida.
+    """
+    parser = _Parser(text)
+    return [text[start:end] for _, start, end in parser.clauses()]
+
+
+def split_literal(text):
+    """Divide un criterio en cláusulas como antes del lenguaje de consulta: términos separados por comas.
+
+    Cada término se escapa (ver escape), así que se busca tal cual.
+    """
+    return [escape(term.strip()) for term in text.split(',') if term.strip()]
+
+
+def parse_clause(text):
+    """Árbol de una cláusula (ver el comentario al comienzo del módulo). Lanza ValueError si no es válida."""
+    parser = _Parser(text)
+    items = parser.clauses()
+    if not items:
+        raise ValueError("Criterio vacío")
+    nodes = [item[0] for item in items]
+    return nodes[0] if len(nodes) == 1 else ("and", nodes)
+
+
+def is_plain(node):
+    """True si el árbol es un término simple (sin comillas ni operadores)."""
+    return node[0] == "term" and not node[2]
+
+
+# Costos estimados de evaluar cada tipo de nodo, en unidades arbitrarias:
+# probar un bit de un término ya buscado, buscar una palabra completa con una
+# expresión regular sobre la página, y buscar todas las apariciones de dos
+# términos para medir su distancia.
+_COST_BIT = 0.01
+_COST_WORD = 1.0
+_COST_NEAR = 3.0
+
+
+def _term_chance(text):
+    """Probabilidad estimada de que un término aparezca en un documento: los cortos son más comunes."""
+    return min(0.9, 2.0 / max(len(text), 1))
+
+
+_TERM, _FEATURE, _NOT, _AND, _OR = range(5)
+
+
+class _Node:
+    __slots__ = ("id", "kind", "children", "bit", "feature", "cost", "chance")
+
+    def __init__(self, node_id, kind, children=(), bit=0, feature=None, cost=_COST_BIT, chance=0.5):
+        self.id = node_id
+        self.kind = kind
+        self.children = children
+        # Bit del término (_TERM) o de la condición de posición (_FEATURE)
+        self.bit = bit
+        self.feature = feature
+        self.cost = cost
+        self.chance = chance
+
+
+class _Feature:
+    """Condición que depende de posiciones en el texto: palabras completas o proximidad.
+
+    Se busca en una ventana del texto normalizado (el final de lo ya visto
+    más la página nueva). Una aparición exacta que termina justo al final de
+    la ventana puede seguir en la página siguiente, así que no cuenta hasta
+    la ventana siguiente o la última (final=True).
+    """
+
+    __slots__ = ("bit", "requires", "span", "left", "right", "distance", "same")
+
+    def __init__(self, bit, requires, left, right=None, distance=0, same=False):
+        self.bit = bit
+        # Términos (bits) que tienen que haber aparecido para que valga la pena buscar
+        self.requires = requires
+        # Cada operando: (patrón, largo del texto, exacta)
+        self.left = left
+        self.right = right
+        self.distance = distance
+        # a ~N a: hacen falta dos apariciones distintas
+        self.same = same
+        self.span = left[1] if right is None else left[1] + distance + right[1]
+
+    @staticmethod
+    def _occurrences(operand, window, start, final):
+        pattern, length, exact = operand
+        end = len(window)
+        return [match.start(1) for match in pattern.finditer(window, start)
+                if final or not exact or match.start(1) + length < end]
+
+    def search(self, window, start, final):
+        if self.right is None:
+            pattern, length, _ = self.left
+            end = len(window)
+            return any(final or match.start(1) + length < end for match in pattern.finditer(window, start))
+        left = self._occurrences(self.left, window, start, final)
+        if not left:
+            return False
+        right = self._occurrences(self.right, window, start, final)
+        if not right:
+            return False
+        same = self.same
+        left_length, right_length = self.left[1], self.right[1]
+        distance = self.distance
+        for position in left:
+            # Apariciones de la derecha que empiezan entre `low` y `high`
+            low = position - distance - right_length
+            high = position + left_length + distance
+            index = bisect.bisect_left(right, low)
+            while index < len(right) and right[index] <= high:
+                if not same or right[index] != position:
+                    return True
+                index += 1
+        return False
+
+
+def _pattern(text, exact):
+    """Patrón que encuentra todas las apariciones de `text` (superpuestas), en el grupo 1."""
+    body = re.escape(text)
+    if exact:
+        body = r"(?<!\w)" + body + r"(?!\w)"
+    return re.compile(f"(?=({body}))")
+
+
+class PlanState:
+    """Estado de la evaluación de un QueryPlan sobre un texto (un documento o un alcance de páginas).
+
+    `found` son los términos ya encontrados (bits de term_bit) y `window` el
+    texto en el que se buscan las condiciones de posición en esta pasada.
+    """
+
+    __slots__ = ("decided", "visited", "stamp", "found", "features", "window", "start", "final", "checked")
+
+    def __init__(self, plan):
+        # Valor definitivo de cada nodo (None: todavía no se sabe)
+        self.decided = [None] * len(plan.nodes)
+        # Pasada en la que se evaluó cada nodo sin decidirse
+        self.visited = [0] * len(plan.nodes)
+        self.stamp = 0
+        self.found = 0
+        self.features = 0
+        self.window = None
+        # Posición de la ventana desde la que se busca (1 si se recortó el comienzo)
+        self.start = 0
+        # Última pasada: lo que no apareció ya no aparece
+        self.final = False
+        # La pasada buscó alguna condición de posición sin encontrarla
+        self.checked = False
+
+    def begin(self, found, window, start, final):
+        self.stamp += 1
+        self.found = found
+        self.window = window
+        self.start = start
+        self.final = final
+        self.checked = False
+
+
+class QueryPlan:
+    """Cláusulas de todos los criterios compiladas a un grafo de nodos compartidos.
+
+    `criteria` tiene, por criterio, la lista de árboles de sus cláusulas que
+    no son términos simples. `normalize` normaliza el texto de los términos y
+    `term_bit(texto)` devuelve el bit con el que quien usa el plan marca en
+    `found` que ese texto (normalizado) apareció; el plan lo usa para los
+    términos sin comillas y como condición previa de las búsquedas exactas y
+    de proximidad.
+
+    - roots: por criterio, el nodo a evaluar (None si no tiene cláusulas)
+    - required: por criterio, los bits de términos que tienen que aparecer sí
+      o sí (sirven para descartar rápido y para filtrar en un índice)
+    - overlap: caracteres del final del texto a conservar entre páginas
+    """
+
+    def __init__(self, criteria, normalize, term_bit):
+        self._normalize = normalize
+        self._term_bit = term_bit
+        self._by_key = {}
+        self.nodes = []
+        self.features = []
+        self.roots = []
+        self.required = []
+        for clauses in criteria:
+            if not clauses:
+                self.roots.append(None)
+                self.required.append(0)
+                continue
+            key = self._canonical(("and", clauses) if len(clauses) > 1 else clauses[0])
+            self.roots.append(self._node(key))
+            self.required.append(self._required(key))
+        longest = max((feature.span for feature in self.features), default=-1)
+        self.overlap = longest + 1
+        # Solo hacen falta para compilar (y así no se copian a los procesos de trabajo)
+        self._normalize = self._term_bit = self._by_key = None
+
+    # --- Compilación
+
+    def _term_text(self, node):
+        text = self._normalize(node[1])
+        if node[2] and not text:
+            raise ValueError("Comillas sin texto")
+        return text
+
+    def _canonical(self, node):
+        """Clave canónica del árbol: términos normalizados, "y"/"o" aplanados, sin repetidos y en orden fijo."""
+        kind = node[0]
+        if kind == "term":
+            return ("exact" if node[2] else "term", self._term_text(node))
+        if kind == "near":
+            left, right = self._canonical(node[1]), self._canonical(node[2])
+            if not left[1] or not right[1]:
+                raise ValueError("~N necesita dos términos no vacíos")
+            return ("near",) + tuple(sorted((left, right))) + (node[3],)
+        if kind == "not":
+            child = self._canonical(node[1])
+            return child[1] if child[0] == "not" else ("not", child)
+        items = set()
+        for child in node[1]:
+            child = self._canonical(child)
+            if child[0] == kind:
+                items.update(child[1])
+            else:
+                items.add(child)
+        if len(items) == 1:
+            return items.pop()
+        return (kind, tuple(sorted(items)))
+
+    def _required(self, key):
+        """Bits de los términos sin los que `key` no se puede cumplir."""
+        kind = key[0]
+        if kind in ("term", "exact"):
+            return self._term_bit(key[1])
+        if kind == "near":
+            return self._term_bit(key[1][1]) | self._term_bit(key[2][1])
+        if kind == "and":
+            mask = 0
+            for child in key[1]:
+                mask |= self._required(child)
+            return mask
+        if kind == "or":
+            masks = [self._required(child) for child in key[1]]
+            mask = masks[0]
+            for other in masks[1:]:
+                mask &= other
+            return mask
+        return 0
+
+    def _operand(self, key):
+        text = key[1]
+        exact = key[0] == "exact"
+        return (_pattern(text, exact), len(text), exact)
+
+    def _node(self, key):
+        node = self._by_key.get(key)
+        if node is not None:
+            return node
+        kind = key[0]
+        node_id = len(self.nodes)
+        if kind == "term":
+            node = _Node(node_id, _TERM, bit=self._term_bit(key[1]), chance=_term_chance(key[1]))
+        elif kind in ("exact", "near"):
+            bit = 1 << len(self.features)
+            if kind == "exact":
+                feature = _Feature(bit, self._term_bit(key[1]), self._operand(key))
+                cost, chance = _COST_WORD, _term_chance(key[1]) / 2
+            else:
+                feature = _Feature(bit, self._required(key), self._operand(key[1]), self._operand(key[2]), key[3],
+                                   key[1] == key[2])
+                cost = _COST_NEAR
+                chance = _term_chance(key[1][1]) * _term_chance(key[2][1]) / 2
+            self.features.append(feature)
+            node = _Node(node_id, _FEATURE, bit=bit, feature=feature, cost=cost, chance=chance)
+        elif kind == "not":
+            child = self._node(key[1])
+            node_id = len(self.nodes)
+            node = _Node(node_id, _NOT, (child,), cost=child.cost, chance=1 - child.chance)
+        else:
+            children = [self._node(child) for child in key[1]]
+            node_id = len(self.nodes)
+            node = self._combine(node_id, _AND if kind == "and" else _OR, children)
+        self.nodes.append(node)
+        self._by_key[key] = node
+        return node
+
+    @staticmethod
+    def _combine(node_id, kind, children):
+        """Nodo "y"/"o" con los operandos en el orden de menor costo por probabilidad de decidir.
+
+        Un "y" se decide en cuanto un operando no se cumple y un "o" en
+        cuanto uno se cumple; el orden que minimiza el costo esperado con
+        operandos independientes es por costo / probabilidad de decidir.
+        """
+        if kind == _AND:
+            decides = [1 - child.chance for child in children]
+        else:
+            decides = [child.chance for child in children]
+        order = sorted(range(len(children)), key=lambda i: children[i].cost / max(decides[i], 1e-6))
+        # Costo esperado: cada operando se evalúa si los anteriores no decidieron
+        cost = 0.0
+        reach = 1.0
+        chance = 1.0
+        for i in order:
+            cost += reach * children[i].cost
+            reach *= 1 - decides[i]
+            chance *= children[i].chance if kind == _AND else 1 - children[i].chance
+        children = tuple(children[i] for i in order)
+        return _Node(node_id, kind, children, cost=cost, chance=chance if kind == _AND else 1 - chance)
+
+    # --- Evaluación
+
+    def new_state(self):
+        return PlanState(self)
+
+    def evaluate(self, node, state):
+        """Valor de `node` en esta pasada: True, False (definitivos) o None (todavía no se sabe)."""
+        value = state.decided[node.id]
+        if value is not None or state.visited[node.id] == state.stamp:
+            return value
+        kind = node.kind
+        if kind == _TERM:
+            value = True if state.found & node.bit else (False if state.final else None)
+        elif kind == _FEATURE:
+            value = True if state.features & node.bit else self._check(node.feature, state)
+        elif kind == _NOT:
+            value = self.evaluate(node.children[0], state)
+            if value is not None:
+                value = not value
+        else:
+            # Un "y" termina con el primer False; un "o", con el primer True
+            decisive = kind == _OR
+            value = decisive is False
+            for child in node.children:
+                child_value = self.evaluate(child, state)
+                if child_value is decisive:
+                    value = decisive
+                    break
+                if child_value is None:
+                    value = None
+        if value is None:
+            state.visited[node.id] = state.stamp
+        else:
+            state.decided[node.id] = value
+        return value
+
+    @staticmethod
+    def _check(feature, state):
+        if state.window is not None and state.found & feature.requires == feature.requires:
+            if feature.search(state.window, state.start, state.final):
+                state.features |= feature.bit
+                return True
+            state.checked = True
+        return False if state.final else None
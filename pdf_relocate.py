@@ -0,0 +1,262 @@
+"""Reubicación de los PDFs clasificados (mover, copiar, enlazar o solo informar).
+
+La reubicación es una etapa aparte del análisis: pdf_engine.analyze la
+ejecuta en hilos propios del proceso principal, así que los workers de
+análisis no quedan esperando al disco (Relocator es seguro entre hilos).
+Dentro del mismo volumen se mueve con un enlace duro y el borrado del
+original (instantáneo), o, si el sistema de archivos no tiene enlaces
+duros, con un renombrado que no reemplaza el destino; entre volúmenes,
+copia y borrado.
+
+Colisiones de nombres: si en la carpeta de destino ya existe un archivo con
+el mismo nombre, con "suffix" el nuevo recibe un sufijo derivado de su ruta
+de origen ("informe-1a2b3c4d.pdf"), que es siempre el mismo para el mismo
+origen; nunca se sobrescribe un archivo existente salvo con "overwrite".
+El nombre de destino se toma de forma atómica, así que tampoco se pisa un
+archivo que otro proceso cree en la misma carpeta mientras tanto.
+"""
+import os
+import sys
+import errno
+import ctypes
+import shutil
+import hashlib
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# "move" mueve el archivo, "copy" lo copia, "hardlink" crea un enlace duro y
+# "reflink" una copia con clonado de bloques (ambos caen a una copia si el
+# sistema de archivos no lo permite); "report" solo lo informa, sin tocarlo
+RELOCATE_MODES = ("move", "copy", "hardlink", "reflink", "report")
+
+# Qué hacer si el destino ya existe: agregar un sufijo, dejar el archivo donde
+# está o sobrescribir el destino
+COLLISION_MODES = ("suffix", "skip", "overwrite")
+
+# Hilos de la etapa de reubicación
+DEFAULT_RELOCATE_WORKERS = 4
+
+# ioctl de Linux para clonar un archivo (cp --reflink)
+_FICLONE = 0x40049409
+
+# Renombrar sin reemplazar un destino existente: renameat2(RENAME_NOREPLACE)
+# en Linux y renamex_np(RENAME_EXCL) en macOS
+_AT_FDCWD = -100
+_RENAME_NOREPLACE = 1
+_RENAME_EXCL = 0x4
+
+# Errores de un renombrado exclusivo que el sistema o el sistema de archivos no admite
+_RENAME_UNSUPPORTED = (errno.ENOSYS, errno.EINVAL, errno.ENOTSUP, errno.EOPNOTSUPP, errno.EXDEV)
+
+
+class DestinationExists(OSError):
+    """El destino ya existe y la política de colisiones es "skip"."""
+
+
+def _suffixed_name(pdf_path, name):
+    stem, ext = os.path.splitext(name)
+    digest = hashlib.sha1(os.path.abspath(pdf_path).encode('utf-8', 'surrogateescape')).hexdigest()[:8]
+    return f"{stem}-{digest}{ext}"
+
+
+def _reflink(src, dest):
+    if fcntl is None:
+        raise OSError(errno.EOPNOTSUPP, "reflink no disponible")
+    # "xb": el destino se crea solo si no existe (FileExistsError si no)
+    with open(src, 'rb') as fsrc, open(dest, 'xb') as fdest:
+        try:
+            fcntl.ioctl(fdest.fileno(), _FICLONE, fsrc.fileno())
+        except OSError:
+            fdest.close()
+            os.remove(dest)
+            raise
+    shutil.copystat(src, dest)
+
+
+def _load_rename_noreplace():
+    """Función (src, dest) -> 0 o -1 (con errno) de la libc que renombra sin reemplazar, o None."""
+    if not (sys.platform.startswith("linux") or sys.platform == "darwin"):
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+    except OSError:
+        return None
+    if sys.platform == "darwin":
+        renamex_np = getattr(libc, "renamex_np", None)
+        if renamex_np is None:
+            return None
+        renamex_np.argtypes = (ctypes.c_char_p, ctypes.c_char_p, ctypes.c_uint)
+        return lambda src, dest: renamex_np(src, dest, _RENAME_EXCL)
+    renameat2 = getattr(libc, "renameat2", None)
+    if renameat2 is None:
+        return None
+    renameat2.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint)
+    return lambda src, dest: renameat2(_AT_FDCWD, src, _AT_FDCWD, dest, _RENAME_NOREPLACE)
+
+
+_rename_noreplace = _load_rename_noreplace()
+
+
+def _rename_exclusive(src, dest):
+    """Renombra `src` a `dest` si `dest` no existe, de forma atómica.
+
+    Devuelve False si no se puede en este sistema, en este sistema de
+    archivos o entre volúmenes distintos; si `dest` ya existe, FileExistsError.
+    """
+    if os.name == "nt":
+        # En Windows os.rename nunca reemplaza un destino existente
+        try:
+            os.rename(src, dest)
+        except FileExistsError:
+            raise
+        except OSError as e:
+            if e.errno in _RENAME_UNSUPPORTED:
+                return False
+            raise
+        return True
+    if _rename_noreplace is None:
+        return False
+    if _rename_noreplace(os.fsencode(src), os.fsencode(dest)) == 0:
+        return True
+    code = ctypes.get_errno()
+    if code in _RENAME_UNSUPPORTED:
+        return False
+    # Con errno.EEXIST, OSError crea un FileExistsError
+    raise OSError(code, os.strerror(code), src, None, dest)
+
+
+def _copy_exclusive(src, dest):
+    """Copia `src` en `dest` creándolo con O_EXCL: si `dest` ya existe, FileExistsError."""
+    with open(src, 'rb') as fsrc, open(dest, 'xb') as fdest:
+        try:
+            shutil.copyfileobj(fsrc, fdest, 1024 * 1024)
+        except OSError:
+            fdest.close()
+            os.remove(dest)
+            raise
+    shutil.copystat(src, dest)
+
+
+def _transfer(src, dest, mode, overwrite):
+    """Reubica `src` en `dest`.
+
+    Sin `overwrite`, el nombre de destino se toma de forma atómica (enlace
+    duro o creación con O_EXCL): si otro proceso lo creó mientras tanto se
+    lanza FileExistsError y no se pisa nada.
+    """
+    if overwrite:
+        if mode == "move":
+            try:
+                # Mismo volumen: renombrar es instantáneo y atómico
+                os.replace(src, dest)
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                shutil.move(src, dest)
+            return
+        if os.path.lexists(dest):
+            os.remove(dest)
+    if mode in ("move", "hardlink"):
+        try:
+            # Mismo volumen: el enlace es instantáneo y falla si el destino ya existe
+            os.link(src, dest)
+        except FileExistsError:
+            raise
+        except OSError as e:
+            # Mismo volumen sin enlaces duros (SMB, FAT, algunos NAS): para
+            # mover alcanza con renombrar. Entre volúmenes, o si tampoco se
+            # puede renombrar sin reemplazar, copia
+            if mode == "move" and e.errno != errno.EXDEV and _rename_exclusive(src, dest):
+                return
+            _copy_exclusive(src, dest)
+        if mode == "move":
+            try:
+                os.unlink(src)
+            except OSError:
+                os.remove(dest)
+                raise
+        return
+    if mode == "reflink":
+        try:
+            _reflink(src, dest)
+            return
+        except FileExistsError:
+            raise
+        except OSError:
+            pass
+    if overwrite:
+        shutil.copy2(src, dest)
+    else:
+        _copy_exclusive(src, dest)
+
+
+def _already_in(pdf_path, folder):
+    """True si `pdf_path` ya está directamente dentro de `folder`."""
+    try:
+        return os.path.samefile(os.path.dirname(os.path.abspath(pdf_path)), folder)
+    except OSError:
+        return False
+
+
+class Relocator:
+    """Reubica archivos en carpetas de destino según un modo y una política de colisiones."""
+
+    def __init__(self, mode="move", collisions="suffix"):
+        if mode not in RELOCATE_MODES:
+            raise ValueError(f"Modo de reubicación desconocido: {mode}")
+        if collisions not in COLLISION_MODES:
+            raise ValueError(f"Tratamiento de colisiones desconocido: {collisions}")
+        self.mode = mode
+        self.collisions = collisions
+        # Destinos elegidos en esta ejecución, aunque la copia todavía no haya terminado
+        self._claimed = set()
+        self._lock = threading.Lock()
+
+    def destination(self, pdf_path, folder):
+        """Elige (y reserva) la ruta de destino de `pdf_path` dentro de `folder`."""
+        name = os.path.basename(pdf_path)
+        dest_path = os.path.join(folder, name)
+        with self._lock:
+            taken = dest_path in self._claimed or os.path.lexists(dest_path)
+            if taken and self.collisions == "skip":
+                raise DestinationExists(errno.EEXIST, f"Ya existe {dest_path}")
+            if taken and self.collisions == "suffix":
+                dest_path = os.path.join(folder, _suffixed_name(pdf_path, name))
+                counter = 2
+                while dest_path in self._claimed or os.path.lexists(dest_path):
+                    stem, ext = os.path.splitext(_suffixed_name(pdf_path, name))
+                    dest_path = os.path.join(folder, f"{stem}-{counter}{ext}")
+                    counter += 1
+            self._claimed.add(dest_path)
+        return dest_path
+
+    def relocate(self, pdf_path, folder):
+        """Reubica `pdf_path` en `folder` y devuelve la ruta de destino (None en modo "report").
+
+        Un archivo que ya está en `folder` se deja como está.
+        """
+        if self.mode == "report":
+            return None
+        if _already_in(pdf_path, folder):
+            return pdf_path
+        os.makedirs(folder, exist_ok=True)
+        while True:
+            dest_path = self.destination(pdf_path, folder)
+            try:
+                _transfer(pdf_path, dest_path, self.mode, self.collisions == "overwrite")
+                return dest_path
+            except FileExistsError:
+                # Otro proceso creó el destino entre la elección y la copia:
+                # con "suffix" se elige el próximo nombre libre
+                with self._lock:
+                    self._claimed.discard(dest_path)
+                if self.collisions == "skip":
+                    raise DestinationExists(errno.EEXIST, f"Ya existe {dest_path}")
+            except OSError:
+                with self._lock:
+                    self._claimed.discard(dest_path)
+                raise
@@ -0,0 +1,280 @@
+"""Informes de una ejecución del analizador (texto, JSONL y CSV)."""
+import os
+import csv
+import json
+import time
+import queue
+import datetime
+import collections
+import threading
+import pdf_engine
+
+REPORT_FORMATS = ("txt", "jsonl", "csv")
+
+# Segundos máximos que un resultado espera en memoria antes de escribirse a disco
+DEFAULT_FLUSH_INTERVAL = 2.0
+
+# Columnas de los informes JSONL y CSV
+_RECORD_FIELDS = ("path", "status", "condition", "scope", "dest_path", "error", "pages", "cache", "elapsed",
+                  "limited", "partial", "skipped", "timed_out", "textless", "workers",
+                  "backend")
+
+# Nombres de las etapas medidas (pdf_engine.STAGES) en el resumen
+STAGE_LABELS = {
+    "open": "apertura",
+    "reader": "PdfReader",
+    "probe": "capa de texto",
+    "extract": "extract_text",
+    "normalize": "normalización",
+    "match": "criterios",
+    "cache": "caché",
+    "move": "mover",
+    "total": "total",
+    "latency": "punta a punta",
+}
+
+# Marca de fin en la cola del ReportWriter
+_STOP = object()
+
+
+def new_log_filename(output_folder):
+    """Devuelve la ruta del informe para una ejecución que empieza ahora."""
+    timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+    return os.path.join(output_folder, f"reporte_analisis_{timestamp}.txt")
+
+
+def _write_header(f, total, conditions):
+    f.write("# INFORME DE ANÁLISIS DE PDFs\n")
+    f.write(f"# Fecha y hora: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+    if total is not None:
+        f.write(f"# Total de archivos analizados: {total}\n")
+    else:
+        f.write("# Total de archivos analizados: se indica en el resumen\n")
+    f.write(f"# Criterios de búsqueda:\n")
+    for i, condition in enumerate(conditions):
+        f.write(f"#   Criterio {i+1}: {pdf_engine.format_criterion(condition)}\n")
+    f.write("\n# RESULTADOS\n")
+    f.write("# --------------------------------------------------------------\n")
+    f.write("# ARCHIVO | CRITERIO ENCONTRADO | UBICACIÓN\n")
+    f.write("# --------------------------------------------------------------\n\n")
+
+
+def _match_line(filename, condition, dest_path, source=None):
+    # Sin destino (modo "report" o destino ocupado con "skip"): el archivo quedó donde estaba
+    location = dest_path if dest_path is not None else f"{source or filename} (no reubicado)"
+    return f"{filename} | {pdf_engine.format_criterion(condition)} | {location}\n"
+
+
+def _write_timings(f, timings):
+    summary = timings.summary()
+    if not summary["total"]["count"]:
+        return
+    f.write("#\n# Tiempos por etapa (por archivo, en ms):\n")
+    f.write(f"#   {'etapa':<14} {'archivos':>9} {'total s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'máx':>9}\n")
+    for stage, s in summary.items():
+        f.write(f"#   {STAGE_LABELS.get(stage, stage):<14} {s['count']:>9} {s['total']:>9.2f} "
+                f"{s['p50'] * 1e3:>9.2f} {s['p95'] * 1e3:>9.2f} {s['p99'] * 1e3:>9.2f} {s['max'] * 1e3:>9.2f}\n")
+    slowest = timings.slowest()
+    if slowest:
+        f.write("#\n# Archivos más lentos:\n")
+        for i, (path, seconds, stages) in enumerate(slowest):
+            detail = ", ".join(f"{STAGE_LABELS.get(stage, stage)} {value * 1e3:.1f}"
+                               for stage, value in sorted(stages.items(), key=lambda item: -item[1]))
+            f.write(f"#   {i+1}. {seconds:.3f} s  {path}  ({detail} ms)\n")
+
+
+def _write_summary(f, stats, timings=None, timed_out=(), backends=None, calibration=None, unrelocated=()):
+    f.write("\n# --------------------------------------------------------------\n")
+    f.write("# RESUMEN\n")
+    f.write("# --------------------------------------------------------------\n")
+    f.write(f"# Total de archivos procesados: {stats['processed']}\n")
+    f.write(f"# Total de archivos encontrados: {stats['matches']}\n")
+    f.write(f"# Total de errores: {stats['errors']}\n")
+    if unrelocated:
+        f.write(f"# Coincidencias que no se pudieron reubicar (contadas como errores): {len(unrelocated)}\n")
+        for path, error in unrelocated:
+            f.write(f"#   {path}: {error}\n")
+    if stats.get('textless'):
+        f.write(f"# Archivos sin texto extraíble (escaneos): {stats['textless']}\n")
+    if stats.get('timeouts'):
+        f.write(f"# Archivos con tiempo agotado: {stats['timeouts']}\n")
+        for path in timed_out:
+            f.write(f"#   {path}\n")
+    f.write(f"# Porcentaje de éxito: {(stats['matches'] / max(1, stats['total'])) * 100:.2f}%\n")
+    if calibration:
+        f.write(f"# Extractor de texto: {calibration}\n")
+    elif backends and set(backends) != {"pypdf2"}:
+        used = ', '.join(f"{name} ({count} archivos)" for name, count in backends.most_common())
+        f.write(f"# Extractor de texto: {used}\n")
+    if stats.get('workers_max', 0) > stats.get('workers_min', 0):
+        f.write(f"# Workers: {stats['workers']} al final (entre {stats['workers_min']} y {stats['workers_max']})\n")
+    cache_lookups = stats.get('cache_hits', 0) + stats.get('cache_misses', 0)
+    if cache_lookups:
+        f.write(f"# Caché de texto: {stats['cache_hits']} aciertos, {stats['cache_misses']} fallos "
+                f"({stats['cache_hits'] / cache_lookups * 100:.1f}% de aciertos)\n")
+    if stats.get('limited'):
+        f.write(f"# Archivos sobre los límites de memoria: {stats['limited']} "
+                f"({stats['partial']} decididos sin leer todas las páginas, "
+                f"{stats.get('skipped', 0)} sin analizar)\n")
+    if timings is not None:
+        _write_timings(f, timings)
+    f.write(f"# Finalizado: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+
+
+class ReportWriter:
+    """Escribe los informes de una ejecución desde un único hilo.
+
+    Los resultados llegan por una cola desde cualquier hilo (add no bloquea)
+    y se escriben en lotes, con los archivos abiertos durante toda la
+    ejecución; se vuelcan a disco cada `flush_interval` segundos. close()
+    escribe el resumen y sincroniza los archivos con el disco.
+
+    Formatos:
+    - "txt": el informe de texto de siempre (solo las coincidencias)
+    - "jsonl": un objeto JSON por archivo analizado
+    - "csv": una fila por archivo analizado
+    """
+
+    def __init__(self, log_filename, conditions, total=None, formats=("txt",),
+                 flush_interval=DEFAULT_FLUSH_INTERVAL):
+        unknown = set(formats) - set(REPORT_FORMATS)
+        if unknown:
+            raise ValueError(f"Formato de informe desconocido: {', '.join(sorted(unknown))}")
+        base = os.path.splitext(log_filename)[0]
+        self.paths = {fmt: (log_filename if fmt == "txt" else f"{base}.{fmt}") for fmt in formats}
+        self.flush_interval = flush_interval
+        self.error = None
+        self._queue = queue.Queue()
+        self._files = {}
+        self._csv = None
+        # Rutas de los archivos con tiempo agotado, para listarlas en el resumen
+        self._timed_out = []
+        # Coincidencias que la etapa de reubicación no pudo mover: (ruta, error)
+        self._unrelocated = []
+        # Archivos analizados con cada extractor de texto
+        self._backends = collections.Counter()
+        # Resultado de la calibración del extractor (Calibration.summary()), si la hubo
+        self.calibration = None
+
+        os.makedirs(os.path.dirname(log_filename) or '.', exist_ok=True)
+        try:
+            for fmt, path in self.paths.items():
+                self._files[fmt] = open(path, 'w', encoding='utf-8', newline='' if fmt == "csv" else None)
+            if "txt" in self._files:
+                _write_header(self._files["txt"], total, conditions)
+            if "csv" in self._files:
+                self._csv = csv.writer(self._files["csv"])
+                self._csv.writerow(_RECORD_FIELDS)
+        except OSError:
+            self._close_files()
+            raise
+
+        self._thread = threading.Thread(target=self._run, name="ReportWriter", daemon=True)
+        self._thread.start()
+
+    def add(self, result):
+        """Encola un AnalysisResult (o un objeto con los mismos atributos)."""
+        self._queue.put(result)
+
+    def close(self, stats=None, timings=None):
+        """Escribe lo pendiente y el resumen, y cierra los archivos sincronizándolos con el disco."""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+        try:
+            if self.error is None:
+                if stats is not None and "txt" in self._files:
+                    _write_summary(self._files["txt"], stats, timings, self._timed_out,
+                                   self._backends, self.calibration, self._unrelocated)
+                for f in self._files.values():
+                    f.flush()
+                    os.fsync(f.fileno())
+        except OSError as e:
+            self.error = e
+        finally:
+            self._close_files()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            timeout = max(0.0, last_flush + self.flush_interval - time.monotonic())
+            try:
+                batch = [self._queue.get(timeout=timeout)]
+            except queue.Empty:
+                batch = []
+            # Tomar todo lo que ya está en la cola para escribirlo de una vez
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = _STOP in batch
+            if self.error is None:
+                try:
+                    self._write_batch([result for result in batch if result is not _STOP])
+                    if stop or time.monotonic() - last_flush >= self.flush_interval:
+                        for f in self._files.values():
+                            f.flush()
+                        last_flush = time.monotonic()
+                except OSError as e:
+                    # Se informa en close(); los resultados siguientes se descartan
+                    self.error = e
+            if stop:
+                return
+
+    def _write_batch(self, results):
+        if not results:
+            return
+        txt = self._files.get("txt")
+        jsonl = self._files.get("jsonl")
+        for result in results:
+            if result.matched and result.error is not None:
+                # Cumple los criterios pero no se pudo reubicar: no es una coincidencia
+                # del informe (el estado es "error") y se lista aparte en el resumen
+                self._unrelocated.append((result.path, result.error))
+            elif txt is not None and result.matched:
+                txt.write(_match_line(os.path.basename(result.path), result.condition, result.dest_path,
+                                      result.path))
+            if getattr(result, "timed_out", None):
+                self._timed_out.append(result.path)
+            if getattr(result, "backend", None):
+                self._backends[result.backend] += 1
+            if jsonl is not None or self._csv is not None:
+                record = result_record(result)
+                if jsonl is not None:
+                    jsonl.write(json.dumps(record, ensure_ascii=False) + "\n")
+                if self._csv is not None:
+                    self._csv.writerow([
+                        ', '.join(value) if isinstance(value, list) else ("" if value is None else value)
+                        for value in record.values()
+                    ])
+
+    def _close_files(self):
+        for f in self._files.values():
+            try:
+                f.close()
+            except OSError:
+                pass
+        self._files = {}
+
+
+def result_record(result):
+    """Datos de un resultado para los informes JSONL y CSV."""
+    record = {field: getattr(result, field, None) for field in _RECORD_FIELDS}
+    if record["condition"] is not None:
+        # El alcance de páginas del criterio va aparte (ver pdf_engine.parse_scope)
+        scope = getattr(record["condition"], "scope", None)
+        record["scope"] = str(scope) if scope is not None else None
+        record["condition"] = list(record["condition"])
+    return record
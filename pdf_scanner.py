@@ -0,0 +1,109 @@
+"""Recorrido incremental de carpetas en busca de PDFs.
+
+scan_pdfs() recorre los árboles de carpetas con os.scandir y entrega cada
+ruta en cuanto la encuentra, así que el análisis puede empezar antes de que
+termine la enumeración y la memoria no crece con la cantidad de archivos
+(solo se guardan las carpetas pendientes de recorrer).
+"""
+import os
+import fnmatch
+
+DEFAULT_INCLUDE = ("*.pdf",)
+
+
+def _matches(name, rel_path, patterns):
+    """True si el nombre o la ruta relativa coincide con algún patrón (sin distinguir mayúsculas)."""
+    name = name.lower()
+    rel_path = rel_path.replace(os.sep, '/').lower()
+    return any(fnmatch.fnmatchcase(name, pattern) or fnmatch.fnmatchcase(rel_path, pattern)
+               for pattern in patterns)
+
+
+def accepts(path, root, include=DEFAULT_INCLUDE, exclude=()):
+    """True si scan_pdfs([root], include, exclude) entregaría `path` (sin mirar el tamaño).
+
+    Sirve para filtrar archivos que se conocen por otra vía (por ejemplo, un
+    aviso del sistema de archivos) con las mismas reglas que el recorrido.
+    """
+    include = [pattern.lower() for pattern in include]
+    exclude = [pattern.lower() for pattern in exclude]
+    rel_path = os.path.relpath(path, root)
+    parts = rel_path.split(os.sep)
+    if exclude:
+        for depth in range(1, len(parts)):
+            if _matches(parts[depth - 1], os.path.join(*parts[:depth]), exclude):
+                return False
+    name = parts[-1]
+    if not _matches(name, rel_path, include):
+        return False
+    return not (exclude and _matches(name, rel_path, exclude))
+
+
+def _folder_key(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+def scan_pdfs(inputs, include=DEFAULT_INCLUDE, exclude=(), min_size=None, max_size=None,
+              follow_symlinks=False, on_error=None, ignore=()):
+    """Entrega las rutas de los PDFs de `inputs` (carpetas, que se recorren recursivamente, o archivos).
+
+    - include: patrones glob que deben coincidir con el nombre o la ruta relativa
+    - exclude: patrones glob de archivos o carpetas a saltear (por ejemplo "*/tmp", "borrador_*")
+    - min_size / max_size: límites de tamaño en bytes
+    - on_error: función llamada con (ruta, excepción) si una carpeta no se puede leer
+    - ignore: carpetas que no se recorren si aparecen dentro de `inputs` (por
+      ejemplo, la carpeta de salida, para no volver a encontrar los PDFs ya movidos)
+
+    Los archivos pasados directamente en `inputs` se entregan sin filtrar.
+    """
+    include = [pattern.lower() for pattern in include]
+    exclude = [pattern.lower() for pattern in exclude]
+    check_size = min_size is not None or max_size is not None
+    ignore = {_folder_key(folder) for folder in ignore if folder}
+
+    for entry in inputs:
+        if not os.path.isdir(entry):
+            yield entry
+            continue
+
+        pending = [entry]
+        while pending:
+            folder = pending.pop()
+            try:
+                iterator = os.scandir(folder)
+            except OSError as e:
+                if on_error:
+                    on_error(folder, e)
+                continue
+
+            subfolders = []
+            with iterator:
+                for item in iterator:
+                    rel_path = os.path.relpath(item.path, entry)
+                    try:
+                        if item.is_dir(follow_symlinks=follow_symlinks):
+                            if exclude and _matches(item.name, rel_path, exclude):
+                                continue
+                            if ignore and _folder_key(item.path) in ignore:
+                                continue
+                            subfolders.append(item.path)
+                            continue
+                        if not item.is_file(follow_symlinks=follow_symlinks):
+                            continue
+                        if not _matches(item.name, rel_path, include):
+                            continue
+                        if exclude and _matches(item.name, rel_path, exclude):
+                            continue
+                        if check_size:
+                            size = item.stat(follow_symlinks=follow_symlinks).st_size
+                            if (min_size is not None and size < min_size) or \
+                                    (max_size is not None and size > max_size):
+                                continue
+                    except OSError as e:
+                        if on_error:
+                            on_error(item.path, e)
+                        continue
+                    yield item.path
+
+            # Recorrer las subcarpetas en orden alfabético (la pila las saca al revés)
+            pending.extend(sorted(subfolders, reverse=True))
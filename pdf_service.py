@@ -0,0 +1,542 @@
+"""Servicio de clasificación: responde por HTTP si un PDF cumple un conjunto de criterios.
+
+Ejemplo:
+    python pdf_service.py -c facturas=criterios_facturas.txt -c contratos.txt --workers 4
+
+y desde otro sistema (o con classify(), al final de este módulo):
+    curl --data-binary @factura.pdf "http://127.0.0.1:8766/clasificar?conjunto=facturas"
+    curl -d '{"ruta": "/datos/factura.pdf", "conjunto": "facturas"}' -H "Content-Type: application/json" \\
+        http://127.0.0.1:8766/clasificar
+
+Los conjuntos de criterios se compilan una sola vez al arrancar y los
+procesos de trabajo quedan en marcha (con PyPDF2 ya importado y los
+criterios cargados), así que cada pedido paga solo el análisis del archivo.
+
+A lo sumo --workers archivos se analizan a la vez; los pedidos que llegan
+mientras tanto esperan en una cola de --cola lugares, y los que no entran
+reciben 503 (con Retry-After) en lugar de acumularse. Si un proceso de
+trabajo muere de golpe, los pedidos que estaban en curso reciben 500 y el
+pool se vuelve a crear para los siguientes. GET /estado informa los pedidos
+en curso y en cola, los reinicios del pool y los percentiles de latencia:
+total, espera en la cola y análisis.
+
+API (JSON; con --clave, cada pedido lleva la cabecera X-Clave):
+    POST /clasificar?conjunto=X[&nombre=archivo.pdf]   cuerpo: el PDF
+    POST /clasificar   {"ruta": "...", "conjunto": "X"}   (Content-Type: application/json)
+        -> {"conjunto", "resultado": {...como en el informe JSONL...}, "ms", "espera_ms"}
+    GET  /conjuntos -> {nombre: [criterios]}
+    GET  /estado    -> pedidos atendidos, rechazados, en curso, en cola, reinicios y latencias (ms)
+Con un único conjunto, "conjunto" se puede omitir.
+"""
+import os
+import sys
+import copy
+import hmac
+import json
+import time
+import signal
+import argparse
+import tempfile
+import threading
+import http.server
+import urllib.error
+import urllib.parse
+import urllib.request
+import multiprocessing
+from concurrent import futures
+import pdf_backends
+import pdf_cache
+import pdf_cluster
+import pdf_engine
+import pdf_report
+import pdf_watchdog
+
+# Dirección por defecto (solo esta máquina)
+DEFAULT_ADDRESS = "127.0.0.1:8766"
+
+# Pedidos que pueden esperar a que se libere un worker
+DEFAULT_QUEUE_SIZE = 32
+
+# Tamaño máximo de un PDF subido
+DEFAULT_MAX_UPLOAD_MB = 100
+
+# Cada cuántos segundos se muestran las latencias en la consola
+DEFAULT_STATUS_INTERVAL = 60.0
+
+# Segundos que un cliente rechazado debería esperar antes de reintentar
+_RETRY_AFTER = 1
+
+_UPLOAD_CHUNK = 1024 * 1024
+
+# Tamaño máximo de un pedido JSON (solo lleva una ruta y un conjunto de criterios)
+_MAX_JSON = 64 * 1024
+
+
+# Estado de cada proceso de trabajo: los criterios compilados y las opciones
+# (para rutas y para PDFs subidos)
+_worker_matchers = None
+_worker_options = None
+_worker_upload_options = None
+
+
+def _init_worker(matchers, options, debug):
+    global _worker_matchers, _worker_options, _worker_upload_options
+    # Ctrl+C lo maneja el proceso principal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_matchers = matchers
+    _worker_options = options
+    # Cada PDF subido llega a un archivo temporal nuevo: con la clave "stat"
+    # sería siempre un fallo de caché y una entrada que nadie vuelve a usar
+    _worker_upload_options = copy.copy(options)
+    _worker_upload_options.cache_key = "content"
+    pdf_engine.debug_enabled = debug
+
+
+def _classify_in_worker(pdf_path, criteria_set, uploaded=False):
+    options = _worker_upload_options if uploaded else _worker_options
+    return pdf_engine.process_pdf(pdf_path, _worker_matchers[criteria_set], options)
+
+
+def _warm_up():
+    """Tarea vacía para que el pool arranque sus procesos antes del primer pedido."""
+    time.sleep(0.05)
+    return os.getpid()
+
+
+def load_criteria_sets(specs):
+    """Lee los conjuntos de --criterios ("nombre=archivo", o "archivo" con el nombre del archivo).
+
+    Lanza ValueError si un conjunto está vacío, repetido o tiene errores, y OSError si no se puede leer.
+    """
+    criteria_sets = {}
+    for spec in specs:
+        name, sep, path = spec.partition("=")
+        if not sep:
+            path = spec
+            name = os.path.splitext(os.path.basename(spec))[0]
+        if name in criteria_sets:
+            raise ValueError(f"Conjunto de criterios repetido: {name}")
+        conditions = pdf_engine.load_conditions(path)
+        if not conditions:
+            raise ValueError(f"No hay criterios de búsqueda definidos en {path}")
+        criteria_sets[name] = conditions
+    return criteria_sets
+
+
+class ServiceBusy(Exception):
+    """Los workers están ocupados y la cola está llena."""
+
+
+class WorkerCrashed(Exception):
+    """Un proceso de trabajo murió de golpe y el pool se volvió a crear; el pedido no se completó."""
+
+
+class ClassificationService:
+    """Pool de workers en marcha y conjuntos de criterios compilados, para pedidos de a un archivo.
+
+    classify() se llama desde los hilos del servidor HTTP: toma un lugar
+    (hay options.workers lugares de análisis y `queue_size` de espera),
+    analiza el archivo en el pool y devuelve el AnalysisResult. Sin lugar,
+    lanza ServiceBusy en seguida.
+    """
+
+    def __init__(self, criteria_sets, options, queue_size=DEFAULT_QUEUE_SIZE):
+        self.criteria_sets = criteria_sets
+        self.options = options
+        self.queue_size = max(0, int(queue_size))
+        # Los criterios se compilan una sola vez; en modo process viajan a cada worker al arrancar
+        self._matchers = {name: pdf_engine.ConditionMatcher(conditions)
+                          for name, conditions in criteria_sets.items()}
+        if not options.timeouts and options.mode != "process":
+            _init_worker(self._matchers, options, pdf_engine.debug_enabled)
+        self._executor = self._new_executor()
+        self._slots = threading.Semaphore(options.workers + self.queue_size)
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.served = 0
+        self.rejected = 0
+        # Veces que se volvió a crear el pool porque un proceso murió de golpe
+        self.restarts = 0
+        self.latency = pdf_engine.LatencyHistogram()
+        self.waiting = pdf_engine.LatencyHistogram()
+        self.analysis = pdf_engine.LatencyHistogram()
+
+    def _new_executor(self):
+        options = self.options
+        if options.timeouts:
+            return pdf_watchdog.WatchdogExecutor(
+                max_workers=options.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self._matchers, options, pdf_engine.debug_enabled),
+                file_timeout=options.file_timeout,
+                page_timeout=options.page_timeout
+            )
+        if options.mode == "process":
+            return futures.ProcessPoolExecutor(
+                max_workers=options.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self._matchers, options, pdf_engine.debug_enabled)
+            )
+        return futures.ThreadPoolExecutor(max_workers=options.workers)
+
+    def _restart(self, broken):
+        """Reemplaza el pool `broken` (ProcessPoolExecutor no se recupera de un proceso que muere de golpe)."""
+        with self._lock:
+            if self._executor is not broken:
+                # Otro pedido ya lo reemplazó
+                return
+            self._executor = self._new_executor()
+            self.restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def warm_up(self):
+        """Arranca todos los workers (en modo process cada uno importa PyPDF2 y recibe los criterios)."""
+        pending = [self._executor.submit(_warm_up) for _ in range(self.options.workers)]
+        futures.wait(pending)
+
+    def classify(self, pdf_path, criteria_set, uploaded=False):
+        """Analiza `pdf_path` con el conjunto `criteria_set`; devuelve (resultado, segundos, segundos en cola).
+
+        `uploaded` indica que `pdf_path` es la copia temporal de un PDF subido
+        (en la caché se identifica por su contenido).
+        """
+        if criteria_set not in self.criteria_sets:
+            raise KeyError(criteria_set)
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise ServiceBusy()
+        started = time.monotonic()
+        with self._lock:
+            self.admitted += 1
+        executor = self._executor
+        try:
+            try:
+                result = executor.submit(_classify_in_worker, pdf_path, criteria_set, uploaded).result()
+            except futures.BrokenExecutor as e:
+                # Murió un proceso (con este archivo o con otro pedido en curso)
+                self._restart(executor)
+                raise WorkerCrashed(str(e))
+            except Exception as e:
+                # El proceso de trabajo terminó de forma inesperada o superó un límite de tiempo
+                result = pdf_engine.AnalysisResult(pdf_path, error=str(e))
+                if isinstance(e, pdf_watchdog.WorkerTimeout):
+                    result.timed_out = e.limit
+        finally:
+            self._slots.release()
+            with self._lock:
+                self.admitted -= 1
+        elapsed = time.monotonic() - started
+        waited = max(0.0, elapsed - result.elapsed)
+        with self._lock:
+            self.served += 1
+            self.latency.add(elapsed)
+            self.waiting.add(waited)
+            self.analysis.add(result.elapsed)
+        return result, elapsed, waited
+
+    def status(self):
+        """Pedidos atendidos, rechazados, en curso y en cola, reinicios del pool y percentiles de latencia (ms)."""
+        with self._lock:
+            running = min(self.admitted, self.options.workers)
+            return {
+                "workers": self.options.workers,
+                "cola": self.queue_size,
+                "en_curso": running,
+                "en_cola": self.admitted - running,
+                "atendidos": self.served,
+                "rechazados": self.rejected,
+                "reinicios": self.restarts,
+                "latencia_ms": {name: _milliseconds(histogram.summary()) for name, histogram in
+                                (("total", self.latency), ("espera", self.waiting), ("analisis", self.analysis))},
+            }
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _milliseconds(summary):
+    return {key: (round(value * 1000, 2) if key != "count" else value) for key, value in summary.items()}
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """Pedidos de clasificación (ver la API al comienzo del módulo)."""
+
+    server_version = "PdfAnalyzerService/1"
+
+    def log_message(self, format, *args):
+        pdf_engine.debug_print(f"{self.address_string()} {format % args}")
+
+    def _reply(self, status, body, headers=()):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError) as e:
+            pdf_engine.debug_print(f"{self.address_string()} no recibió la respuesta: {str(e)}")
+
+    def _authorized(self):
+        key = self.server.key
+        if key is None:
+            return True
+        return hmac.compare_digest(self.headers.get("X-Clave", "").encode("utf-8"), key.encode("utf-8"))
+
+    def do_GET(self):
+        if not self._authorized():
+            return self._reply(403, {"error": "Clave incorrecta"})
+        service = self.server.service
+        if self.path == "/estado":
+            return self._reply(200, service.status())
+        if self.path == "/conjuntos":
+            return self._reply(200, {name: [pdf_engine.format_criterion(condition) for condition in conditions]
+                                     for name, conditions in service.criteria_sets.items()})
+        self._reply(404, {"error": f"No existe {self.path}"})
+
+    def do_POST(self):
+        if not self._authorized():
+            return self._reply(403, {"error": "Clave incorrecta"})
+        url = urllib.parse.urlsplit(self.path)
+        if url.path != "/clasificar":
+            return self._reply(404, {"error": f"No existe {url.path}"})
+        query = dict(urllib.parse.parse_qsl(url.query))
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            return self._reply(400, {"error": "Content-Length inválido"})
+
+        upload = None
+        try:
+            if self.headers.get_content_type() == "application/json":
+                if length > _MAX_JSON:
+                    return self._reply(413, {"error": f"El pedido supera {_MAX_JSON // 1024} KB"})
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if not isinstance(body, dict) or not body.get("ruta"):
+                    return self._reply(400, {"error": "Falta \"ruta\""})
+                pdf_path = str(body["ruta"])
+                criteria_set = body.get("conjunto") or query.get("conjunto")
+                name = pdf_path
+            else:
+                if length > self.server.max_upload:
+                    return self._reply(413, {"error": f"El PDF supera {self.server.max_upload // (1024 * 1024)} MB"})
+                upload = self._save_upload(length)
+                pdf_path = upload
+                criteria_set = query.get("conjunto")
+                name = query.get("nombre") or "subido.pdf"
+        except ValueError as e:
+            return self._reply(400, {"error": str(e)})
+        except OSError as e:
+            return self._reply(500, {"error": f"No se pudo guardar el PDF: {str(e)}"})
+
+        service = self.server.service
+        try:
+            if criteria_set is None:
+                if len(service.criteria_sets) != 1:
+                    return self._reply(400, {"error": "Falta \"conjunto\""})
+                criteria_set = next(iter(service.criteria_sets))
+            try:
+                result, elapsed, waited = service.classify(pdf_path, criteria_set, uploaded=upload is not None)
+            except KeyError:
+                return self._reply(404, {"error": f"Conjunto de criterios desconocido: {criteria_set}"})
+            except ServiceBusy:
+                return self._reply(503, {"error": "Servicio saturado, reintentar más tarde"},
+                                   headers=(("Retry-After", str(_RETRY_AFTER)),))
+            except WorkerCrashed as e:
+                return self._reply(500, {"error": f"El proceso de trabajo terminó de forma inesperada: {str(e)}"})
+        finally:
+            if upload is not None:
+                os.remove(upload)
+        record = pdf_report.result_record(result)
+        record["path"] = name
+        self._reply(200, {"conjunto": criteria_set, "resultado": record, "ms": round(elapsed * 1000, 2),
+                          "espera_ms": round(waited * 1000, 2)})
+
+    def _save_upload(self, length):
+        """Guarda el cuerpo del pedido en un archivo temporal y devuelve su ruta."""
+        fd, path = tempfile.mkstemp(suffix=".pdf", dir=self.server.upload_folder)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                remaining = length
+                while remaining > 0:
+                    chunk = self.rfile.read(min(remaining, _UPLOAD_CHUNK))
+                    if not chunk:
+                        raise ValueError("El PDF llegó incompleto")
+                    f.write(chunk)
+                    remaining -= len(chunk)
+        except BaseException:
+            os.remove(path)
+            raise
+        return path
+
+
+class _Server(http.server.ThreadingHTTPServer):
+    # Conexiones pendientes de aceptar: las ráfagas de pedidos esperan en la cola del servicio
+    # (y reciben 503 si no hay lugar), no en la del sistema operativo
+    request_queue_size = 256
+
+
+def classify(url, pdf_path=None, data=None, criteria_set=None, name=None, key=None, timeout=300):
+    """Cliente del servicio: clasifica un archivo que el servicio puede leer (`pdf_path`) o un PDF subido (`data`).
+
+    Devuelve (código HTTP, respuesta JSON); 503 indica que el servicio está saturado.
+    """
+    url = url.rstrip("/") + "/clasificar"
+    headers = {"X-Clave": key} if key else {}
+    if data is None:
+        body = {"ruta": pdf_path}
+        if criteria_set:
+            body["conjunto"] = criteria_set
+        data = json.dumps(body).encode("utf-8")
+        headers["Content-Type"] = "application/json"
+    else:
+        query = {key_: value for key_, value in (("conjunto", criteria_set), ("nombre", name)) if value}
+        if query:
+            url += "?" + urllib.parse.urlencode(query)
+        headers["Content-Type"] = "application/pdf"
+    request = urllib.request.Request(url, data=data, headers=headers, method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, json.loads(response.read().decode("utf-8"))
+    except urllib.error.HTTPError as e:
+        try:
+            return e.code, json.loads(e.read().decode("utf-8"))
+        except ValueError:
+            return e.code, {"error": e.reason}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Servicio HTTP que responde si un PDF cumple un conjunto de criterios, con workers en marcha."
+    )
+    parser.add_argument("-c", "--criterios", action="append", required=True, metavar="[NOMBRE=]ARCHIVO",
+                        help="Conjunto de criterios (un archivo como el de pdf_cli.py); sin NOMBRE se usa el "
+                             "nombre del archivo. Se puede repetir")
+    parser.add_argument("--escuchar", default=DEFAULT_ADDRESS, metavar="HOST:PUERTO",
+                        help=f"Dirección del servicio (por defecto {DEFAULT_ADDRESS}, solo esta máquina)")
+    parser.add_argument("--clave", default=None, help="Clave que deben presentar los clientes (cabecera X-Clave)")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="Archivos que se analizan a la vez (por defecto, un proceso por núcleo)")
+    parser.add_argument("-m", "--modo", choices=pdf_engine.EXECUTION_MODES, default=pdf_engine.DEFAULT_MODE,
+                        help="Analizar en procesos (usa todos los núcleos) o en hilos")
+    parser.add_argument("--cola", type=int, default=DEFAULT_QUEUE_SIZE, metavar="N",
+                        help="Pedidos que pueden esperar a que se libere un worker; los demás reciben 503")
+    parser.add_argument("--max-subida-mb", type=int, default=DEFAULT_MAX_UPLOAD_MB, metavar="MB",
+                        help="Tamaño máximo de un PDF subido")
+    parser.add_argument("--carpeta-temporal", metavar="CARPETA", default=None,
+                        help="Dónde se guardan los PDFs subidos mientras se analizan")
+    parser.add_argument("--extractor", choices=pdf_backends.BACKENDS, default=pdf_backends.DEFAULT_BACKEND,
+                        help="Biblioteca que extrae el texto (pypdfium2 y pdfminer si están instalados)")
+    parser.add_argument("--cache", metavar="CARPETA",
+                        help="Carpeta de la caché de texto extraído (los PDFs subidos se identifican "
+                             "siempre por su contenido)")
+    parser.add_argument("--cache-max-mb", type=int, default=pdf_cache.DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="Tamaño máximo de la caché en MB")
+    parser.add_argument("--cache-clave", choices=pdf_cache.CACHE_KEYS, default="stat",
+                        help="Identificar los PDFs pedidos por ruta por su ruta/tamaño/fecha (stat) o por su "
+                             "contenido (content)")
+    parser.add_argument("--limite-paginas", type=int, default=None, metavar="N",
+                        help="Decidir con las primeras N páginas los archivos más largos")
+    parser.add_argument("--timeout-archivo", type=float, default=None, metavar="SEGUNDOS",
+                        help="Tiempo máximo por archivo; el proceso que lo supera se reemplaza (requiere --modo "
+                             "process)")
+    parser.add_argument("--timeout-pagina", type=float, default=None, metavar="SEGUNDOS",
+                        help="Tiempo máximo sin avanzar de página dentro de un archivo (requiere --modo process)")
+    parser.add_argument("--intervalo-estado", type=float, default=DEFAULT_STATUS_INTERVAL, metavar="SEGUNDOS",
+                        help="Cada cuántos segundos se muestran en la consola los pedidos y las latencias")
+    parser.add_argument("--debug", action="store_true", help="Muestra mensajes de depuración")
+    return parser
+
+
+def _status_line(status):
+    latency = status["latencia_ms"]
+    return (f"Atendidos: {status['atendidos']}  Rechazados: {status['rechazados']}  "
+            f"En curso: {status['en_curso']}  En cola: {status['en_cola']}  "
+            f"Latencia p50 {latency['total']['p50']:.1f} ms, p95 {latency['total']['p95']:.1f} ms, "
+            f"p99 {latency['total']['p99']:.1f} ms (análisis p50 {latency['analisis']['p50']:.1f} ms, "
+            f"espera p95 {latency['espera']['p95']:.1f} ms)")
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    pdf_engine.debug_enabled = args.debug
+
+    try:
+        criteria_sets = load_criteria_sets(args.criterios)
+    except (OSError, ValueError) as e:
+        print(f"Error al leer los criterios: {str(e)}", file=sys.stderr)
+        return 2
+    try:
+        host, port = pdf_cluster.parse_address(args.escuchar)
+        options = pdf_engine.AnalysisOptions(
+            output_folder=None,
+            relocate="report",
+            workers=args.workers,
+            mode=args.modo,
+            backend=args.extractor,
+            cache_folder=args.cache,
+            cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+            cache_key=args.cache_clave,
+            max_pages=args.limite_paginas,
+            # En un servicio no hay "después": los archivos largos se deciden con sus primeras páginas
+            oversize="partial",
+            file_timeout=args.timeout_archivo,
+            page_timeout=args.timeout_pagina
+        )
+    except ValueError as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 2
+
+    service = ClassificationService(criteria_sets, options, queue_size=args.cola)
+    try:
+        server = _Server((host, port), _Handler)
+    except OSError as e:
+        print(f"No se puede escuchar en {args.escuchar}: {str(e)}", file=sys.stderr)
+        service.close()
+        return 2
+    server.service = service
+    server.key = args.clave
+    server.max_upload = args.max_subida_mb * 1024 * 1024
+    server.upload_folder = args.carpeta_temporal
+
+    started = time.monotonic()
+    service.warm_up()
+    print(f"Workers listos en {time.monotonic() - started:.1f} s: {options.workers} "
+          f"{'procesos' if options.mode == 'process' else 'hilos'}, cola de {service.queue_size}")
+    for name, conditions in criteria_sets.items():
+        print(f"Conjunto {name}: {len(conditions)} criterios")
+
+    # Ctrl+C o SIGTERM: dejar de aceptar pedidos y terminar los que están en curso
+    shutdown = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: shutdown.set())
+    signal.signal(signal.SIGTERM, lambda signum, frame: shutdown.set())
+    threading.Thread(target=server.serve_forever, name="ServiceServer", daemon=True).start()
+    print(f"Servicio en http://{host}:{port}. Ctrl+C para terminar.")
+
+    served = 0
+    next_status = time.monotonic() + args.intervalo_estado
+    while not shutdown.wait(0.5):
+        if time.monotonic() >= next_status:
+            next_status += args.intervalo_estado
+            status = service.status()
+            if status["atendidos"] != served:
+                served = status["atendidos"]
+                print(_status_line(status))
+
+    server.shutdown()
+    server.server_close()
+    service.close()
+    print(_status_line(service.status()))
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
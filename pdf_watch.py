@@ -0,0 +1,465 @@
+"""Modo vigilancia: clasifica los PDFs a medida que llegan a una carpeta de entrada.
+
+Ejemplo:
+    python pdf_watch.py /datos/bandeja --criterios criterios.txt --salida "/datos/PDFs Encontrados"
+
+Los archivos nuevos se detectan con inotify en Linux (o revisando las
+carpetas periódicamente en otros sistemas, o con --sondeo), se esperan hasta
+que terminan de escribirse y se analizan con los mismos workers del motor,
+que quedan en marcha entre archivo y archivo. El informe se rota por
+ventanas de tiempo (--intervalo-informe) e incluye la latencia de punta a
+punta: desde que el archivo apareció hasta que quedó clasificado.
+"""
+import os
+import sys
+import time
+import errno
+import ctypes
+import select
+import signal
+import struct
+import threading
+import ctypes.util
+import multiprocessing
+import pdf_cli
+import pdf_engine
+import pdf_report
+import pdf_scanner
+
+# Segundos sin cambios de tamaño ni fecha para considerar que un archivo terminó de escribirse
+DEFAULT_SETTLE = 1.0
+
+# Cada cuántos segundos se recorren las carpetas sin inotify
+DEFAULT_POLL_INTERVAL = 1.0
+
+# Duración de cada informe (segundos)
+DEFAULT_REPORT_WINDOW = 3600
+
+# Cuánto espera la fuente de archivos antes de devolverle el control al motor
+_WAIT_SLICE = 0.05
+
+# Constantes de inotify (linux/inotify.h)
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_MOVED_FROM | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Acceso mínimo a inotify con ctypes (sin dependencias externas)."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        # Descriptor de vigilancia -> carpeta
+        self.folders = {}
+
+    def watch(self, folder):
+        wd = self._add_watch(self.fd, os.fsencode(folder), _WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch {folder}")
+        self.folders[wd] = folder
+
+    def read(self, timeout):
+        """Espera hasta `timeout` segundos y devuelve los eventos (máscara, ruta)."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return []
+            raise
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            folder = self.folders.get(wd)
+            if mask & _IN_IGNORED:
+                self.folders.pop(wd, None)
+            if mask & _IN_Q_OVERFLOW:
+                events.append((mask, None))
+            elif folder is not None:
+                events.append((mask, os.path.join(folder, name) if name else folder))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _Candidate:
+    """Archivo detectado que todavía no se entregó para analizar."""
+
+    __slots__ = ("stat", "since", "closed", "detected")
+
+    def __init__(self, detected, closed):
+        self.stat = None
+        self.since = detected
+        # Con inotify: el escritor ya cerró el archivo (o llegó movido, completo)
+        self.closed = closed
+        self.detected = detected
+
+
+class FolderWatcher:
+    """Detecta PDFs nuevos o reescritos en carpetas y entrega los que terminaron de escribirse.
+
+    Un archivo se entrega cuando su tamaño y fecha no cambiaron durante
+    `settle` segundos (y, con inotify, después de que su escritor lo cerró).
+    Al empezar se entregan también los PDFs que ya estaban en las carpetas.
+    Los archivos dentro de `ignore` (por ejemplo, la carpeta de salida) no
+    se tienen en cuenta.
+    """
+
+    def __init__(self, folders, include=pdf_scanner.DEFAULT_INCLUDE, exclude=(), min_size=None, max_size=None,
+                 settle=DEFAULT_SETTLE, poll_interval=DEFAULT_POLL_INTERVAL, use_inotify=True, ignore=(),
+                 on_error=None):
+        self.folders = [os.path.abspath(folder) for folder in folders]
+        self.include = include
+        self.exclude = exclude
+        self.min_size = min_size
+        self.max_size = max_size
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self.ignore = [os.path.abspath(folder) + os.sep for folder in ignore]
+        self.on_error = on_error
+        self.candidates = {}
+        # Archivos ya entregados: ruta -> (tamaño, fecha); se vuelven a entregar si cambian
+        self.seen = {}
+        self._next_poll = 0.0
+
+        self.inotify = None
+        if use_inotify and sys.platform.startswith("linux"):
+            try:
+                self.inotify = _Inotify()
+                for folder in self.folders:
+                    self._watch_tree(folder)
+            except (OSError, AttributeError) as e:
+                pdf_engine.debug_print(f"inotify no disponible, se revisan las carpetas periódicamente: {str(e)}")
+                if self.inotify is not None:
+                    self.inotify.close()
+                self.inotify = None
+        self._scan(time.monotonic())
+
+    @property
+    def method(self):
+        return "inotify" if self.inotify is not None else "sondeo"
+
+    def _root_of(self, path):
+        for folder in self.folders:
+            if path == folder or path.startswith(folder + os.sep):
+                return folder
+        return None
+
+    def _ignored(self, path):
+        return any(path.startswith(prefix) for prefix in self.ignore)
+
+    def _watch_tree(self, folder):
+        """Vigila `folder` y sus subcarpetas (salvo las ignoradas)."""
+        pending = [folder]
+        while pending:
+            current = pending.pop()
+            if self._ignored(current + os.sep):
+                continue
+            try:
+                self.inotify.watch(current)
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+            except OSError as e:
+                if self.on_error:
+                    self.on_error(current, e)
+
+    def _add(self, path, now, closed):
+        if self._ignored(path):
+            return
+        root = self._root_of(path)
+        if root is None or not pdf_scanner.accepts(path, root, self.include, self.exclude):
+            return
+        candidate = self.candidates.get(path)
+        if candidate is None:
+            self.candidates[path] = _Candidate(now, closed)
+        else:
+            candidate.closed = candidate.closed or closed
+            candidate.since = now
+
+    def _scan(self, now):
+        """Recorre las carpetas: agrega los archivos nuevos o cambiados y olvida los que ya no están."""
+        found = set()
+        for path in pdf_scanner.scan_pdfs(self.folders, self.include, self.exclude, on_error=self.on_error):
+            if self._ignored(path):
+                continue
+            found.add(path)
+            if path in self.candidates:
+                continue
+            previous = self.seen.get(path)
+            if previous is not None:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if previous == (stat.st_size, stat.st_mtime_ns):
+                    continue
+            self.candidates[path] = _Candidate(now, closed=True)
+        for path in [path for path in self.seen if path not in found]:
+            del self.seen[path]
+        self._next_poll = now + self.poll_interval
+
+    def _handle_events(self, events, now):
+        for mask, path in events:
+            if path is None:
+                # Se perdieron eventos: recorrer todo de nuevo
+                self._scan(now)
+            elif mask & _IN_ISDIR:
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    # Carpeta nueva: vigilarla y tomar lo que ya tenga adentro
+                    self._watch_tree(path)
+                    for pdf_path in pdf_scanner.scan_pdfs([path], self.include, self.exclude):
+                        self._add(pdf_path, now, closed=True)
+            elif mask & (_IN_DELETE | _IN_MOVED_FROM):
+                self.candidates.pop(path, None)
+                self.seen.pop(path, None)
+            elif mask & (_IN_CLOSE_WRITE | _IN_MOVED_TO):
+                self._add(path, now, closed=True)
+            elif mask & _IN_CREATE:
+                self._add(path, now, closed=False)
+
+    def _collect(self, now):
+        """Devuelve los candidatos que ya terminaron de escribirse."""
+        ready = []
+        for path, candidate in list(self.candidates.items()):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                del self.candidates[path]
+                continue
+            key = (stat.st_size, stat.st_mtime_ns)
+            if key != candidate.stat:
+                candidate.stat = key
+                candidate.since = now
+                continue
+            if now - candidate.since < self.settle or not candidate.closed:
+                continue
+            del self.candidates[path]
+            self.seen[path] = key
+            if (self.min_size is not None and stat.st_size < self.min_size) or \
+                    (self.max_size is not None and stat.st_size > self.max_size):
+                continue
+            ready.append((path, candidate.detected))
+        return ready
+
+    def ready(self, timeout):
+        """Espera hasta `timeout` segundos y devuelve [(ruta, instante de detección)] listos para analizar."""
+        deadline = time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            # Los candidatos se revisan varias veces dentro de cada período de estabilidad
+            step = max(0.0, deadline - now)
+            if self.candidates:
+                step = min(step, self.settle / 4)
+            if self.inotify is not None:
+                self._handle_events(self.inotify.read(step), time.monotonic())
+            else:
+                if now >= self._next_poll:
+                    self._scan(now)
+                time.sleep(min(step, max(0.0, self._next_poll - now)))
+            now = time.monotonic()
+            ready = self._collect(now) if self.candidates else []
+            if ready or now >= deadline:
+                return ready
+
+    def close(self):
+        if self.inotify is not None:
+            self.inotify.close()
+            self.inotify = None
+
+
+class RotatingReport:
+    """Informe del modo vigilancia: un ReportWriter por ventana de tiempo.
+
+    Cada ventana tiene sus propias estadísticas y tiempos; el archivo se crea
+    con el primer resultado de la ventana, así que las ventanas sin
+    actividad no dejan informes vacíos.
+    """
+
+    def __init__(self, folder, conditions, window=DEFAULT_REPORT_WINDOW, formats=("txt",),
+                 flush_interval=pdf_report.DEFAULT_FLUSH_INTERVAL, on_close=None):
+        self.folder = folder
+        self.conditions = conditions
+        self.window = window
+        self.formats = formats
+        self.flush_interval = flush_interval
+        # Se llama con (tracker, ReportWriter) al cerrar cada ventana
+        self.on_close = on_close
+        self.writer = None
+        self.tracker = None
+        self.window_end = None
+
+    def add(self, result, latency=None):
+        now = time.time()
+        self.rotate(now)
+        if self.writer is None:
+            self.tracker = pdf_engine.ProgressTracker()
+            self.writer = pdf_report.ReportWriter(pdf_report.new_log_filename(self.folder), self.conditions,
+                                                  formats=self.formats, flush_interval=self.flush_interval)
+            # Ventanas alineadas con el reloj (por ejemplo, en punto cada hora)
+            self.window_end = (now // self.window + 1) * self.window
+        self.tracker.add_total()
+        self.tracker.update(result, latency)
+        self.writer.add(result)
+
+    def rotate(self, now=None):
+        """Cierra el informe en curso si terminó su ventana."""
+        if self.writer is not None and (now or time.time()) >= self.window_end:
+            self.close()
+
+    def close(self):
+        if self.writer is None:
+            return
+        writer, tracker = self.writer, self.tracker
+        self.writer = self.tracker = None
+        writer.close(tracker.stats, tracker.timings)
+        if self.on_close:
+            self.on_close(tracker, writer)
+
+
+def build_parser():
+    parser = pdf_cli.build_parser()
+    parser.description = ("Vigila carpetas de entrada y clasifica los PDFs a medida que llegan "
+                          "(mueve a la carpeta de salida los que cumplen algún criterio).")
+    parser.add_argument("--estabilidad", type=float, default=DEFAULT_SETTLE, metavar="SEGUNDOS",
+                        help="Segundos sin cambios para considerar que un archivo terminó de escribirse")
+    parser.add_argument("--sondeo", action="store_true",
+                        help="Revisar las carpetas periódicamente en lugar de usar inotify")
+    parser.add_argument("--intervalo-sondeo", type=float, default=DEFAULT_POLL_INTERVAL, metavar="SEGUNDOS",
+                        help="Cada cuántos segundos se revisan las carpetas sin inotify")
+    parser.add_argument("--intervalo-informe", type=float, default=DEFAULT_REPORT_WINDOW, metavar="SEGUNDOS",
+                        help="Duración de cada informe; al terminar la ventana se empieza uno nuevo")
+    return parser
+
+
+def _ready_paths(watcher, report, shutdown, detected, journal=None):
+    """Fuente de archivos para el motor: entrega None mientras no hay nada nuevo."""
+    while not shutdown.is_set():
+        report.rotate()
+        ready = watcher.ready(_WAIT_SLICE)
+        if not ready:
+            yield None
+            continue
+        for path, detected_at in ready:
+            # Lo que ya se clasificó antes de reiniciar no se repite (solo se
+            # pasa el diario con --reanudar)
+            if journal is not None and journal.is_done(path):
+                continue
+            detected[path] = detected_at
+            yield path
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    pdf_engine.debug_enabled = args.debug
+
+    try:
+        conditions = pdf_engine.load_conditions(args.criterios)
+    except (OSError, ValueError) as e:
+        print(f"Error al leer los criterios: {str(e)}", file=sys.stderr)
+        return 2
+    if not conditions:
+        print("No hay criterios de búsqueda definidos.", file=sys.stderr)
+        return 2
+    try:
+        options = pdf_cli.build_options(args)
+        journal = pdf_cli.open_journal(args, conditions)
+    except (ValueError, OSError) as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 2
+    # El carril de excedidos corre cuando se termina la fuente de archivos, y en
+    # vigilancia eso es recién al cerrar: los archivos sobre los límites se
+    # deciden con sus primeras páginas en lugar de esperar hasta entonces
+    if options.oversize == "lane":
+        options.oversize = "partial"
+    for folder in args.inputs:
+        if not os.path.isdir(folder):
+            print(f"No es una carpeta: {folder}", file=sys.stderr)
+            return 2
+
+    def report_scan_error(path, error):
+        print(f"No se puede leer {path}: {error}", file=sys.stderr)
+
+    def report_window(tracker, writer):
+        summary = tracker.timings.summary()
+        latency = summary.get("latency")
+        line = f"Informe cerrado: {tracker.stats['processed']} archivos, {tracker.stats['matches']} encontrados"
+        if latency:
+            line += f", latencia p50 {latency['p50']:.2f} s, p95 {latency['p95']:.2f} s"
+        print(line)
+        for report_path in writer.paths.values():
+            print(f"Informe: {report_path}")
+
+    os.makedirs(args.salida, exist_ok=True)
+    watcher = FolderWatcher(
+        args.inputs,
+        include=args.incluir or pdf_scanner.DEFAULT_INCLUDE,
+        exclude=args.excluir,
+        min_size=args.min_kb * 1024 if args.min_kb is not None else None,
+        max_size=args.max_mb * 1024 * 1024 if args.max_mb is not None else None,
+        settle=args.estabilidad,
+        poll_interval=args.intervalo_sondeo,
+        use_inotify=not args.sondeo,
+        ignore=options.destination_folders,
+        on_error=report_scan_error
+    )
+    report = RotatingReport(args.salida, conditions, window=args.intervalo_informe,
+                            formats=args.formato or ("txt",), flush_interval=args.intervalo_escritura,
+                            on_close=report_window)
+
+    # Ctrl+C o SIGTERM: dejar de tomar archivos nuevos y terminar los que están en curso
+    shutdown = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: shutdown.set())
+    signal.signal(signal.SIGTERM, lambda signum, frame: shutdown.set())
+
+    print(f"Vigilando {', '.join(watcher.folders)} ({watcher.method}). Ctrl+C para terminar.")
+    detected = {}
+    started = time.monotonic()
+    processed = 0
+    try:
+        paths = _ready_paths(watcher, report, shutdown, detected, journal if args.reanudar else None)
+        for result in pdf_engine.analyze(paths, conditions, options):
+            detected_at = detected.pop(result.path, None)
+            latency = time.monotonic() - detected_at if detected_at is not None else None
+            report.add(result, latency)
+            if journal is not None:
+                journal.record(result)
+            processed += 1
+            if args.verbose:
+                print(f"{result.status}: {result.path} {pdf_cli.result_detail(result)}".rstrip()
+                      + (f" ({latency:.2f} s)" if latency is not None else ""))
+    finally:
+        report.close()
+        watcher.close()
+        if journal is not None:
+            journal.close()
+
+    elapsed = time.monotonic() - started
+    print(f"Procesados: {processed} en {elapsed:.0f} s ({processed / max(elapsed, 1e-6) * 60:.1f} PDFs/min)")
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
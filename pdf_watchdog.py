@@ -0,0 +1,278 @@
+"""Pool de procesos con límite de tiempo por tarea.
+
+concurrent.futures.ProcessPoolExecutor no permite matar un worker que quedó
+colgado en una tarea. WatchdogExecutor reparte las tareas entre procesos
+propios, vigila cuánto lleva cada una y, si supera el límite por archivo o
+pasa demasiado tiempo sin avanzar de página (ver beat()), mata el proceso,
+marca la tarea con WorkerTimeout y lo reemplaza por uno nuevo.
+
+Expone submit()/shutdown() con Future de concurrent.futures, así que se usa
+igual que los executors estándar.
+"""
+import time
+import threading
+import collections
+from concurrent import futures
+from multiprocessing import connection
+
+# Intervalo con el que el vigilante revisa los tiempos de las tareas
+_POLL_INTERVAL = 0.05
+
+# Instante del último avance de la tarea en curso (solo en los procesos del pool)
+_heartbeat = None
+
+
+def beat():
+    """Indica que la tarea en curso avanzó (por ejemplo, que empieza otra página).
+
+    Fuera de un WatchdogExecutor no hace nada.
+    """
+    if _heartbeat is not None:
+        _heartbeat.value = time.monotonic()
+
+
+class WorkerTimeout(Exception):
+    """La tarea superó su límite de tiempo y el proceso que la ejecutaba fue terminado."""
+
+    def __init__(self, message, limit):
+        super().__init__(message)
+        # "file" o "page"
+        self.limit = limit
+
+
+class WorkerDied(Exception):
+    """El proceso terminó de forma inesperada mientras ejecutaba la tarea."""
+
+
+def _worker_main(conn, heartbeat, initializer, initargs):
+    # El proceso atiende tareas hasta recibir None: el que decide cuándo
+    # reciclarlo (max_tasks_per_child) es el proceso principal
+    global _heartbeat
+    _heartbeat = heartbeat
+    if initializer is not None:
+        initializer(*initargs)
+    while True:
+        task = conn.recv()
+        if task is None:
+            break
+        function, args = task
+        heartbeat.value = time.monotonic()
+        try:
+            conn.send((True, function(*args)))
+        except BaseException as e:
+            conn.send((False, e))
+    conn.close()
+
+
+class _Worker:
+    def __init__(self, ctx, initializer, initargs):
+        self.conn, child_conn = ctx.Pipe()
+        self.heartbeat = ctx.Value('d', 0.0, lock=False)
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.heartbeat, initializer, initargs),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.future = None
+        self.started = 0.0
+        # Tareas terminadas por este proceso
+        self.tasks = 0
+
+    def start(self, future, function, args):
+        """Le pasa una tarea ya marcada como en curso. Devuelve False si el proceso ya no la puede recibir."""
+        self.future = future
+        self.started = time.monotonic()
+        self.heartbeat.value = self.started
+        try:
+            self.conn.send((function, args))
+            return True
+        except OSError:
+            self.future = None
+            return False
+
+    def stop(self):
+        """Termina un proceso libre: le pide que salga y, si no lo hace, lo mata."""
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class WatchdogExecutor:
+    """Executor de procesos que mata y reemplaza los workers cuyas tareas superan su límite de tiempo.
+
+    Los procesos se crean a medida que hacen falta, hasta `max_workers`.
+
+    - file_timeout: segundos máximos por tarea (None = sin límite)
+    - page_timeout: segundos máximos sin llamar a beat() (None = sin límite)
+    - max_tasks_per_child: reemplazar cada proceso tras esa cantidad de tareas
+    """
+
+    def __init__(self, max_workers, mp_context, initializer=None, initargs=(),
+                 file_timeout=None, page_timeout=None, max_tasks_per_child=None):
+        self._ctx = mp_context
+        self._initializer = initializer
+        self._initargs = initargs
+        self._max_tasks = max_tasks_per_child
+        self.max_workers = max_workers
+        self.file_timeout = file_timeout
+        self.page_timeout = page_timeout
+        # Procesos reemplazados por morir o superar un límite de tiempo, y
+        # procesos reciclados al llegar a max_tasks_per_child
+        self.replaced = 0
+        self.recycled = 0
+
+        self._queue = collections.deque()
+        self._lock = threading.Lock()
+        self._wakeup_reader, self._wakeup_writer = mp_context.Pipe(duplex=False)
+        self._shutdown = False
+        self._workers = []
+        self._thread = threading.Thread(target=self._run, name="WatchdogExecutor", daemon=True)
+        self._thread.start()
+
+    def _spawn(self):
+        return _Worker(self._ctx, self._initializer, self._initargs)
+
+    def submit(self, function, *args):
+        future = futures.Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("El executor ya fue cerrado")
+            self._queue.append((future, function, args))
+        self._wakeup_writer.send(None)
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        """Deja de aceptar tareas. Las que están en curso terminan (o vencen) normalmente."""
+        with self._lock:
+            self._shutdown = True
+            if cancel_futures:
+                while self._queue:
+                    self._queue.popleft()[0].cancel()
+        self._wakeup_writer.send(None)
+        if wait:
+            self._thread.join()
+
+    def _idle_workers(self):
+        for worker in list(self._workers):
+            if worker.future is None:
+                yield worker
+        while self._queue and len(self._workers) < self.max_workers:
+            worker = self._spawn()
+            self._workers.append(worker)
+            yield worker
+
+    def _dispatch(self):
+        if not self._queue:
+            return
+        for worker in self._idle_workers():
+            with self._lock:
+                if not self._queue:
+                    return
+                future, function, args = self._queue.popleft()
+            if not future.set_running_or_notify_cancel():
+                continue
+            if worker.start(future, function, args):
+                continue
+            # El proceso murió estando libre: la tarea (que ya figura en curso)
+            # pasa a uno nuevo en su lugar
+            self._replace(worker, None)
+            worker = self._spawn()
+            self._workers.append(worker)
+            if not worker.start(future, function, args):
+                self._replace(worker, None)
+                future.set_exception(WorkerDied("No se pudo iniciar un proceso de trabajo"))
+
+    def _replace(self, worker, error):
+        future = worker.future
+        worker.future = None
+        try:
+            worker.kill()
+        except OSError:
+            pass
+        # El reemplazo se crea en cuanto haya otra tarea (_idle_workers)
+        self._workers.remove(worker)
+        self.replaced += 1
+        if future is not None and error is not None:
+            future.set_exception(error)
+
+    def _finished(self, worker):
+        """Cuenta la tarea que `worker` acaba de terminar y lo recicla si llegó a max_tasks_per_child."""
+        worker.tasks += 1
+        if self._max_tasks and worker.tasks >= self._max_tasks:
+            # Se lo retira antes de darle otra tarea; el reemplazo se crea en
+            # cuanto haga falta (_idle_workers)
+            self._workers.remove(worker)
+            worker.stop()
+            self.recycled += 1
+
+    def _check_timeouts(self):
+        now = time.monotonic()
+        for worker in list(self._workers):
+            if worker.future is None:
+                continue
+            if self.file_timeout and now - worker.started > self.file_timeout:
+                self._replace(worker, WorkerTimeout(
+                    f"Tiempo agotado: más de {self.file_timeout:g} s en el archivo", "file"))
+            elif self.page_timeout and now - worker.heartbeat.value > self.page_timeout:
+                self._replace(worker, WorkerTimeout(
+                    f"Tiempo agotado: más de {self.page_timeout:g} s en una página", "page"))
+
+    def _run(self):
+        while True:
+            self._dispatch()
+            busy = [worker for worker in self._workers if worker.future is not None]
+            with self._lock:
+                if self._shutdown and not busy:
+                    break
+
+            waitables = [self._wakeup_reader]
+            for worker in self._workers:
+                waitables.append(worker.conn)
+                waitables.append(worker.process.sentinel)
+            ready = connection.wait(waitables, timeout=_POLL_INTERVAL)
+
+            if self._wakeup_reader in ready:
+                while self._wakeup_reader.poll():
+                    self._wakeup_reader.recv()
+            for worker in list(self._workers):
+                if worker.conn in ready:
+                    try:
+                        ok, value = worker.conn.recv()
+                    except (EOFError, OSError):
+                        self._replace(worker, WorkerDied("El proceso de trabajo terminó de forma inesperada"))
+                        continue
+                    future, worker.future = worker.future, None
+                    if future is not None:
+                        if ok:
+                            future.set_result(value)
+                        else:
+                            future.set_exception(value)
+                    self._finished(worker)
+                elif worker.process.sentinel in ready:
+                    # Murió durante una tarea, o estando libre
+                    error = WorkerDied("El proceso de trabajo terminó de forma inesperada")
+                    self._replace(worker, error if worker.future is not None else None)
+            self._check_timeouts()
+
+        for worker in self._workers:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+        for worker in self._workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.kill()
@@ -0,0 +1,7 @@
+"""Configuración común de las pruebas: los módulos del proyecto y el generador de PDFs sintéticos."""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
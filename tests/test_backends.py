@@ -0,0 +1,52 @@
+"""Chequeo de capa de texto de pdf_backends, sin extraer las páginas."""
+import io
+
+import PyPDF2
+import pytest
+
+import pdf_backends
+
+
+def _pdf(page_resources, page_content, form_resources=None, form_content=b"BT /F1 12 Tf 72 700 Td (hola) Tj ET"):
+    """PDF de una página con un formulario /Fm1 (objeto 5) y una fuente /F1 (objeto 6)."""
+    form_dict = "/Type /XObject /Subtype /Form /BBox [0 0 612 792]"
+    if form_resources is not None:
+        form_dict += f" /Resources {form_resources}"
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources {page_resources} "
+        f"/Contents 4 0 R >>".encode(),
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(page_content), page_content),
+        f"<< {form_dict} /Length {len(form_content)} >>".encode() + b"\nstream\n" + form_content + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return PyPDF2.PdfReader(io.BytesIO(out.getvalue())).pages[0]
+
+
+@pytest.mark.parametrize("page_resources, page_content, form_resources, may_have_text", [
+    # Texto en el contenido de la página
+    ("<< /Font << /F1 6 0 R >> >>", b"BT /F1 12 Tf 72 700 Td (hola) Tj ET", None, True),
+    # Solo una imagen o un formulario, sin fuentes en ningún lado
+    ("<< /XObject << /Fm1 5 0 R >> >>", b"/Fm1 Do", None, False),
+    # Formulario con sus propias fuentes
+    ("<< /XObject << /Fm1 5 0 R >> >>", b"/Fm1 Do", "<< /Font << /F1 6 0 R >> >>", True),
+    # Formulario sin recursos que escribe con las fuentes de la página
+    ("<< /Font << /F1 6 0 R >> /XObject << /Fm1 5 0 R >> >>", b"/Fm1 Do", None, True),
+    # Fuentes en la página pero ningún operador de texto ni formulario
+    ("<< /Font << /F1 6 0 R >> >>", b"0 0 m 10 10 l S", None, False),
+])
+def test_page_may_have_text(page_resources, page_content, form_resources, may_have_text):
+    page = _pdf(page_resources, page_content, form_resources)
+    assert pdf_backends._page_may_have_text(page) is may_have_text
@@ -0,0 +1,94 @@
+"""Caché de texto: claves, entradas parciales y expulsión de las menos usadas."""
+import os
+import time
+
+import pytest
+
+import pdf_cache
+import pdf_engine
+from synthetic_pdfs import write_pdf
+
+
+def _entry_size(cache, key):
+    return os.path.getsize(cache._entry_path(key))
+
+
+def test_put_and_get(tmp_path):
+    cache = pdf_cache.TextCache(str(tmp_path))
+    cache.put("ab" * 32, ["página uno", None, "tres"], False, 3)
+    entry = cache.get("ab" * 32)
+    assert entry.pages == ["página uno", None, "tres"]
+    assert not entry.complete and entry.page_count == 3
+    assert cache.get("cd" * 32) is None
+
+
+def test_stat_key_changes_with_the_file_and_content_key_does_not(tmp_path):
+    pdf_path = tmp_path / "a.pdf"
+    pdf_path.write_bytes(b"uno")
+    stat_cache = pdf_cache.TextCache(str(tmp_path / "stat"), key="stat")
+    content_cache = pdf_cache.TextCache(str(tmp_path / "content"), key="content")
+    stat_key = stat_cache.key_for(str(pdf_path))
+    content_key = content_cache.key_for(str(pdf_path))
+    # Cada extractor tiene sus propias entradas
+    assert stat_cache.key_for(str(pdf_path), "pdfminer") != stat_key
+
+    moved = tmp_path / "movido.pdf"
+    os.rename(pdf_path, moved)
+    assert content_cache.key_for(str(moved)) == content_key
+    assert stat_cache.key_for(str(moved)) != stat_key
+
+    moved.write_bytes(b"dos")
+    assert content_cache.key_for(str(moved)) != content_key
+
+
+def test_evict_removes_least_recently_used(tmp_path):
+    cache = pdf_cache.TextCache(str(tmp_path), max_bytes=10 ** 9)
+    keys = [f"{i:02d}" * 32 for i in range(6)]
+    for key in keys:
+        cache.put(key, ["texto %s " % key * 50], True)
+    size = _entry_size(cache, keys[0])
+
+    # Entradas de la más vieja a la más nueva; la primera se acaba de leer
+    now = time.time()
+    for age, key in enumerate(reversed(keys)):
+        os.utime(cache._entry_path(key), (now - 100 * (age + 1), now - 100 * (age + 1)))
+    assert cache.get(keys[0]) is not None
+
+    # Lugar para cuatro entradas: quedan por debajo del 90% las tres usadas más recientemente
+    cache.max_bytes = size * 4
+    cache.evict()
+    remaining = [key for key in keys if cache.get(key) is not None]
+    assert remaining == [keys[0], keys[4], keys[5]]
+
+
+def test_evict_runs_when_enough_was_written(tmp_path):
+    cache = pdf_cache.TextCache(str(tmp_path), max_bytes=2000)
+    for i in range(40):
+        cache.put(f"{i:02d}" * 32, [f"texto {i} " * 40], True)
+    total = sum(os.path.getsize(os.path.join(dirpath, name))
+                for dirpath, _, names in os.walk(str(tmp_path)) for name in names)
+    assert total <= 2000
+
+
+def test_probe_skipped_pages_are_not_cached(tmp_path):
+    # Un PDF sin capa de texto se decide sin extraer sus páginas: eso no es texto para la caché
+    pdf_path = str(tmp_path / "escaneo.pdf")
+    write_pdf(pdf_path, [None, None])
+    options = pdf_engine.AnalysisOptions(output_folder=str(tmp_path), relocate="report",
+                                         cache_folder=str(tmp_path / "cache"))
+    result = pdf_engine.process_pdf(pdf_path, pdf_engine.ConditionMatcher([["factura"]]), options)
+    assert result.status == "no_text"
+    cache = pdf_cache.TextCache(options.cache_folder)
+    assert cache.get(cache.key_for(pdf_path)) is None
+
+
+@pytest.mark.parametrize("key", pdf_cache.CACHE_KEYS)
+def test_second_run_reads_from_the_cache(tmp_path, key):
+    pdf_path = str(tmp_path / "a.pdf")
+    write_pdf(pdf_path, ["nada", "factura pagada"])
+    options = pdf_engine.AnalysisOptions(cache_folder=str(tmp_path / "cache"), cache_key=key)
+    matcher = pdf_engine.ConditionMatcher([["factura", "pagada"]])
+    first = pdf_engine.process_pdf(pdf_path, matcher, options)
+    second = pdf_engine.process_pdf(pdf_path, matcher, options)
+    assert (first.cache, second.cache) == ("miss", "hit")
+    assert first.matched and second.matched
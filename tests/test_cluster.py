@@ -0,0 +1,149 @@
+"""Cola del coordinador de pdf_cluster: lotes, plazos y reintentos."""
+import time
+import threading
+import http.client
+
+import pytest
+
+import pdf_cluster
+import pdf_engine
+import pdf_report
+
+
+def _record(path, condition=None):
+    return pdf_report.result_record(pdf_engine.AnalysisResult(path, matched=condition is not None,
+                                                              condition=condition))
+
+
+def _drain(coordinator):
+    return [result for result in coordinator.results() if result is not None]
+
+
+def test_batches_and_finish():
+    coordinator = pdf_cluster.Coordinator([f"{i}.pdf" for i in range(5)], {}, batch_size=2)
+    first, paths = coordinator.take("a")
+    assert paths == ["0.pdf", "1.pdf"]
+    second, more = coordinator.take("b")
+    assert more == ["2.pdf", "3.pdf"]
+    assert coordinator.report("a", [first], [_record(path) for path in paths]) == 2
+    assert coordinator.report("b", [second], [_record(path, ["x"]) for path in more]) == 2
+    third, last = coordinator.take("a")
+    assert last == ["4.pdf"]
+    # Sin rutas nuevas pero con un lote en curso: hay que esperar
+    assert coordinator.take("b") == (None, False)
+    coordinator.report("a", [third], [_record("4.pdf")])
+    assert coordinator.take("b") == (None, True)
+    assert coordinator.finished
+    results = _drain(coordinator)
+    assert sorted(result.path for result in results) == [f"{i}.pdf" for i in range(5)]
+    assert dict(coordinator.processed_by) == {"a": 3, "b": 2}
+
+
+def test_expired_lease_requeues_unfinished_paths():
+    coordinator = pdf_cluster.Coordinator(["a.pdf", "b.pdf", "c.pdf"], {}, batch_size=3, lease=0.05)
+    batch, paths = coordinator.take("caido")
+    # El worker terminó uno solo y dejó de responder
+    coordinator.report("caido", [batch], [_record("a.pdf")])
+    time.sleep(0.1)
+
+    _, retried = coordinator.take("otro")
+    assert retried == ["b.pdf", "c.pdf"]
+    assert coordinator.reassigned == 2
+    # Un resultado tardío del worker caído vale (llegó primero); el repetido se descarta
+    assert coordinator.report("caido", [batch], [_record("b.pdf")]) == 1
+    assert coordinator.report("otro", [], [_record("b.pdf"), _record("c.pdf")]) == 1
+    assert coordinator.finished
+    assert sorted(result.path for result in _drain(coordinator)) == ["a.pdf", "b.pdf", "c.pdf"]
+
+
+def test_heartbeat_renews_the_lease():
+    coordinator = pdf_cluster.Coordinator(["a.pdf"], {}, lease=0.1)
+    batch, _ = coordinator.take("lento")
+    for _ in range(4):
+        time.sleep(0.05)
+        coordinator.report("lento", [batch], [])
+    assert coordinator.take("otro") == (None, False)
+    assert coordinator.reassigned == 0
+
+
+def test_worker_leaving_requeues_at_once():
+    coordinator = pdf_cluster.Coordinator(["a.pdf", "b.pdf"], {}, lease=60)
+    batch, _ = coordinator.take("a")
+    coordinator.report("a", [batch], [_record("a.pdf")], done=True)
+    assert coordinator.take("b")[1] == ["b.pdf"]
+
+
+def test_path_that_keeps_losing_its_worker_becomes_an_error():
+    coordinator = pdf_cluster.Coordinator(["malo.pdf"], {}, lease=0.02, attempts=2)
+    for worker in ("a", "b"):
+        assert coordinator.take(worker)[1] == ["malo.pdf"]
+        time.sleep(0.05)
+    assert coordinator.take("c") == (None, True)
+    [result] = _drain(coordinator)
+    assert result.status == "error" and "2 intentos" in result.error
+
+
+def test_stop_hands_out_nothing_more():
+    coordinator = pdf_cluster.Coordinator(["a.pdf", "b.pdf"], {}, batch_size=1)
+    coordinator.take("a")
+    coordinator.stop()
+    assert coordinator.take("b") == (None, True)
+
+
+def test_concurrent_takes_hand_out_each_path_once():
+    # Cada pedido recorre la carpeta fuera del lock; ninguna ruta se entrega dos veces
+    paths = [f"{i}.pdf" for i in range(500)]
+
+    def slow_scan():
+        for path in paths:
+            time.sleep(0.0001)
+            yield path
+
+    coordinator = pdf_cluster.Coordinator(slow_scan(), {}, batch_size=7)
+    handed = []
+    lock = threading.Lock()
+
+    def worker(name):
+        while True:
+            batch, batch_paths = coordinator.take(name)
+            if batch is None:
+                if batch_paths:
+                    return
+                time.sleep(0.001)
+                continue
+            with lock:
+                handed.extend(batch_paths)
+            coordinator.report(name, [batch], [_record(path) for path in batch_paths])
+
+    threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+    assert sorted(handed) == sorted(paths)
+    assert coordinator.finished
+
+
+def test_relayed_result_keeps_the_page_scope():
+    condition = pdf_engine.parse_criterion("primeras 2: factura")
+    coordinator = pdf_cluster.Coordinator(["a.pdf"], {})
+    batch, _ = coordinator.take("a")
+    coordinator.report("a", [batch], [_record("a.pdf", condition)])
+    [result] = _drain(coordinator)
+    assert result.condition == condition
+    assert pdf_engine.format_criterion(result.condition) == "primeras 2: factura"
+
+
+@pytest.mark.parametrize("length", ["-1", "abc", str(pdf_cluster._MAX_BODY + 1)])
+def test_invalid_content_length_is_rejected(length):
+    server = pdf_cluster.start_server(pdf_cluster.Coordinator(["a.pdf"], {}), "127.0.0.1", 0)
+    try:
+        connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+        connection.putrequest("POST", "/lote")
+        connection.putheader("Content-Length", length)
+        connection.endheaders()
+        assert connection.getresponse().status == 400
+        connection.close()
+    finally:
+        server.shutdown()
+        server.server_close()
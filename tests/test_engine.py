@@ -0,0 +1,208 @@
+"""El motor clasifica igual que el analizador original (extraer todo el texto y después verificar).
+
+La referencia es la lógica de PdfAnalyzer antes del motor: se extrae el
+texto de todas las páginas con PyPDF2, se normaliza y se busca cada término
+de cada criterio, en orden; vale el primer criterio con todos sus términos.
+"""
+import os
+import re
+import random
+import threading
+import unicodedata
+
+import PyPDF2
+import pytest
+
+import pdf_backends
+import pdf_engine
+from synthetic_pdfs import write_pdf
+
+WORDS = ("factura", "pagada", "crédito", "nota", "Cláusula", "año", "señor", "de", "la", "contrato",
+         "firmado", "Resolución", "pago", "número")
+
+
+def baseline_normalize(texto):
+    texto = texto.lower()
+    texto = ''.join(c for c in unicodedata.normalize('NFD', texto) if unicodedata.category(c) != 'Mn')
+    return re.sub(r'\s+', ' ', texto).strip()
+
+
+def baseline_extract(pdf_path):
+    with open(pdf_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        text = ""
+        for page in reader.pages:
+            page_text = page.extract_text()
+            if page_text:
+                text += page_text
+        return text
+
+
+def baseline_check(pdf_text, conditions):
+    if not pdf_text:
+        return False, None
+    pdf_text_norm = baseline_normalize(pdf_text)
+    for condition in conditions:
+        if all(baseline_normalize(term) in pdf_text_norm for term in condition):
+            return True, condition
+    return False, None
+
+
+def random_conditions(rng):
+    conditions = []
+    for _ in range(rng.randint(1, 4)):
+        terms = []
+        for _ in range(rng.randint(1, 3)):
+            # Algunos términos son frases, y pueden quedar partidos entre dos páginas
+            terms.append(" ".join(rng.sample(WORDS, rng.choice((1, 1, 1, 2)))))
+        conditions.append(terms)
+    return conditions
+
+
+def random_pages(rng):
+    return ["\n".join(" ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 6)))
+                      for _ in range(rng.randint(1, 3)))
+            for _ in range(rng.randint(1, 5))]
+
+
+@pytest.fixture(scope="module")
+def corpus(tmp_path_factory):
+    """PDFs con texto al azar y sus criterios."""
+    folder = tmp_path_factory.mktemp("corpus")
+    rng = random.Random(7)
+    cases = []
+    for i in range(40):
+        path = str(folder / f"doc_{i:03d}.pdf")
+        write_pdf(path, random_pages(rng))
+        cases.append((path, random_conditions(rng)))
+    return cases
+
+
+@pytest.mark.parametrize("use_automaton", [False, True])
+def test_process_pdf_matches_baseline(corpus, use_automaton):
+    options = pdf_engine.AnalysisOptions(output_folder=None)
+    for path, conditions in corpus:
+        matcher = pdf_engine.ConditionMatcher(conditions, use_automaton=use_automaton)
+        result = pdf_engine.process_pdf(path, matcher, options)
+        expected = baseline_check(baseline_extract(path), conditions)
+        assert result.error is None
+        assert (result.matched, result.condition) == expected, path
+
+
+def test_analyze_matches_baseline(corpus, tmp_path):
+    # Todos los archivos con los mismos criterios, por el pool y con la caché (dos pasadas: fallo y acierto)
+    conditions = [["factura", "pagada"], ["nota de"], ["contrato"]]
+    expected = {path: baseline_check(baseline_extract(path), conditions) for path, _ in corpus}
+    options = pdf_engine.AnalysisOptions(mode="thread", workers=2, cache_folder=str(tmp_path / "cache"))
+    for cache in ("miss", "hit"):
+        results = list(pdf_engine.analyze([path for path, _ in corpus], conditions, options))
+        assert len(results) == len(corpus)
+        for result in results:
+            assert result.cache == cache
+            assert (result.matched, result.condition) == expected[result.path]
+
+
+def test_check_pdf_conditions_matches_baseline():
+    rng = random.Random(11)
+    for _ in range(2000):
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 12)))
+        conditions = random_conditions(rng)
+        expected = baseline_check(text, conditions)
+        assert pdf_engine.check_pdf_conditions(text, conditions) == expected, (text, conditions)
+
+
+def _full_and_early(matcher, pages):
+    full = matcher.new_scan()
+    full.plan(len(pages))
+    for index, page in enumerate(pages):
+        full.feed(page, index)
+    early = matcher.new_scan()
+    for index in early.plan(len(pages)):
+        if early.feed(pages[index], index):
+            break
+    return full.result(), early.result()
+
+
+def test_early_exit_reports_the_same_criterion_as_a_full_scan():
+    # Con operadores y alcances de página, salir antes tiene que dar el mismo criterio que leer todo
+    rng = random.Random(5)
+    words = [word.lower() for word in WORDS[:8]]
+    for _ in range(1500):
+        conditions = []
+        for _ in range(rng.randint(1, 4)):
+            terms = rng.sample(words, rng.randint(1, 2))
+            text = ", ".join(terms)
+            if rng.random() < 0.3:
+                text = f"{terms[0]}, -{rng.choice(words)}"
+            if rng.random() < 0.3:
+                text = f"páginas {rng.randint(1, 3)}-{rng.randint(3, 5)}: {text}"
+            conditions.append(pdf_engine.parse_criterion(text))
+        matcher = pdf_engine.ConditionMatcher(conditions)
+        pages = [" ".join(rng.choice(words) for _ in range(rng.randint(0, 3))) for _ in range(rng.randint(1, 6))]
+        full, early = _full_and_early(matcher, pages)
+        assert full == early, (conditions, pages)
+
+
+def test_early_exit_waits_for_earlier_criteria():
+    matcher = pdf_engine.ConditionMatcher([["factura"], ["nota"]])
+    scan = matcher.new_scan()
+    # "nota" ya se cumple, pero "factura" (el primer criterio) todavía puede aparecer
+    assert not scan.feed("nota")
+    assert scan.feed("factura")
+    assert scan.result() == (True, ["factura"])
+
+
+def test_textless_pdf_decided_on_its_last_page(tmp_path):
+    # Sin texto, el criterio queda descartado con la última página de su alcance
+    pdf_path = str(tmp_path / "escaneo.pdf")
+    write_pdf(pdf_path, [None, None])
+    options = pdf_engine.AnalysisOptions(output_folder=None, textless="extract")
+    matcher = pdf_engine.ConditionMatcher([pdf_engine.parse_criterion("primeras 2: factura")])
+    result = pdf_engine.process_pdf(pdf_path, matcher, options)
+    assert result.status == "no_text"
+
+
+def _crash_on_bad(pdf_path, matcher, options):
+    # Un fallo nativo del extractor: el proceso muere sin pasar por Python
+    if "malo" in pdf_path:
+        os._exit(1)
+    return pdf_engine.AnalysisResult(pdf_path)
+
+
+@pytest.mark.parametrize("bad", [["malo-7.pdf"], ["malo-3.pdf", "malo-20.pdf"]])
+def test_worker_crash_in_process_mode_does_not_abort_the_run(bad):
+    paths = [f"{i}.pdf" for i in range(30)]
+    for name in bad:
+        paths.insert(int(re.search(r"\d+", name).group()), name)
+    options = pdf_engine.AnalysisOptions(output_folder=None, workers=2, mode="process")
+    matcher = pdf_engine.ConditionMatcher([["factura"]])
+    results = list(pdf_engine._run_pool(paths, _crash_on_bad, matcher, options, threading.Event(),
+                                        pdf_engine._failed_result))
+    assert sorted(result.path for result in results) == sorted(paths)
+    # Solo los archivos que tiran abajo al worker se informan como error
+    assert sorted(result.path for result in results if result.error is not None) == sorted(bad)
+
+
+def test_auto_backend_calibrates_on_every_run_without_changing_the_options(corpus, monkeypatch):
+    # Un segundo extractor "instalado" que lee igual que PyPDF2 (en hilos, así lo ven los workers)
+    monkeypatch.setitem(pdf_backends._DOCUMENTS, "pypdfium2", pdf_backends._DOCUMENTS["pypdf2"])
+    paths = [path for path, _ in corpus[:6]]
+    options = pdf_engine.AnalysisOptions(mode="thread", workers=2, backend="auto", calibration_sample=3)
+    for _ in range(2):
+        run = pdf_engine.analyze(paths, [["factura"]], options)
+        assert run.calibration is not None
+        assert run.calibration.sample == 3
+        assert run.backend == run.calibration.chosen
+        results = list(run)
+        assert sorted(result.path for result in results) == sorted(paths)
+        assert {result.backend for result in results} == {run.backend}
+        assert options.backend == "auto"
+
+
+def test_auto_backend_with_a_single_extractor(corpus, monkeypatch):
+    monkeypatch.setattr(pdf_backends, "available_backends", lambda: [pdf_backends.DEFAULT_BACKEND])
+    options = pdf_engine.AnalysisOptions(mode="thread", workers=1, backend="auto")
+    run = pdf_engine.analyze([corpus[0][0]], [["factura"]], options)
+    assert run.calibration is None
+    assert [result.backend for result in run] == [pdf_backends.DEFAULT_BACKEND]
+    assert options.backend == "auto"
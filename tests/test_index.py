@@ -0,0 +1,139 @@
+"""Mantenimiento del índice de texto completo y consultas sobre él."""
+import os
+
+import pytest
+
+import pdf_engine
+import pdf_index
+from synthetic_pdfs import write_pdf
+
+
+def _engine_matches(criterion, pages):
+    scan = pdf_engine.ConditionMatcher([criterion]).new_scan()
+    for index in scan.plan(len(pages)):
+        scan.feed(pages[index], index)
+    return scan.result()[0]
+
+
+@pytest.mark.parametrize("criterion, matched", [
+    ("páginas 1-2: factura", True),
+    ("páginas 1-2: informe factura", True),
+    ("páginas 1-2: fac tura", False),
+    ("primeras 1: fac", True),
+    ("páginas 2-: pagada", True),
+])
+def test_scoped_query_joins_pages_like_the_engine(tmp_path, criterion, matched):
+    # "factura" queda partida entre la página 1 y la 2
+    pages = ["Informe fac", "tura  pagada\n"]
+    criterion = pdf_engine.parse_criterion(criterion)
+    with pdf_index.PdfIndex(str(tmp_path / "indice.db"), per_page=True) as index:
+        index.add(pdf_engine.ExtractedDocument("doc.pdf", [pdf_engine.normalizar_fragmento(page) for page in pages]))
+        assert bool(index.query([criterion])) == _engine_matches(criterion, pages) is matched
+
+
+def _document(path, *pages):
+    return pdf_engine.ExtractedDocument(path, [pdf_engine.normalizar_fragmento(page) for page in pages])
+
+
+def _paths(hits):
+    return [os.path.basename(path) for path, _ in hits]
+
+
+def test_add_replace_and_remove(tmp_path):
+    with pdf_index.PdfIndex(str(tmp_path / "indice.db")) as index:
+        index.add(_document(str(tmp_path / "a.pdf"), "factura pagada"))
+        index.add(_document(str(tmp_path / "b.pdf"), "nota de crédito"))
+        assert index.count() == 2
+        assert _paths(index.query([["factura"]])) == ["a.pdf"]
+
+        # Volver a agregar la misma ruta reemplaza el texto anterior
+        index.add(_document(str(tmp_path / "a.pdf"), "contrato firmado"))
+        assert index.count() == 2
+        assert index.query([["factura"]]) == []
+        assert _paths(index.query([["contrato"]])) == ["a.pdf"]
+
+        assert index.remove(str(tmp_path / "a.pdf"))
+        assert not index.remove(str(tmp_path / "a.pdf"))
+        assert index.query([["contrato"]]) == []
+        assert index.paths() == [str(tmp_path / "b.pdf")]
+
+
+def _stat(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def test_relative_and_absolute_paths_are_the_same_document(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_pdf("a.pdf", ["factura"])
+    with pdf_index.PdfIndex("indice.db", per_page=True) as index:
+        index.add(pdf_engine.ExtractedDocument("./a.pdf", ["factura"], *_stat("a.pdf")))
+        index.add(pdf_engine.ExtractedDocument(str(tmp_path / "a.pdf"), ["factura"], *_stat("a.pdf")))
+        assert index.paths() == [str(tmp_path / "a.pdf")]
+        assert index.is_current("a.pdf")
+        assert index.pages_with_terms("./a.pdf", ["factura"]) == [1]
+        assert index.remove("a.pdf")
+        assert index.count() == 0
+
+
+def test_rename_keeps_the_text(tmp_path):
+    with pdf_index.PdfIndex(str(tmp_path / "indice.db"), per_page=True) as index:
+        index.add(_document(str(tmp_path / "entrada" / "a.pdf"), "portada", "factura pagada"))
+        index.add(_document(str(tmp_path / "salida" / "a.pdf"), "otro documento"))
+        # Un destino que ya estaba indexado se reemplaza
+        index.rename(str(tmp_path / "entrada" / "a.pdf"), str(tmp_path / "salida" / "a.pdf"))
+        assert index.paths() == [str(tmp_path / "salida" / "a.pdf")]
+        assert index.query([["otro"]]) == []
+        assert index.pages_with_terms(str(tmp_path / "salida" / "a.pdf"), ["Factura"]) == [2]
+
+
+def test_update_reindexes_only_new_and_changed_files(tmp_path):
+    options = pdf_engine.AnalysisOptions(mode="thread", workers=1)
+    first, second = str(tmp_path / "a.pdf"), str(tmp_path / "b.pdf")
+    write_pdf(first, ["factura pagada"])
+    write_pdf(second, ["nota de crédito"])
+    with pdf_index.PdfIndex(str(tmp_path / "indice.db")) as index:
+        assert index.update([first, second], options) == (2, 0, 0)
+        assert index.update([first, second], options) == (0, 2, 0)
+
+        # Mismo tamaño y otro contenido: cuenta la fecha de modificación
+        write_pdf(first, ["factura vencida"])
+        stat = os.stat(first)
+        os.utime(first, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        assert not index.is_current(first)
+        assert index.update([first, second], options) == (1, 1, 0)
+        assert _paths(index.query([["vencida"]])) == ["a.pdf"]
+        assert index.query([["pagada"]]) == []
+
+        assert index.update([str(tmp_path / "falta.pdf")], options) == (0, 0, 1)
+        assert index.count() == 2
+
+
+def test_prune_removes_missing_files_under_the_roots(tmp_path):
+    inside, outside = tmp_path / "entrada", tmp_path / "otra"
+    inside.mkdir()
+    with pdf_index.PdfIndex(str(tmp_path / "indice.db")) as index:
+        write_pdf(str(inside / "sigue.pdf"), ["factura"])
+        index.add(_document(str(inside / "sigue.pdf"), "factura"))
+        index.add(_document(str(inside / "borrado.pdf"), "factura"))
+        index.add(_document(str(outside / "borrado.pdf"), "factura"))
+        assert index.prune([str(inside)]) == 1
+        assert index.paths() == [str(inside / "sigue.pdf"), str(outside / "borrado.pdf")]
+
+
+@pytest.mark.parametrize("criterion, expected", [
+    (["de"], ["a.pdf", "b.pdf"]),
+    (["ab"], ["b.pdf"]),
+    (["x"], ["c.pdf"]),
+    (["nota", "ab"], ["b.pdf"]),
+    (["nota", "zz"], []),
+    # Los comodines de LIKE se buscan como texto
+    (["a_"], ["c.pdf"]),
+    (["5%"], ["c.pdf"]),
+])
+def test_short_terms(tmp_path, criterion, expected):
+    with pdf_index.PdfIndex(str(tmp_path / "indice.db")) as index:
+        index.add(_document("a.pdf", "nota de débito"))
+        index.add(_document("b.pdf", "nota de ab"))
+        index.add(_document("c.pdf", "x a_b 5%"))
+        assert _paths(index.query([criterion])) == expected
@@ -0,0 +1,132 @@
+"""Diario de la ejecución y --reanudar."""
+import os
+import json
+import glob
+
+import pytest
+
+import pdf_cli
+import pdf_engine
+import pdf_journal
+from synthetic_pdfs import generate_corpus
+
+
+def _result(path, condition=None, **fields):
+    result = pdf_engine.AnalysisResult(path, matched=condition is not None, condition=condition)
+    for name, value in fields.items():
+        setattr(result, name, value)
+    return result
+
+
+def test_resume_loads_finished_files(tmp_path):
+    pdf_path = tmp_path / "a.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4")
+    conditions = [pdf_engine.parse_criterion("primeras 2: factura, pagada"), pdf_engine.parse_criterion("nota")]
+    journal_path = str(tmp_path / "diario.jsonl")
+
+    with pdf_journal.RunJournal(journal_path, conditions) as journal:
+        journal.record(_result(str(pdf_path), conditions[0], pages=2, partial=True, skipped=False))
+        journal.record(_result(str(tmp_path / "movido.pdf"), error="No se pudo abrir"))
+
+    with pdf_journal.RunJournal(journal_path, conditions, resume=True) as journal:
+        assert len(journal) == 2
+        assert journal.is_done(str(pdf_path))
+        # Un archivo que ya no está en su lugar cuenta como terminado
+        assert journal.is_done(str(tmp_path / "movido.pdf"))
+        assert not journal.is_done(str(tmp_path / "otro.pdf"))
+        results = {result.path: result for result in journal.results()}
+
+    restored = results[str(pdf_path)]
+    assert restored.status == "match"
+    # El criterio vuelve con su alcance de páginas
+    assert restored.condition == conditions[0]
+    assert str(restored.condition.scope) == "primeras 2"
+    assert restored.partial and not restored.skipped and restored.pages == 2
+    assert results[str(tmp_path / "movido.pdf")].status == "error"
+
+
+def test_changed_file_is_analyzed_again(tmp_path):
+    pdf_path = tmp_path / "a.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4")
+    journal_path = str(tmp_path / "diario.jsonl")
+    with pdf_journal.RunJournal(journal_path, [["factura"]]) as journal:
+        journal.record(_result(str(pdf_path)))
+
+    pdf_path.write_bytes(b"%PDF-1.4 cambiado")
+    with pdf_journal.RunJournal(journal_path, [["factura"]], resume=True) as journal:
+        assert not journal.is_done(str(pdf_path))
+
+
+def test_new_file_with_the_name_of_a_moved_one_is_not_done(tmp_path):
+    pdf_path = tmp_path / "a.pdf"
+    journal_path = str(tmp_path / "diario.jsonl")
+    with pdf_journal.RunJournal(journal_path, [["factura"]]) as journal:
+        # Encontrado y movido a la salida: el diario no tiene su tamaño ni su fecha
+        journal.record(_result(str(pdf_path), ["factura"]))
+        assert journal.is_done(str(pdf_path))
+        pdf_path.write_bytes(b"%PDF-1.4 otro")
+        assert not journal.is_done(str(pdf_path))
+
+
+def test_resume_rejects_other_criteria(tmp_path):
+    journal_path = str(tmp_path / "diario.jsonl")
+    pdf_journal.RunJournal(journal_path, [["factura"]]).close()
+    with pytest.raises(ValueError):
+        pdf_journal.RunJournal(journal_path, [["nota"]], resume=True)
+    # Mismos términos con otro alcance tampoco es el mismo diario
+    with pytest.raises(ValueError):
+        pdf_journal.RunJournal(journal_path, [pdf_engine.parse_criterion("primeras 1: factura")], resume=True)
+
+
+def test_incomplete_last_line_is_discarded(tmp_path):
+    journal_path = str(tmp_path / "diario.jsonl")
+    with pdf_journal.RunJournal(journal_path, [["factura"]]) as journal:
+        journal.record(_result(str(tmp_path / "a.pdf")))
+    with open(journal_path, "a", encoding="utf-8") as f:
+        f.write('{"path": "b.pdf", "sta')
+
+    with pdf_journal.RunJournal(journal_path, [["factura"]], resume=True) as journal:
+        assert len(journal) == 1
+        journal.record(_result(str(tmp_path / "c.pdf")))
+    with open(journal_path, encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert [line.get("path") for line in lines[1:]] == [str(tmp_path / "a.pdf"), str(tmp_path / "c.pdf")]
+
+
+def _read_jsonl(folder):
+    with open(sorted(glob.glob(os.path.join(folder, "*.jsonl")))[-1], encoding="utf-8") as f:
+        return {record["path"]: record for record in map(json.loads, f)}
+
+
+def test_cli_resume_analyzes_only_what_was_missing(tmp_path, capsys):
+    corpus = str(tmp_path / "corpus")
+    paths = generate_corpus(corpus, files=8, pages=2, words_per_page=40, terms=("contrato",))
+    criteria = tmp_path / "criterios.txt"
+    criteria.write_text("contrato\n", encoding="utf-8")
+    common = [corpus, "-c", str(criteria), "--reubicar", "report", "-w", "1", "-m", "thread",
+              "--formato", "jsonl", "-v"]
+
+    first = str(tmp_path / "primera")
+    assert pdf_cli.main(common + ["-o", first]) == 0
+    complete = _read_jsonl(first)
+    assert len(complete) == len(paths)
+
+    # Ejecución cortada: el diario se quedó con tres archivos y media línea
+    journal_path = os.path.join(first, "diario_analisis.jsonl")
+    with open(journal_path, encoding="utf-8") as f:
+        lines = f.readlines()
+    with open(journal_path, "w", encoding="utf-8") as f:
+        f.writelines(lines[:4])
+        f.write(lines[4][:10])
+    capsys.readouterr()
+
+    second = str(tmp_path / "segunda")
+    assert pdf_cli.main(common + ["-o", second, "--diario", journal_path, "--reanudar"]) == 0
+    output = capsys.readouterr().out
+    assert "Reanudando: 3 archivos" in output
+    analyzed = [line for line in output.splitlines() if line.startswith("[")]
+    assert len(analyzed) == len(paths) - 3
+
+    resumed = _read_jsonl(second)
+    assert {path: record["status"] for path, record in resumed.items()} == \
+           {path: record["status"] for path, record in complete.items()}
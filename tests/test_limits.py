@@ -0,0 +1,108 @@
+"""Modo de memoria acotada: límites de páginas, bytes y memoria, y el tratamiento de los excedidos."""
+import os
+
+import pytest
+
+import pdf_engine
+from synthetic_pdfs import write_pdf
+
+FILLER = "texto de relleno sin criterios"
+
+
+@pytest.fixture
+def files(tmp_path):
+    """PDF largo con el término en la última página, uno corto y uno largo con el término al principio."""
+    paths = {
+        "largo": str(tmp_path / "largo.pdf"),
+        "corto": str(tmp_path / "corto.pdf"),
+        "primera": str(tmp_path / "primera.pdf"),
+    }
+    write_pdf(paths["largo"], [FILLER] * 5 + ["factura pagada"])
+    write_pdf(paths["corto"], ["factura pagada"])
+    write_pdf(paths["primera"], ["factura pagada"] + [FILLER] * 5)
+    return paths
+
+
+def process(path, **kwargs):
+    options = pdf_engine.AnalysisOptions(output_folder=None, mode="thread", **kwargs)
+    return pdf_engine.process_pdf(path, pdf_engine.ConditionMatcher([["factura"]]), options)
+
+
+def run(paths, **kwargs):
+    options = pdf_engine.AnalysisOptions(output_folder=None, mode="thread", workers=1, **kwargs)
+    stats = pdf_engine.new_stats(len(paths))
+    results = {}
+    for result in pdf_engine.analyze(paths, [["factura"]], options):
+        pdf_engine.update_stats(stats, result)
+        results[os.path.basename(result.path)] = result
+    return results, stats
+
+
+def outcome(result):
+    return result.limited, result.deferred, result.partial, result.skipped, result.matched, result.pages
+
+
+@pytest.mark.parametrize("oversize, expected", [
+    ("lane", ("pages", True, False, False, False, 0)),
+    ("partial", ("pages", False, True, False, False, 2)),
+    ("skip", ("pages", False, False, True, False, 0)),
+])
+def test_page_limit(files, oversize, expected):
+    assert outcome(process(files["largo"], max_pages=2, oversize=oversize)) == expected
+
+
+def test_decided_within_the_read_pages_is_not_partial(files):
+    result = process(files["primera"], max_pages=2, oversize="partial")
+    assert result.error is None
+    assert outcome(result) == (None, False, False, False, True, 1)
+
+
+@pytest.mark.parametrize("oversize, expected", [
+    ("lane", ("bytes", True, False, False, False, 0)),
+    ("partial", ("bytes", False, True, False, False, 2)),
+    ("skip", ("bytes", False, False, True, False, 0)),
+])
+def test_byte_limit(files, monkeypatch, oversize, expected):
+    monkeypatch.setattr(pdf_engine, "DEFAULT_PARTIAL_PAGES", 2)
+    limit = os.path.getsize(files["corto"])
+    assert outcome(process(files["corto"], max_file_bytes=limit, oversize=oversize)) == \
+        (None, False, False, False, True, 1)
+    assert outcome(process(files["largo"], max_file_bytes=limit, oversize=oversize)) == expected
+
+
+@pytest.mark.parametrize("oversize, expected", [
+    ("lane", ("memory", True, False, False, False, 0)),
+    ("partial", ("memory", False, True, False, False, 0)),
+    ("skip", ("memory", False, False, True, False, 0)),
+])
+def test_memory_limit(files, oversize, expected):
+    # Con un límite de un byte la memoria del proceso ya lo supera antes de la primera página
+    assert outcome(process(files["largo"], rss_limit=1, oversize=oversize)) == expected
+
+
+def test_lane_analyzes_the_oversized_files_at_the_end(files):
+    results, stats = run(list(files.values()), max_pages=2, oversize="lane")
+    assert sorted(results) == ["corto.pdf", "largo.pdf", "primera.pdf"]
+    # En el carril no hay límite de páginas: el largo se lee completo
+    assert outcome(results["largo.pdf"]) == ("pages", False, False, False, True, 6)
+    assert outcome(results["primera.pdf"]) == ("pages", False, False, False, True, 1)
+    assert outcome(results["corto.pdf"]) == (None, False, False, False, True, 1)
+    assert (stats["matches"], stats["limited"], stats["partial"], stats["skipped"]) == (3, 2, 0, 0)
+
+
+def test_lane_keeps_the_memory_limit(files):
+    # Si en el carril tampoco alcanza la memoria, se decide con lo leído
+    results, stats = run([files["largo"]], rss_limit=1, oversize="lane")
+    assert outcome(results["largo.pdf"]) == ("memory", False, True, False, False, 0)
+    assert (stats["processed"], stats["limited"], stats["partial"], stats["skipped"]) == (1, 1, 1, 0)
+
+
+def test_partial_and_skip_stats(files):
+    results, stats = run(list(files.values()), max_pages=2, oversize="partial")
+    assert outcome(results["largo.pdf"]) == ("pages", False, True, False, False, 2)
+    assert (stats["matches"], stats["limited"], stats["partial"], stats["skipped"]) == (2, 1, 1, 0)
+
+    # Sin leer las primeras páginas, también el que tiene el término al principio queda sin analizar
+    results, stats = run(list(files.values()), max_pages=2, oversize="skip")
+    assert outcome(results["primera.pdf"]) == ("pages", False, False, True, False, 0)
+    assert (stats["matches"], stats["limited"], stats["partial"], stats["skipped"]) == (1, 2, 0, 2)
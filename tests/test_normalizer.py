@@ -0,0 +1,62 @@
+"""normalizar_texto y normalizar_fragmento dan lo mismo que la versión original con NFD."""
+import re
+import sys
+import random
+import unicodedata
+
+import pytest
+
+import pdf_engine
+
+SAMPLES = [
+    "Canción", "ÁRBOL", "pingüino", "Ñandú", "crème brûlée", "Ελληνικά ΣΟΦΟΣ", "İstanbul", "Straße",
+    "ﬁnal", "é combinado", "no separable", "tab\tsalto\nretorno\r", "  espacios   extra  ",
+    "Ǆ Ǳ", "Å Å", "ｆｕｌｌ ｗｉｄｔｈ", "", " ", "  ",
+]
+
+
+def normalizar_texto_original(texto):
+    texto = texto.lower()
+    texto = ''.join(c for c in unicodedata.normalize('NFD', texto) if unicodedata.category(c) != 'Mn')
+    return re.sub(r'\s+', ' ', texto).strip()
+
+
+def join_fragments(fragments):
+    """Une fragmentos normalizados como lo hace DocumentScan."""
+    text = ""
+    for fragment in fragments:
+        chunk = pdf_engine.normalizar_fragmento(fragment)
+        if chunk.startswith(' ') and (not text or text.endswith(' ')):
+            chunk = chunk[1:]
+        text += chunk
+    return text.rstrip(' ')
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_samples(text):
+    assert pdf_engine.normalizar_texto(text) == normalizar_texto_original(text)
+    assert join_fragments([text]) == normalizar_texto_original(text)
+
+
+def test_every_character():
+    # Cada carácter Unicode solo y entre letras: la tabla en caché tiene que coincidir con NFD
+    for code in range(sys.maxunicode + 1):
+        text = f"a{chr(code)}b"
+        assert pdf_engine.normalizar_texto(text) == normalizar_texto_original(text), f"U+{code:04X}"
+
+
+def test_random_mixed_text_in_fragments():
+    rng = random.Random(3)
+    alphabet = list("aeiouáéíóúüñÁÉÍÓÚÜÑ σςΑ\t\n\r  ́̃İßﬁ.-,") + ["  "]
+    for _ in range(3000):
+        text = ''.join(rng.choice(alphabet + ["Σ"]) for _ in range(rng.randint(0, 40)))
+        expected = normalizar_texto_original(text)
+        assert pdf_engine.normalizar_texto(text) == expected, text
+        # La sigma mayúscula se deja fuera de los fragmentos: su minúscula
+        # depende de la letra siguiente, que puede estar en otro fragmento
+        text = text.replace("Σ", "")
+        expected = normalizar_texto_original(text)
+        # Partido en fragmentos al azar (por ejemplo, entre una letra y su acento combinado)
+        cuts = sorted(rng.sample(range(len(text) + 1), min(len(text) + 1, rng.randint(0, 4))))
+        fragments = [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+        assert join_fragments(fragments) == expected, fragments
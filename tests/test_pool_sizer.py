@@ -0,0 +1,96 @@
+"""El pool adaptativo crece, se achica y respeta sus límites (con reloj y CPU simulados)."""
+import pytest
+
+import pdf_engine
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeCpu:
+    """Tiempos acumulados de la CPU: cada lectura suma un período con la carga fijada."""
+
+    def __init__(self, busy, iowait):
+        self.busy = busy
+        self.iowait = iowait
+        self.times = (0.0, 0.0, 0.0)
+
+    def __call__(self):
+        busy, iowait, total = self.times
+        self.times = (busy + 100 * self.busy, iowait + 100 * self.iowait, total + 100)
+        return self.times
+
+
+def run_period(sizer, clock, files):
+    """Termina `files` archivos en un período de `sizer.interval` segundos."""
+    for _ in range(files - 1):
+        sizer.completed()
+    clock.now += sizer.interval
+    sizer.completed()
+
+
+def new_sizer(monkeypatch, initial, minimum, maximum, load):
+    monkeypatch.setattr(pdf_engine, "_cpu_times", FakeCpu(*load) if load else lambda: None)
+    clock = FakeClock()
+    return pdf_engine.PoolSizer(initial, minimum, maximum, interval=2.0, clock=clock), clock
+
+
+@pytest.mark.parametrize("load", [(0.5, 0.0), (0.9, 0.3), None], ids=["cpu-libre", "espera-es", "sin-cpu"])
+def test_grows_while_more_workers_help_and_stops_at_the_maximum(monkeypatch, load):
+    sizer, clock = new_sizer(monkeypatch, 2, 1, 6, load)
+    for _ in range(20):
+        # El ritmo crece con cada worker agregado
+        run_period(sizer, clock, 5 * sizer.size)
+    assert sizer.size == 6
+    assert [size for _, size, *_ in sizer.history] == [3, 4, 5, 6]
+
+
+def test_undoes_a_worker_that_does_not_help_and_waits_before_retrying(monkeypatch):
+    sizer, clock = new_sizer(monkeypatch, 2, 1, 6, (0.5, 0.0))
+    run_period(sizer, clock, 10)
+    assert sizer.size == 3
+    # Con un worker más el ritmo no mejora: se vuelve atrás
+    run_period(sizer, clock, 10)
+    assert sizer.size == 2
+    for _ in range(pdf_engine.ADAPT_HOLD_PERIODS):
+        run_period(sizer, clock, 10)
+        assert sizer.size == 2
+    run_period(sizer, clock, 10)
+    assert sizer.size == 3
+
+
+def test_shrinks_on_a_saturated_cpu_and_stops_at_the_minimum(monkeypatch):
+    sizer, clock = new_sizer(monkeypatch, 5, 2, 8, (0.99, 0.0))
+    for _ in range(20):
+        # Quitar workers no empeora el ritmo: la CPU ya estaba al límite
+        run_period(sizer, clock, 20)
+    assert sizer.size == 2
+    assert [size for _, size, *_ in sizer.history] == [4, 3, 2]
+
+
+def test_keeps_a_removed_worker_only_if_the_rate_holds(monkeypatch):
+    sizer, clock = new_sizer(monkeypatch, 4, 1, 8, (0.99, 0.0))
+    run_period(sizer, clock, 20)
+    assert sizer.size == 3
+    run_period(sizer, clock, 10)
+    assert sizer.size == 4
+
+
+def test_no_change_before_the_interval(monkeypatch):
+    sizer, clock = new_sizer(monkeypatch, 2, 1, 6, (0.5, 0.0))
+    for _ in range(50):
+        sizer.completed()
+    clock.now += 1.9
+    sizer.completed()
+    assert sizer.size == 2
+    assert sizer.history == []
+
+
+@pytest.mark.parametrize("initial, expected", [(0, 2), (3, 3), (10, 4)])
+def test_initial_size_is_clamped(initial, expected):
+    assert pdf_engine.PoolSizer(initial, 2, 4).size == expected
@@ -0,0 +1,104 @@
+"""Progreso compartido entre los hilos que procesan y quien lo muestra."""
+import threading
+
+import pytest
+
+import pdf_engine
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def finished(path, matched=False, error=None):
+    result = pdf_engine.AnalysisResult(path, matched=matched, error=error)
+    result.elapsed = 0.01
+    result.timings = {"extract": 0.01}
+    return result
+
+
+def test_snapshot_counts_and_copies():
+    tracker = pdf_engine.ProgressTracker(total=4)
+    tracker.update(finished("a.pdf", matched=True))
+    tracker.update(finished("b.pdf", error="dañado"))
+    tracker.add_total(2)
+    snapshot = tracker.snapshot()
+    assert (snapshot.stats["total"], snapshot.stats["processed"]) == (6, 2)
+    assert (snapshot.stats["matches"], snapshot.stats["errors"]) == (1, 1)
+    assert snapshot.percent == pytest.approx(100 / 3)
+    # La instantánea es una copia: no cambia con lo que siga llegando
+    tracker.update(finished("c.pdf"))
+    assert snapshot.stats["processed"] == 2
+    assert tracker.timings.summary()["extract"]["count"] == 3
+
+
+def test_rate_and_eta_over_the_recent_window():
+    clock = FakeClock()
+    tracker = pdf_engine.ProgressTracker(total=20, window=5.0, clock=clock)
+
+    # Sin nada terminado no hay estimación
+    clock.now = 0.5
+    snapshot = tracker.snapshot()
+    assert (snapshot.rate, snapshot.eta) == (0, None)
+
+    # Menos de un segundo de ventana: promedio desde el inicio
+    for i in range(5):
+        tracker.update(finished(f"{i}.pdf"))
+    clock.now = 1.0
+    snapshot = tracker.snapshot()
+    assert snapshot.rate == pytest.approx(5.0)
+    assert snapshot.eta == pytest.approx(3.0)
+    assert snapshot.elapsed == pytest.approx(1.0)
+
+    for i in range(5, 15):
+        tracker.update(finished(f"{i}.pdf"))
+    clock.now = 3.0
+    snapshot = tracker.snapshot()
+    assert snapshot.rate == pytest.approx(15 / 2.5)
+
+    # Las muestras de más de `window` segundos se descartan: manda el ritmo reciente
+    tracker.update(finished("15.pdf"))
+    clock.now = 10.0
+    snapshot = tracker.snapshot()
+    assert snapshot.rate == pytest.approx(1 / 7.0)
+    assert snapshot.eta == pytest.approx(4 * 7.0)
+
+
+def test_producers_on_other_threads_while_draining():
+    # Como en pdf_cluster: el total crece en unos hilos y los resultados llegan en otro,
+    # mientras el consumidor toma instantáneas
+    tracker = pdf_engine.ProgressTracker()
+    per_thread = 2000
+    start = threading.Barrier(5)
+
+    def discover():
+        start.wait()
+        for _ in range(per_thread):
+            tracker.add_total()
+
+    def process():
+        start.wait()
+        for i in range(per_thread):
+            tracker.update(finished(f"{i}.pdf", matched=i % 2 == 0))
+
+    threads = [threading.Thread(target=discover) for _ in range(2)]
+    threads += [threading.Thread(target=process) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    while any(thread.is_alive() for thread in threads):
+        snapshot = tracker.snapshot()
+        assert snapshot.stats["processed"] <= 2 * per_thread
+        assert snapshot.stats["matches"] <= snapshot.stats["processed"]
+    for thread in threads:
+        thread.join()
+
+    snapshot = tracker.snapshot()
+    assert snapshot.stats["total"] == 2 * per_thread
+    assert snapshot.stats["processed"] == 2 * per_thread
+    assert snapshot.stats["matches"] == per_thread
+    assert tracker.timings.total.count == 2 * per_thread
@@ -0,0 +1,94 @@
+"""Lenguaje de consulta de los criterios (pdf_query)."""
+import pytest
+
+import pdf_engine
+import pdf_query
+
+
+@pytest.mark.parametrize("text, tree", [
+    ("factura", ("term", "factura", False)),
+    ('"pago"', ("term", "pago", True)),
+    ("pagada | cobrada", ("or", [("term", "pagada", False), ("term", "cobrada", False)])),
+    ("-borrador", ("not", ("term", "borrador", False))),
+    ("factura ~50 pagada", ("near", ("term", "factura", False), ("term", "pagada", False), 50)),
+    ("(a, b) | c", ("or", [("and", [("term", "a", False), ("term", "b", False)]), ("term", "c", False)])),
+])
+def test_parse_clause(text, tree):
+    assert pdf_query.parse_clause(text) == tree
+
+
+def test_precedence():
+    # ~N se une más fuerte que -, y - más fuerte que |
+    assert pdf_query.parse_clause("-a | b ~5 c") == (
+        "or", [("not", ("term", "a", False)), ("near", ("term", "b", False), ("term", "c", False), 5)])
+
+
+def test_split_clauses_ignores_commas_inside_parentheses():
+    assert pdf_query.split_clauses("factura, (a, b) | c, -borrador") == ["factura", "(a, b) | c", "-borrador"]
+    assert pdf_query.split_clauses("factura, , pagada") == ["factura", "pagada"]
+
+
+@pytest.mark.parametrize("text", ["(factura", "factura)", "a | ", "~5 pagada", '"sin cerrar'])
+def test_invalid_syntax(text):
+    with pytest.raises(ValueError):
+        pdf_query.parse_clause(text)
+
+
+@pytest.mark.parametrize("criterion, pages, matched", [
+    ("factura, pagada", ["factura", "pagada"], True),
+    ("factura, -borrador", ["factura", "borrador"], False),
+    ("pagada | cobrada", ["cobrada"], True),
+    ('"pago"', ["pagos"], False),
+    ('"pago"', ["el pago."], True),
+    ("factura ~10 pagada", ["factura numero 1 pagada"], True),
+    ("factura ~10 pagada", ["factura con un texto largo en el medio pagada"], False),
+    # Los términos se buscan normalizados: sin acentos, en minúsculas, también partidos entre páginas
+    ("Crédito", ["CREDI", "TO"], True),
+    ('"credito" | -factura', ["el CRÉDITO"], True),
+    ("primeras 1: factura, -borrador", ["factura", "borrador"], True),
+])
+def test_evaluation(criterion, pages, matched):
+    matcher = pdf_engine.ConditionMatcher([pdf_engine.parse_criterion(criterion)])
+    scan = matcher.new_scan()
+    for index in scan.plan(len(pages)):
+        scan.feed(pages[index], index)
+    assert scan.result()[0] is matched
+
+
+def test_first_criterion_in_order_is_reported():
+    conditions = [pdf_engine.parse_criterion(text) for text in ("nota, -factura", "factura", "nota")]
+    matcher = pdf_engine.ConditionMatcher(conditions)
+    assert pdf_engine.check_pdf_conditions("nota y factura", matcher) == (True, conditions[1])
+    assert pdf_engine.check_pdf_conditions("solo nota", matcher) == (True, conditions[0])
+    assert pdf_engine.check_pdf_conditions("otra cosa", matcher) == (False, None)
+
+
+@pytest.mark.parametrize("text, clauses, pages, matched", [
+    # Criterios de antes de los operadores que no son una consulta válida: términos tal cual
+    ("(nota, anexo", ["\\(nota", "anexo"], ["ver (nota 3) y anexo"], True),
+    ("5 ~ 10, total", ["5 \\~ 10", "total"], ["rango 5 ~ 10 total"], True),
+    ('pulgadas 15", pantalla', ['pulgadas 15\\"', "pantalla"], ['pulgadas 15" pantalla'], True),
+    # Con "\" se buscan como texto los que sí son una consulta válida
+    ("\\-5%, descuento", ["\\-5%", "descuento"], ["descuento -5%"], True),
+    ("\\-5%, descuento", ["\\-5%", "descuento"], ["descuento 5%"], False),
+    ("entrada\\|salida", ["entrada\\|salida"], ["entrada|salida"], True),
+    ("entrada\\|salida", ["entrada\\|salida"], ["entrada"], False),
+])
+def test_literal_criteria(text, clauses, pages, matched):
+    criterion = pdf_engine.parse_criterion(text)
+    assert list(criterion) == clauses
+    assert pdf_engine.parse_criterion(pdf_engine.format_criterion(criterion)) == criterion
+    matcher = pdf_engine.ConditionMatcher([criterion])
+    assert matcher.is_plain(0)
+    assert pdf_engine.check_pdf_conditions(pages[0], matcher)[0] is matched
+
+
+def test_legacy_criteria_file(tmp_path):
+    path = tmp_path / "criterios.txt"
+    path.write_text("# criterios viejos\n(nota, anexo\nfactura, pagada\n", encoding="utf-8")
+    assert pdf_engine.load_conditions(str(path)) == [["\\(nota", "anexo"], ["factura", "pagada"]]
+
+
+@pytest.mark.parametrize("term", ["(nota", "-5%", "a|b", 'x"y', "c:\\", "~", "a, b", "\\-"])
+def test_escape(term):
+    assert pdf_query.parse_clause(pdf_query.escape(term)) == ("term", term, False)
@@ -0,0 +1,157 @@
+"""Reubicación de los encontrados y colisiones de nombres en la carpeta de destino."""
+import os
+
+import pytest
+
+import pdf_engine
+import pdf_relocate
+import pdf_report
+
+
+def _pdf(folder, name, content):
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("mode", ["move", "copy", "hardlink", "reflink"])
+def test_collision_gets_a_suffix_from_the_source_path(tmp_path, mode):
+    dest = str(tmp_path / "destino")
+    first = _pdf(str(tmp_path / "a"), "informe.pdf", "a")
+    second = _pdf(str(tmp_path / "b"), "informe.pdf", "b")
+    relocator = pdf_relocate.Relocator(mode)
+
+    assert relocator.relocate(first, dest) == os.path.join(dest, "informe.pdf")
+    suffixed = relocator.relocate(second, dest)
+    assert suffixed == os.path.join(dest, pdf_relocate._suffixed_name(second, "informe.pdf"))
+    assert _read(os.path.join(dest, "informe.pdf")) == "a"
+    assert _read(suffixed) == "b"
+    assert os.path.exists(second) == (mode != "move")
+
+
+def test_suffix_is_stable_and_counts_up_when_taken(tmp_path):
+    dest = str(tmp_path / "destino")
+    source = _pdf(str(tmp_path / "a"), "informe.pdf", "nuevo")
+    suffixed = pdf_relocate._suffixed_name(source, "informe.pdf")
+    assert suffixed == pdf_relocate._suffixed_name(source, "informe.pdf")
+    assert suffixed.startswith("informe-") and suffixed.endswith(".pdf")
+    _pdf(dest, "informe.pdf", "viejo")
+    _pdf(dest, suffixed, "viejo")
+
+    relocated = pdf_relocate.Relocator("copy").relocate(source, dest)
+    stem, ext = os.path.splitext(suffixed)
+    assert relocated == os.path.join(dest, f"{stem}-2{ext}")
+    assert _read(os.path.join(dest, "informe.pdf")) == "viejo"
+
+
+def test_skip_and_overwrite(tmp_path):
+    dest = str(tmp_path / "destino")
+    existing = _pdf(dest, "informe.pdf", "viejo")
+    source = _pdf(str(tmp_path / "a"), "informe.pdf", "nuevo")
+
+    with pytest.raises(pdf_relocate.DestinationExists):
+        pdf_relocate.Relocator("move", "skip").relocate(source, dest)
+    assert _read(existing) == "viejo" and os.path.exists(source)
+
+    assert pdf_relocate.Relocator("move", "overwrite").relocate(source, dest) == existing
+    assert _read(existing) == "nuevo" and not os.path.exists(source)
+
+
+def test_same_name_in_one_run_is_not_reused(tmp_path):
+    # Dos archivos con el mismo nombre reubicados en la misma ejecución reciben destinos distintos
+    dest = str(tmp_path / "destino")
+    relocator = pdf_relocate.Relocator("copy")
+    sources = [_pdf(str(tmp_path / folder), "informe.pdf", folder) for folder in ("a", "b", "c")]
+    destinations = [relocator.destination(source, dest) for source in sources]
+    assert len(set(destinations)) == 3
+
+
+class _RacingRelocator(pdf_relocate.Relocator):
+    """Otro proceso crea el destino elegido justo antes de la copia (solo la primera vez)."""
+
+    def destination(self, pdf_path, folder):
+        dest_path = super().destination(pdf_path, folder)
+        if not getattr(self, "raced", False):
+            self.raced = True
+            _pdf(folder, os.path.basename(dest_path), "de otro proceso")
+        return dest_path
+
+
+@pytest.mark.parametrize("mode", ["move", "copy", "hardlink", "reflink"])
+def test_destination_created_by_another_process_is_not_overwritten(tmp_path, mode):
+    dest = str(tmp_path / "destino")
+    source = _pdf(str(tmp_path / "a"), "informe.pdf", "nuevo")
+
+    relocated = _RacingRelocator(mode).relocate(source, dest)
+    assert relocated == os.path.join(dest, pdf_relocate._suffixed_name(source, "informe.pdf"))
+    assert _read(os.path.join(dest, "informe.pdf")) == "de otro proceso"
+    assert _read(relocated) == "nuevo"
+
+    other = _pdf(str(tmp_path / "b"), "otro.pdf", "nuevo")
+    with pytest.raises(pdf_relocate.DestinationExists):
+        _RacingRelocator(mode, "skip").relocate(other, dest)
+    assert _read(os.path.join(dest, "otro.pdf")) == "de otro proceso"
+    assert os.path.exists(other)
+
+
+def test_report_mode_does_not_touch_the_file(tmp_path):
+    source = _pdf(str(tmp_path / "a"), "informe.pdf", "x")
+    assert pdf_relocate.Relocator("report").relocate(source, str(tmp_path / "destino")) is None
+    assert os.path.exists(source)
+    assert not os.path.exists(tmp_path / "destino")
+
+
+@pytest.mark.parametrize("mode", ["move", "copy", "hardlink", "reflink"])
+def test_file_already_in_the_destination_is_left_alone(tmp_path, mode):
+    dest = str(tmp_path / "destino")
+    source = _pdf(dest, "informe.pdf", "a")
+
+    assert pdf_relocate.Relocator(mode).relocate(source, dest) == source
+    assert os.listdir(dest) == ["informe.pdf"]
+    assert _read(source) == "a"
+
+
+def test_skipped_match_is_reported_in_place(tmp_path):
+    dest = str(tmp_path / "destino")
+    _pdf(dest, "informe.pdf", "viejo")
+    source = _pdf(str(tmp_path / "a"), "informe.pdf", "nuevo")
+    result = pdf_engine.AnalysisResult(source, True, ["factura"])
+
+    pdf_engine._relocate_result(pdf_relocate.Relocator("move", "skip"), result, dest)
+    assert result.status == "match" and result.dest_path is None
+    line = pdf_report._match_line(result.filename, result.condition, result.dest_path, result.path)
+    assert line.rstrip("\n").endswith(f"| {source} (no reubicado)")
+    assert "None" not in line
+
+
+@pytest.mark.skipif(pdf_relocate._rename_noreplace is None and os.name != "nt",
+                    reason="sin renombrado exclusivo en este sistema")
+def test_move_without_hardlinks_renames_instead_of_copying(tmp_path, monkeypatch):
+    def no_links(src, dest):
+        raise PermissionError(1, "Operation not permitted")
+
+    def no_copies(src, dest):
+        raise AssertionError("no debería copiar dentro del mismo volumen")
+
+    monkeypatch.setattr(os, "link", no_links)
+    monkeypatch.setattr(pdf_relocate, "_copy_exclusive", no_copies)
+    dest = str(tmp_path / "destino")
+    source = _pdf(str(tmp_path / "a"), "informe.pdf", "nuevo")
+    inode = os.stat(source).st_ino
+
+    relocated = pdf_relocate.Relocator("move").relocate(source, dest)
+    assert os.stat(relocated).st_ino == inode and not os.path.exists(source)
+
+    # El renombrado tampoco pisa un destino que apareció mientras tanto
+    other = _pdf(str(tmp_path / "b"), "otro.pdf", "nuevo")
+    existing = _pdf(dest, "otro.pdf", "de otro proceso")
+    with pytest.raises(FileExistsError):
+        pdf_relocate._transfer(other, existing, "move", False)
+    assert _read(existing) == "de otro proceso" and os.path.exists(other)
@@ -0,0 +1,136 @@
+"""Informes de la ejecución (pdf_report.ReportWriter) y su rotación en el modo vigilancia."""
+import csv
+import json
+import time
+
+import pytest
+
+import pdf_engine
+import pdf_report
+import pdf_watch
+
+
+def _result(path, condition=None, dest_path=None, error=None, **fields):
+    result = pdf_engine.AnalysisResult(path, matched=condition is not None, condition=condition,
+                                       dest_path=dest_path, error=error)
+    for name, value in fields.items():
+        setattr(result, name, value)
+    return result
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def _stats(results):
+    stats = pdf_engine.new_stats(len(results))
+    for result in results:
+        stats["processed"] += 1
+        stats["matches"] += result.status == "match"
+        stats["errors"] += result.status == "error"
+    return stats
+
+
+def test_txt_jsonl_and_csv(tmp_path):
+    conditions = [pdf_engine.parse_criterion("factura, pagada"), pdf_engine.parse_criterion("primeras 1: nota")]
+    results = [
+        _result("/in/a.pdf", conditions[0], dest_path="/out/a.pdf", pages=2),
+        _result("/in/b.pdf", pages=3),
+        _result("/in/c.pdf", error="PDF dañado"),
+        _result("/in/d.pdf", conditions[1], dest_path="/out/d.pdf"),
+    ]
+    log_path = str(tmp_path / "reporte.txt")
+    writer = pdf_report.ReportWriter(log_path, conditions, total=4, formats=("txt", "jsonl", "csv"))
+    for result in results:
+        writer.add(result)
+    writer.close(_stats(results))
+
+    assert set(writer.paths) == {"txt", "jsonl", "csv"}
+    txt = _read(writer.paths["txt"])
+    assert "# Total de archivos analizados: 4" in txt
+    assert "#   Criterio 2: primeras 1: nota" in txt
+    assert "a.pdf | factura, pagada | /out/a.pdf\n" in txt
+    assert "d.pdf | primeras 1: nota | /out/d.pdf\n" in txt
+    # Solo las coincidencias tienen línea en el informe de texto
+    assert "b.pdf" not in txt and "c.pdf" not in txt
+    assert "# Total de archivos encontrados: 2" in txt and "# Total de errores: 1" in txt
+
+    records = [json.loads(line) for line in _read(writer.paths["jsonl"]).splitlines()]
+    assert [record["status"] for record in records] == ["match", "no_match", "error", "match"]
+    assert records[0]["condition"] == ["factura", "pagada"] and records[0]["pages"] == 2
+    assert records[3]["scope"] == "primeras 1" and records[2]["error"] == "PDF dañado"
+
+    with open(writer.paths["csv"], encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["path"] for row in rows] == [result.path for result in results]
+    assert rows[0]["condition"] == "factura, pagada" and rows[1]["condition"] == ""
+
+
+def test_relocated_and_not_relocated_matches(tmp_path):
+    conditions = [["factura"]]
+    writer = pdf_report.ReportWriter(str(tmp_path / "reporte.txt"), conditions)
+    results = [
+        _result("/in/movido.pdf", ["factura"], dest_path="/out/movido.pdf"),
+        # Con --reubicar report o --colisiones skip el archivo se queda donde está
+        _result("/in/quieto.pdf", ["factura"]),
+        # Cumple los criterios pero no se pudo mover: es un error, listado en el resumen
+        _result("/in/fallido.pdf", ["factura"], error="No se pudo reubicar: disco lleno"),
+    ]
+    for result in results:
+        writer.add(result)
+    writer.close(_stats(results))
+
+    txt = _read(writer.paths["txt"])
+    assert "movido.pdf | factura | /out/movido.pdf\n" in txt
+    assert "quieto.pdf | factura | /in/quieto.pdf (no reubicado)\n" in txt
+    assert "fallido.pdf | factura" not in txt
+    assert "# Coincidencias que no se pudieron reubicar (contadas como errores): 1" in txt
+    assert "#   /in/fallido.pdf: No se pudo reubicar: disco lleno" in txt
+
+
+def test_results_reach_the_disk_every_flush_interval(tmp_path):
+    fast = pdf_report.ReportWriter(str(tmp_path / "rapido.txt"), [["factura"]], flush_interval=0.1)
+    slow = pdf_report.ReportWriter(str(tmp_path / "lento.txt"), [["factura"]], flush_interval=3600)
+    try:
+        for writer in (fast, slow):
+            writer.add(_result("/in/a.pdf", ["factura"], dest_path="/out/a.pdf"))
+        deadline = time.monotonic() + 10
+        while "a.pdf" not in _read(fast.paths["txt"]) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert "a.pdf |" in _read(fast.paths["txt"])
+        # Sin llegar al intervalo, lo escrito sigue en el búfer hasta close()
+        assert "a.pdf |" not in _read(slow.paths["txt"])
+    finally:
+        fast.close()
+        slow.close()
+    assert "a.pdf |" in _read(slow.paths["txt"])
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError, match="xml"):
+        pdf_report.ReportWriter(str(tmp_path / "reporte.txt"), [["factura"]], formats=("xml",))
+
+
+def test_watch_report_rotates_per_window(tmp_path, monkeypatch):
+    names = iter(str(tmp_path / f"reporte_{i}.txt") for i in range(10))
+    monkeypatch.setattr(pdf_report, "new_log_filename", lambda folder: next(names))
+    closed = []
+    report = pdf_watch.RotatingReport(str(tmp_path), [["factura"]], window=3600,
+                                      on_close=lambda tracker, writer: closed.append(
+                                          (writer.paths["txt"], tracker.stats["processed"])))
+    report.rotate()
+    assert report.writer is None  # sin resultados no hay informe
+
+    report.add(_result("/in/a.pdf", ["factura"], dest_path="/out/a.pdf"))
+    report.add(_result("/in/b.pdf"))
+    report.rotate(report.window_end - 1)
+    assert not closed
+    report.rotate(report.window_end)
+    assert closed == [(str(tmp_path / "reporte_0.txt"), 2)]
+
+    report.add(_result("/in/c.pdf", ["factura"], dest_path="/out/c.pdf"))
+    report.close()
+    assert closed[1] == (str(tmp_path / "reporte_1.txt"), 1)
+    assert "a.pdf |" in _read(closed[0][0]) and "c.pdf |" not in _read(closed[0][0])
+    assert "c.pdf |" in _read(closed[1][0])
@@ -0,0 +1,34 @@
+"""Recorrido de carpetas: filtros y carpetas a saltear."""
+import os
+
+import pdf_scanner
+
+
+def _touch(path, size=0):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    return path
+
+
+def _scan(root, **kwargs):
+    return sorted(os.path.relpath(path, root) for path in pdf_scanner.scan_pdfs([str(root)], **kwargs))
+
+
+def test_include_exclude_and_size(tmp_path):
+    _touch(str(tmp_path / "a.pdf"), 10)
+    _touch(str(tmp_path / "B.PDF"), 10)
+    _touch(str(tmp_path / "notas.txt"), 10)
+    _touch(str(tmp_path / "borrador_c.pdf"), 10)
+    _touch(str(tmp_path / "tmp" / "d.pdf"), 10)
+    _touch(str(tmp_path / "sub" / "grande.pdf"), 1000)
+    assert _scan(tmp_path, exclude=["borrador_*", "tmp"], max_size=100) == ["B.PDF", "a.pdf"]
+
+
+def test_output_folders_inside_the_input_are_not_scanned(tmp_path):
+    _touch(str(tmp_path / "a.pdf"))
+    _touch(str(tmp_path / "salida" / "movido.pdf"))
+    _touch(str(tmp_path / "salida" / "Sin texto" / "escaneo.pdf"))
+    _touch(str(tmp_path / "otra" / "b.pdf"))
+    assert _scan(tmp_path, ignore=[str(tmp_path / "salida"), None]) == ["a.pdf", os.path.join("otra", "b.pdf")]
+    assert len(_scan(tmp_path)) == 4
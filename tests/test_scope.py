@@ -0,0 +1,60 @@
+"""Criterios con alcance de páginas."""
+import pytest
+
+import pdf_engine
+
+
+@pytest.mark.parametrize("text, scope", [
+    ("primeras 2: factura", pdf_engine.PageScope("first", 2)),
+    ("Última 1: factura", pdf_engine.PageScope("last", 1)),
+    ("páginas 3-5: factura", pdf_engine.PageScope("range", 3, 5)),
+    ("pagina 4: factura", pdf_engine.PageScope("range", 4, 4)),
+    ("páginas 3-: factura", pdf_engine.PageScope("range", 3, None)),
+    ("factura", None),
+])
+def test_parse_criterion_scope(text, scope):
+    criterion = pdf_engine.parse_criterion(text)
+    assert criterion == pdf_engine.Criterion(["factura"], scope)
+    # El texto de un criterio se vuelve a leer igual
+    assert pdf_engine.parse_criterion(pdf_engine.format_criterion(criterion)) == criterion
+    if scope is not None:
+        assert pdf_engine.parse_scope(str(scope)) == scope
+
+
+@pytest.mark.parametrize("text", ["páginas 5-3: factura", "primeras 0: factura"])
+def test_invalid_scope(text):
+    with pytest.raises(ValueError):
+        pdf_engine.parse_criterion(text)
+
+
+def test_invalid_scope_text():
+    with pytest.raises(ValueError):
+        pdf_engine.parse_scope("primeras 2: factura")
+
+
+def test_scope_pages():
+    assert list(pdf_engine.PageScope("first", 2).pages(5)) == [0, 1]
+    assert list(pdf_engine.PageScope("last", 2).pages(5)) == [3, 4]
+    assert list(pdf_engine.PageScope("range", 2, 9).pages(5)) == [1, 2, 3, 4]
+    assert list(pdf_engine.PageScope("first", 3).pages(1)) == [0]
+
+
+@pytest.mark.parametrize("criterion, pages, matched", [
+    ("factura, pagada", ["factura", "pagada"], True),
+    ("primeras 1: pagada", ["factura", "pagada"], False),
+    ("últimas 1: pagada", ["factura", "pagada"], True),
+    ("páginas 2-3: factura, pagada", ["nada", "factura", "pagada", "nada"], True),
+    ("páginas 5-: factura", ["factura"], False),
+])
+def test_evaluation(criterion, pages, matched):
+    matcher = pdf_engine.ConditionMatcher([pdf_engine.parse_criterion(criterion)])
+    scan = matcher.new_scan()
+    for index in scan.plan(len(pages)):
+        scan.feed(pages[index], index)
+    assert scan.result()[0] is matched
+
+
+def test_plan_reads_only_pages_in_scope():
+    matcher = pdf_engine.ConditionMatcher([pdf_engine.parse_criterion("primeras 2: factura"),
+                                           pdf_engine.parse_criterion("última 1: nota")])
+    assert list(matcher.new_scan().plan(10)) == [0, 1, 9]
@@ -0,0 +1,141 @@
+"""Servicio de clasificación (pdf_service): pedidos HTTP, saturación y caídas del pool."""
+import os
+import json
+import signal
+import threading
+import http.client
+
+import pytest
+
+import pdf_engine
+import pdf_service
+from synthetic_pdfs import write_pdf
+
+
+@pytest.fixture
+def pdfs(tmp_path):
+    paths = {}
+    for name, text in (("factura", "factura pagada"), ("otro", "nada que ver")):
+        paths[name] = str(tmp_path / f"{name}.pdf")
+        write_pdf(paths[name], [text])
+    return paths
+
+
+def _start(service, max_upload=1024 * 1024):
+    server = pdf_service._Server(("127.0.0.1", 0), pdf_service._Handler)
+    server.service = service
+    server.key = None
+    server.max_upload = max_upload
+    server.upload_folder = None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+@pytest.fixture
+def service():
+    options = pdf_engine.AnalysisOptions(output_folder=None, workers=1, mode="thread")
+    service = pdf_service.ClassificationService({"facturas": [["factura", "pagada"]], "notas": [["nota"]]},
+                                                options, queue_size=0)
+    server, url = _start(service, max_upload=64 * 1024)
+    yield service, url
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+
+def _post(url, length, body=b"", content_type="application/json"):
+    host, port = url.rsplit("/", 1)[1].split(":")
+    connection = http.client.HTTPConnection(host, int(port), timeout=10)
+    connection.putrequest("POST", "/clasificar?conjunto=facturas")
+    connection.putheader("Content-Type", content_type)
+    connection.putheader("Content-Length", length)
+    connection.endheaders()
+    if body:
+        connection.send(body)
+    response = connection.getresponse()
+    data = json.loads(response.read())
+    connection.close()
+    return response.status, data
+
+
+def test_classify_by_path_and_upload(service, pdfs):
+    _, url = service
+    status, body = pdf_service.classify(url, pdfs["factura"], criteria_set="facturas")
+    assert status == 200 and body["resultado"]["status"] == "match"
+    with open(pdfs["otro"], "rb") as f:
+        status, body = pdf_service.classify(url, data=f.read(), criteria_set="facturas", name="otro.pdf")
+    assert status == 200 and body["resultado"]["status"] == "no_match"
+    assert body["resultado"]["path"] == "otro.pdf"
+
+
+def test_unknown_or_missing_criteria_set(service, pdfs):
+    _, url = service
+    status, body = pdf_service.classify(url, pdfs["factura"], criteria_set="contratos")
+    assert status == 404 and "contratos" in body["error"]
+    # Con más de un conjunto no se puede omitir
+    assert pdf_service.classify(url, pdfs["factura"])[0] == 400
+
+
+def test_busy_service_answers_503_with_retry_after(service, pdfs):
+    svc, url = service
+    # El único lugar (1 worker, cola 0) está ocupado
+    svc._slots.acquire()
+    try:
+        host, port = url.rsplit("/", 1)[1].split(":")
+        connection = http.client.HTTPConnection(host, int(port), timeout=10)
+        connection.request("POST", "/clasificar", json.dumps({"ruta": pdfs["factura"], "conjunto": "facturas"}),
+                           {"Content-Type": "application/json"})
+        response = connection.getresponse()
+        assert response.status == 503
+        assert response.getheader("Retry-After") == str(pdf_service._RETRY_AFTER)
+        connection.close()
+    finally:
+        svc._slots.release()
+    assert svc.status()["rechazados"] == 1
+
+
+def test_oversized_bodies_get_413(service):
+    _, url = service
+    assert _post(url, str(pdf_service._MAX_JSON + 1))[0] == 413
+    assert _post(url, str(64 * 1024 + 1), content_type="application/pdf")[0] == 413
+
+
+@pytest.mark.parametrize("length", ["-1", "abc"])
+def test_invalid_content_length_gets_400(service, length):
+    _, url = service
+    assert _post(url, length)[0] == 400
+
+
+def test_json_without_path_gets_400(service):
+    _, url = service
+    assert _post(url, "2", b"{}")[0] == 400
+
+
+def test_status(service, pdfs):
+    svc, url = service
+    for _ in range(3):
+        pdf_service.classify(url, pdfs["factura"], criteria_set="facturas")
+    status = svc.status()
+    assert status["atendidos"] == 3 and status["rechazados"] == 0 and status["reinicios"] == 0
+    assert status["en_curso"] == 0 and status["en_cola"] == 0 and status["workers"] == 1
+    latency = status["latencia_ms"]["total"]
+    assert latency["count"] == 3 and 0 < latency["p50"] <= latency["p99"]
+
+
+def test_pool_is_recreated_after_a_worker_crash(pdfs):
+    options = pdf_engine.AnalysisOptions(output_folder=None, workers=1, mode="process")
+    service = pdf_service.ClassificationService({"facturas": [["factura", "pagada"]]}, options)
+    server, url = _start(service)
+    try:
+        pid = service._executor.submit(pdf_service._warm_up).result(timeout=60)
+        os.kill(pid, signal.SIGKILL)
+        status, body = pdf_service.classify(url, pdfs["factura"], timeout=60)
+        assert status == 500 and "error" in body
+        # Los pedidos siguientes van a un pool nuevo
+        status, body = pdf_service.classify(url, pdfs["factura"], timeout=60)
+        assert status == 200 and body["resultado"]["status"] == "match"
+        assert service.status()["reinicios"] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.close()
@@ -0,0 +1,93 @@
+"""Percentiles del histograma de duraciones y resumen de los tiempos por etapa."""
+import pytest
+
+import pdf_engine
+
+
+def histogram(samples):
+    result = pdf_engine.LatencyHistogram()
+    for seconds in samples:
+        result.add(seconds)
+    return result
+
+
+def within_bucket(reported, exact):
+    # Se informa el límite superior de la cubeta: nunca menos que el valor, a lo sumo un 5% más
+    return exact <= reported <= exact * pdf_engine.LatencyHistogram._GROWTH
+
+
+def test_percentiles_of_known_samples():
+    # 1 ms, 2 ms, ..., 100 ms en desorden
+    samples = [i / 1000 for i in range(1, 101)]
+    h = histogram(samples[::2] + samples[1::2])
+    assert within_bucket(h.percentile(0.50), 0.050)
+    assert within_bucket(h.percentile(0.95), 0.095)
+    assert within_bucket(h.percentile(0.99), 0.099)
+    # El máximo es exacto y ningún percentil lo supera
+    assert h.max == 0.100
+    assert h.percentile(1.0) == 0.100
+
+
+def test_percentiles_follow_the_tail():
+    # 90 archivos rápidos y 10 lentos: la mediana es rápida, p95 y p99 caen en los lentos
+    h = histogram([0.01] * 90 + [2.0] * 10)
+    assert within_bucket(h.percentile(0.50), 0.01)
+    assert h.percentile(0.95) == h.percentile(0.99) == 2.0
+
+
+def test_single_sample_and_tiny_durations():
+    h = histogram([0.25])
+    assert h.percentile(0.50) == h.percentile(0.99) == 0.25
+    # Por debajo de la resolución (y cero) van a la primera cubeta, acotada por el máximo
+    h = histogram([0.0, 0.0, 1e-9])
+    assert h.percentile(0.50) == 1e-9
+
+
+def test_empty_histogram():
+    h = pdf_engine.LatencyHistogram()
+    assert h.percentile(0.5) == 0.0
+    assert h.summary() == {"count": 0, "total": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+
+
+def test_histogram_summary():
+    samples = [i / 1000 for i in range(1, 101)]
+    summary = histogram(samples).summary()
+    assert summary["count"] == 100
+    assert summary["total"] == pytest.approx(sum(samples))
+    assert summary["max"] == 0.100
+    assert summary["p50"] == histogram(samples).percentile(0.50)
+    assert summary["p50"] <= summary["p95"] <= summary["p99"] <= summary["max"]
+
+
+def result(path, elapsed, **timings):
+    r = pdf_engine.AnalysisResult(path)
+    r.elapsed = elapsed
+    r.timings = timings
+    return r
+
+
+def test_timing_stats_summary_and_slowest():
+    stats = pdf_engine.TimingStats(slowest=2)
+    stats.add(result("a.pdf", 0.3, match=0.1, extract=0.2))
+    stats.add(result("b.pdf", 0.9, extract=0.8, open=0.1))
+    stats.add(result("c.pdf", 0.5, extract=0.5))
+
+    summary = stats.summary()
+    # Etapas en el orden de STAGES y el total por archivo al final; sin latencia si no se informó
+    assert list(summary) == ["open", "extract", "match", "total"]
+    assert summary["extract"]["count"] == 3
+    assert summary["extract"]["total"] == pytest.approx(1.5)
+    assert summary["extract"]["max"] == 0.8
+    assert summary["total"]["count"] == 3
+    assert summary["total"]["max"] == 0.9
+
+    assert [(path, seconds) for path, seconds, _ in stats.slowest()] == [("b.pdf", 0.9), ("c.pdf", 0.5)]
+    assert stats.slowest()[0][2] == {"extract": 0.8, "open": 0.1}
+
+
+def test_timing_stats_latency():
+    stats = pdf_engine.TimingStats()
+    stats.add(result("a.pdf", 0.1), latency=3.0)
+    stats.add(result("b.pdf", 0.1))
+    assert stats.summary()["latency"]["count"] == 1
+    assert stats.summary()["latency"]["max"] == 3.0
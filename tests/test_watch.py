@@ -0,0 +1,54 @@
+"""Modo vigilancia (pdf_watch) de punta a punta, en un proceso aparte."""
+import os
+import sys
+import time
+import shutil
+import signal
+import subprocess
+
+from synthetic_pdfs import write_pdf
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _wait_for(condition, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def _drop(folder, name, pages, staging):
+    # Se escribe afuera y se mueve, así el archivo aparece completo
+    temp_path = os.path.join(staging, name)
+    write_pdf(temp_path, pages)
+    shutil.move(temp_path, os.path.join(folder, name))
+
+
+def test_file_reusing_the_name_of_an_earlier_match_is_classified(tmp_path):
+    inbox, output, staging = (str(tmp_path / name) for name in ("bandeja", "salida", "temporal"))
+    for folder in (inbox, output, staging):
+        os.makedirs(folder)
+    criteria = tmp_path / "criterios.txt"
+    criteria.write_text("contrato, firmado\n", encoding="utf-8")
+
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "pdf_watch.py"), inbox, "-c", str(criteria), "-o", output,
+         "--sondeo", "--intervalo-sondeo", "0.1", "--estabilidad", "0.2", "--modo", "thread", "--workers", "1"],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        def found():
+            return sorted(name for name in os.listdir(output) if name.endswith(".pdf"))
+
+        _drop(inbox, "informe.pdf", ["contrato firmado uno"], staging)
+        assert _wait_for(lambda: len(found()) == 1)
+        # Llega otro PDF con el mismo nombre: es un archivo nuevo y se clasifica
+        _drop(inbox, "informe.pdf", ["contrato firmado dos"], staging)
+        assert _wait_for(lambda: len(found()) == 2)
+        assert not os.listdir(inbox)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=30)
@@ -0,0 +1,107 @@
+"""Pool de procesos con límites de tiempo (pdf_watchdog)."""
+import os
+import time
+import multiprocessing
+
+import pytest
+
+import pdf_watchdog
+
+
+def _pid():
+    return os.getpid()
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def _beating(seconds, interval):
+    # Avanza de "página" cada `interval` segundos
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        pdf_watchdog.beat()
+        time.sleep(interval)
+    return "ok"
+
+
+def _crash():
+    os._exit(3)
+
+
+def _executor(**kwargs):
+    kwargs.setdefault("max_workers", 1)
+    return pdf_watchdog.WatchdogExecutor(mp_context=multiprocessing.get_context("spawn"), **kwargs)
+
+
+def test_file_timeout_kills_and_replaces_the_worker():
+    executor = _executor(file_timeout=0.5)
+    try:
+        with pytest.raises(pdf_watchdog.WorkerTimeout) as error:
+            executor.submit(_sleep, 30).result(timeout=20)
+        assert error.value.limit == "file"
+        # El reemplazo atiende la tarea siguiente
+        assert executor.submit(_sleep, 0).result(timeout=20) == 0
+        assert executor.replaced == 1
+    finally:
+        executor.shutdown()
+
+
+def test_page_timeout_only_when_the_task_stops_beating():
+    executor = _executor(page_timeout=0.5)
+    try:
+        assert executor.submit(_beating, 1.5, 0.05).result(timeout=20) == "ok"
+        with pytest.raises(pdf_watchdog.WorkerTimeout) as error:
+            executor.submit(_sleep, 30).result(timeout=20)
+        assert error.value.limit == "page"
+    finally:
+        executor.shutdown()
+
+
+def test_crashed_worker_is_replaced():
+    executor = _executor(max_workers=2)
+    try:
+        with pytest.raises(pdf_watchdog.WorkerDied):
+            executor.submit(_crash).result(timeout=20)
+        assert [executor.submit(_sleep, 0).result(timeout=20) for _ in range(3)] == [0, 0, 0]
+        assert executor.replaced == 1
+    finally:
+        executor.shutdown()
+
+
+@pytest.mark.parametrize("max_tasks", [1, 3])
+def test_workers_are_recycled_after_max_tasks(max_tasks):
+    executor = _executor(max_tasks_per_child=max_tasks, file_timeout=60)
+    try:
+        pids = [executor.submit(_pid).result(timeout=20) for _ in range(7)]
+        # Cada proceso atiende exactamente max_tasks tareas (salvo el último) y ninguna falla
+    finally:
+        executor.shutdown()
+    assert [pids.count(pid) for pid in dict.fromkeys(pids)] == \
+        [max_tasks] * (7 // max_tasks) + ([7 % max_tasks] if 7 % max_tasks else [])
+    assert executor.recycled == 7 // max_tasks
+    assert executor.replaced == 0
+
+
+def test_task_goes_to_a_new_worker_when_the_idle_one_is_gone(monkeypatch):
+    start = pdf_watchdog._Worker.start
+    failures = []
+
+    def failing_start(worker, future, function, args):
+        if not failures:
+            # El proceso murió estando libre, justo antes de recibir la tarea
+            failures.append(worker)
+            worker.process.kill()
+            worker.process.join()
+            return False
+        return start(worker, future, function, args)
+
+    monkeypatch.setattr(pdf_watchdog._Worker, "start", failing_start)
+    executor = _executor()
+    try:
+        assert executor.submit(_sleep, 0).result(timeout=20) == 0
+        assert executor.submit(_sleep, 0).result(timeout=20) == 0
+        assert len(failures) == 1 and executor.replaced == 1
+    finally:
+        executor.shutdown()